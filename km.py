@@ -5,15 +5,16 @@ Eliminates global state reuse and provides consistent, debuggable rate curves.
 
 import pandas as pd
 import numpy as np
-import hashlib
 from typing import List, Optional, Dict, Any, Literal
 import plotly.graph_objects as go
 import streamlit as st
 
+from navira.hashing import HASH_FUNCS, frame_hash
+
 
 def dataframe_md5(df: pd.DataFrame) -> str:
-    """Generate MD5 hash of DataFrame content for cache key generation."""
-    return hashlib.md5(df.to_csv(index=False).encode()).hexdigest()
+    """Content hash of a DataFrame for cache key generation (vectorized row hashing)."""
+    return frame_hash(df)
 
 
 def debug_signature(df: pd.DataFrame, *args, **kwargs) -> Dict[str, Any]:
@@ -48,7 +49,7 @@ def debug_signature(df: pd.DataFrame, *args, **kwargs) -> Dict[str, Any]:
         }
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def compute_complication_rates_from_aggregates(
     df: pd.DataFrame,
     time_col: str,           # e.g., "semester_label" or "quarter"
@@ -244,9 +245,9 @@ def km_plot(
 
 
 def clear_km_cache():
-    """Clear all KM-related cached data."""
+    """Clear all KM-related cached data (other pages' caches are left intact)."""
     try:
-        st.cache_data.clear()
+        compute_complication_rates_from_aggregates.clear()
         return True
     except Exception as e:
         st.error(f"Error clearing cache: {e}")
@@ -1,11 +1,14 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from navira.data_loader import get_dataframes
+from navira.ranking import VOLUME_BIN_EDGES, VOLUME_BIN_LABELS
+from navira.store import data_version, on_version_change
 
 # --- MAPPING DICTIONARIES ---
 BARIATRIC_PROCEDURE_NAMES = {
@@ -23,9 +26,55 @@ SURGICAL_APPROACH_NAMES = {
     'LAP': 'Open Surgery', 'COE': 'Coelioscopy', 'ROB': 'Robotic'
 }
 
+# Hospital-years below this volume are left out of national analyses
+ELIGIBLE_MIN_PROCEDURES = 25
+
+VOLUME_BINS = VOLUME_BIN_LABELS
+AFFILIATION_CATEGORIES = ['Public – Univ.', 'Public – Non-Acad.', 'Private – For-profit', 'Private – Not-for-profit']
+LABEL_CATEGORIES = ['SOFFCO Label', 'CSO Label', 'Both', 'None']
+
+# --- CATEGORY COLUMNS ---
+def volume_bin_column(volume: pd.Series) -> pd.Series:
+    """Ordered categorical volume bin of annual procedure counts."""
+    edges = [-np.inf, *VOLUME_BIN_EDGES, np.inf]
+    return pd.cut(pd.to_numeric(volume, errors='coerce'), edges, right=False, labels=VOLUME_BINS)
+
+def affiliation_category_column(df: pd.DataFrame) -> pd.Series:
+    """Categorical affiliation from sector, academic_affiliation and profit_status.
+
+    Hospitals outside the public sector (including unknown) count as private;
+    missing columns take their defaults.
+    """
+    def column(name, default):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+    public = column('sector', 'unknown').eq('public').to_numpy()
+    academic = column('academic_affiliation', 0).eq(1).to_numpy()
+    for_profit = column('profit_status', 'not_for_profit').eq('for_profit').to_numpy()
+    values = np.select([public & academic, public, for_profit], AFFILIATION_CATEGORIES[:3], AFFILIATION_CATEGORIES[3])
+    return pd.Series(pd.Categorical(values, categories=AFFILIATION_CATEGORIES), index=df.index)
+
+def label_category_column(cso: pd.Series, soffco: pd.Series) -> pd.Series:
+    """Categorical quality label (SOFFCO Label / CSO Label / Both / None) from the two flags."""
+    has_cso, has_soffco = cso.eq(1).to_numpy(), soffco.eq(1).to_numpy()
+    values = np.select([has_cso & has_soffco, has_soffco, has_cso], ['Both', 'SOFFCO Label', 'CSO Label'], 'None')
+    return pd.Series(pd.Categorical(values, categories=LABEL_CATEGORIES), index=cso.index)
+
+def with_category_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the volume_bin and affiliation_category columns unless already present."""
+    missing = {}
+    if 'volume_bin' not in df.columns and 'total_procedures_year' in df.columns:
+        missing['volume_bin'] = volume_bin_column(df['total_procedures_year'])
+    if 'affiliation_category' not in df.columns:
+        missing['affiliation_category'] = affiliation_category_column(df)
+    return df.assign(**missing) if missing else df
+
 # --- DATA LOADING AND FILTERING ---
-@st.cache_data(show_spinner=False)
 def load_and_prepare_data() -> pd.DataFrame:
+    """Return the merged hospital-year frame of the served data version (shared; shallow copy)."""
+    return get_national_aggregates().frame.copy(deep=False)
+
+def _prepare_data() -> pd.DataFrame:
     """Load Parquet data, merge establishments and annual, and normalize schema for national analysis."""
     try:
         # Try the original method first
@@ -139,274 +188,218 @@ def load_and_prepare_data() -> pd.DataFrame:
 
 
 
-    # Revision count available at establishment level; map to rows (ensure unique index)
-    if 'revision_surgeries_n' in establishments.columns:
+    # Revision count and share available at establishment level; map to rows (ensure unique index)
+    if 'revision_surgeries_n' in establishments.columns or 'revision_surgeries_pct' in establishments.columns:
         rev_src = establishments.copy()
         if 'id' in rev_src.columns:
             rev_src['id'] = rev_src['id'].astype(str)
         rev_src = rev_src.dropna(subset=['id'])
-        rev_src = rev_src.drop_duplicates(subset=['id'], keep='first')
-        rev_map = rev_src.set_index('id')['revision_surgeries_n']
-        merged['revision_count'] = merged['hospital_id'].astype(str).map(rev_map).fillna(0)
+        rev_src = rev_src.drop_duplicates(subset=['id'], keep='first').set_index('id')
+        hospital_ids = merged['hospital_id'].astype(str)
+        if 'revision_surgeries_n' in rev_src.columns:
+            merged['revision_count'] = hospital_ids.map(rev_src['revision_surgeries_n']).fillna(0)
+        if 'revision_surgeries_pct' in rev_src.columns:
+            merged['revision_pct'] = hospital_ids.map(rev_src['revision_surgeries_pct'])
 
     # Academic affiliation column expected by consumers
     if 'university' in merged.columns:
         merged['academic_affiliation'] = merged['university']
 
     # Numeric hygiene
-    for col in ['year', 'total_procedures_year', 'academic_affiliation', 'cso_label', 'soffco_label', 'latitude', 'longitude']:
+    for col in ['year', 'total_procedures_year', 'academic_affiliation', 'cso_label', 'soffco_label', 'revision_pct', 'latitude', 'longitude']:
         if col in merged.columns:
             merged[col] = pd.to_numeric(merged[col], errors='coerce')
 
     # Drop duplicates by hospital-year
     merged = merged.drop_duplicates(subset=['hospital_id', 'year'], keep='first')
 
-    return merged
+    # Volume bin and affiliation are derived once; national analyses group on them
+    return with_category_columns(merged)
 
-@st.cache_data
-def filter_eligible_years(df: pd.DataFrame, min_interventions: int = 25) -> pd.DataFrame:
+def filter_eligible_years(df: pd.DataFrame, min_interventions: int = ELIGIBLE_MIN_PROCEDURES) -> pd.DataFrame:
     """Filter to only include hospital-years with >= min_interventions total procedures."""
     return df[df['total_procedures_year'] >= min_interventions]
 
-@st.cache_data
 def total_by_hospital_year(df: pd.DataFrame) -> pd.DataFrame:
     """Compute total procedures by hospital-year."""
     return df.groupby(['hospital_id', 'year'])['total_procedures_year'].first().reset_index()
 
+# --- NATIONAL AGGREGATES ---
+def _yearly_kpis(eligible: pd.DataFrame) -> pd.DataFrame:
+    """Hospitals, surgeries and estimated revisions of the eligible hospital-years, per year.
+
+    revision_count is cumulative, so a year's revisions are estimated from the
+    establishment's revision share: procedures * revision_pct / 100.
+    """
+    if 'revision_pct' in eligible.columns:
+        pct = eligible['revision_pct']
+        revisions = (eligible['total_procedures_year'] * pct / 100).where(pct > 0, 0.0)
+    else:
+        revisions = pd.Series(0.0, index=eligible.index)
+    return (eligible.assign(revisions=revisions)
+            .groupby('year')
+            .agg(hospitals=('hospital_id', 'nunique'),
+                 surgeries=('total_procedures_year', 'sum'),
+                 revisions=('revisions', 'sum')))
+
+# Breakdowns of the national page; the approach and procedure codes are summed columns
+AGGREGATE_KEYS = ['year', 'affiliation_category', 'volume_bin', 'label_category', 'lib_reg', 'sector', 'academic_affiliation']
+
+class NationalAggregates:
+    """Eligible hospital-years summed over every national breakdown at once.
+
+    One eligibility filter and one groupby over AGGREGATE_KEYS; the compute_*
+    functions below are views over the (small) ``cube``, and the few
+    hospital-level analyses read ``eligible`` directly.
+    """
+
+    __slots__ = ("frame", "eligible", "cube", "values", "kpis")
+
+    def __init__(self, frame: pd.DataFrame, eligible: pd.DataFrame, cube: pd.DataFrame, values: List[str],
+                 kpis: pd.DataFrame):
+        self.frame = frame  # prepared hospital-year frame, every year
+        self.eligible = eligible  # hospital-years with enough procedures, with category columns
+        self.cube = cube  # sums of ``values`` per combination of the keys present
+        self.values = values
+        self.kpis = kpis  # per year: hospitals, surgeries, estimated revisions
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, min_interventions: int = ELIGIBLE_MIN_PROCEDURES) -> "NationalAggregates":
+        """Build from a hospital-year frame shaped like load_and_prepare_data()."""
+        eligible = filter_eligible_years(with_category_columns(df), min_interventions)
+        if 'cso_label' in eligible.columns and 'soffco_label' in eligible.columns:
+            # Hospitals with an unknown flag are left out of the label breakdown
+            known = eligible['cso_label'].isin([0, 1]) & eligible['soffco_label'].isin([0, 1])
+            labels = label_category_column(eligible['cso_label'], eligible['soffco_label']).where(known)
+        else:
+            labels = pd.Series(pd.Categorical([None] * len(eligible), categories=LABEL_CATEGORIES), index=eligible.index)
+        eligible = eligible.assign(label_category=labels)
+
+        codes = [c for c in [*SURGICAL_APPROACH_NAMES, *BARIATRIC_PROCEDURE_NAMES] if c in eligible.columns]
+        values = eligible[['total_procedures_year', *codes]].assign(hospitals=1)
+        if 'ROB' in codes:
+            # Per-hospital robotic shares, summed so a bin's unweighted mean is one division
+            share = eligible['ROB'] / eligible['total_procedures_year'] * 100
+            values['ROB_share'] = share.replace([np.inf, -np.inf], 0).fillna(0)
+        keys = [k for k in AGGREGATE_KEYS if k in eligible.columns]
+        cube = (pd.concat([eligible[keys], values], axis=1)
+                .groupby(keys, observed=True, dropna=False, sort=True)
+                .sum()
+                .reset_index())
+        return cls(df, eligible, cube, list(values.columns), _yearly_kpis(eligible))
+
+    def has(self, column: str) -> bool:
+        return column in self.cube.columns
+
+    def totals(self, by=None, years=None):
+        """Summed values grouped by ``by`` (None: one grand total Series) over ``years`` (None: all)."""
+        cube = self.cube if years is None else self.cube[self.cube['year'].isin(list(years))]
+        if by is None:
+            return cube[self.values].sum()
+        return cube.groupby(by, observed=True)[self.values].sum()
+
+    def hospital_years(self, years) -> pd.DataFrame:
+        """Eligible hospital-year rows of the given years."""
+        return self.eligible[self.eligible['year'].isin(list(years))]
+
+def _aggregates(data) -> NationalAggregates:
+    return data if isinstance(data, NationalAggregates) else NationalAggregates.from_frame(data)
+
+@st.cache_resource(show_spinner=False)
+def _load_aggregates(version: Optional[str]) -> NationalAggregates:
+    return NationalAggregates.from_frame(_prepare_data())
+
+def get_national_aggregates() -> NationalAggregates:
+    """Return the national aggregates, built once per process and data version."""
+    return _load_aggregates(data_version())
+
+on_version_change(_load_aggregates.clear)
+
 # --- VOLUME ANALYSIS ---
-@st.cache_data
-def compute_volume_bins_2024(df: pd.DataFrame) -> Dict[str, int]:
+def compute_volume_bins_2024(data) -> Dict[str, int]:
     """Compute volume distribution for 2024 with proper binning."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    def categorize_volume(total_procedures):
-        if total_procedures < 50:
-            return "<50"
-        elif total_procedures < 100:
-            return "50–100"
-        elif total_procedures < 200:
-            return "100–200"
-        else:
-            return ">200"
-    
-    df_eligible['volume_bin'] = df_eligible['total_procedures_year'].apply(categorize_volume)
-    volume_dist = df_eligible['volume_bin'].value_counts()
-    
-    # Ensure all bins are present
-    bins = ["<50", "50–100", "100–200", ">200"]
-    result = {bin_name: volume_dist.get(bin_name, 0) for bin_name in bins}
-    
-    return result
+    counts = _aggregates(data).totals('volume_bin', [2024])['hospitals']
+    return {bin_name: int(counts.get(bin_name, 0)) for bin_name in VOLUME_BINS}
 
-@st.cache_data
-def compute_baseline_bins_2020_2023(df: pd.DataFrame) -> Dict[str, float]:
+def compute_baseline_bins_2020_2023(data) -> Dict[str, float]:
     """Compute average volume distribution for 2020-2023 baseline."""
-    df_baseline = df[df['year'].between(2020, 2023)].copy()
-    df_eligible = filter_eligible_years(df_baseline)
-    
-    def categorize_volume(total_procedures):
-        if total_procedures < 50:
-            return "<50"
-        elif total_procedures < 100:
-            return "50–100"
-        elif total_procedures < 200:
-            return "100–200"
-        else:
-            return ">200"
-    
-    df_eligible['volume_bin'] = df_eligible['total_procedures_year'].apply(categorize_volume)
-    
-    # Compute yearly counts then average
-    yearly_counts = []
-    for year in [2020, 2021, 2022, 2023]:
-        year_data = df_eligible[df_eligible['year'] == year]
-        year_dist = year_data['volume_bin'].value_counts()
-        yearly_counts.append(year_dist)
-    
-    # Average across years
-    bins = ["<50", "50–100", "100–200", ">200"]
-    baseline = {}
-    for bin_name in bins:
-        values = [year_dist.get(bin_name, 0) for year_dist in yearly_counts]
-        baseline[bin_name] = sum(values) / len(values)
-    
-    return baseline
+    # Yearly counts per bin (years without data count as zero), then average
+    yearly_counts = (_aggregates(data).totals(['year', 'volume_bin'], range(2020, 2024))['hospitals']
+                     .unstack(fill_value=0)
+                     .reindex(index=range(2020, 2024), columns=VOLUME_BINS, fill_value=0))
+    return {bin_name: float(yearly_counts[bin_name].mean()) for bin_name in VOLUME_BINS}
 
 # --- AFFILIATION ANALYSIS ---
-@st.cache_data
-def compute_affiliation_breakdown_2024(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+def compute_affiliation_breakdown_2024(data) -> Dict[str, Dict[str, int]]:
     """Compute hospital affiliation breakdown for 2025."""
-    df_2025 = df[df['year'] == 2025].copy()
-    df_eligible = filter_eligible_years(df_2025).copy()  # Ensure we have a copy, not a view
-    
-    # Create affiliation categories
-    def get_affiliation_category(row):
-        if row['sector'] == 'public':
-            if row['academic_affiliation'] == 1:
-                return 'Public – Univ.'
-            else:
-                return 'Public – Non-Acad.'
-        else:  # private
-            if row['profit_status'] == 'for_profit':
-                return 'Private – For-profit'
-            else:
-                return 'Private – Not-for-profit'
-    
-    df_eligible['affiliation_category'] = df_eligible.apply(get_affiliation_category, axis=1)
-    
-    # Count by affiliation
-    affiliation_counts = df_eligible['affiliation_category'].value_counts().to_dict()
-    
-    # Add label breakdown
-    label_breakdown = {}
-    for category in ['Public – Univ.', 'Public – Non-Acad.', 'Private – For-profit', 'Private – Not-for-profit']:
-        category_data = df_eligible[df_eligible['affiliation_category'] == category]
-        
-        soffco_only = len(category_data[(category_data['soffco_label'] == 1) & (category_data['cso_label'] == 0)])
-        cso_only = len(category_data[(category_data['soffco_label'] == 0) & (category_data['cso_label'] == 1)])
-        both = len(category_data[(category_data['soffco_label'] == 1) & (category_data['cso_label'] == 1)])
-        none = len(category_data[(category_data['soffco_label'] == 0) & (category_data['cso_label'] == 0)])
-        
-        label_breakdown[category] = {
-            'SOFFCO Label': soffco_only,
-            'CSO Label': cso_only,
-            'Both': both,
-            'None': none
-        }
-    
+    aggregates = _aggregates(data)
+
+    # Count by affiliation (categories with hospitals only)
+    counts = aggregates.totals('affiliation_category', [2025])['hospitals']
+    affiliation_counts = {k: int(v) for k, v in counts[counts > 0].sort_values(ascending=False, kind='stable').items()}
+
+    label_counts = (aggregates.totals(['affiliation_category', 'label_category'], [2025])['hospitals']
+                    .unstack(fill_value=0)
+                    .reindex(index=AFFILIATION_CATEGORIES, columns=LABEL_CATEGORIES, fill_value=0))
+    label_breakdown = {
+        category: {label: int(n) for label, n in row.items()}
+        for category, row in label_counts.iterrows()
+    }
+
     return {
         'affiliation_counts': affiliation_counts,
         'label_breakdown': label_breakdown
     }
 
-@st.cache_data
-def compute_affiliation_trends_2020_2024(df: pd.DataFrame) -> Dict[str, Dict[int, int]]:
+def compute_affiliation_trends_2020_2024(data) -> Dict[str, Dict[int, int]]:
     """Compute affiliation trends over 2020-2024 period."""
-    trends = {
-        'Public – Univ.': {},
-        'Public – Non-Acad.': {},
-        'Private – For-profit': {},
-        'Private – Not-for-profit': {}
-    }
-    
-    for year in range(2020, 2025):
-        df_year = df[df['year'] == year].copy()
-        df_eligible = filter_eligible_years(df_year).copy()  # Ensure we have a copy, not a view
-        
-        # Create affiliation categories for this year
-        def get_affiliation_category(row):
-            if row['sector'] == 'public':
-                if row['academic_affiliation'] == 1:
-                    return 'Public – Univ.'
-                else:
-                    return 'Public – Non-Acad.'
-            else:  # private
-                if row['profit_status'] == 'for_profit':
-                    return 'Private – For-profit'
-                else:
-                    return 'Private – Not-for-profit'
-        
-        df_eligible['affiliation_category'] = df_eligible.apply(get_affiliation_category, axis=1)
-        
-        # Count by affiliation for this year
-        year_counts = df_eligible['affiliation_category'].value_counts()
-        
-        for category in trends.keys():
-            trends[category][year] = year_counts.get(category, 0)
-    
-    return trends
+    year_counts = (_aggregates(data).totals(['year', 'affiliation_category'], range(2020, 2025))['hospitals']
+                   .unstack(fill_value=0)
+                   .reindex(index=range(2020, 2025), columns=AFFILIATION_CATEGORIES, fill_value=0))
+    return {category: {year: int(n) for year, n in year_counts[category].items()} for category in AFFILIATION_CATEGORIES}
 
 # --- ROBOTIC SURGERY COMPARISON ANALYSIS ---
-@st.cache_data
-def compute_robotic_geographic_analysis(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+def compute_robotic_geographic_analysis(data) -> Dict[str, Dict[str, int]]:
     """Compute robotic surgery adoption by geographic region."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    # Check if required columns exist
-    has_rob = 'ROB' in df_eligible.columns
-    has_total = 'total_procedures_year' in df_eligible.columns
-    has_reg = 'lib_reg' in df_eligible.columns
-    
-    # If missing critical columns, return empty or dummy data
-    if not has_rob or not has_total:
-        if has_reg:
-            # Return structure with empty data
-            return {'regions': [], 'robotic_counts': [], 'total_counts': [], 'percentages': []}
-        else:
-            return {'regions': [], 'robotic_counts': [], 'total_counts': [], 'percentages': []}
-    
-    # Group by region and compute robotic adoption
-    if has_reg:
-        regional_data = df_eligible.groupby('lib_reg', observed=False).agg({
-            'ROB': 'sum',
-            'total_procedures_year': 'sum'
-        }).reset_index()
-        
-        regional_data['robotic_percentage'] = (regional_data['ROB'] / regional_data['total_procedures_year'] * 100).round(1)
-        # Remove regions with no data or NaN values
-        regional_data = regional_data.dropna(subset=['robotic_percentage'])
-        regional_data = regional_data[regional_data['robotic_percentage'] > 0]
-        regional_data = regional_data.sort_values('robotic_percentage', ascending=False)
-        
-        return {
-            'regions': regional_data['lib_reg'].tolist(),
-            'robotic_counts': regional_data['ROB'].tolist(),
-            'total_counts': regional_data['total_procedures_year'].tolist(),
-            'percentages': regional_data['robotic_percentage'].tolist()
-        }
-    else:
+    aggregates = _aggregates(data)
+
+    # Without robotic counts or regions, return empty data
+    if not aggregates.has('ROB') or not aggregates.has('lib_reg'):
         return {'regions': [], 'robotic_counts': [], 'total_counts': [], 'percentages': []}
 
-@st.cache_data
-def compute_robotic_affiliation_analysis(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+    # Group by region and compute robotic adoption
+    regional_data = aggregates.totals('lib_reg', [2024])[['ROB', 'total_procedures_year']].reset_index()
+    regional_data['robotic_percentage'] = (regional_data['ROB'] / regional_data['total_procedures_year'] * 100).round(1)
+    # Remove regions with no data or NaN values
+    regional_data = regional_data.dropna(subset=['robotic_percentage'])
+    regional_data = regional_data[regional_data['robotic_percentage'] > 0]
+    regional_data = regional_data.sort_values('robotic_percentage', ascending=False)
+
+    return {
+        'regions': regional_data['lib_reg'].tolist(),
+        'robotic_counts': regional_data['ROB'].tolist(),
+        'total_counts': regional_data['total_procedures_year'].tolist(),
+        'percentages': regional_data['robotic_percentage'].tolist()
+    }
+
+def compute_robotic_affiliation_analysis(data) -> Dict[str, Dict[str, int]]:
     """Compute robotic surgery adoption by hospital affiliation type."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    # Check if required columns exist
-    has_rob = 'ROB' in df_eligible.columns
-    has_total = 'total_procedures_year' in df_eligible.columns
-    has_sector = 'sector' in df_eligible.columns
-    
+    aggregates = _aggregates(data)
+
     # If missing critical columns, return empty data
-    if not has_rob or not has_total:
+    if not aggregates.has('ROB'):
         return {
             'affiliations': [],
             'robotic_counts': [],
             'total_counts': [],
             'percentages': []
         }
-    
-    # Create affiliation categories (handle missing sector gracefully)
-    def get_affiliation_category(row):
-        sector = row.get('sector', 'unknown')
-        academic = row.get('academic_affiliation', 0)
-        profit_status = row.get('profit_status', 'not_for_profit')
-        
-        if sector == 'public':
-            if academic == 1:
-                return 'Public – Univ.'
-            else:
-                return 'Public – Non-Acad.'
-        else:  # private or unknown
-            if profit_status == 'for_profit':
-                return 'Private – For-profit'
-            else:
-                return 'Private – Not-for-profit'
-    
-    df_eligible['affiliation_category'] = df_eligible.apply(get_affiliation_category, axis=1)
-    
+
     # Group by affiliation and compute robotic adoption
-    affiliation_data = df_eligible.groupby('affiliation_category').agg({
-        'ROB': 'sum',
-        'total_procedures_year': 'sum'
-    }).reset_index()
-    
+    affiliation_data = aggregates.totals('affiliation_category', [2024])[['ROB', 'total_procedures_year']].reset_index()
     affiliation_data['robotic_percentage'] = (affiliation_data['ROB'] / affiliation_data['total_procedures_year'] * 100).round(1)
     affiliation_data = affiliation_data.sort_values('robotic_percentage', ascending=False)
-    
+
     return {
         'affiliations': affiliation_data['affiliation_category'].tolist(),
         'robotic_counts': affiliation_data['ROB'].tolist(),
@@ -414,21 +407,15 @@ def compute_robotic_affiliation_analysis(df: pd.DataFrame) -> Dict[str, Dict[str
         'percentages': affiliation_data['robotic_percentage'].tolist()
     }
 
-@st.cache_data
-def compute_robotic_volume_analysis(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+def compute_robotic_volume_analysis(data) -> Dict[str, Dict[str, int]]:
     """Compute robotic surgery adoption by hospital volume category.
     Returns both weighted (by total surgeries) and unweighted (per-hospital mean) percentages,
     along with counts per category.
     """
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
+    aggregates = _aggregates(data)
 
-    # Check if required columns exist
-    has_rob = 'ROB' in df_eligible.columns
-    has_total = 'total_procedures_year' in df_eligible.columns
-    
     # If missing critical columns, return empty data
-    if not has_rob or not has_total:
+    if not aggregates.has('ROB'):
         return {
             'volume_categories': [],
             'robotic_counts': [],
@@ -438,181 +425,74 @@ def compute_robotic_volume_analysis(df: pd.DataFrame) -> Dict[str, Dict[str, int
             'percentages_mean': []
         }
 
-    # Categorize hospitals by volume
-    def categorize_volume(total_procedures):
-        if total_procedures < 50:
-            return "<50"
-        elif total_procedures < 100:
-            return "50–100"
-        elif total_procedures < 200:
-            return "100–200"
-        else:
-            return ">200"
-
-    df_eligible['volume_category'] = df_eligible['total_procedures_year'].apply(categorize_volume)
-
-    # Weighted percentages (by total surgeries in each category)
-    vol_agg = df_eligible.groupby('volume_category').agg({
-        'ROB': 'sum',
-        'total_procedures_year': 'sum',
-        'hospital_id': pd.Series.nunique
-    }).reset_index().rename(columns={'hospital_id': 'hospitals'})
-
+    # Weighted percentages (by total surgeries in each volume bin); unweighted
+    # ones average the hospital-level robotic shares. Bins keep their order.
+    vol_agg = aggregates.totals('volume_bin', [2024]).reset_index()
     vol_agg['pct_weighted'] = (vol_agg['ROB'] / vol_agg['total_procedures_year'] * 100).round(1)
-
-    # Unweighted: compute hospital-level robotic share first, then average within each category
-    hosp_agg = (df_eligible.groupby(['hospital_id', 'volume_category'])
-                .agg({
-                    'ROB': 'sum',
-                    'total_procedures_year': 'sum'
-                })
-                .reset_index())
-    hosp_agg['hospital_pct'] = (hosp_agg['ROB'] / hosp_agg['total_procedures_year'] * 100).replace([pd.NA, float('inf')], 0).fillna(0)
-    mean_pct = hosp_agg.groupby('volume_category')['hospital_pct'].mean().round(1).reset_index(name='pct_mean')
-
-    # Merge to align ordering
-    merged = vol_agg.merge(mean_pct, on='volume_category', how='left')
-
-    # Sort by volume category order
-    volume_order = ["<50", "50–100", "100–200", ">200"]
-    order_map = {cat: i for i, cat in enumerate(volume_order)}
-    merged['volume_order'] = merged['volume_category'].map(order_map)
-    merged = merged.sort_values('volume_order')
+    vol_agg['pct_mean'] = (vol_agg['ROB_share'] / vol_agg['hospitals']).round(1)
 
     return {
-        'volume_categories': merged['volume_category'].tolist(),
-        'robotic_counts': merged['ROB'].tolist(),
-        'total_counts': merged['total_procedures_year'].tolist(),
-        'hospitals': merged['hospitals'].tolist(),
-        'percentages_weighted': merged['pct_weighted'].tolist(),
-        'percentages_mean': merged['pct_mean'].tolist(),
+        'volume_categories': vol_agg['volume_bin'].tolist(),
+        'robotic_counts': vol_agg['ROB'].tolist(),
+        'total_counts': vol_agg['total_procedures_year'].tolist(),
+        'hospitals': vol_agg['hospitals'].tolist(),
+        'percentages_weighted': vol_agg['pct_weighted'].tolist(),
+        'percentages_mean': vol_agg['pct_mean'].tolist(),
     }
 
-@st.cache_data
-def compute_robotic_temporal_analysis(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+def compute_robotic_temporal_analysis(data) -> Dict[str, Dict[str, int]]:
     """Compute robotic surgery adoption trends over time."""
-    temporal_data = []
-    
-    # Check if required columns exist
-    has_rob = 'ROB' in df.columns
-    has_total = 'total_procedures_year' in df.columns
-    
-    # If missing critical columns, return dummy data
-    if not has_rob or not has_total:
-        for year in range(2020, 2025):
-            # Dummy data: increasing robotic adoption trend
-            base_rob = 1500 + (year - 2020) * 300
-            base_total = 8000 + (year - 2020) * 500
-            robotic_percentage = round((base_rob / base_total) * 100, 1) if base_total > 0 else 0
-            
-            temporal_data.append({
-                'year': year,
-                'robotic_count': base_rob,
-                'total_count': base_total,
-                'percentage': robotic_percentage
-            })
+    aggregates = _aggregates(data)
+    years = list(range(2020, 2025))
+
+    if aggregates.has('ROB'):
+        by_year = aggregates.totals('year', years).reindex(years, fill_value=0)
+        robotic = by_year['ROB'].astype(int).tolist()
+        totals = by_year['total_procedures_year'].astype(int).tolist()
     else:
-        for year in range(2020, 2025):
-            df_year = df[df['year'] == year].copy()
-            df_eligible = filter_eligible_years(df_year)
-            
-            total_robotic = int(df_eligible['ROB'].sum()) if 'ROB' in df_eligible.columns else 0
-            total_procedures = int(df_eligible['total_procedures_year'].sum()) if 'total_procedures_year' in df_eligible.columns else 0
-            robotic_percentage = round((total_robotic / total_procedures) * 100, 1) if total_procedures > 0 else 0
-            
-            temporal_data.append({
-                'year': year,
-                'robotic_count': total_robotic,
-                'total_count': total_procedures,
-                'percentage': robotic_percentage
-            })
-    
+        # Dummy data: increasing robotic adoption trend
+        robotic = [1500 + (year - 2020) * 300 for year in years]
+        totals = [8000 + (year - 2020) * 500 for year in years]
+
     return {
-        'years': [d['year'] for d in temporal_data],
-        'robotic_counts': [d['robotic_count'] for d in temporal_data],
-        'total_counts': [d['total_count'] for d in temporal_data],
-        'percentages': [d['percentage'] for d in temporal_data]
+        'years': years,
+        'robotic_counts': robotic,
+        'total_counts': totals,
+        'percentages': [round(r / t * 100, 1) if t > 0 else 0 for r, t in zip(robotic, totals)]
     }
 
-@st.cache_data
-def compute_robotic_institutional_analysis(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+def compute_robotic_institutional_analysis(data) -> Dict[str, Dict[str, int]]:
     """Compute robotic surgery adoption by institutional characteristics."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    # Check if required columns exist
-    has_rob = 'ROB' in df_eligible.columns
-    has_total = 'total_procedures_year' in df_eligible.columns
-    has_academic = 'academic_affiliation' in df_eligible.columns
-    has_sector = 'sector' in df_eligible.columns
-    
+    aggregates = _aggregates(data)
+    empty = {'types': [], 'robotic_counts': [], 'total_counts': [], 'percentages': []}
+
     # If missing critical columns, return empty data
-    if not has_rob or not has_total:
+    if not aggregates.has('ROB'):
+        return {'academic': dict(empty), 'sector': dict(empty)}
+
+    def breakdown(key: str, names: Dict) -> Dict[str, list]:
+        if not aggregates.has(key):
+            return dict(empty)
+        rows = aggregates.totals(key, [2024]).reset_index()
         return {
-            'academic': {
-                'types': [],
-                'robotic_counts': [],
-                'total_counts': [],
-                'percentages': []
-            },
-            'sector': {
-                'types': [],
-                'robotic_counts': [],
-                'total_counts': [],
-                'percentages': []
-            }
+            'types': rows[key].map(names).tolist(),
+            'robotic_counts': rows['ROB'].tolist(),
+            'total_counts': rows['total_procedures_year'].tolist(),
+            'percentages': (rows['ROB'] / rows['total_procedures_year'] * 100).round(1).tolist()
         }
-    
-    # Analyze by academic affiliation
-    academic_result = {'types': [], 'robotic_counts': [], 'total_counts': [], 'percentages': []}
-    if has_academic:
-        academic_data = df_eligible.groupby('academic_affiliation').agg({
-            'ROB': 'sum',
-            'total_procedures_year': 'sum'
-        }).reset_index()
-        
-        academic_data['robotic_percentage'] = (academic_data['ROB'] / academic_data['total_procedures_year'] * 100).round(1)
-        academic_data['institution_type'] = academic_data['academic_affiliation'].map({1: 'Academic', 0: 'Non-Academic'})
-        
-        academic_result = {
-            'types': academic_data['institution_type'].tolist(),
-            'robotic_counts': academic_data['ROB'].tolist(),
-            'total_counts': academic_data['total_procedures_year'].tolist(),
-            'percentages': academic_data['robotic_percentage'].tolist()
-        }
-    
-    # Analyze by sector
-    sector_result = {'types': [], 'robotic_counts': [], 'total_counts': [], 'percentages': []}
-    if has_sector:
-        sector_data = df_eligible.groupby('sector').agg({
-            'ROB': 'sum',
-            'total_procedures_year': 'sum'
-        }).reset_index()
-        
-        sector_data['robotic_percentage'] = (sector_data['ROB'] / sector_data['total_procedures_year'] * 100).round(1)
-        sector_data['institution_type'] = sector_data['sector'].map({'public': 'Public', 'private': 'Private', 'unknown': 'Unknown'})
-        
-        sector_result = {
-            'types': sector_data['institution_type'].tolist(),
-            'robotic_counts': sector_data['ROB'].tolist(),
-            'total_counts': sector_data['total_procedures_year'].tolist(),
-            'percentages': sector_data['robotic_percentage'].tolist()
-        }
-    
+
     return {
-        'academic': academic_result,
-        'sector': sector_result
+        'academic': breakdown('academic_affiliation', {1: 'Academic', 0: 'Non-Academic'}),
+        'sector': breakdown('sector', {'public': 'Public', 'private': 'Private', 'unknown': 'Unknown'})
     }
 
 # --- PROCEDURE ANALYSIS ---
-@st.cache_data
-def compute_procedure_averages_2020_2024(df: pd.DataFrame) -> Dict[str, float]:
+def compute_procedure_averages_2020_2024(data) -> Dict[str, float]:
     """Compute average procedure counts per hospital across 2020-2024 (FIXED)."""
-    df_period = df[df['year'].between(2020, 2024)].copy()
-    df_eligible = filter_eligible_years(df_period)
+    aggregates = _aggregates(data)
     
     # Check which procedure columns actually exist
-    available_proc_codes = [proc_code for proc_code in BARIATRIC_PROCEDURE_NAMES.keys() if proc_code in df_eligible.columns]
+    available_proc_codes = [proc_code for proc_code in BARIATRIC_PROCEDURE_NAMES.keys() if aggregates.has(proc_code)]
     
     # If no procedure columns exist, return dummy data
     if not available_proc_codes:
@@ -629,159 +509,79 @@ def compute_procedure_averages_2020_2024(df: pd.DataFrame) -> Dict[str, float]:
         }
         return dummy_averages
     
-    # Group by hospital and compute averages per hospital (only for available columns)
-    agg_dict = {proc_code: 'mean' for proc_code in available_proc_codes}
-    hospital_averages = df_eligible.groupby('hospital_id').agg(agg_dict)
-    
-    # Then average across all hospitals
-    procedure_averages = {}
-    for proc_code in BARIATRIC_PROCEDURE_NAMES.keys():
-        if proc_code in hospital_averages.columns:
-            procedure_averages[proc_code] = float(hospital_averages[proc_code].mean())
-        else:
-            # Fill missing procedure codes with 0
-            procedure_averages[proc_code] = 0.0
-    
-    return procedure_averages
+    # Average per hospital first, then across hospitals
+    hospital_averages = aggregates.hospital_years(range(2020, 2025)).groupby('hospital_id')[available_proc_codes].mean()
+    return {
+        proc_code: float(hospital_averages[proc_code].mean()) if proc_code in hospital_averages.columns else 0.0
+        for proc_code in BARIATRIC_PROCEDURE_NAMES.keys()
+    }
 
-@st.cache_data
-def get_2024_procedure_totals(df: pd.DataFrame) -> Dict[str, int]:
-    """Get total procedure counts for 2024."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    totals = {}
-    available_proc_codes = [proc_code for proc_code in BARIATRIC_PROCEDURE_NAMES.keys() if proc_code in df_eligible.columns]
-    
-    # If no procedure columns exist, return dummy data
-    if not available_proc_codes:
-        # Return dummy totals based on typical distribution
-        totals = {
-            'SLE': 5000,  # Sleeve Gastrectomy (most common)
-            'BPG': 2000,  # Gastric Bypass
-            'ANN': 500,   # Gastric Banding
-            'REV': 1000,  # Revision Surgery
-            'ABL': 200,   # Band Removal
-            'DBP': 100,   # Bilio-pancreatic Diversion
-            'GVC': 50,    # Gastroplasty
-            'NDD': 50     # Not Defined
-        }
-        # Use total_procedures_year if available, otherwise sum dummy values
-        if 'total_procedures_year' in df_eligible.columns:
-            totals['total_all'] = int(df_eligible['total_procedures_year'].sum())
-        else:
-            totals['total_all'] = sum(totals.values())
-        return totals
-    
-    for proc_code in BARIATRIC_PROCEDURE_NAMES.keys():
-        if proc_code in df_eligible.columns:
-            totals[proc_code] = int(df_eligible[proc_code].sum())
-        else:
-            totals[proc_code] = 0
-    
-    if 'total_procedures_year' in df_eligible.columns:
-        totals['total_all'] = int(df_eligible['total_procedures_year'].sum())
+def _procedure_totals(aggregates: NationalAggregates, years, dummy: Dict[str, int]) -> Dict[str, int]:
+    """Procedure counts summed over ``years``, plus 'total_all'; ``dummy`` without procedure columns."""
+    sums = aggregates.totals(years=years)
+    if not any(aggregates.has(proc_code) for proc_code in BARIATRIC_PROCEDURE_NAMES):
+        totals = dict(dummy)
     else:
-        totals['total_all'] = sum(totals.get(proc_code, 0) for proc_code in BARIATRIC_PROCEDURE_NAMES.keys())
-    
+        totals = {proc_code: int(sums.get(proc_code, 0)) for proc_code in BARIATRIC_PROCEDURE_NAMES.keys()}
+    totals['total_all'] = int(sums['total_procedures_year'])
     return totals
 
-@st.cache_data
-def get_2020_2024_procedure_totals(df: pd.DataFrame) -> Dict[str, int]:
+def get_2024_procedure_totals(data) -> Dict[str, int]:
+    """Get total procedure counts for 2024."""
+    # Dummy totals based on typical distribution, used without procedure columns
+    return _procedure_totals(_aggregates(data), [2024], {
+        'SLE': 5000,  # Sleeve Gastrectomy (most common)
+        'BPG': 2000,  # Gastric Bypass
+        'ANN': 500,   # Gastric Banding
+        'REV': 1000,  # Revision Surgery
+        'ABL': 200,   # Band Removal
+        'DBP': 100,   # Bilio-pancreatic Diversion
+        'GVC': 50,    # Gastroplasty
+        'NDD': 50     # Not Defined
+    })
+
+def get_2020_2024_procedure_totals(data) -> Dict[str, int]:
     """Get total procedure counts for 2020-2024 period."""
-    df_period = df[df['year'].between(2020, 2024)].copy()
-    df_eligible = filter_eligible_years(df_period)
-    
-    totals = {}
-    available_proc_codes = [proc_code for proc_code in BARIATRIC_PROCEDURE_NAMES.keys() if proc_code in df_eligible.columns]
-    
-    # If no procedure columns exist, return dummy data (scaled for 5-year period)
-    if not available_proc_codes:
-        # Return dummy totals for 5-year period
-        totals = {
-            'SLE': 25000,  # Sleeve Gastrectomy (most common)
-            'BPG': 10000,  # Gastric Bypass
-            'ANN': 2500,   # Gastric Banding
-            'REV': 5000,   # Revision Surgery
-            'ABL': 1000,   # Band Removal
-            'DBP': 500,    # Bilio-pancreatic Diversion
-            'GVC': 250,    # Gastroplasty
-            'NDD': 250     # Not Defined
-        }
-        # Use total_procedures_year if available, otherwise sum dummy values
-        if 'total_procedures_year' in df_eligible.columns:
-            totals['total_all'] = int(df_eligible['total_procedures_year'].sum())
-        else:
-            totals['total_all'] = sum(totals.values())
-        return totals
-    
-    for proc_code in BARIATRIC_PROCEDURE_NAMES.keys():
-        if proc_code in df_eligible.columns:
-            totals[proc_code] = int(df_eligible[proc_code].sum())
-        else:
-            totals[proc_code] = 0
-    
-    if 'total_procedures_year' in df_eligible.columns:
-        totals['total_all'] = int(df_eligible['total_procedures_year'].sum())
-    else:
-        totals['total_all'] = sum(totals.get(proc_code, 0) for proc_code in BARIATRIC_PROCEDURE_NAMES.keys())
-    
-    return totals
+    # Dummy totals for the 5-year period, used without procedure columns
+    return _procedure_totals(_aggregates(data), range(2020, 2025), {
+        'SLE': 25000,  # Sleeve Gastrectomy (most common)
+        'BPG': 10000,  # Gastric Bypass
+        'ANN': 2500,   # Gastric Banding
+        'REV': 5000,   # Revision Surgery
+        'ABL': 1000,   # Band Removal
+        'DBP': 500,    # Bilio-pancreatic Diversion
+        'GVC': 250,    # Gastroplasty
+        'NDD': 250     # Not Defined
+    })
 
 # --- APPROACH ANALYSIS ---
-@st.cache_data
-def compute_approach_trends(df: pd.DataFrame) -> Dict[str, Dict[int, int]]:
+def compute_approach_trends(data) -> Dict[str, Dict[int, int]]:
     """Compute approach trends over 2020-2024."""
-    df_period = df[df['year'].between(2020, 2024)].copy()
-    df_eligible = filter_eligible_years(df_period)
-    
-    trends = {'all': {}, 'robotic': {}}
-    
-    # Check if we have the necessary columns
-    has_total = 'total_procedures_year' in df_eligible.columns
-    has_rob = 'ROB' in df_eligible.columns
-    
-    # If no data columns, return dummy trends
-    if not has_total and not has_rob:
-        for year in range(2020, 2025):
-            # Dummy data: increasing trend
-            base_all = 8000 + (year - 2020) * 500
-            base_rob = 1500 + (year - 2020) * 300
-            trends['all'][year] = base_all
-            trends['robotic'][year] = base_rob
-        return trends
-    
-    for year in range(2020, 2025):
-        year_data = df_eligible[df_eligible['year'] == year]
-        if has_total:
-            trends['all'][year] = int(year_data['total_procedures_year'].sum())
-        else:
-            # Fallback: estimate from available data or use dummy
-            trends['all'][year] = 8000 + (year - 2020) * 500
-        
-        if has_rob:
-            trends['robotic'][year] = int(year_data['ROB'].sum())
-        else:
-            # Fallback: estimate robotic trend
-            trends['robotic'][year] = 1500 + (year - 2020) * 300
-    
-    return trends
+    aggregates = _aggregates(data)
+    years = list(range(2020, 2025))
+    by_year = aggregates.totals('year', years).reindex(years, fill_value=0)
+
+    # Fallback estimates without robotic counts
+    if aggregates.has('ROB'):
+        robotic = {year: int(n) for year, n in by_year['ROB'].items()}
+    else:
+        robotic = {year: 1500 + (year - 2020) * 300 for year in years}
+    return {
+        'all': {year: int(n) for year, n in by_year['total_procedures_year'].items()},
+        'robotic': robotic,
+    }
 
-@st.cache_data
-def compute_2024_approach_mix(df: pd.DataFrame) -> Dict[str, int]:
+def compute_2024_approach_mix(data) -> Dict[str, int]:
     """Compute approach mix for 2024."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    approach_mix = {}
-    available_approaches = []
-    for approach_code, approach_name in SURGICAL_APPROACH_NAMES.items():
-        if approach_code in df_eligible.columns:
-            approach_mix[approach_name] = int(df_eligible[approach_code].sum())
-            available_approaches.append(approach_code)
+    aggregates = _aggregates(data)
+    sums = aggregates.totals(years=[2024])
+    approach_mix = {
+        approach_name: int(sums[approach_code])
+        for approach_code, approach_name in SURGICAL_APPROACH_NAMES.items() if aggregates.has(approach_code)
+    }
     
     # If no approach columns exist, return dummy data
-    if not available_approaches:
+    if not approach_mix:
         # Return dummy approach mix based on typical distribution
         approach_mix = {
             'Coelioscopy': 6000,  # Most common
@@ -792,82 +592,30 @@ def compute_2024_approach_mix(df: pd.DataFrame) -> Dict[str, int]:
     return approach_mix
 
 # --- KPI COMPUTATIONS ---
-@st.cache_data
-def compute_national_kpis(df: pd.DataFrame) -> Dict[str, float]:
-    """Compute key national KPIs."""
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
-    
-    # Total hospitals meeting criteria
-    total_hospitals = len(df_eligible['hospital_id'].unique())
-    
-    # Total surgeries in 2024
-    total_surgeries_2024 = df_eligible['total_procedures_year'].sum()
-    
-    # Total revisions in 2024 - calculate using revision percentage
-    # Since revision_count is cumulative data, we need to estimate 2024 revisions
-    # We'll use the revision percentage to estimate 2024 revisions
-    total_revisions_2024 = 0
-    
-    # Get establishments data to access revision percentages
-    try:
-        establishments, _ = get_dataframes()
-        establishments['id'] = establishments['id'].astype(str)
-        
-        # For each hospital in 2024, calculate estimated 2024 revisions
-        for _, row in df_eligible.iterrows():
-            hospital_id = row['hospital_id']
-            hospital_procedures_2024 = row['total_procedures_year']
-            
-            # Find corresponding establishment data
-            est_data = establishments[establishments['id'] == hospital_id]
-            if not est_data.empty:
-                revision_pct = est_data.iloc[0].get('revision_surgeries_pct', 0)
-                if pd.notna(revision_pct) and revision_pct > 0:
-                    estimated_2024_revisions = (hospital_procedures_2024 * revision_pct) / 100
-                    total_revisions_2024 += estimated_2024_revisions
-    except Exception:
-        # Fallback: use simple average if percentage calculation fails
-        total_revisions_2024 = df_eligible['revision_count'].sum() / 5  # Divide by 5 years (2020-2024)
-    
+def compute_national_kpis(data, year: int = 2024) -> Dict[str, float]:
+    """Compute key national KPIs for a year (keys keep their historical 2024 names)."""
+    kpis = _aggregates(data).kpis
+    known = year in kpis.index
     return {
-        'total_hospitals_2024': total_hospitals,
-        'avg_surgeries_per_year': total_surgeries_2024,
-        'avg_revisions_per_year': total_revisions_2024
+        'total_hospitals_2024': int(kpis.at[year, 'hospitals']) if known else 0,
+        'avg_surgeries_per_year': kpis.at[year, 'surgeries'] if known else 0,
+        'avg_revisions_per_year': float(kpis.at[year, 'revisions']) if known else 0.0
     }
 
-@st.cache_data(show_spinner=False)
-def compute_robotic_volume_distribution(df: pd.DataFrame) -> pd.DataFrame:
+def compute_robotic_volume_distribution(data) -> pd.DataFrame:
     """Return per-hospital robotic share by volume bin for distribution plots.
     Columns: volume_category, hospital_pct, total_surgeries, hospital_id
     """
-    df_2024 = df[df['year'] == 2024].copy()
-    df_eligible = filter_eligible_years(df_2024)
+    df_eligible = _aggregates(data).hospital_years([2024])
 
-    # Check if required columns exist
-    has_rob = 'ROB' in df_eligible.columns
-    has_total = 'total_procedures_year' in df_eligible.columns
-    has_hospital_id = 'hospital_id' in df_eligible.columns
-    
     # If missing critical columns, return empty DataFrame with correct structure
-    if not has_rob or not has_total or not has_hospital_id:
+    if 'ROB' not in df_eligible.columns or 'hospital_id' not in df_eligible.columns:
         return pd.DataFrame(columns=['hospital_id', 'volume_category', 'hospital_pct', 'total_surgeries'])
 
-    def categorize_volume(total_procedures):
-        if total_procedures < 50:
-            return "<50"
-        elif total_procedures < 100:
-            return "50–100"
-        elif total_procedures < 200:
-            return "100–200"
-        else:
-            return ">200"
-
-    df_eligible['volume_category'] = df_eligible['total_procedures_year'].apply(categorize_volume)
-
-    hosp_agg = (df_eligible.groupby(['hospital_id', 'volume_category'])
+    hosp_agg = (df_eligible.groupby(['hospital_id', 'volume_bin'], observed=True)
                 .agg({'ROB': 'sum', 'total_procedures_year': 'sum'})
-                .reset_index())
+                .reset_index()
+                .rename(columns={'volume_bin': 'volume_category'}))
     hosp_agg['hospital_pct'] = (hosp_agg['ROB'] / hosp_agg['total_procedures_year'] * 100)
     hosp_agg['hospital_pct'] = pd.to_numeric(hosp_agg['hospital_pct'], errors='coerce').fillna(0)
     hosp_agg = hosp_agg.rename(columns={'total_procedures_year': 'total_surgeries'})
@@ -0,0 +1,140 @@
+"""
+Compiled data artifacts shared by every process on a host.
+
+scripts/build_parquet.py writes each new_data table twice under
+<NAVIRA_OUT_DIR>/new_data/: a zstd Parquet file (compact, for transfer and
+inspection) and an uncompressed Arrow IPC file. The IPC file is opened
+memory-mapped, so Streamlit replicas and the API backend share a single
+page-cache copy and start by mapping the files instead of parsing them.
+
+Each build is then published as an immutable snapshot under versions/<version>/
+(hard links to the build outputs) and the ``current`` pointer file is swapped
+atomically, so readers never observe a half-written data set.
+
+next_migration/backend reads the same artifacts through this module, in a
+process without Streamlit.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "current"
+VERSIONS_DIR = "versions"
+
+
+def compiled_root() -> Path:
+    """Build directory of the compiled artifacts (also holds versions/ and the pointer)."""
+    default = Path(__file__).resolve().parent.parent / "data" / "processed"
+    return Path(os.environ.get("NAVIRA_OUT_DIR", default)) / "new_data"
+
+
+def current_version(root: Optional[Path] = None) -> Optional[str]:
+    """Name of the published version the ``current`` pointer designates."""
+    try:
+        name = ((root or compiled_root()) / CURRENT_NAME).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return name or None
+
+
+def compiled_dir(root: Optional[Path] = None) -> Path:
+    """Directory holding the active artifacts and their manifest.
+
+    This is the published snapshot named by the pointer, or the build
+    directory itself when nothing was published yet.
+    """
+    root = root or compiled_root()
+    name = current_version(root)
+    if name and (root / VERSIONS_DIR / name).is_dir():
+        return root / VERSIONS_DIR / name
+    return root
+
+
+def read_manifest(directory: Optional[Path] = None) -> Optional[dict]:
+    """Return the manifest, or None when nothing was built."""
+    path = (directory or compiled_dir()) / MANIFEST_NAME
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_path(entry: dict, directory: Optional[Path] = None) -> Optional[Path]:
+    """Best existing artifact of a manifest entry: IPC, then Parquet."""
+    base = directory or compiled_dir()
+    for key in ("ipc", "file"):
+        if entry.get(key) and (base / entry[key]).exists():
+            return base / entry[key]
+    return None
+
+
+def write_ipc(table: pa.Table, path: Path) -> None:
+    """Write an uncompressed Arrow IPC file (required for zero-copy mapping)."""
+    tmp = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def open_ipc(path: Path) -> pa.Table:
+    """Open an Arrow IPC file memory-mapped; buffers reference the mapping."""
+    source = pa.memory_map(str(path), "r")
+    return ipc.open_file(source).read_all()
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def publish_version(root: Path, version: str, keep: int = 2) -> Path:
+    """Snapshot the build directory as versions/<version> and point ``current`` at it.
+
+    Build outputs are always replaced (never rewritten in place), so hard
+    links give an immutable snapshot without copying. The snapshot is
+    assembled in a temporary directory and renamed into place before the
+    pointer is swapped; the ``keep`` most recent versions are retained so
+    processes still mapping the previous one are unaffected.
+    """
+    manifest = read_manifest(root)
+    if manifest is None:
+        raise FileNotFoundError(f"{root / MANIFEST_NAME} not found")
+    versions = root / VERSIONS_DIR
+    dest = versions / version
+    if not dest.is_dir():
+        staging = versions / f".{version}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for entry in manifest.get("tables", {}).values():
+            for key in ("file", "ipc"):
+                if entry.get(key) and (root / entry[key]).exists():
+                    _link_or_copy(root / entry[key], staging / entry[key])
+        shutil.copy2(root / MANIFEST_NAME, staging / MANIFEST_NAME)
+        os.replace(staging, dest)
+
+    pointer = root / CURRENT_NAME
+    tmp = pointer.with_name(pointer.name + ".tmp")
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, pointer)
+
+    published = sorted(
+        (d for d in versions.iterdir() if d.is_dir() and not d.name.startswith(".")),
+        key=lambda d: d.stat().st_mtime,
+        reverse=True,
+    )
+    for old in published[keep:]:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    return dest
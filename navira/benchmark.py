@@ -0,0 +1,177 @@
+"""
+Long-format benchmark cube.
+
+Every metric ships as one table per comparison level (TAB_*_HOP_*, _REG_,
+_STATUS_, _NATL_). The cube stacks them into a single table keyed by
+(metric, level, entity, year, category) with numerator / denominator
+columns, so "hospital vs its region vs its status vs national" is one
+lookup in one table (see compare()).
+
+New comparison levels are aggregated from the HOP rows instead of shipping
+new CSVs (see aggregate()); the compiled cube already carries a department
+level built that way.
+"""
+
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+HOP = 'HOP'
+DEP = 'DEP'
+REG = 'REG'
+STATUS = 'STATUS'
+NATL = 'NATL'
+
+LEVELS = (HOP, REG, STATUS, NATL)
+
+# Entity of the national rows
+NATIONAL = 'FR'
+
+# Entity column of each shipped level (NATL has none)
+ENTITY_COLUMNS = {HOP: 'finessGeoDP', REG: 'lib_reg', STATUS: 'statut'}
+
+
+class Metric(NamedTuple):
+    tables: str  # table name pattern, {level} is hop / reg / status / natl
+    num: str  # numerator column
+    den: Optional[str]  # denominator column; None: share of the entity-year total
+    category: Optional[str]  # sub-category column
+
+
+METRICS: Dict[str, Metric] = {
+    'volume': Metric('vol_{level}_year', 'n', None, None),
+    'approach': Metric('app_{level}_year', 'n', None, 'vda'),
+    'procedure': Metric('tcn_{level}_year', 'n', None, 'baria_t'),
+    'complications': Metric('compl_{level}_year', 'COMPL_nb', 'TOT', None),
+    'complication_grade': Metric('compl_grade_{level}_year', 'COMPL_nb', 'TOT', 'clav_cat_90'),
+    'los': Metric('los_{level}', 'LOS_nb', None, 'duree_cat'),
+}
+
+# Counts without a denominator
+COUNT_METRICS = ('volume',)
+
+# Grade rows only exist for grades that occurred, so their aggregated
+# denominator is the procedure total of the 'complications' metric
+SHARED_DENOMINATORS = {'complication_grade': 'complications'}
+
+# Source tables, in the argument order of benchmark_table()
+BENCHMARK_SOURCES: Tuple[str, ...] = tuple(
+    m.tables.format(level=level.lower()) for m in METRICS.values() for level in LEVELS
+) + ('hospitals_redux',)
+
+SCHEMA = pa.schema([
+    ('metric', pa.string()),
+    ('level', pa.string()),
+    ('entity', pa.string()),
+    ('annee', pa.int16()),
+    ('category', pa.string()),
+    ('num', pa.float64()),
+    ('den', pa.float64()),
+])
+
+KEY = ['metric', 'level', 'entity', 'annee', 'category']
+
+
+def _rows(df: pd.DataFrame, metric: str, level: str) -> pd.DataFrame:
+    """Cube rows of one per-level table."""
+    spec = METRICS[metric]
+    entity = ENTITY_COLUMNS.get(level)
+    needed = [c for c in (entity, 'annee', spec.num, spec.den, spec.category) if c]
+    if df.empty or any(c not in df.columns for c in needed):
+        return pd.DataFrame(columns=SCHEMA.names)
+    rows = pd.DataFrame({
+        'metric': metric,
+        'level': level,
+        'entity': df[entity].astype(str).str.strip() if entity else NATIONAL,
+        'annee': pd.to_numeric(df['annee'], errors='coerce'),
+        'category': df[spec.category].astype(str).str.strip() if spec.category else '',
+        'num': pd.to_numeric(df[spec.num], errors='coerce').astype('float64'),
+    })
+    if spec.den:
+        rows['den'] = pd.to_numeric(df[spec.den], errors='coerce').astype('float64')
+    elif metric in COUNT_METRICS:
+        rows['den'] = np.nan
+    else:
+        rows['den'] = rows.groupby(['entity', 'annee'])['num'].transform('sum')
+    return rows.dropna(subset=['annee'])
+
+
+def aggregate(cube: pd.DataFrame, groups: Mapping[str, str], level: str) -> pd.DataFrame:
+    """Roll the HOP rows up to a new level.
+
+    ``groups`` maps FINESS to the new level's entity (department, cohort...);
+    hospitals without a group are left out. Numerators are summed; each
+    denominator is rebuilt the way its metric defines it. The rows come back
+    sorted like the cube, so compare() works on them directly.
+    """
+    hop = cube[cube['level'] == HOP]
+    entity = hop['entity'].map(groups)
+    hop = hop.assign(entity=entity, level=level)[entity.notna()]
+    if hop.empty:
+        return pd.DataFrame(columns=SCHEMA.names)
+    out = hop.groupby(KEY, as_index=False, sort=False)[['num', 'den']].sum(min_count=1)
+
+    # Shares: total of the group's categories
+    share = out['metric'].isin([m for m, s in METRICS.items() if s.den is None and m not in COUNT_METRICS])
+    totals = out.groupby(['metric', 'entity', 'annee'])['num'].transform('sum')
+    out.loc[share, 'den'] = totals[share]
+
+    # Sparse categories: denominator of the metric they share it with
+    for metric, base in SHARED_DENOMINATORS.items():
+        rows = out['metric'] == metric
+        base_den = out[out['metric'] == base].set_index(['entity', 'annee'])['den']
+        keys = pd.MultiIndex.from_frame(out.loc[rows, ['entity', 'annee']])
+        out.loc[rows, 'den'] = base_den.reindex(keys).to_numpy()
+    return out.sort_values(KEY, kind='stable', ignore_index=True)
+
+
+def benchmark_table(*frames: pd.DataFrame) -> pa.Table:
+    """Build the cube from the per-level tables (see BENCHMARK_SOURCES)."""
+    *tables, hospitals = frames
+    parts: List[pd.DataFrame] = []
+    it = iter(tables)
+    for metric in METRICS:
+        for level in LEVELS:
+            parts.append(_rows(next(it), metric, level))
+    parts = [p for p in parts if not p.empty]
+    cube = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=SCHEMA.names)
+
+    if not hospitals.empty and {'finessGeo', 'code_dep'} <= set(hospitals.columns):
+        departments = hospitals.drop_duplicates('finessGeo').set_index('finessGeo')['code_dep'].dropna()
+        cube = pd.concat([cube, aggregate(cube, departments.astype(str), DEP)], ignore_index=True)
+
+    cube = cube.sort_values(KEY, kind='stable', ignore_index=True)
+    cube['annee'] = cube['annee'].astype('int16')
+    return pa.Table.from_pandas(cube[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+
+def compare(cube: pd.DataFrame, metric: str, entities: Mapping[str, Optional[str]],
+            category: Optional[str] = None) -> pd.DataFrame:
+    """Rows of ``metric`` for several (level, entity) pairs at once.
+
+    ``entities`` maps a level to its entity, e.g. ``{HOP: finess, REG: region,
+    STATUS: status, NATL: NATIONAL}``; levels mapped to None are skipped. The
+    cube is sorted by metric, so the metric is a binary-search slice and the
+    entities a single mask over it. A ``value`` column holds num / den in
+    percent, or the count itself for count metrics.
+    """
+    if cube.empty:
+        return pd.DataFrame(columns=SCHEMA.names + ['value'])
+    metrics = cube['metric'].to_numpy()
+    lo, hi = np.searchsorted(metrics, metric, side='left'), np.searchsorted(metrics, metric, side='right')
+    rows = cube.iloc[lo:hi]
+    mask = np.zeros(len(rows), dtype=bool)
+    level, entity = rows['level'].to_numpy(), rows['entity'].to_numpy()
+    for lvl, ent in entities.items():
+        if ent is not None and str(ent):
+            mask |= (level == lvl) & (entity == str(ent))
+    if category is not None:
+        mask &= rows['category'].to_numpy() == str(category)
+    rows = rows[mask]
+    if metric in COUNT_METRICS:
+        value = rows['num']
+    else:
+        value = (rows['num'] / rows['den'].where(rows['den'] > 0) * 100.0)
+    return rows.assign(value=value.astype('float64'))
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, Iterable, List, Literal, Optional, Tuple
+from typing import Dict, Iterable, List, Literal, Mapping, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
 
+from .postal_mapping import HASH_FUNCS as MAPPING_HASH_FUNCS, PostalInseeMapping
+from .recruitment import RecruitmentMatrix
+
 
 AllocationMode = Literal["even_split", "no_split"]
 
@@ -101,13 +104,11 @@ def load_communes_csv(path: str) -> pd.DataFrame:
     return df[["insee", "postal", "name", "latitude", "longitude"]]
 
 
-@st.cache_data(show_spinner=False)
-def build_cp_to_insee(communes_csv_path: str) -> Dict[str, List[str]]:
+@st.cache_resource(show_spinner=False)
+def build_cp_to_insee(communes_csv_path: str) -> PostalInseeMapping:
+    # A shared resource: cached functions taking it hash its version token only
     cities = load_communes_csv(communes_csv_path)
-    mapping: Dict[str, List[str]] = {}
-    for postal, group in cities.groupby("postal"):
-        mapping[postal] = group["insee"].dropna().astype(str).tolist()
-    return mapping
+    return PostalInseeMapping.from_communes(cities, "postal", "insee", arrondissements=False)
 
 
 @st.cache_data(show_spinner=False)
@@ -127,17 +128,26 @@ def get_top_competitors(
     return filt["competitor_id"].dropna().astype(str).head(n).tolist()
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False, hash_funcs=MAPPING_HASH_FUNCS)
+def build_recruitment_matrix(
+    recruitment_csv_path: str, cp_to_insee: Mapping[str, List[str]]
+) -> RecruitmentMatrix:
+    # Every hospital's choropleth at once (both allocations); keyed on path + mapping version
+    mapping = cp_to_insee if isinstance(cp_to_insee, PostalInseeMapping) else PostalInseeMapping.from_dict(cp_to_insee)
+    rec = load_recruitment_csv(recruitment_csv_path)
+    return RecruitmentMatrix.from_frame(rec, mapping, "finess", "postal", "nb_patients")
+
+
+@st.cache_data(show_spinner=False, hash_funcs=MAPPING_HASH_FUNCS)
 def competitor_choropleth_df(
     recruitment_csv_path: str,
     competitor_finess: str,
-    cp_to_insee: Dict[str, List[str]],
+    cp_to_insee: Mapping[str, List[str]],
     allocation: AllocationMode = "even_split",
 ) -> Tuple[pd.DataFrame, Dict[str, object]]:
-    comp9 = str(competitor_finess).strip().zfill(9)
-    rec = load_recruitment_csv(recruitment_csv_path)
-    rec = rec[rec["finess"] == comp9].copy()
-    if rec.empty:
+    matrix = build_recruitment_matrix(recruitment_csv_path, cp_to_insee)
+    stats = matrix.stats(competitor_finess, allocation)
+    if stats is None:
         return pd.DataFrame(columns=["insee5", "value"]), {
             "rows": 0,
             "cp_missing": 0,
@@ -146,43 +156,14 @@ def competitor_choropleth_df(
             "total_alloc": 0.0,
         }
 
-    total_nb = float(rec["nb_patients"].sum())
-    rec["cp"] = rec["postal"].astype(str)
-
-    # Map postal to insee list
-    rec["insee_list"] = rec["cp"].map(lambda cp: cp_to_insee.get(cp, []))
-    unmapped = rec[rec["insee_list"].map(len) == 0]["cp"].unique().tolist()
-
-    # Explode mapping
-    exploded = rec.explode("insee_list")
-    exploded = exploded.dropna(subset=["insee_list"]).copy()
-    exploded["insee5"] = exploded["insee_list"].astype(str).str.zfill(5)
-
-    if allocation == "no_split":
-        exploded["alloc"] = exploded["nb_patients"].astype(float)
-    else:
-        # even_split
-        counts = (
-            rec.assign(num_insee=rec["insee_list"].map(len))[["cp", "num_insee"]]
-            .drop_duplicates()
-            .set_index("cp")
-        )
-        exploded = exploded.join(counts, on="cp")
-        exploded["num_insee"] = exploded["num_insee"].replace(0, 1)
-        exploded["alloc"] = exploded["nb_patients"].astype(float) / exploded[
-            "num_insee"
-        ]
-
-    agg = (
-        exploded.groupby("insee5", as_index=False)["alloc"].sum().rename(columns={"alloc": "value"})
-    )
+    # A row slice of the matrix
+    agg = matrix.row(competitor_finess, allocation)
+    unmapped = pd.unique(stats.unmatched).tolist()
     diagnostics = {
-        "rows": int(len(rec)),
+        "rows": stats.rows,
         "cp_missing": int(len(unmapped)),
         "cp_unmapped": unmapped[:10],
-        "total_nb": float(total_nb),
+        "total_nb": stats.total,
         "total_alloc": float(agg["value"].sum()),
     }
     return agg, diagnostics
-
-
@@ -8,10 +8,13 @@ This module provides functionality for:
 - Diagnostics for data quality assessment
 """
 
+import os
 import pandas as pd
 import streamlit as st
-from typing import Dict, List, Tuple, Literal, NamedTuple
+from typing import Dict, List, Mapping, Tuple, Literal, NamedTuple
 from .data_loaders import load_recruitment_data, load_competitors_data
+from .postal_mapping import HASH_FUNCS as MAPPING_HASH_FUNCS, PostalInseeMapping
+from .recruitment import RecruitmentMatrix
 
 
 class ChloroplethDiagnostics(NamedTuple):
@@ -74,10 +77,53 @@ def get_top_competitors(finess: str, n: int = 5) -> List[str]:
         return []
 
 
-@st.cache_data
+_EMPTY_DIAGNOSTICS = ChloroplethDiagnostics(0, 0, 0, [], 0.0, 0.0, 0.0)
+
+
+@st.cache_resource(show_spinner=False, hash_funcs=MAPPING_HASH_FUNCS)
+def _build_recruitment_matrix(file_path: str, mtime: float, cp_to_insee: Mapping[str, List[str]]) -> RecruitmentMatrix:
+    # Keyed on path + mtime + mapping version: nothing is hashed per call
+    mapping = cp_to_insee if isinstance(cp_to_insee, PostalInseeMapping) else PostalInseeMapping.from_dict(cp_to_insee)
+    return RecruitmentMatrix.from_frame(load_recruitment_data(file_path), mapping)
+
+
+def get_recruitment_matrix(cp_to_insee: Mapping[str, List[str]],
+                           file_path: str = "data/11_recruitement_zone.csv") -> RecruitmentMatrix:
+    """
+    Hospital x commune recruitment matrix of every hospital (both allocations).
+    
+    Built once per recruitment file version and mapping version with
+    vectorized ops, and shared by every session; choropleths are row slices
+    of it.
+    """
+    try:
+        mtime = os.path.getmtime(file_path)
+    except OSError:
+        mtime = 0.0
+    return _build_recruitment_matrix(file_path, mtime, cp_to_insee)
+
+
+def _choropleth(matrix: RecruitmentMatrix, finess: str, allocation: str) -> Tuple[pd.DataFrame, ChloroplethDiagnostics]:
+    stats = matrix.stats(finess, allocation)
+    if stats is None:
+        return pd.DataFrame(columns=['insee5', 'value']), _EMPTY_DIAGNOSTICS
+    unmatched = stats.unmatched.tolist()
+    diagnostics = ChloroplethDiagnostics(
+        total_cps=stats.rows,
+        matched_cps=stats.rows - len(unmatched),
+        unmatched_cps=len(unmatched),
+        unmatched_cp_examples=unmatched[:10],  # Show max 10 examples
+        original_total=stats.total,
+        allocated_total=stats.allocated,
+        allocation_difference=stats.allocated - stats.total
+    )
+    return matrix.row(finess, allocation), diagnostics
+
+
+@st.cache_data(hash_funcs=MAPPING_HASH_FUNCS)
 def competitor_choropleth_df(
     competitor_finess: str, 
-    cp_to_insee: Dict[str, List[str]],
+    cp_to_insee: Mapping[str, List[str]],
     allocation: Literal["even_split", "no_split"] = "even_split"
 ) -> Tuple[pd.DataFrame, ChloroplethDiagnostics]:
     """
@@ -85,7 +131,9 @@ def competitor_choropleth_df(
     
     Args:
         competitor_finess: 9-digit FINESS code of the competitor
-        cp_to_insee: Mapping from postal code to list of INSEE codes
+        cp_to_insee: Mapping from postal code to list of INSEE codes; pass the
+            shared PostalInseeMapping (get_postal_insee_mapping) so the cache is
+            keyed on its version token instead of hashing every entry
         allocation: Strategy for handling multiple INSEE codes per postal code
             - "even_split": divide patient count evenly among mapped INSEE codes
             - "no_split": assign full patient count to all mapped INSEE codes
@@ -96,101 +144,35 @@ def competitor_choropleth_df(
         - ChloroplethDiagnostics with mapping statistics and quality metrics
         
     Notes:
-        - Input postal codes are mapped to INSEE codes using cp_to_insee
-        - Final values are grouped by INSEE code and summed
-        - Diagnostics track data quality and allocation accuracy
+        - A row slice of the recruitment matrix (get_recruitment_matrix)
+        - Values are summed per INSEE code, diagnostics track data quality and
+          allocation accuracy
     """
     try:
-        recruitment_df = load_recruitment_data()
-        
-        if recruitment_df.empty:
-            empty_diag = ChloroplethDiagnostics(0, 0, 0, [], 0.0, 0.0, 0.0)
-            return pd.DataFrame(columns=['insee5', 'value']), empty_diag
-        
-        # Ensure FINESS is properly formatted
-        competitor_finess = str(competitor_finess).zfill(9)
-        
-        # Filter recruitment data for this competitor
-        competitor_data = recruitment_df[
-            recruitment_df['finessGeoDP'] == competitor_finess
-        ].copy()
-        
-        if competitor_data.empty:
-            empty_diag = ChloroplethDiagnostics(0, 0, 0, [], 0.0, 0.0, 0.0)
-            return pd.DataFrame(columns=['insee5', 'value']), empty_diag
-        
-        # Calculate diagnostics
-        total_cps = len(competitor_data)
-        original_total = competitor_data['nb'].sum()
-        
-        # Map postal codes to INSEE codes
-        mapped_rows = []
-        unmatched_cps = []
-        paris_debug = []
-        
-        for _, row in competitor_data.iterrows():
-            postal_code = str(row['codeGeo']).zfill(5)
-            patient_count = float(row['nb']) if pd.notna(row['nb']) else 0.0
-            
-            # Debug Paris data
-            if postal_code.startswith('750'):
-                paris_debug.append(f"{postal_code} -> {cp_to_insee.get(postal_code, 'NOT FOUND')}")
-            
-            if postal_code in cp_to_insee:
-                insee_codes = cp_to_insee[postal_code]
-                
-                if allocation == "even_split":
-                    # Divide patient count evenly among INSEE codes
-                    alloc_value = patient_count / len(insee_codes) if insee_codes else 0.0
-                    for insee in insee_codes:
-                        mapped_rows.append({
-                            'insee5': str(insee).zfill(5),
-                            'value': alloc_value
-                        })
-                else:  # no_split
-                    # Assign full patient count to all INSEE codes
-                    for insee in insee_codes:
-                        mapped_rows.append({
-                            'insee5': str(insee).zfill(5), 
-                            'value': patient_count
-                        })
-            else:
-                unmatched_cps.append(postal_code)
-        
-        # Create result dataframe
-        if mapped_rows:
-            result_df = pd.DataFrame(mapped_rows)
-            # Group by INSEE and sum values
-            result_df = result_df.groupby('insee5')['value'].sum().reset_index()
-        else:
-            result_df = pd.DataFrame(columns=['insee5', 'value'])
-        
-        # Calculate final diagnostics
-        matched_cps = total_cps - len(unmatched_cps)
-        allocated_total = result_df['value'].sum() if not result_df.empty else 0.0
-        allocation_diff = allocated_total - original_total
-        
-        # Limit unmatched examples for display
-        unmatched_examples = unmatched_cps[:10]  # Show max 10 examples
-        
-        # Suppress Paris debug logs in production
-        
-        diagnostics = ChloroplethDiagnostics(
-            total_cps=total_cps,
-            matched_cps=matched_cps,
-            unmatched_cps=len(unmatched_cps),
-            unmatched_cp_examples=unmatched_examples,
-            original_total=original_total,
-            allocated_total=allocated_total,
-            allocation_difference=allocation_diff
-        )
-        
-        return result_df, diagnostics
-        
+        return _choropleth(get_recruitment_matrix(cp_to_insee), str(competitor_finess).zfill(9), allocation)
     except Exception as e:
         st.warning(f"Error generating choropleth for competitor {competitor_finess}: {e}")
-        empty_diag = ChloroplethDiagnostics(0, 0, 0, [], 0.0, 0.0, 0.0)
-        return pd.DataFrame(columns=['insee5', 'value']), empty_diag
+        return pd.DataFrame(columns=['insee5', 'value']), _EMPTY_DIAGNOSTICS
+
+
+def competitor_choropleths(
+    finess_codes: List[str],
+    cp_to_insee: Mapping[str, List[str]],
+    allocation: Literal["even_split", "no_split"] = "even_split"
+) -> Dict[str, Tuple[pd.DataFrame, ChloroplethDiagnostics]]:
+    """
+    Choropleth data of several hospitals (e.g. a hospital and its competitors) at once.
+    
+    Returns:
+        Dictionary mapping FINESS -> (DataFrame[insee5, value], ChloroplethDiagnostics),
+        in the order given, all sliced from one recruitment matrix
+    """
+    try:
+        matrix = get_recruitment_matrix(cp_to_insee)
+        return {finess: _choropleth(matrix, str(finess).zfill(9), allocation) for finess in finess_codes}
+    except Exception as e:
+        st.warning(f"Error generating choropleths: {e}")
+        return {finess: (pd.DataFrame(columns=['insee5', 'value']), _EMPTY_DIAGNOSTICS) for finess in finess_codes}
 
 
 def format_diagnostics_summary(diag: ChloroplethDiagnostics) -> str:
@@ -9,6 +9,11 @@ import streamlit as st
 from typing import Dict, Optional, Tuple
 import numpy as np
 
+from .csv_encoding import read_csv_sniffed
+from .finess_index import hospital_rows, sort_by_finess
+from .schema import read_tab
+from .store import data_version, on_version_change
+
 # Get the absolute path to the directory of the current script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -18,21 +23,11 @@ complications_data_dir = os.path.join(script_dir, '..', 'new_data', 'COMPLICATIO
 geography_data_dir = os.path.join(script_dir, '..', 'new_data', 'GEOGRAPHY')
 
 def _read_csv_with_fallback(path: str, sep: str = ',', decimal: str = '.') -> pd.DataFrame:
-    """Read CSV with multiple encoding attempts and French decimal handling."""
-    encodings = ["utf-8", "cp1252", "latin1"]
-    last_err = None
-    for enc in encodings:
-        try:
-            kwargs = {'sep': sep, 'encoding': enc}
-            if decimal is not None:
-                kwargs['decimal'] = decimal
-            return pd.read_csv(path, **kwargs)
-        except Exception as e:
-            last_err = e
-            continue
-    if last_err:
-        raise last_err
-    raise FileNotFoundError(path)
+    """Read CSV once, with its sniffed (and cached) encoding and French decimal handling."""
+    kwargs = {'sep': sep}
+    if decimal is not None:
+        kwargs['decimal'] = decimal
+    return read_csv_sniffed(path, **kwargs)
 
 @st.cache_data(show_spinner=False)
 def load_establishments_from_csv() -> pd.DataFrame:
@@ -43,38 +38,13 @@ def load_establishments_from_csv() -> pd.DataFrame:
         data_dir = os.path.join(script_dir, '..', 'data')
         hospitals_path = os.path.join(data_dir, "01_hospitals.csv")
         
-        df = _read_csv_with_fallback(hospitals_path, sep=';')
-        
-        # Normalize column names
-        rename_map = {
-            'finessGeo': 'id',
-            'rs': 'name',
-            'ville': 'city',
-            'lib_dep': 'department',
-            'lib_reg': 'region',
-            'statut': 'status'
-        }
-        
-        for old_col, new_col in rename_map.items():
-            if old_col in df.columns:
-                df = df.rename(columns={old_col: new_col})
-        
-        # Ensure proper data types
-        if 'id' in df.columns:
-            df['id'] = df['id'].astype(str)
-        
-        # Convert coordinates if present
-        for coord_col in ['latitude', 'longitude']:
-            if coord_col in df.columns:
-                df[coord_col] = pd.to_numeric(df[coord_col], errors='coerce')
-        
-        return df
+        return read_tab(hospitals_path, 'establishments', sep=';')
     except Exception as e:
         st.error(f"Error loading establishments: {e}")
         return pd.DataFrame()
 
 @st.cache_data(show_spinner=False)
-def load_app_data() -> Dict[str, pd.DataFrame]:
+def load_app_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load surgical approach data (APP files)."""
     app_files = {
         'HOP': 'TAB_APP_HOP_YEAR.csv',
@@ -87,32 +57,7 @@ def load_app_data() -> Dict[str, pd.DataFrame]:
     for level, filename in app_files.items():
         try:
             filepath = os.path.join(activity_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'annee': 'year',
-                'vda': 'approach',
-                'n': 'count',
-                'pct': 'percentage'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            if 'year' in df.columns:
-                df['year'] = pd.to_numeric(df['year'], errors='coerce')
-            if 'count' in df.columns:
-                df['count'] = pd.to_numeric(df['count'], errors='coerce')
-            if 'percentage' in df.columns:
-                df['percentage'] = pd.to_numeric(df['percentage'], errors='coerce')
-            
-            app_data[level] = df
+            app_data[level] = sort_by_finess(read_tab(filepath, 'app'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             app_data[level] = pd.DataFrame()
@@ -120,7 +65,7 @@ def load_app_data() -> Dict[str, pd.DataFrame]:
     return app_data
 
 @st.cache_data(show_spinner=False)
-def load_rev_data() -> Dict[str, pd.DataFrame]:
+def load_rev_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load revision surgery data (REV files)."""
     rev_files = {
         'HOP': 'TAB_REV_HOP.csv',
@@ -137,31 +82,7 @@ def load_rev_data() -> Dict[str, pd.DataFrame]:
     for level, filename in rev_files.items():
         try:
             filepath = os.path.join(activity_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'annee': 'year',
-                'redo': 'is_revision',
-                'n': 'count'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            if 'year' in df.columns:
-                df['year'] = pd.to_numeric(df['year'], errors='coerce')
-            if 'is_revision' in df.columns:
-                df['is_revision'] = pd.to_numeric(df['is_revision'], errors='coerce')
-            if 'count' in df.columns:
-                df['count'] = pd.to_numeric(df['count'], errors='coerce')
-            
-            rev_data[level] = df
+            rev_data[level] = sort_by_finess(read_tab(filepath, 'rev'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             rev_data[level] = pd.DataFrame()
@@ -169,7 +90,7 @@ def load_rev_data() -> Dict[str, pd.DataFrame]:
     return rev_data
 
 @st.cache_data(show_spinner=False)
-def load_tcn_data() -> Dict[str, pd.DataFrame]:
+def load_tcn_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load procedure type data (TCN files)."""
     tcn_files = {
         'HOP': 'TAB_TCN_HOP.csv',
@@ -191,32 +112,7 @@ def load_tcn_data() -> Dict[str, pd.DataFrame]:
     for level, filename in tcn_files.items():
         try:
             filepath = os.path.join(activity_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'annee': 'year',
-                'baria_t': 'procedure_type',
-                'n': 'count',
-                'pct': 'percentage'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            if 'year' in df.columns:
-                df['year'] = pd.to_numeric(df['year'], errors='coerce')
-            if 'count' in df.columns:
-                df['count'] = pd.to_numeric(df['count'], errors='coerce')
-            if 'percentage' in df.columns:
-                df['percentage'] = pd.to_numeric(df['percentage'], errors='coerce')
-            
-            tcn_data[level] = df
+            tcn_data[level] = sort_by_finess(read_tab(filepath, 'tcn'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             tcn_data[level] = pd.DataFrame()
@@ -224,7 +120,7 @@ def load_tcn_data() -> Dict[str, pd.DataFrame]:
     return tcn_data
 
 @st.cache_data(show_spinner=False)
-def load_vol_data() -> Dict[str, pd.DataFrame]:
+def load_vol_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load volume data (VOL files)."""
     vol_files = {
         'HOP_YEAR': 'TAB_VOL_HOP_YEAR.csv',
@@ -238,31 +134,7 @@ def load_vol_data() -> Dict[str, pd.DataFrame]:
     for level, filename in vol_files.items():
         try:
             filepath = os.path.join(activity_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'annee': 'year',
-                'mois': 'month',
-                'n': 'count'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            if 'year' in df.columns:
-                df['year'] = pd.to_numeric(df['year'], errors='coerce')
-            if 'month' in df.columns:
-                df['month'] = pd.to_numeric(df['month'], errors='coerce')
-            if 'count' in df.columns:
-                df['count'] = pd.to_numeric(df['count'], errors='coerce')
-            
-            vol_data[level] = df
+            vol_data[level] = sort_by_finess(read_tab(filepath, 'vol'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             vol_data[level] = pd.DataFrame()
@@ -270,42 +142,17 @@ def load_vol_data() -> Dict[str, pd.DataFrame]:
     return vol_data
 
 @st.cache_data(show_spinner=False)
-def load_rob_data() -> pd.DataFrame:
+def load_rob_data(version: Optional[str] = None) -> pd.DataFrame:
     """Load robotic surgery data."""
     try:
         filepath = os.path.join(activity_data_dir, 'TAB_ROB_HOP_12M.csv')
-        df = _read_csv_with_fallback(filepath, sep=',')
-        
-        # Normalize column names
-        rename_map = {
-            'finessGeoDP': 'hospital_id',
-            'vda': 'approach',
-            'n': 'count',
-            'TOT': 'total',
-            'PCT_app': 'percentage'
-        }
-        
-        for old_col, new_col in rename_map.items():
-            if old_col in df.columns:
-                df = df.rename(columns={old_col: new_col})
-        
-        # Ensure proper data types
-        if 'hospital_id' in df.columns:
-            df['hospital_id'] = df['hospital_id'].astype(str)
-        if 'count' in df.columns:
-            df['count'] = pd.to_numeric(df['count'], errors='coerce')
-        if 'total' in df.columns:
-            df['total'] = pd.to_numeric(df['total'], errors='coerce')
-        if 'percentage' in df.columns:
-            df['percentage'] = pd.to_numeric(df['percentage'], errors='coerce')
-        
-        return df
+        return sort_by_finess(read_tab(filepath, 'rob'))
     except Exception as e:
         st.warning(f"Could not load robotic surgery data: {e}")
         return pd.DataFrame()
 
 @st.cache_data(show_spinner=False)
-def load_trend_data() -> Dict[str, pd.DataFrame]:
+def load_trend_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load trend data (TREND files)."""
     trend_files = {
         'HOP': 'TAB_TREND_HOP.csv',
@@ -318,28 +165,7 @@ def load_trend_data() -> Dict[str, pd.DataFrame]:
     for level, filename in trend_files.items():
         try:
             filepath = os.path.join(activity_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'Vol_2024': 'volume_2024',
-                'Vol_2025': 'volume_2025',
-                'diff_pct': 'change_percentage'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            for col in ['volume_2024', 'volume_2025', 'change_percentage']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            trend_data[level] = df
+            trend_data[level] = sort_by_finess(read_tab(filepath, 'trend'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             trend_data[level] = pd.DataFrame()
@@ -357,21 +183,28 @@ def load_dictionary() -> pd.DataFrame:
         st.warning(f"Could not load dictionary: {e}")
         return pd.DataFrame()
 
+def _evict_version(version: Optional[str]) -> None:
+    """Drop the new_data loader entries cached for a retired data version."""
+    for loader in (load_app_data, load_rev_data, load_tcn_data, load_vol_data, load_rob_data,
+                   load_trend_data, load_complications_data, load_los_data, load_never_events_data):
+        loader.clear(version)
+
 def get_csv_dataframes():
     """Get all CSV dataframes - main entry point."""
+    version = data_version()
     establishments = load_establishments_from_csv()
-    app_data = load_app_data()
-    rev_data = load_rev_data()
-    tcn_data = load_tcn_data()
-    vol_data = load_vol_data()
-    rob_data = load_rob_data()
-    trend_data = load_trend_data()
+    app_data = load_app_data(version)
+    rev_data = load_rev_data(version)
+    tcn_data = load_tcn_data(version)
+    vol_data = load_vol_data(version)
+    rob_data = load_rob_data(version)
+    trend_data = load_trend_data(version)
     dictionary = load_dictionary()
     
     # Load new data sources
-    complications_data = load_complications_data()
-    los_data = load_los_data()
-    never_events_data = load_never_events_data()
+    complications_data = load_complications_data(version)
+    los_data = load_los_data(version)
+    never_events_data = load_never_events_data(version)
     
     return {
         'establishments': establishments,
@@ -391,7 +224,7 @@ def get_annual_procedures_from_csv():
     """Create annual procedures dataframe from CSV data for compatibility."""
     try:
         # Use HOP_YEAR volume data as the base
-        vol_data = load_vol_data()
+        vol_data = load_vol_data(data_version())
         vol_hop_year = vol_data.get('HOP_YEAR', pd.DataFrame())
         
         if vol_hop_year.empty:
@@ -442,7 +275,7 @@ def get_procedure_mix_data(hospital_id: str = None, level: str = 'HOP') -> pd.Da
             df = tcn_data.get('HOP_YEAR', pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"tcn_data/{level}", version=data_version())
         
         return df
     except Exception as e:
@@ -468,7 +301,7 @@ def get_surgical_approaches_data(hospital_id: str = None, level: str = 'HOP') ->
             df = app_data.get('HOP', pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"app_data/{level}", version=data_version())
         
         return df
     except Exception as e:
@@ -494,7 +327,7 @@ def get_revision_data(hospital_id: str = None, level: str = 'HOP') -> pd.DataFra
             df = rev_data.get('HOP', pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"rev_data/{level}", version=data_version())
         
         # Filter for revision surgeries only
         if 'is_revision' in df.columns:
@@ -524,7 +357,7 @@ def get_volume_data(hospital_id: str = None, level: str = 'HOP') -> pd.DataFrame
             df = vol_data.get('HOP_YEAR', pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"vol_data/{level}", version=data_version())
         
         return df
     except Exception as e:
@@ -538,7 +371,7 @@ def get_robotic_surgery_data(hospital_id: str = None) -> pd.DataFrame:
         rob_data = csv_data['rob_data']
         
         if hospital_id and 'hospital_id' in rob_data.columns:
-            rob_data = rob_data[rob_data['hospital_id'] == hospital_id]
+            rob_data = hospital_rows(rob_data, hospital_id, "rob_data", version=data_version())
         
         return rob_data
     except Exception as e:
@@ -564,7 +397,7 @@ def get_trend_data(hospital_id: str = None, level: str = 'HOP') -> pd.DataFrame:
             df = trend_data.get('HOP', pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"trend_data/{level}", version=data_version())
         
         return df
     except Exception as e:
@@ -589,7 +422,7 @@ def get_complications_data(hospital_id: str = None, level: str = 'HOP', timefram
         df = complications_data.get(key, pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"complications_data/{key}", version=data_version())
         
         return df
     except Exception as e:
@@ -607,7 +440,7 @@ def get_los_data(hospital_id: str = None, level: str = 'HOP', extended: bool = F
         df = los_data.get(key, pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"los_data/{key}", version=data_version())
         
         return df
     except Exception as e:
@@ -624,7 +457,7 @@ def get_never_events_data(hospital_id: str = None, level: str = 'HOP') -> pd.Dat
         df = never_events_data.get(level, pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"never_events_data/{level}", version=data_version())
         
         return df
     except Exception as e:
@@ -642,7 +475,7 @@ def get_complications_grade_data(hospital_id: str = None, level: str = 'HOP') ->
         df = complications_data.get(key, pd.DataFrame())
         
         if hospital_id and 'hospital_id' in df.columns:
-            df = df[df['hospital_id'] == hospital_id]
+            df = hospital_rows(df, hospital_id, f"complications_data/{key}", version=data_version())
         
         return df
     except Exception as e:
@@ -652,7 +485,7 @@ def get_complications_grade_data(hospital_id: str = None, level: str = 'HOP') ->
 # New data loading functions for complications, LOS, and Never Events
 
 @st.cache_data(show_spinner=False)
-def load_complications_data() -> Dict[str, pd.DataFrame]:
+def load_complications_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load complications data from all levels and timeframes."""
     complications_files = {
         'HOP_YEAR': 'TAB_COMPL_HOP_YEAR.csv',
@@ -673,43 +506,7 @@ def load_complications_data() -> Dict[str, pd.DataFrame]:
     for level, filename in complications_files.items():
         try:
             filepath = os.path.join(complications_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'annee': 'year',
-                'date': 'date',
-                'mois': 'month',
-                'TOT': 'total_procedures',
-                'COMPL_nb': 'complications_count',
-                'COMPL_pct': 'complications_percentage',
-                'COMPL_pct_roll12': 'complications_percentage_rolling',
-                'clav_cat_90': 'clavien_grade'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            if 'year' in df.columns:
-                df['year'] = pd.to_numeric(df['year'], errors='coerce')
-            if 'month' in df.columns:
-                df['month'] = pd.to_numeric(df['month'], errors='coerce')
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            
-            # Convert numeric columns
-            numeric_cols = ['total_procedures', 'complications_count', 'complications_percentage', 
-                           'complications_percentage_rolling', 'clavien_grade']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            complications_data[level] = df
+            complications_data[level] = sort_by_finess(read_tab(filepath, 'complications'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             complications_data[level] = pd.DataFrame()
@@ -717,7 +514,7 @@ def load_complications_data() -> Dict[str, pd.DataFrame]:
     return complications_data
 
 @st.cache_data(show_spinner=False)
-def load_los_data() -> Dict[str, pd.DataFrame]:
+def load_los_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load length of stay data from all levels."""
     los_files = {
         'HOP': 'TAB_LOS_HOP.csv',
@@ -734,38 +531,7 @@ def load_los_data() -> Dict[str, pd.DataFrame]:
     for level, filename in los_files.items():
         try:
             filepath = os.path.join(complications_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'annee': 'year',
-                'duree_cat': 'duration_category',
-                'LOS_nb': 'los_count',
-                'LOS_pct': 'los_percentage',
-                'TOT': 'total_procedures',
-                'LOS_7_nb': 'los_7_count',
-                'LOS_7_pct': 'los_7_percentage'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            if 'year' in df.columns:
-                df['year'] = pd.to_numeric(df['year'], errors='coerce')
-            
-            # Convert numeric columns
-            numeric_cols = ['total_procedures', 'los_count', 'los_percentage', 
-                           'los_7_count', 'los_7_percentage']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            los_data[level] = df
+            los_data[level] = sort_by_finess(read_tab(filepath, 'los'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             los_data[level] = pd.DataFrame()
@@ -773,7 +539,7 @@ def load_los_data() -> Dict[str, pd.DataFrame]:
     return los_data
 
 @st.cache_data(show_spinner=False)
-def load_never_events_data() -> Dict[str, pd.DataFrame]:
+def load_never_events_data(version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
     """Load Never Events data from all levels."""
     never_files = {
         'HOP': 'TAB_NEVER_HOP.csv',
@@ -786,33 +552,11 @@ def load_never_events_data() -> Dict[str, pd.DataFrame]:
     for level, filename in never_files.items():
         try:
             filepath = os.path.join(complications_data_dir, filename)
-            df = _read_csv_with_fallback(filepath, sep=',')
-            
-            # Normalize column names
-            rename_map = {
-                'finessGeoDP': 'hospital_id',
-                'TOT': 'total_procedures',
-                'NEVER_nb': 'never_events_count',
-                'NEVER_pct': 'never_events_percentage'
-            }
-            
-            for old_col, new_col in rename_map.items():
-                if old_col in df.columns:
-                    df = df.rename(columns={old_col: new_col})
-            
-            # Ensure proper data types
-            if 'hospital_id' in df.columns:
-                df['hospital_id'] = df['hospital_id'].astype(str)
-            
-            # Convert numeric columns
-            numeric_cols = ['total_procedures', 'never_events_count', 'never_events_percentage']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            never_data[level] = df
+            never_data[level] = sort_by_finess(read_tab(filepath, 'never'))
         except Exception as e:
             st.warning(f"Could not load {filename}: {e}")
             never_data[level] = pd.DataFrame()
     
     return never_data
+
+on_version_change(_evict_version)
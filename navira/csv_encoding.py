@@ -0,0 +1,132 @@
+"""
+Encoding detection for the raw CSV inputs.
+
+The legacy data/*.csv files are a mix of UTF-8 and Windows-1252. Instead of
+re-parsing a file once per candidate encoding, the encoding is sniffed from
+the raw bytes and remembered per file (path, mtime, size):
+- in-process, and
+- in a sidecar JSON next to the files, so cold starts skip the sniff too
+
+Each file is then parsed exactly once.
+"""
+
+import codecs
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_NAME = ".navira_encodings.json"
+
+# Bytes read per sniff step; ASCII-only blocks are skipped until a decisive byte shows up
+SNIFF_BYTES = 64 * 1024
+
+# Bytes that are undefined in cp1252; their presence means plain latin1
+_CP1252_UNDEFINED = frozenset(b"\x81\x8d\x8f\x90\x9d")
+
+_memo: Dict[str, Tuple[float, int, str]] = {}
+_lock = threading.Lock()
+
+
+def sniff_encoding(path: str) -> str:
+    """Detect the encoding of a file from its first non-ASCII bytes."""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        sample = head
+        while sample.isascii():
+            block = f.read(SNIFF_BYTES)
+            if not block:
+                return "utf-8"
+            sample = block
+    try:
+        # Incremental decode tolerates a multi-byte sequence cut at the block end
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if _CP1252_UNDEFINED.isdisjoint(sample):
+        return "cp1252"
+    return "latin1"
+
+
+def _stat(path: str) -> Tuple[float, int]:
+    st = os.stat(path)
+    return st.st_mtime, st.st_size
+
+
+def _sidecar_path(path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(path)), SIDECAR_NAME)
+
+
+def _read_sidecar(sidecar: str) -> dict:
+    try:
+        with open(sidecar, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_sidecar(sidecar: str, entries: dict) -> None:
+    # Best effort: read-only data directories just keep the in-process cache
+    try:
+        tmp = f"{sidecar}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass
+
+
+def detect_encoding(path: str) -> str:
+    """Return the cached encoding of a file, sniffing it when unknown or stale."""
+    key = os.path.abspath(path)
+    mtime, size = _stat(key)
+    with _lock:
+        cached = _memo.get(key)
+        if cached and cached[:2] == (mtime, size):
+            return cached[2]
+
+        sidecar = _sidecar_path(key)
+        entries = _read_sidecar(sidecar)
+        entry = entries.get(os.path.basename(key))
+        if entry and (entry.get("mtime"), entry.get("size")) == (mtime, size):
+            encoding = entry["encoding"]
+        else:
+            encoding = sniff_encoding(key)
+            entries[os.path.basename(key)] = {"mtime": mtime, "size": size, "encoding": encoding}
+            _write_sidecar(sidecar, entries)
+        _memo[key] = (mtime, size, encoding)
+        return encoding
+
+
+def forget_encoding(path: str) -> None:
+    """Drop a file from the in-process and sidecar caches."""
+    key = os.path.abspath(path)
+    with _lock:
+        _memo.pop(key, None)
+        sidecar = _sidecar_path(key)
+        entries = _read_sidecar(sidecar)
+        if entries.pop(os.path.basename(key), None) is not None:
+            _write_sidecar(sidecar, entries)
+
+
+def read_csv_sniffed(path: str, encoding: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """Parse a CSV once, with its detected encoding.
+
+    Raises ValueError naming the file and encoding when the bytes do not
+    decode with the detected encoding; other parse errors propagate as-is.
+    """
+    enc = encoding or detect_encoding(path)
+    try:
+        return pd.read_csv(path, encoding=enc, **kwargs)
+    except UnicodeDecodeError as e:
+        forget_encoding(path)
+        raise ValueError(f"{path}: could not decode as {enc} ({e})") from e
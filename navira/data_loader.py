@@ -15,6 +15,8 @@ RAW_FALLBACK_DIR = data_dir
 
 # Import the new CSV data loader
 from .csv_data_loader import get_csv_dataframes, get_all_csv_dataframes
+from .csv_encoding import read_csv_sniffed
+from .finess_index import sort_by_finess
 
 def _resolve_parquet_path(filename: str) -> str:
     """Return the existing Parquet path, preferring NAVIRA_OUT_DIR then falling back to data/."""
@@ -33,20 +35,11 @@ def _mtime(path: str) -> float:
 
 
 def _read_csv_with_fallback(path: str, sep: str = ';', decimal: str | None = None) -> pd.DataFrame:
-    encodings = ["utf-8", "cp1252", "latin1"]
-    last_err = None
-    for enc in encodings:
-        try:
-            kwargs = {'sep': sep, 'encoding': enc}
-            if decimal is not None:
-                kwargs['decimal'] = decimal
-            return pd.read_csv(path, **kwargs)
-        except Exception as e:
-            last_err = e
-            continue
-    if last_err:
-        raise last_err
-    raise FileNotFoundError(path)
+    """Read a CSV once, with its sniffed (and cached) encoding."""
+    kwargs = {'sep': sep}
+    if decimal is not None:
+        kwargs['decimal'] = decimal
+    return read_csv_sniffed(path, **kwargs)
 
 
 def _backfill_id_from_raw_csv(est_df: pd.DataFrame) -> pd.DataFrame:
@@ -270,9 +263,10 @@ def load_complications():
         if 'ic_high' in df.columns:
             df = df.rename(columns={'ic_high': 'confidence_high'})
             
-        # Ensure proper data types
+        # Ensure proper data types; FINESS-sorted so per-hospital lookups are slices
         if 'hospital_id' in df.columns:
-            df['hospital_id'] = df['hospital_id'].astype(str)
+            df['hospital_id'] = df['hospital_id'].astype(str).str.strip()
+            df = sort_by_finess(df)
         if 'quarter_date' in df.columns:
             df['quarter_date'] = pd.to_datetime(df['quarter_date'], errors='coerce')
         
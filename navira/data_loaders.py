@@ -7,11 +7,32 @@ This module provides cached, typed data loading functions for:
 - French communes data with INSEE code mapping
 """
 
+import hashlib
 import pandas as pd
 import streamlit as st
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import os
 
+from .artifacts import compiled_root
+from .hashing import HASH_FUNCS, content_hash
+from .geocoder import Geocoder
+from .postal_mapping import ARTIFACT_NAME as POSTAL_INSEE_ARTIFACT, PostalInseeMapping
+from .spatial import SpatialIndex
+from .store import data_version, on_version_change
+
+
+def _decimal_comma_to_numeric(values: pd.Series) -> pd.Series:
+    """
+    Numbers of a column written with decimal commas ("12,5"); unparseable values become NaN.
+    
+    Any non-numeric column is converted, whatever its dtype: under pandas 3
+    text columns are "str" rather than "object", and testing for object
+    dtype skipped the comma replacement, turning every value into NaN.
+    """
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.replace(',', '.', regex=False)
+    return pd.to_numeric(values, errors='coerce')
+
 
 @st.cache_data
 def load_recruitment_data(file_path: str = "data/11_recruitement_zone.csv") -> pd.DataFrame:
@@ -50,9 +71,7 @@ def load_recruitment_data(file_path: str = "data/11_recruitement_zone.csv") -> p
         numeric_cols = ['nb', 'TOT', 'PCT', 'PCT_CUM']
         for col in numeric_cols:
             if col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                df[col] = _decimal_comma_to_numeric(df[col])
         
         return df
         
@@ -94,9 +113,7 @@ def load_competitors_data(file_path: str = "data/13_main_competitors.csv") -> pd
         numeric_cols = ['TOT_etb', 'TOT_conc']
         for col in numeric_cols:
             if col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                df[col] = _decimal_comma_to_numeric(df[col])
         
         return df
         
@@ -138,9 +155,7 @@ def load_communes_data(file_path: str = "data/COMMUNES_FRANCE_INSEE.csv") -> pd.
         coord_cols = ['longitude', 'latitude']
         for col in coord_cols:
             if col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                df[col] = _decimal_comma_to_numeric(df[col])
         
         return df
         
@@ -149,8 +164,8 @@ def load_communes_data(file_path: str = "data/COMMUNES_FRANCE_INSEE.csv") -> pd.
         return pd.DataFrame()
 
 
-@st.cache_data
-def build_postal_to_insee_mapping(communes_df: pd.DataFrame) -> Dict[str, List[str]]:
+@st.cache_data(hash_funcs=HASH_FUNCS)
+def build_postal_to_insee_mapping(communes_df: pd.DataFrame) -> PostalInseeMapping:
     """
     Build mapping from postal codes to INSEE commune codes.
     
@@ -158,56 +173,101 @@ def build_postal_to_insee_mapping(communes_df: pd.DataFrame) -> Dict[str, List[s
         communes_df: DataFrame from load_communes_data()
         
     Returns:
-        Dictionary mapping postal code -> list of INSEE codes
-        Note: Multiple INSEE codes per postal code is common in France
+        PostalInseeMapping (postal code -> list of INSEE codes, stored as CSR arrays)
+        Note: Multiple INSEE codes per postal code is common in France; the
+        Paris, Marseille and Lyon postal codes also map to their arrondissement
+        INSEE codes, which the GeoJSON uses
     """
-    mapping = {}
+    return PostalInseeMapping.from_communes(communes_df)
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def postal_insee_artifact_path() -> str:
+    """Where scripts/build_parquet.py writes the compiled postal -> INSEE mapping."""
+    return str(compiled_root().parent / POSTAL_INSEE_ARTIFACT)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_postal_insee_mapping(file_path: str, mtime: float) -> PostalInseeMapping:
+    artifact = postal_insee_artifact_path()
+    try:
+        mapping, meta = PostalInseeMapping.load(artifact)
+        # Only if it was compiled from this very communes file
+        if meta.get("source_sha256") == _sha256_file(file_path):
+            return mapping
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_postal_to_insee_mapping(load_communes_data(file_path))
+
+
+def get_postal_insee_mapping(file_path: str = "data/COMMUNES_FRANCE_INSEE.csv") -> PostalInseeMapping:
+    """
+    Process-wide postal code to INSEE mapping of the communes file.
     
-    if communes_df.empty or 'codePostal' not in communes_df.columns or 'codeInsee' not in communes_df.columns:
-        return mapping
+    Loaded from the compiled artifact when it matches the file (built from
+    the CSV otherwise), once per process and again when the file changes,
+    and shared by every session. Cached functions taking it are keyed on its
+    version token, not on its content.
+    """
+    try:
+        mtime = os.path.getmtime(file_path)
+    except OSError:
+        mtime = 0.0
+    return _load_postal_insee_mapping(file_path, mtime)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_geocoder(file_path: str, mtime: float) -> Geocoder:
+    return Geocoder.from_communes(load_communes_data(file_path))
+
+
+def get_geocoder(file_path: str = "data/COMMUNES_FRANCE_INSEE.csv") -> Geocoder:
+    """
+    Process-wide offline geocoder of the communes file.
+    
+    Built once per process (and again when the file changes) and shared by
+    every session; lookups then take well under a millisecond, without a
+    network round trip.
+    """
+    try:
+        mtime = os.path.getmtime(file_path)
+    except OSError:
+        mtime = 0.0
+    return _load_geocoder(file_path, mtime)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_spatial_index(version: Optional[str], name: str, points_hash: str, _points: pd.DataFrame) -> SpatialIndex:
+    return SpatialIndex.from_frame(_points)
+
+
+def get_spatial_index(name: str, points: pd.DataFrame) -> SpatialIndex:
+    """
+    Process-wide KD-tree over the latitude / longitude of a table's rows.
     
-    # Group by postal code and collect all INSEE codes
-    grouped = communes_df.groupby('codePostal')['codeInsee'].apply(list).to_dict()
-
-    # Ensure all values are lists and remove duplicates
-    for postal, insee_list in grouped.items():
-        mapping[postal] = list(set(insee_list))
-
-    # Special-case overrides for cities with arrondissements where GeoJSON uses arrondissement INSEE codes
-    # Paris: postal 75001..75020 -> INSEE 75101..75120
-    for i in range(1, 21):
-        postal = f"750{str(i).zfill(2)}"
-        arrondissement_insee = f"751{str(i).zfill(2)}"
-        if postal in mapping:
-            existing = set(mapping.get(postal, []))
-            existing.add(arrondissement_insee)
-            mapping[postal] = list(existing)
-        else:
-            mapping[postal] = [arrondissement_insee]
-
-    # Marseille: postal 13001..13016 -> INSEE 13201..13216
-    for i in range(1, 17):
-        postal = f"130{str(i).zfill(2)}"
-        arrondissement_insee = f"132{str(i).zfill(2)}"
-        if postal in mapping:
-            existing = set(mapping.get(postal, []))
-            existing.add(arrondissement_insee)
-            mapping[postal] = list(existing)
-        else:
-            mapping[postal] = [arrondissement_insee]
-
-    # Lyon: postal 69001..69009 -> INSEE 69381..69389
-    for i in range(1, 10):
-        postal = f"690{str(i).zfill(2)}"
-        arrondissement_insee = f"6938{i}"
-        if postal in mapping:
-            existing = set(mapping.get(postal, []))
-            existing.add(arrondissement_insee)
-            mapping[postal] = list(existing)
-        else:
-            mapping[postal] = [arrondissement_insee]
-
-    return mapping
+    Shared by every session and keyed on the content of the coordinate
+    columns, so a different table (or the same one after a refresh) never
+    reuses an index whose positions point at other rows; indexes of a
+    retired data version are dropped. Query results are row positions in
+    ``points``.
+    """
+    coords = points[[c for c in ('latitude', 'longitude') if c in points.columns]]
+    return _load_spatial_index(data_version(), name, content_hash(coords), points)
+
+
+def _evict_spatial_indexes(version: Optional[str]) -> None:
+    """Drop the spatial indexes built for a retired data version."""
+    _load_spatial_index.clear()
+
+
+on_version_change(_evict_spatial_indexes)
 
 
 def get_data_file_path(filename: str) -> str:
@@ -0,0 +1,137 @@
+"""
+INSEE code -> display polygon table, per shipped geometry set.
+
+Recruitment data names Paris, Marseille and Lyon arrondissements (751xx,
+132xx, 6938x), but a geometry set may only draw the whole city (75056,
+13055, 69123 / 69380), or draw arrondissements instead of the city. Rather
+than scanning codes and folding arrondissements into cities at render time,
+DisplayPolygons records once, for every INSEE code and every geometry set,
+the code of the polygon it is drawn on:
+
+    insee    sorted INSEE codes (every commune, arrondissement and polygon)
+    display  per geometry set, the polygon of each code ("" when none)
+
+``aggregate`` then maps a choropleth onto a geometry set with one vectorized
+lookup and groupby. scripts/build_parquet.py saves the table as
+display_polygons.npz next to the geometry store.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .postal_mapping import ARRONDISSEMENTS
+
+ARTIFACT_NAME = "display_polygons.npz"
+
+# Geometry sets: the communes GeoJSON as shipped, and the same with the
+# official Paris arrondissement polygons in place of the single Paris polygon
+COMMUNES = "communes"
+COMMUNES_PARIS_ARRONDISSEMENTS = "communes_paris_arrondissements"
+
+PARIS = "75056"
+PARIS_CODE_PROPERTY = "c_arinsee"  # INSEE code property of the official Paris arrondissements file
+# City polygon codes, in order of preference, of each arrondissement
+CITY_POLYGONS: Dict[str, Tuple[str, ...]] = {
+    **{insee: (PARIS,) for _, insee in ARRONDISSEMENTS if insee.startswith("751")},
+    **{insee: ("13055",) for _, insee in ARRONDISSEMENTS if insee.startswith("132")},
+    **{insee: ("69380", "69123") for _, insee in ARRONDISSEMENTS if insee.startswith("6938")},
+}
+
+
+def geometry_sets(communes_polygons: Iterable[str], paris_arrondissement_polygons: Iterable[str]) -> Dict[str, set]:
+    """Polygon codes of each geometry set shipped with the given geometry files."""
+    communes = {str(c) for c in communes_polygons}
+    sets = {COMMUNES: communes}
+    paris = {str(c) for c in paris_arrondissement_polygons}
+    if paris:
+        sets[COMMUNES_PARIS_ARRONDISSEMENTS] = (communes - {PARIS}) | paris
+    return sets
+
+
+def display_code(insee: str, polygons: set) -> str:
+    """Polygon drawing ``insee`` among ``polygons``: itself, else its city, else ""."""
+    if insee in polygons:
+        return insee
+    for city in CITY_POLYGONS.get(insee, ()):
+        if city in polygons:
+            return city
+    return ""
+
+
+class DisplayPolygons:
+    """Read-only INSEE code -> display polygon code, for each geometry set."""
+
+    __slots__ = ("insee", "display")
+
+    def __init__(self, insee: np.ndarray, display: Dict[str, np.ndarray]):
+        self.insee = insee
+        self.display = display  # geometry set -> display code of each insee code
+
+    @classmethod
+    def from_geometry(cls, geometry_sets: Dict[str, Iterable[str]], insee_codes: Iterable[str] = ()) -> "DisplayPolygons":
+        """Build from the polygon codes of each geometry set (and other known INSEE codes)."""
+        polygons = {name: {str(c) for c in codes} for name, codes in geometry_sets.items()}
+        universe = {str(c).strip().zfill(5) for c in insee_codes} | set(CITY_POLYGONS)
+        for codes in polygons.values():
+            universe |= codes
+        insee = np.array(sorted(universe), dtype=str)
+        display = {name: np.array([display_code(c, codes) for c in insee.tolist()], dtype=str)
+                   for name, codes in polygons.items()}
+        return cls(insee, display)
+
+    @property
+    def sets(self) -> List[str]:
+        return list(self.display)
+
+    def preferred_set(self) -> str:
+        """Most detailed geometry set available (Paris arrondissements when shipped)."""
+        return COMMUNES_PARIS_ARRONDISSEMENTS if COMMUNES_PARIS_ARRONDISSEMENTS in self.display else COMMUNES
+
+    def save(self, path: Path, **meta: str) -> None:
+        """Write the table (and string metadata, e.g. source hashes) to an .npz file."""
+        np.savez(path, insee=np.char.encode(self.insee, "ascii"), sets=np.array(self.sets),
+                 **{f"display_{i}": np.char.encode(codes, "ascii") for i, codes in enumerate(self.display.values())},
+                 **{f"meta_{k}": np.array(v) for k, v in meta.items()})
+
+    @classmethod
+    def load(cls, path: Path) -> Tuple["DisplayPolygons", Dict[str, str]]:
+        """Read a saved table; returns it with its metadata."""
+        with np.load(path, allow_pickle=False) as f:
+            display = {str(name): f[f"display_{i}"].astype(str) for i, name in enumerate(f["sets"])}
+            table = cls(f["insee"].astype(str), display)
+            meta = {k[len("meta_"):]: str(f[k]) for k in f.files if k.startswith("meta_")}
+        return table, meta
+
+    def display_codes(self, insee_codes, geometry_set: str) -> np.ndarray:
+        """Display polygon of each code (vectorized binary search), "" when not drawn."""
+        codes = np.asarray(insee_codes, dtype=str)
+        display = self.display.get(geometry_set)
+        if display is None or not len(self.insee):
+            return np.full(codes.shape, "", dtype=str)
+        pos = np.minimum(np.searchsorted(self.insee, codes), len(self.insee) - 1)
+        return np.where(self.insee[pos] == codes, display[pos], "")
+
+    def aggregate(self, df: pd.DataFrame, geometry_set: str, code_col: str = "insee5",
+                  value_col: str = "value") -> pd.DataFrame:
+        """Sum a choropleth's values per display polygon; codes that are not drawn are dropped."""
+        if df.empty:
+            return pd.DataFrame(columns=[code_col, value_col])
+        codes = self.display_codes(df[code_col].astype(str).to_numpy(dtype=str), geometry_set)
+        values = pd.to_numeric(df[value_col], errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+        drawn = codes != ""
+        out = pd.DataFrame({code_col: codes[drawn].astype(object), value_col: values[drawn]})
+        return out.groupby(code_col, as_index=False, sort=True)[value_col].sum()
+
+    def polygon_codes(self, geometry_set: str) -> np.ndarray:
+        """Distinct display polygons of a geometry set."""
+        codes = np.unique(self.display.get(geometry_set, np.empty(0, dtype=str)))
+        return codes[codes != ""]
+
+    def __len__(self) -> int:
+        return len(self.insee)
+
+    def __repr__(self) -> str:
+        return f"DisplayPolygons({len(self.insee)} codes, sets={self.sets})"
@@ -0,0 +1,91 @@
+"""
+FINESS offset index for per-hospital slicing.
+
+HOP-level tables are stored sorted by FINESS, so one hospital's rows form a
+contiguous block. FinessIndex records the (start, stop) offsets of every
+block; looking a hospital up is a binary search and returning its rows is
+a positional slice instead of a full-table boolean mask.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class FinessIndex:
+    """FINESS -> (start, stop) row offsets of a table sorted by FINESS."""
+
+    __slots__ = ("keys", "starts", "stops", "n_rows")
+
+    def __init__(self, ids: np.ndarray):
+        n = len(ids)
+        change = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+        self.starts = np.concatenate(([0], change)).astype(np.int64) if n else np.empty(0, np.int64)
+        self.stops = np.concatenate((change, [n])).astype(np.int64) if n else np.empty(0, np.int64)
+        self.keys = ids[self.starts]
+        self.n_rows = n
+
+    @classmethod
+    def from_column(cls, col: pd.Series) -> Optional["FinessIndex"]:
+        """Build the index of a FINESS column; None when it is not sorted."""
+        ids = col.astype(str).to_numpy(dtype=object)
+        if len(ids) > 1 and not (ids[:-1] <= ids[1:]).all():
+            return None
+        return cls(ids)
+
+    def bounds(self, hospital_id: str) -> Tuple[int, int]:
+        """Row offsets of a hospital; (0, 0) when absent."""
+        i = int(np.searchsorted(self.keys, hospital_id))
+        if i < len(self.keys) and self.keys[i] == hospital_id:
+            return int(self.starts[i]), int(self.stops[i])
+        return 0, 0
+
+    def slice(self, df: pd.DataFrame, hospital_id: str) -> pd.DataFrame:
+        start, stop = self.bounds(hospital_id)
+        return df.iloc[start:stop]
+
+
+def sort_by_finess(df: pd.DataFrame, column: str = 'hospital_id') -> pd.DataFrame:
+    """Stable-sort a table by its FINESS column so each hospital is contiguous."""
+    if column not in df.columns or df[column].is_monotonic_increasing:
+        return df
+    return df.sort_values(column, kind='stable', ignore_index=True)
+
+
+# Tables indexed by their frame rather than a data version
+BY_FRAME = object()
+
+# name -> (version, or weak reference to the frame; row count; index, None when unsorted)
+_indexes: Dict[str, Tuple[Any, int, Optional[FinessIndex]]] = {}
+_lock = threading.Lock()
+
+
+def hospital_rows(df: pd.DataFrame, hospital_id: str, name: str, column: str = 'hospital_id',
+                  version: Any = BY_FRAME) -> pd.DataFrame:
+    """Return one hospital's rows of a FINESS-sorted table.
+
+    The index of table ``name`` is built once per data ``version`` (callers
+    serving the versioned loaders pass ``data_version()``) or, by default,
+    once per frame object, and reused after an O(1) check of that key and
+    the row count; unsorted tables fall back to a mask.
+    """
+    if column not in df.columns:
+        return df
+    col = df[column]
+    entry = _indexes.get(name)
+    if entry is not None:
+        token, n_rows, idx = entry
+        fresh = (token() is df) if isinstance(token, weakref.ref) else (version is not BY_FRAME and token == version)
+        if not fresh or n_rows != len(df):
+            entry = None
+    if entry is None:
+        idx = FinessIndex.from_column(col)
+        token = weakref.ref(df) if version is BY_FRAME else version
+        with _lock:
+            _indexes[name] = (token, len(df), idx)
+    if idx is None:
+        return df[col == hospital_id]
+    return idx.slice(df, str(hospital_id))
@@ -3,6 +3,9 @@ GeoJSON loading and INSEE key auto-detection utilities.
 
 This module provides functionality for:
 - Loading French communes GeoJSON from configurable paths
+- Reading only the needed communes from the compiled geometry store
+  (navira.geo_store) when scripts/build_parquet.py has built it
+- Mapping INSEE codes to the polygons drawn for them (navira.display_polygons)
 - Auto-detecting INSEE code property keys in GeoJSON features
 - Caching and validation of geographic data
 """
@@ -16,6 +19,19 @@ import logging
 from pathlib import Path
 import pandas as pd
 
+from .artifacts import compiled_root
+from .data_loaders import _sha256_file
+from .display_polygons import (
+    ARTIFACT_NAME as DISPLAY_POLYGONS,
+    COMMUNES_PARIS_ARRONDISSEMENTS,
+    PARIS_CODE_PROPERTY,
+    DisplayPolygons,
+    geometry_sets,
+)
+from .geo_store import STORE_NAME, GeoStore
+
+PARIS_ARRONDISSEMENTS_GEOJSON = "data/paris_arrondissements_official.geojson"
+
 
 @st.cache_data(show_spinner=False)
 def load_communes_geojson(path_override: Optional[str] = None, cache_version: str = "v2") -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
@@ -39,7 +55,7 @@ def load_communes_geojson(path_override: Optional[str] = None, cache_version: st
     }
     
     # Simple path resolution - just use the known working path
-    geojson_path = path_override or "data/communes.geojson"
+    geojson_path = path_override or communes_geojson_path()
     
     try:
         # Load the GeoJSON file
@@ -76,18 +92,75 @@ def load_communes_geojson(path_override: Optional[str] = None, cache_version: st
         return None, diagnostics
 
 
+def communes_geojson_path() -> str:
+    """The communes GeoJSON the app draws, and scripts/build_parquet.py compiles by default."""
+    return os.environ.get("COMMUNES_GEOJSON_PATH") or "data/communes.geojson"
+
+
+def communes_geo_store_path() -> Path:
+    """Where scripts/build_parquet.py writes the compiled communes geometry store."""
+    return compiled_root().parent / STORE_NAME
+
+
+@st.cache_resource(show_spinner=False)
+def _open_geo_store(path: str, mtime: float, source_path: str, source_mtime: float) -> Optional[GeoStore]:
+    try:
+        store = GeoStore(Path(path))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring communes geometry store {path}: {e}")
+        return None
+    # Only if it was compiled from this very GeoJSON (when the GeoJSON is shipped)
+    if os.path.exists(source_path) and store.header.get("source_sha256") != _sha256_file(source_path):
+        logging.warning(f"Ignoring communes geometry store {path}: not built from {source_path}")
+        return None
+    return store
+
+
+def get_communes_geo_store() -> Optional[GeoStore]:
+    """
+    Memory-mapped communes geometry store, or None when it was not built.
+    
+    Also None when it was built from another GeoJSON than the configured
+    one (callers then load the GeoJSON itself); without the GeoJSON the
+    store is the only geometry and is served as is.
+    """
+    path = communes_geo_store_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    source = communes_geojson_path()
+    try:
+        source_mtime = os.path.getmtime(source)
+    except OSError:
+        source_mtime = 0.0
+    return _open_geo_store(str(path), mtime, source, source_mtime)
+
+
 @st.cache_data(show_spinner=False)
-def load_communes_geojson_filtered(needed_insee_codes: List[str], cache_version: str = "v2") -> Optional[Dict[str, Any]]:
+def load_communes_geojson_filtered(needed_insee_codes: List[str], cache_version: str = "v2",
+                                   zoom: Optional[float] = None) -> Optional[Dict[str, Any]]:
     """
     Load GeoJSON filtered to only include specific INSEE codes for performance.
     
     Args:
         needed_insee_codes: List of INSEE codes to include in filtered GeoJSON
         cache_version: Version string for cache invalidation
+        zoom: Initial zoom of the map the communes are drawn on; with the
+            compiled store, selects a simplified geometry level
         
     Returns:
         Filtered GeoJSON dictionary or None if source not available
+        
+    Notes:
+        With the compiled geometry store, only the needed communes are read,
+        at the coarsest level that looks unchanged at the zoom (and extent of
+        the communes); otherwise the full GeoJSON is loaded and scanned
     """
+    store = get_communes_geo_store()
+    if store is not None and needed_insee_codes:
+        return store.feature_collection(needed_insee_codes, store.level_for(needed_insee_codes, zoom))
+    
     # Use the simple loader
     full_geojson = load_communes_geojson_simple()
     
@@ -184,6 +257,97 @@ def detect_insee_property(geojson_dict: Dict[str, Any]) -> Optional[str]:
 
 
 # Backward compatibility functions
+@st.cache_data(show_spinner=False)
+def load_paris_arrondissements(path: str = PARIS_ARRONDISSEMENTS_GEOJSON) -> Dict[str, Dict[str, Any]]:
+    """Official Paris arrondissement features by INSEE code, with the code under 'code'."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            geojson = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Paris arrondissements not loaded from {path}: {e}")
+        return {}
+    features = {}
+    for feat in geojson.get('features', []):
+        props = dict(feat.get('properties') or {})
+        insee = str(props.get(PARIS_CODE_PROPERTY, '')).strip()
+        if not insee:
+            continue
+        # Duplicate under 'code' so downstream uses a single key
+        props['code'] = insee.zfill(5)
+        features[props['code']] = {**feat, 'properties': props}
+    return features
+
+
+def display_polygons_path() -> Path:
+    """Where scripts/build_parquet.py writes the INSEE -> display polygon table."""
+    return compiled_root().parent / DISPLAY_POLYGONS
+
+
+def _communes_polygon_codes() -> List[str]:
+    store = get_communes_geo_store()
+    if store is not None:
+        return store.codes.astype(str).tolist()
+    geojson = load_communes_geojson_simple()
+    key = detect_insee_property(geojson) if geojson else None
+    if not key:
+        return []
+    return [str(f['properties'][key]).strip().upper().zfill(5)
+            for f in geojson.get('features', []) if (f.get('properties') or {}).get(key) is not None]
+
+
+@st.cache_resource(show_spinner=False)
+def _load_display_polygons(artifact: str, artifact_mtime: float, communes_sha256: str,
+                           paris_path: str, paris_mtime: float) -> DisplayPolygons:
+    paris_sha256 = _sha256_file(paris_path) if paris_mtime else ""
+    try:
+        table, meta = DisplayPolygons.load(Path(artifact))
+        # Only if it was compiled from the geometry served now
+        if communes_sha256 and meta.get("communes_sha256") == communes_sha256 \
+                and meta.get("paris_sha256", "") == paris_sha256:
+            return table
+    except (OSError, ValueError, KeyError):
+        pass
+    paris_codes = list(load_paris_arrondissements(paris_path)) if paris_mtime else []
+    return DisplayPolygons.from_geometry(geometry_sets(_communes_polygon_codes(), paris_codes))
+
+
+def get_display_polygons(paris_path: str = PARIS_ARRONDISSEMENTS_GEOJSON) -> DisplayPolygons:
+    """
+    Process-wide INSEE code -> display polygon table of the shipped geometry.
+    
+    Loaded from the compiled artifact when it matches the geometry store and
+    the Paris arrondissements file (built from them otherwise), once per
+    process and again when either changes.
+    """
+    store = get_communes_geo_store()
+    communes_sha256 = store.header.get("source_sha256", "") if store is not None else ""
+    mtimes = []
+    for path in (str(display_polygons_path()), paris_path):
+        try:
+            mtimes.append(os.path.getmtime(path))
+        except OSError:
+            mtimes.append(0.0)
+    return _load_display_polygons(str(display_polygons_path()), mtimes[0], communes_sha256, paris_path, mtimes[1])
+
+
+def load_display_geojson(display_codes: List[str], geometry_set: str,
+                         zoom: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Polygons of the given display codes in a geometry set (see get_display_polygons).
+    
+    Communes come from load_communes_geojson_filtered; in the Paris
+    arrondissements set, arrondissement codes come from the official file.
+    """
+    arrondissements = load_paris_arrondissements() if geometry_set == COMMUNES_PARIS_ARRONDISSEMENTS else {}
+    communes_codes = [c for c in display_codes if c not in arrondissements]
+    base = load_communes_geojson_filtered(communes_codes, zoom=zoom) if communes_codes else None
+    features = list(base.get('features', [])) if base else []
+    features += [arrondissements[c] for c in display_codes if c in arrondissements]
+    if not features and base is None:
+        return None
+    return {"type": "FeatureCollection", "features": features}
+
+
 def detect_insee_key(geojson_data: Dict[str, Any]) -> Optional[str]:
     """Backward compatibility wrapper for detect_insee_property."""
     return detect_insee_property(geojson_data)
@@ -0,0 +1,307 @@
+"""
+Indexed binary store of commune geometries with per-INSEE random access.
+
+Parsing the communes GeoJSON (tens of MB) yields one dict holding every
+commune, and a map only ever draws the few hundred communes a hospital
+recruits from. scripts/build_parquet.py compiles the GeoJSON once into a
+single binary file, opened memory-mapped: reading a commune touches only
+its own bytes, so memory does not scale with the 35k communes.
+
+File layout (little endian):
+
+    magic      8 bytes, b"NAVGEO01"
+    header     uint64 length, then JSON: count, property key, coordinate
+               quantum, source hash and the offsets of the sections below
+               (from the first 8-byte boundary after the header)
+    codes      count x 5 ASCII bytes, sorted INSEE codes
+    bounds     int32[count, 4], quantized bounding box of each commune
+    offsets    int64[count + 1], blob of codes[i] is data[offsets[i]:offsets[i + 1]]
+    data       one blob per commune
+    then, per simplification level, its own offsets and data sections
+
+Level 0 holds the source geometry; the other levels are simplified with a
+growing tolerance (see navira.simplify, which keeps neighbours' shared
+borders identical). ``level_for`` picks the coarsest level whose error stays
+under a screen pixel at the zoom a map is shown at.
+
+A blob holds the feature's properties (JSON) and its geometry. Polygons and
+multipolygons are stored as ring lengths plus int32 coordinates quantized to
+1e-6 degree (~0.1 m); other geometry types as JSON.
+"""
+
+import json
+import math
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .simplify import simplify_rings
+
+STORE_NAME = "communes_geo.bin"
+MAGIC = b"NAVGEO01"
+QUANTUM = 1_000_000  # coordinate units per degree
+CODE_WIDTH = 5
+# Simplified levels (degrees, ~20 m to ~400 m): under a pixel from zoom ~11 down to ~6
+LEVEL_TOLERANCES = (0.0002, 0.0006, 0.0015, 0.004)
+TILE_SIZE = 256  # web map tile width, pixels
+VIEWPORT_PX = 800  # typical map width, pixels
+ZOOM_HEADROOM = 1  # zoom-in steps without visible loss
+
+_JSON, _POLYGON, _MULTIPOLYGON = 0, 1, 2
+_BLOB_HEADER = struct.Struct("<IIII")  # properties length, geometry kind, polygons, rings
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def normalize_code(code: Any) -> str:
+    """INSEE code as stored: 5 characters, zero-padded, upper case (Corsica 2A/2B)."""
+    return str(code).strip().upper().zfill(CODE_WIDTH)
+
+
+def _properties(feature: Dict[str, Any]) -> bytes:
+    return json.dumps(feature.get("properties") or {}, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _polygon_rings(geometry: Dict[str, Any]) -> Tuple[int, List[int], List[np.ndarray]]:
+    """Geometry kind and, for (multi)polygons, rings per polygon and quantized rings."""
+    kind = {"Polygon": _POLYGON, "MultiPolygon": _MULTIPOLYGON}.get(geometry.get("type"), _JSON)
+    if kind == _JSON:
+        return kind, [], []
+    polygons = [geometry["coordinates"]] if kind == _POLYGON else geometry["coordinates"]
+    rings = [np.round(np.asarray(ring, dtype="float64").reshape(-1, 2) * QUANTUM).astype("<i4")
+             for polygon in polygons for ring in polygon]
+    return kind, [len(polygon) for polygon in polygons], rings
+
+
+def _encode_polygons(props: bytes, kind: int, ring_counts: List[int], rings: List[np.ndarray]) -> bytes:
+    coords = np.concatenate(rings).astype("<i4") if rings else np.empty((0, 2), "<i4")
+    return b"".join([
+        _BLOB_HEADER.pack(len(props), kind, len(ring_counts), len(rings)), props,
+        np.array(ring_counts, dtype="<i4").tobytes(),
+        np.array([len(ring) for ring in rings], dtype="<i4").tobytes(), coords.tobytes(),
+    ])
+
+
+def encode_feature(feature: Dict[str, Any]) -> bytes:
+    """Binary blob of one GeoJSON feature."""
+    props = _properties(feature)
+    geometry = feature.get("geometry") or {}
+    kind, ring_counts, rings = _polygon_rings(geometry)
+    if kind == _JSON:
+        body = json.dumps(geometry, separators=(",", ":")).encode()
+        return _BLOB_HEADER.pack(len(props), kind, 0, 0) + props + body
+    return _encode_polygons(props, kind, ring_counts, rings)
+
+
+def decode_feature(blob: bytes) -> Dict[str, Any]:
+    """GeoJSON feature of a blob written by ``encode_feature``."""
+    props_len, kind, n_polygons, n_rings = _BLOB_HEADER.unpack_from(blob)
+    start = _BLOB_HEADER.size
+    properties = json.loads(blob[start:start + props_len])
+    start += props_len
+    if kind == _JSON:
+        return {"type": "Feature", "properties": properties, "geometry": json.loads(blob[start:])}
+    ring_counts = np.frombuffer(blob, "<i4", n_polygons, start)
+    ring_lengths = np.frombuffer(blob, "<i4", n_rings, start + 4 * n_polygons)
+    coords = np.frombuffer(blob, "<i4", offset=start + 4 * (n_polygons + n_rings)).reshape(-1, 2) / QUANTUM
+    bounds = np.concatenate([[0], np.cumsum(ring_lengths)])
+    rings = [coords[a:b].tolist() for a, b in zip(bounds[:-1], bounds[1:])]
+    ring_bounds = np.concatenate([[0], np.cumsum(ring_counts)])
+    polygons = [rings[a:b] for a, b in zip(ring_bounds[:-1], ring_bounds[1:])]
+    if kind == _POLYGON:
+        geometry = {"type": "Polygon", "coordinates": polygons[0] if polygons else []}
+    else:
+        geometry = {"type": "MultiPolygon", "coordinates": polygons}
+    return {"type": "Feature", "properties": properties, "geometry": geometry}
+
+
+def write_store(geojson: Dict[str, Any], path: Path, key: str,
+                tolerances: Sequence[float] = LEVEL_TOLERANCES, **meta: Any) -> int:
+    """Compile a FeatureCollection into a store file; returns the number of communes.
+
+    ``key`` is the property holding the INSEE code. Features without one are
+    skipped; when a code repeats, the first feature is kept. Besides the
+    source geometry, one simplified level is written per tolerance (degrees).
+    """
+    features: Dict[str, Dict[str, Any]] = {}
+    for feature in geojson.get("features", []):
+        code = (feature.get("properties") or {}).get(key)
+        if code is None or str(code).strip() == "":
+            continue
+        features.setdefault(normalize_code(code), feature)
+    codes = sorted(features)
+
+    # Rings of every commune go through the simplifier together (shared borders)
+    parts, rings = [], []
+    for code in codes:
+        geometry = features[code].get("geometry") or {}
+        kind, ring_counts, feature_rings = _polygon_rings(geometry)
+        parts.append((_properties(features[code]), kind, ring_counts, len(rings), len(feature_rings)))
+        rings.extend(feature_rings)
+    levels = simplify_rings(rings, [0.0] + [t * QUANTUM for t in tolerances])
+
+    def blobs_of(level_rings: List[np.ndarray]) -> List[bytes]:
+        return [encode_feature(features[code]) if kind == _JSON
+                else _encode_polygons(props, kind, ring_counts, level_rings[first:first + n])
+                for code, (props, kind, ring_counts, first, n) in zip(codes, parts)]
+
+    bounds = np.zeros((len(codes), 4), dtype="<i4")
+    for i, (_, _, _, first, n) in enumerate(parts):
+        if n:
+            coords = np.concatenate(rings[first:first + n])
+            bounds[i] = [*coords.min(axis=0), *coords.max(axis=0)]
+
+    sections = [np.array(codes, dtype=f"S{CODE_WIDTH}").tobytes(), bounds.tobytes()]
+    level_blobs = [blobs_of(level) for level in levels]
+    for blobs in level_blobs:
+        sections.append(np.concatenate([[0], np.cumsum([len(b) for b in blobs])]).astype("<i8").tobytes())
+        sections.append(b"".join(blobs))
+
+    # Section offsets are relative to the first 8-byte boundary after the header
+    at = [0]
+    for section in sections[:-1]:
+        at.append(_align(at[-1] + len(section)))
+    header = json.dumps({
+        "count": len(codes), "key": key, "quantum": QUANTUM,
+        "codes": at[0], "bounds": at[1], "offsets": at[2], "data": at[3],
+        "levels": [{"tolerance": t, "offsets": at[4 + 2 * j], "data": at[5 + 2 * j]}
+                   for j, t in enumerate(tolerances)],
+        **meta,
+    }).encode()
+    base = _align(len(MAGIC) + 8 + len(header))
+
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for offset, section in zip(at, sections):
+            f.write(b"\0" * (base + offset - f.tell()) + section)
+    tmp.replace(path)
+    return len(codes)
+
+
+def pixel_degrees(zoom: float) -> float:
+    """Width of a screen pixel, in degrees of longitude, at a web map zoom."""
+    return 360.0 / (TILE_SIZE * 2.0 ** zoom)
+
+
+def fit_zoom(extent: Tuple[float, float, float, float], width: int = VIEWPORT_PX) -> float:
+    """Zoom at which a (west, south, east, north) extent spans ``width`` pixels."""
+    west, south, east, north = extent
+    # Mercator: a degree of latitude is 1 / cos(latitude) degrees of longitude on screen
+    span = max(east - west, (north - south) / max(math.cos(math.radians((south + north) / 2)), 0.1), 1e-6)
+    return math.log2(360.0 * width / (TILE_SIZE * span))
+
+
+def choose_level(tolerances: Sequence[float], extent: Optional[Tuple[float, float, float, float]],
+                 zoom: Optional[float] = None) -> int:
+    """Coarsest level whose tolerance stays under a pixel at the display zoom.
+
+    The display zoom is the larger of ``zoom`` (the map's initial zoom) and
+    the zoom fitting ``extent``, plus ``ZOOM_HEADROOM`` for zooming in.
+    ``tolerances`` are per level, ascending, level 0 being the source (0).
+    """
+    zooms = [z for z in (zoom, fit_zoom(extent) if extent else None) if z is not None]
+    if not zooms:
+        return 0
+    pixel = pixel_degrees(max(zooms) + ZOOM_HEADROOM)
+    if extent:
+        # Tolerances apply to latitude too, which is stretched on screen
+        pixel *= math.cos(math.radians((extent[1] + extent[3]) / 2))
+    return max(i for i, t in enumerate(tolerances) if t <= pixel or i == 0)
+
+
+class GeoStore:
+    """Memory-mapped commune geometries, looked up by INSEE code."""
+
+    __slots__ = ("path", "header", "codes", "bounds", "_levels")
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        mapped = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if bytes(mapped[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{self.path} is not a geometry store")
+        (length,) = struct.unpack("<Q", bytes(mapped[len(MAGIC):len(MAGIC) + 8]))
+        self.header = json.loads(bytes(mapped[len(MAGIC) + 8:len(MAGIC) + 8 + length]))
+        count, base = self.header["count"], _align(len(MAGIC) + 8 + length)
+        codes_at = base + self.header["codes"]
+        self.codes = mapped[codes_at:codes_at + count * CODE_WIDTH].view(f"S{CODE_WIDTH}")
+        # Stores written before simplification levels have neither bounds nor levels
+        self.bounds = None
+        if "bounds" in self.header:
+            bounds_at = base + self.header["bounds"]
+            self.bounds = mapped[bounds_at:bounds_at + 16 * count].view("<i4").reshape(count, 4)
+        self._levels = []  # (tolerance, offsets, data) per level
+        for level in [{"tolerance": 0.0, "offsets": self.header["offsets"], "data": self.header["data"]}] \
+                + self.header.get("levels", []):
+            offsets_at = base + level["offsets"]
+            offsets = mapped[offsets_at:offsets_at + 8 * (count + 1)].view("<i8")
+            data_at = base + level["data"]
+            self._levels.append((level["tolerance"], offsets, mapped[data_at:data_at + int(offsets[-1])]))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def key(self) -> str:
+        """Property holding the INSEE code in the source features."""
+        return self.header["key"]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._levels[0][1]
+
+    @property
+    def tolerances(self) -> List[float]:
+        """Simplification tolerance (degrees) of each level; level 0 is the source."""
+        return [tolerance for tolerance, _, _ in self._levels]
+
+    def positions(self, codes: Iterable[Any]) -> np.ndarray:
+        """Index of each code (binary search), -1 when absent."""
+        wanted = np.array([normalize_code(c).encode("ascii", "replace") for c in codes], dtype=f"S{CODE_WIDTH}")
+        if not len(self.codes) or not len(wanted):
+            return np.full(len(wanted), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.codes, wanted), len(self.codes) - 1)
+        return np.where(self.codes[pos] == wanted, pos, -1).astype(np.int64)
+
+    def __contains__(self, code: Any) -> bool:
+        return bool(self.positions([code])[0] >= 0)
+
+    def _decode(self, i: int, level: int) -> Dict[str, Any]:
+        _, offsets, data = self._levels[min(max(level, 0), len(self._levels) - 1)]
+        return decode_feature(data[offsets[i]:offsets[i + 1]].tobytes())
+
+    def feature(self, code: Any, level: int = 0) -> Optional[Dict[str, Any]]:
+        i = int(self.positions([code])[0])
+        if i < 0:
+            return None
+        return self._decode(i, level)
+
+    def features(self, codes: Iterable[Any], level: int = 0) -> List[Dict[str, Any]]:
+        """Features of the given codes that exist, in code order, each read once."""
+        positions = np.unique(self.positions(codes))
+        return [self._decode(i, level) for i in positions[positions >= 0]]
+
+    def feature_collection(self, codes: Iterable[Any], level: int = 0) -> Dict[str, Any]:
+        return {"type": "FeatureCollection", "features": self.features(codes, level)}
+
+    def extent(self, codes: Iterable[Any]) -> Optional[Tuple[float, float, float, float]]:
+        """(west, south, east, north) in degrees around the given communes, None if unknown."""
+        if self.bounds is None:
+            return None
+        positions = self.positions(codes)
+        positions = positions[positions >= 0]
+        if not len(positions):
+            return None
+        boxes = self.bounds[positions]
+        west, south = boxes[:, :2].min(axis=0) / QUANTUM
+        east, north = boxes[:, 2:].max(axis=0) / QUANTUM
+        return float(west), float(south), float(east), float(north)
+
+    def level_for(self, codes: Iterable[Any], zoom: Optional[float] = None) -> int:
+        """Level to draw the given communes at, for a map opened at ``zoom``."""
+        codes = list(codes)
+        return choose_level(self.tolerances, self.extent(codes), zoom)
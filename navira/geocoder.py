@@ -0,0 +1,212 @@
+"""
+Offline geocoder of French communes, built from COMMUNES_FRANCE_INSEE.csv.
+
+Resolving addresses through Nominatim blocks every search on a network
+round trip, is rate-limited and does not work air-gapped. The communes file
+already holds every commune's INSEE code, postal code, name and centroid;
+Geocoder indexes it in memory:
+
+    postal codes   sorted array, binary search
+    names          accent- and case-insensitive keys, sorted for exact and
+                   prefix lookups, plus a trigram index for fuzzy matches
+    coordinates    navira.spatial.SpatialIndex for reverse lookups
+
+Addresses resolve to the centroid of their commune, not the street. In the
+shipped communes file the ``longitude`` column holds latitudes and the
+other way round; ``from_communes`` detects which column is which.
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .spatial import SpatialIndex
+
+_POSTAL = re.compile(r"\b(\d{5})\b")
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+# Abbreviations written out before matching ("St-Denis" == "Saint-Denis")
+_WORDS = {"ST": "SAINT", "STE": "SAINTE", "S": "SUR", "SS": "SOUS"}
+FUZZY_MIN_SCORE = 0.5  # trigram Dice similarity
+
+
+class Place(NamedTuple):
+    insee: str
+    postal: str
+    name: str
+    latitude: float
+    longitude: float
+
+
+def normalize_name(text: str) -> str:
+    """Matching key of a name: no accents, upper case, single spaces, abbreviations expanded."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode().upper()
+    words = _NON_ALNUM.sub(" ", text).split()
+    return " ".join(_WORDS.get(w, w) for w in words)
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _coordinates(values: pd.Series) -> np.ndarray:
+    """Float degrees of a coordinate column (decimal commas accepted)."""
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.replace(",", ".", regex=False)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+
+
+def _coordinate_columns(df: pd.DataFrame) -> Tuple[str, str]:
+    """(latitude, longitude) column names; swapped when the data says so.
+
+    Most communes are in metropolitan France (latitude 41-51.5, longitude
+    -5.5-10): a ``longitude`` column with a median in the latitude band
+    holds latitudes.
+    """
+    lat = np.nanmedian(_coordinates(df["latitude"]))
+    lon = np.nanmedian(_coordinates(df["longitude"]))
+    if 41.0 <= lon <= 51.5 and -5.5 <= lat <= 10.0:
+        return "longitude", "latitude"
+    return "latitude", "longitude"
+
+
+class Geocoder:
+    """In-memory commune lookups by postal code, name and coordinates."""
+
+    __slots__ = ("insee", "postal", "names", "latitude", "longitude",
+                 "_postal_order", "_postal_sorted", "_keys", "_key_rows", "_key_ptr",
+                 "_trigrams", "_trigram_counts", "_spatial")
+
+    def __init__(self, insee: np.ndarray, postal: np.ndarray, names: np.ndarray,
+                 latitude: np.ndarray, longitude: np.ndarray):
+        self.insee = insee
+        self.postal = postal
+        self.names = names
+        self.latitude = latitude
+        self.longitude = longitude
+
+        self._postal_order = np.argsort(postal, kind="stable")
+        self._postal_sorted = postal[self._postal_order]
+
+        # Distinct name keys, sorted; rows of keys[i] are key_rows[key_ptr[i]:key_ptr[i + 1]]
+        row_keys = np.array([normalize_name(n) for n in names.tolist()], dtype=str)
+        order = np.argsort(row_keys, kind="stable")
+        self._keys, starts = np.unique(row_keys[order], return_index=True)
+        self._key_rows = order
+        self._key_ptr = np.append(starts, len(order))
+
+        postings: dict = {}
+        for i, key in enumerate(self._keys.tolist()):
+            for gram in _trigrams(key):
+                postings.setdefault(gram, []).append(i)
+        self._trigrams = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self._trigram_counts = np.array([len(_trigrams(k)) for k in self._keys.tolist()], dtype=np.int64)
+
+        self._spatial = SpatialIndex(latitude, longitude)
+
+    @classmethod
+    def from_communes(cls, df: pd.DataFrame, insee_col: str = "codeInsee", postal_col: str = "codePostal",
+                      name_col: str = "nomCommune") -> "Geocoder":
+        """Build from a communes table (see navira.data_loaders.load_communes_data)."""
+        columns = (insee_col, postal_col, name_col, "latitude", "longitude")
+        if df.empty or any(c not in df.columns for c in columns):
+            empty = np.empty(0, dtype=str)
+            return cls(empty, empty, empty, np.empty(0), np.empty(0))
+        lat_col, lon_col = _coordinate_columns(df)
+        return cls(
+            df[insee_col].astype(str).str.strip().str.upper().str.zfill(5).to_numpy(dtype=str),
+            df[postal_col].astype(str).str.strip().str.zfill(5).to_numpy(dtype=str),
+            df[name_col].fillna("").astype(str).to_numpy(dtype=str),
+            _coordinates(df[lat_col]),
+            _coordinates(df[lon_col]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.insee)
+
+    def place(self, row: int) -> Place:
+        return Place(str(self.insee[row]), str(self.postal[row]), str(self.names[row]),
+                     float(self.latitude[row]), float(self.longitude[row]))
+
+    def _rows_of_keys(self, first: int, last: int) -> np.ndarray:
+        return self._key_rows[self._key_ptr[first]:self._key_ptr[last]]
+
+    def by_postal(self, postal: str) -> List[Place]:
+        """Communes of a postal code, in file order."""
+        code = str(postal).strip().zfill(5)
+        a = np.searchsorted(self._postal_sorted, code, side="left")
+        b = np.searchsorted(self._postal_sorted, code, side="right")
+        return [self.place(int(r)) for r in self._postal_order[a:b]]
+
+    def search(self, name: str, limit: int = 10) -> List[Place]:
+        """Communes matching a name: exact key first, then key prefix, then fuzzy (trigram) matches."""
+        key = normalize_name(name)
+        if not key or not len(self._keys):
+            return []
+        a = int(np.searchsorted(self._keys, key, side="left"))
+        if a < len(self._keys) and self._keys[a] == key:
+            rows = self._rows_of_keys(a, a + 1)
+        else:
+            # Keys starting with the query sort between the query and the query + max char
+            b = int(np.searchsorted(self._keys, key + "\x7f", side="left"))
+            rows = self._rows_of_keys(a, b) if b > a else self._fuzzy(key, limit)
+        return [self.place(int(r)) for r in rows[:limit]]
+
+    def _fuzzy(self, key: str, limit: int) -> np.ndarray:
+        grams = _trigrams(key)
+        postings = [self._trigrams[g] for g in grams if g in self._trigrams]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._keys))
+        score = 2.0 * shared / (len(grams) + self._trigram_counts)
+        candidates = np.flatnonzero(score >= FUZZY_MIN_SCORE)
+        candidates = candidates[np.argsort(-score[candidates], kind="stable")][:limit]
+        if not len(candidates):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._rows_of_keys(i, i + 1) for i in candidates])
+
+    def geocode(self, address: str) -> Optional[Place]:
+        """Commune of a free-form address or postal code, None when nothing matches.
+
+        A postal code in the text selects its communes, disambiguated by the
+        name around it; otherwise the name parts of the address are searched
+        (last comma-separated part first).
+        """
+        text = str(address or "").strip()
+        if not text:
+            return None
+        match = _POSTAL.search(text)
+        names = self._name_candidates(text, match)
+        if match:
+            places = self.by_postal(match.group(1))
+            if places:
+                for candidate in names:
+                    key = normalize_name(candidate)
+                    for place in places:
+                        if key and normalize_name(place.name).startswith(key):
+                            return place
+                return places[0]
+        for candidate in names:
+            found = self.search(candidate, limit=1)
+            if found:
+                return found[0]
+        return None
+
+    @staticmethod
+    def _name_candidates(text: str, match: Optional[re.Match]) -> Iterable[str]:
+        candidates = []
+        if match:
+            candidates.append(text[match.end():].split(",")[0])
+        parts = [p for p in (s.strip() for s in text.split(",")) if p]
+        candidates.extend(reversed(parts))
+        # Street numbers and postal codes are not part of a commune name
+        cleaned = [re.sub(r"\d+", " ", c).strip() for c in candidates]
+        return list(dict.fromkeys(c for c in cleaned if c and c.upper() != "FRANCE"))
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[Place]:
+        """Commune whose centroid is nearest to the coordinates."""
+        rows, _ = self._spatial.nearest(latitude, longitude, k=1)
+        return self.place(int(rows[0])) if len(rows) else None
@@ -6,6 +6,8 @@ from typing import Any, Dict, Optional, Iterable, Set
 
 import streamlit as st
 
+from .geo import get_communes_geo_store
+
 
 @st.cache_data(show_spinner=False)
 def load_communes_geojson(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -48,6 +50,12 @@ def load_communes_geojson(path: Optional[str] = None) -> Optional[Dict[str, Any]
 
 @st.cache_data(show_spinner=False)
 def load_communes_geojson_filtered(insee_codes: Iterable[str], path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    # Default source: read only the requested communes from the compiled store
+    store = get_communes_geo_store() if path is None else None
+    if store is not None:
+        filtered = store.feature_collection(insee_codes)
+        if filtered["features"]:
+            return filtered
     base = load_communes_geojson(path)
     if not base:
         return None
@@ -0,0 +1,54 @@
+"""
+Fast content hashes of DataFrames for cache keys.
+
+Hashing a frame by serializing it (``to_csv`` then MD5) costs more than most
+of the computations it keys. ``content_hash`` instead hashes every row with
+``pd.util.hash_pandas_object`` (vectorized, one uint64 per row) and digests
+that buffer together with the columns, dtypes and shape.
+
+Digests are not memoized per frame object: callers edit frames in place
+(cell assignments, column casts), which would leave a memoized digest
+stale and make Streamlit serve results computed from the old values. Pass
+``HASH_FUNCS`` to ``st.cache_data(hash_funcs=...)`` so Streamlit keys cached
+functions the same way.
+"""
+
+import hashlib
+from typing import Any
+
+import pandas as pd
+
+
+def _row_hashes(df: pd.DataFrame):
+    try:
+        return pd.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        # Unhashable cells (lists, dicts): hash their text instead
+        return pd.util.hash_pandas_object(df.astype(str), index=False)
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Hex digest of a frame's columns, dtypes and values (index ignored)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((df.shape, [str(c) for c in df.columns], [str(t) for t in df.dtypes])).encode())
+    if len(df) and len(df.columns):
+        h.update(_row_hashes(df).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Cache key of a frame: its ``content_hash``, recomputed on every call."""
+    return content_hash(df)
+
+
+def cache_key(*args: Any, **kwargs: Any) -> str:
+    """Deterministic key of arguments; DataFrames contribute their content hash."""
+    def part(value: Any) -> str:
+        return frame_hash(value) if isinstance(value, pd.DataFrame) else str(value)
+
+    parts = [part(a) for a in args] + [f"{k}={part(v)}" for k, v in sorted(kwargs.items())]
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
+
+
+# st.cache_data(hash_funcs=HASH_FUNCS): key DataFrame arguments by frame_hash
+HASH_FUNCS = {pd.DataFrame: frame_hash}
@@ -9,15 +9,18 @@ This module provides functionality for:
 """
 
 import folium
+import html
 import os
 from folium import plugins
 import pandas as pd
 import streamlit as st
 from typing import Dict, List, Optional, Any, Tuple
 import branca.colormap as cm
-from .competitors import get_top_competitors, competitor_choropleth_df, get_competitor_names, ChloroplethDiagnostics
-from .data_loaders import build_postal_to_insee_mapping, load_communes_data
-from .geo import load_communes_geojson, detect_insee_key, get_geojson_summary
+from branca.element import MacroElement
+from jinja2 import Template
+from .competitors import get_top_competitors, competitor_choropleths, get_competitor_names, ChloroplethDiagnostics
+from .data_loaders import get_postal_insee_mapping, load_communes_data
+from .geo import load_communes_geojson, detect_insee_key, get_display_polygons, get_geojson_summary
 
 
 class MapConfig:
@@ -36,7 +39,8 @@ def create_recruitment_map(
     hospital_info: Optional[Dict[str, Any]] = None,
     establishments_df: Optional[pd.DataFrame] = None,
     allocation: str = "even_split",
-    max_competitors: int = 5
+    max_competitors: int = 5,
+    shared_geometry: bool = True
 ) -> Tuple[folium.Map, List[ChloroplethDiagnostics]]:
     """
     Create interactive Folium map with recruitment zone choropleths.
@@ -47,6 +51,8 @@ def create_recruitment_map(
         establishments_df: DataFrame with hospital information for competitor names
         allocation: Allocation strategy ("even_split" or "no_split")
         max_competitors: Maximum number of competitor layers to show
+        shared_geometry: Emit the commune geometry once for all layers and
+            restyle it in the browser on toggle (False: one GeoJSON per layer)
         
     Returns:
         Tuple of (folium.Map, List[ChloroplethDiagnostics])
@@ -54,7 +60,8 @@ def create_recruitment_map(
     Notes:
         - Creates base map centered on hospital or France
         - Adds hospital marker and competitor markers if coordinates available
-        - Generates up to max_competitors choropleth layers
+        - Generates up to max_competitors choropleth layers (sharing one
+          copy of the geometry unless shared_geometry is False)
         - Includes layer control and legend
         - Returns diagnostics for each choropleth layer
     """
@@ -87,7 +94,7 @@ def create_recruitment_map(
     
     # Load required data
     communes_df = load_communes_data()
-    cp_to_insee = build_postal_to_insee_mapping(communes_df)
+    cp_to_insee = get_postal_insee_mapping()
     
     # Get top competitors first
     competitors = get_top_competitors(hospital_finess, max_competitors)
@@ -96,74 +103,27 @@ def create_recruitment_map(
         _add_hospital_marker(m, hospital_finess, hospital_info)
         return m, []
     
-    # Get needed INSEE codes to filter GeoJSON for performance
-    needed_insee_codes = []
-    # Include selected hospital first so we can build its own layer distinctly
-    focal_df, _ = competitor_choropleth_df(hospital_finess, cp_to_insee, allocation)
-    if not focal_df.empty:
-        needed_insee_codes.extend(focal_df['insee5'].tolist())
-    for competitor in competitors[:max_competitors]:
-        df, _ = competitor_choropleth_df(competitor, cp_to_insee, allocation)
-        if not df.empty:
-            needed_insee_codes.extend(df['insee5'].tolist())
-    
-    # Add aggregation target codes for major cities when we have arrondissement data
-    has_paris_arr = any(code.startswith('751') for code in needed_insee_codes)
-    has_marseille_arr = any(code.startswith('132') for code in needed_insee_codes)
-    has_lyon_arr = any(code.startswith('6938') or code.startswith('6912') for code in needed_insee_codes)
-    
-    if has_paris_arr:
-        needed_insee_codes.append('75056')  # Single Paris polygon
-    if has_marseille_arr:
-        needed_insee_codes.append('13055')  # Single Marseille polygon  
-    if has_lyon_arr:
-        needed_insee_codes.extend(['69380', '69123'])  # Lyon polygons
-    
-    # Load GeoJSON - simple and direct approach
-    from .geo import load_communes_geojson_filtered, load_communes_geojson_simple, detect_insee_key
-    
-    # Try to load GeoJSON data
+    # Slice the selected hospital and its competitors from the recruitment matrix at once
+    layers = competitor_choropleths([hospital_finess] + competitors, cp_to_insee, allocation)
     
-    # Check if we need Paris arrondissement detail
-    has_paris_arrondissements = any(code.startswith('751') for code in needed_insee_codes)
+    # Map every layer onto the polygons drawn (arrondissements onto their city
+    # when the geometry has none) with the precomputed display polygon table
+    display_polygons = get_display_polygons()
+    geometry_set = display_polygons.preferred_set()
+    layers = {
+        finess: (display_polygons.aggregate(df, geometry_set), diagnostics)
+        for finess, (df, diagnostics) in layers.items()
+    }
+    # Include selected hospital first so we can build its own layer distinctly
+    focal_df, _ = layers[hospital_finess]
+    needed_insee_codes = sorted({code for df, _ in layers.values() for code in df['insee5']})
     
-    if has_paris_arrondissements:
-        # Build a combined GeoJSON: nationwide communes + Paris arrondissements
-        try:
-            import json
-            # Base: all needed communes
-            base_geo = load_communes_geojson_filtered(needed_insee_codes) if needed_insee_codes else load_communes_geojson_simple()
-            base_features = list(base_geo.get('features', [])) if base_geo else []
-            # Remove single-Paris polygon if present
-            filtered_base = []
-            for feat in base_features:
-                props = feat.get('properties', {})
-                if str(props.get('code', '')).zfill(5) == '75056':
-                    continue
-                filtered_base.append(feat)
-            # Load official arrondissement shapes and normalize property key to 'code'
-            with open('data/paris_arrondissements_official.geojson', 'r', encoding='utf-8') as f:
-                arr_geo = json.load(f)
-            arr_features = []
-            for feat in arr_geo.get('features', []):
-                props = feat.get('properties', {})
-                insee = str(props.get('c_arinsee', '')).zfill(5)
-                if not insee:
-                    continue
-                # Duplicate under 'code' so downstream uses a single key
-                props['code'] = insee
-                feat['properties'] = props
-                arr_features.append(feat)
-            geojson_data = {"type": "FeatureCollection", "features": filtered_base + arr_features}
-        except Exception:
-            # Fallback to communes only
-            geojson_data = load_communes_geojson_filtered(needed_insee_codes) if needed_insee_codes else load_communes_geojson_simple()
+    # Load only the needed polygons
+    from .geo import load_display_geojson, load_communes_geojson_simple, detect_insee_key
+    if needed_insee_codes:
+        geojson_data = load_display_geojson(needed_insee_codes, geometry_set, zoom=zoom_start)
     else:
-        # Use regular communes GeoJSON
-        if needed_insee_codes:
-            geojson_data = load_communes_geojson_filtered(needed_insee_codes)
-        else:
-            geojson_data = load_communes_geojson_simple()
+        geojson_data = load_communes_geojson_simple()
     
     diagnostics_list = []
     
@@ -193,7 +153,7 @@ def create_recruitment_map(
     
     # Pre-calculate all choropleth data to determine global scale
     for i, competitor_finess in enumerate(competitors):
-        df, diagnostics = competitor_choropleth_df(competitor_finess, cp_to_insee, allocation)
+        df, diagnostics = layers[competitor_finess]
         diagnostics_list.append(diagnostics)
         
         if not df.empty:
@@ -214,32 +174,28 @@ def create_recruitment_map(
     focal_colormap = cm.linear.Blues_06.scale(global_min_value, global_max_value)
     focal_colormap.caption = 'Patients recruited (selected)'
     
-    # Add focal hospital choropleth layer first (distinct color)
+    # Focal hospital layer first (distinct color), then competitors
+    choropleth_layers = []
     if not focal_df.empty:
-        _add_choropleth_layer(
-            m,
-            geojson_data,
-            focal_df,
-            insee_key,
-            layer_name=f"Selected hospital",
-            colormap=focal_colormap,
-            show=True,
-            communes_df=communes_df
-        )
-
-    # Add competitor choropleth layers
+        choropleth_layers.append(("Selected hospital", focal_df, focal_colormap, True))
     for i, competitor_finess in enumerate(competitors):
         if competitor_finess in choropleth_data:
             competitor_name = competitor_names.get(competitor_finess, f"Competitor {i+1}")
+            choropleth_layers.append((competitor_name, choropleth_data[competitor_finess], comp_colormap, False))
 
+    if shared_geometry:
+        # Geometry emitted once; layer toggles restyle it in the browser
+        _add_shared_choropleth(m, geojson_data, choropleth_layers, insee_key, communes_df=communes_df)
+    else:
+        for layer_name, df, colormap, show in choropleth_layers:
             _add_choropleth_layer(
-                m, 
-                geojson_data, 
-                choropleth_data[competitor_finess], 
+                m,
+                geojson_data,
+                df,
                 insee_key,
-                competitor_name,
-                comp_colormap,
-                show=False,
+                layer_name,
+                colormap,
+                show=show,
                 communes_df=communes_df
             )
     
@@ -289,6 +245,40 @@ def create_recruitment_map(
     return m, diagnostics_list
 
 
+def _feature_code(feature: Dict[str, Any], insee_key: str) -> str:
+    c = str((feature.get('properties') or {}).get(insee_key, '')).strip().upper()
+    return c if c.startswith(('2A', '2B')) else c.zfill(5)
+
+
+def _commune_names(communes_df: Optional[pd.DataFrame], codes: Optional[set] = None) -> Dict[str, str]:
+    """INSEE code -> commune name for tooltips (restricted to ``codes`` when given)."""
+    if communes_df is None or communes_df.empty:
+        return {}
+    if 'codeInsee' not in communes_df.columns or 'nomCommune' not in communes_df.columns:
+        return {}
+    insee = communes_df['codeInsee'].astype(str).str.zfill(5)
+    names = communes_df['nomCommune'].astype(str)
+    if codes is not None:
+        keep = insee.isin(codes)
+        insee, names = insee[keep], names[keep]
+    return dict(zip(insee, names))
+
+
+_FILLED_STYLE = {
+    'color': '#333333',
+    'weight': 0.5,
+    'fillOpacity': MapConfig.CHOROPLETH_OPACITY,
+    'opacity': MapConfig.CHOROPLETH_LINE_OPACITY
+}
+_EMPTY_STYLE = {
+    'fillColor': '#f0f0f0',
+    'color': '#cccccc',
+    'weight': 0.5,
+    'fillOpacity': 0.1,
+    'opacity': 0.2
+}
+
+
 def _add_choropleth_layer(
     m: folium.Map, 
     geojson_data: Dict[str, Any], 
@@ -299,83 +289,16 @@ def _add_choropleth_layer(
     show: bool = True,
     communes_df: Optional[pd.DataFrame] = None
 ) -> None:
-    """Add a single choropleth layer to the map."""
+    """Add a single choropleth layer to the map (with its own copy of the geometry).
+
+    ``choropleth_df`` holds values per display polygon (see DisplayPolygons.aggregate).
+    """
     try:
         # Create value mapping for styling
         value_map = dict(zip(choropleth_df['insee5'].astype(str), choropleth_df['value']))
 
-        # Detect which INSEE codes are present in the GeoJSON
-        feature_codes = set()
-        for f in geojson_data.get('features', []):
-            props = f.get('properties', {})
-            if insee_key in props:
-                c = str(props[insee_key]).strip().upper()
-                feature_codes.add(c if c.startswith(('2A','2B')) else c.zfill(5))
-        
-        # Presence checks (no UI output)
-        paris_geo_codes = [c for c in feature_codes if c.startswith('75')]
-        
-        # Check if we're using arrondissement polygons (no aggregation needed)
-        has_arrondissement_polygons = any(code.startswith('751') for code in feature_codes)
-        if has_arrondissement_polygons:
-            # Skip aggregation - show data directly on arrondissement polygons
-            skip_aggregation = True
-        else:
-            skip_aggregation = False
-
-        # Apply aggregation only if we don't have arrondissement polygons
-        if not skip_aggregation:
-            # If the GeoJSON does NOT contain arrondissement polygons for major cities,
-            # aggregate arrondissement values into the single commune code present.
-            def _collapse_arr_to_city(value_map_in: Dict[str, float]) -> Dict[str, float]:
-                vm = value_map_in.copy()
-                # Paris: arr 75101..75120 -> 75056
-                has_75056 = '75056' in feature_codes
-                has_arrondissements = any(code.startswith('751') for code in feature_codes)
-                # Paris aggregation only when arrondissement polygons are absent
-                
-                if has_75056 and not has_arrondissements:
-                    total = 0.0
-                    arrondissement_count = 0
-                    for i in range(1, 21):
-                        k = f"751{str(i).zfill(2)}"
-                        if k in vm:
-                            total += float(vm.pop(k))
-                            arrondissement_count += 1
-                    if total > 0:
-                        vm['75056'] = vm.get('75056', 0.0) + total
-                    
-                # Marseille: arr 13201..13216 -> 13055
-                if ('13055' in feature_codes) and not any(code.startswith('132') for code in feature_codes):
-                    total = 0.0
-                    for i in range(1, 17):
-                        k = f"132{str(i).zfill(2)}"
-                        if k in vm:
-                            total += float(vm.pop(k))
-                    if total > 0:
-                        vm['13055'] = vm.get('13055', 0.0) + total
-                # Lyon: arr 69381..69389 -> 69380 (or legacy 69123 if present)
-                lyon_city_code = '69380' if '69380' in feature_codes else ('69123' if '69123' in feature_codes else None)
-                if lyon_city_code and not any(code.startswith('6938') for code in feature_codes):
-                    total = 0.0
-                    for i in range(1, 10):
-                        k = f"6938{i}"
-                        if k in vm:
-                            total += float(vm.pop(k))
-                    if total > 0:
-                        vm[lyon_city_code] = vm.get(lyon_city_code, 0.0) + total
-                return vm
-
-            value_map = _collapse_arr_to_city(value_map)
-
         # Create commune name mapping for tooltips
-        name_map = {}
-        if communes_df is not None and not communes_df.empty:
-            if 'codeInsee' in communes_df.columns and 'nomCommune' in communes_df.columns:
-                name_map = dict(zip(
-                    communes_df['codeInsee'].astype(str).str.zfill(5),
-                    communes_df['nomCommune'].astype(str)
-                ))
+        name_map = _commune_names(communes_df)
         
         # Create feature group for this layer
         feature_group = folium.FeatureGroup(name=layer_name, show=show)
@@ -386,21 +309,9 @@ def _add_choropleth_layer(
             value = value_map.get(insee_code, 0)
             
             if value > 0:
-                return {
-                    'fillColor': colormap(value),
-                    'color': '#333333',
-                    'weight': 0.5,
-                    'fillOpacity': MapConfig.CHOROPLETH_OPACITY,
-                    'opacity': MapConfig.CHOROPLETH_LINE_OPACITY
-                }
+                return {'fillColor': colormap(value), **_FILLED_STYLE}
             else:
-                return {
-                    'fillColor': '#f0f0f0',
-                    'color': '#cccccc',
-                    'weight': 0.5,
-                    'fillOpacity': 0.1,
-                    'opacity': 0.2
-                }
+                return dict(_EMPTY_STYLE)
         
         # Tooltip function
         def create_tooltip(feature):
@@ -433,6 +344,124 @@ def _add_choropleth_layer(
         st.warning(f"Error adding choropleth layer '{layer_name}': {e}")
 
 
+class _SharedChoroplethStyler(MacroElement):
+    """Restyles the shared choropleth GeoJSON in the browser when layers are toggled.
+
+    Every feature carries ``v`` (value per layer) and ``c`` (fill colour per
+    layer, null without patients). A feature is filled with the colour of the
+    last active layer recruiting there, as the topmost of stacked layers
+    would be; the geometry is hidden when no layer is active.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var shared = {{ this.geojson.get_name() }};
+            var groups = [{% for g in this.groups %}{{ g.get_name() }}{% if not loop.last %}, {% endif %}{% endfor %}];
+            var names = {{ this.names|tojson }};
+            var filled = {{ this.filled|tojson }};
+            var empty = {{ this.empty|tojson }};
+            function active() {
+                return groups.map(function(g) { return map.hasLayer(g); });
+            }
+            function restyle() {
+                var on = active();
+                if (on.indexOf(true) < 0) {
+                    map.removeLayer(shared);
+                    return;
+                }
+                shared.eachLayer(function(layer) {
+                    var p = layer.feature.properties, fill = null;
+                    for (var i = 0; i < on.length; i++) {
+                        if (on[i] && p.c[i]) { fill = p.c[i]; }
+                    }
+                    layer.setStyle(fill ? Object.assign({fillColor: fill}, filled) : empty);
+                });
+                if (!map.hasLayer(shared)) { shared.addTo(map); }
+            }
+            shared.bindTooltip(function(layer) {
+                var p = layer.feature.properties, on = active(), rows = [];
+                for (var i = 0; i < on.length; i++) {
+                    if (on[i]) {
+                        rows.push(names[i] + ': ' + (p.v[i] > 0 ? p.v[i].toFixed(1) + ' patients' : 'no patients'));
+                    }
+                }
+                return '<b>' + p.name + '</b>' + (rows.length ? '<br/>' + rows.join('<br/>') : '');
+            }, {sticky: true, opacity: 0.9});
+            // Also catches the layer control removing layers hidden at start
+            map.on('layeradd layerremove', function(e) {
+                if (groups.indexOf(e.layer) >= 0) { restyle(); }
+            });
+            restyle();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, geojson: folium.GeoJson, groups: List[folium.FeatureGroup], names: List[str]):
+        super().__init__()
+        self._name = "SharedChoroplethStyler"
+        self.geojson = geojson
+        self.groups = groups
+        self.names = [html.escape(n) for n in names]
+        self.filled = _FILLED_STYLE
+        self.empty = _EMPTY_STYLE
+
+
+def _add_shared_choropleth(
+    m: folium.Map,
+    geojson_data: Dict[str, Any],
+    layers: List[Tuple[str, pd.DataFrame, Any, bool]],
+    insee_key: str,
+    communes_df: Optional[pd.DataFrame] = None
+) -> None:
+    """Add several choropleth layers drawn on one copy of the geometry.
+
+    ``layers`` are (name, choropleth frame, colormap, shown) tuples, with
+    values per display polygon (see DisplayPolygons.aggregate). Each
+    feature is emitted once with every layer's value and precomputed colour;
+    the layers appear in the layer control as empty overlays whose toggling
+    restyles the shared GeoJSON client side.
+    """
+    if not layers:
+        return
+    try:
+        features = geojson_data.get('features', [])
+        codes = [_feature_code(f, insee_key) for f in features]
+        value_maps = [dict(zip(df['insee5'].astype(str), df['value'])) for _, df, _, _ in layers]
+        name_map = _commune_names(communes_df, set(codes))
+
+        shared_features = []
+        for feature, code in zip(features, codes):
+            values = [round(float(vm.get(code, 0.0)), 2) for vm in value_maps]
+            shared_features.append({
+                "type": "Feature",
+                "geometry": feature.get("geometry"),
+                "properties": {
+                    insee_key: code,
+                    "name": html.escape(name_map.get(code, f"INSEE {code}")),
+                    "v": values,
+                    "c": [colormap(v) if v > 0 else None for v, (_, _, colormap, _) in zip(values, layers)],
+                },
+            })
+
+        shared = folium.GeoJson(
+            {"type": "FeatureCollection", "features": shared_features},
+            name="Recruitment zones",
+            control=False
+        )
+        shared.add_to(m)
+        groups = []
+        for layer_name, _, _, show in layers:
+            group = folium.FeatureGroup(name=layer_name, show=show)
+            group.add_to(m)
+            groups.append(group)
+        _SharedChoroplethStyler(shared, groups, [name for name, _, _, _ in layers]).add_to(m)
+
+    except Exception as e:
+        st.warning(f"Error adding choropleth layers: {e}")
+
+
 def _add_hospital_marker(
     m: folium.Map, 
     hospital_finess: str, 
@@ -0,0 +1,179 @@
+"""
+Postal code -> INSEE commune codes mapping as a process-level resource.
+
+Choropleth functions are cached with ``st.cache_data``, which hashes every
+argument on every call: passing the postal mapping as a plain dict meant
+hashing all of it for each competitor layer of each render.
+PostalInseeMapping carries a ``version`` token (a digest of its arrays), is
+built once per process, and ``HASH_FUNCS`` tells Streamlit to key it by that
+token only.
+
+The mapping is stored CSR-style in three NumPy arrays instead of a dict of
+Python lists:
+
+    postal   sorted unique postal codes
+    offsets  INSEE codes of postal[i] are insee[offsets[i]:offsets[i + 1]]
+    insee    INSEE codes, sorted within each postal code
+
+plus ``weights``, the even-split share (1 / number of communes) of each
+postal code. Looking up many postal codes is one binary search, and
+``gather`` / ``allocate`` expand them into communes with gathers only.
+scripts/build_parquet.py saves it as postal_insee.npz next to the legacy
+Parquet files.
+"""
+
+import hashlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ARTIFACT_NAME = "postal_insee.npz"
+
+# Postal codes of Paris / Marseille / Lyon arrondissements -> arrondissement INSEE
+# codes (the GeoJSON draws arrondissements, the communes file only the city)
+ARRONDISSEMENTS: Tuple[Tuple[str, str], ...] = (
+    tuple((f"750{i:02d}", f"751{i:02d}") for i in range(1, 21))
+    + tuple((f"130{i:02d}", f"132{i:02d}") for i in range(1, 17))
+    + tuple((f"690{i:02d}", f"6938{i}") for i in range(1, 10))
+)
+
+
+class PostalInseeMapping(Mapping):
+    """Read-only postal code -> list of INSEE codes, identified by ``version``."""
+
+    __slots__ = ("postal", "offsets", "insee", "weights", "version")
+
+    def __init__(self, postal: np.ndarray, offsets: np.ndarray, insee: np.ndarray, version: Optional[str] = None):
+        self.postal = postal
+        self.offsets = offsets
+        self.insee = insee
+        counts = np.diff(offsets)
+        self.weights = np.divide(1.0, counts, out=np.zeros(len(counts)), where=counts > 0)
+        self.version = version if version is not None else self._token()
+
+    def _token(self) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for array in (self.postal, self.offsets, self.insee):
+            h.update(np.ascontiguousarray(array).tobytes())
+        return h.hexdigest()
+
+    @classmethod
+    def from_pairs(cls, postal: Iterable, insee: Iterable) -> "PostalInseeMapping":
+        """Build from parallel postal / INSEE code sequences (duplicates and blanks dropped)."""
+        pairs = pd.DataFrame({"postal": list(postal), "insee": list(insee)}, dtype=object).dropna()
+        for col in ("postal", "insee"):
+            pairs[col] = pairs[col].astype(str).str.strip()
+        pairs = pairs[(pairs["postal"] != "") & (pairs["insee"] != "")]
+        for col in ("postal", "insee"):
+            pairs[col] = pairs[col].str.zfill(5)
+        pairs = pairs.drop_duplicates().sort_values(["postal", "insee"])
+        postal_sorted = pairs["postal"].to_numpy(dtype=str)
+        keys, starts = np.unique(postal_sorted, return_index=True)
+        offsets = np.append(starts, len(postal_sorted)).astype(np.int64)
+        return cls(keys, offsets, pairs["insee"].to_numpy(dtype=str))
+
+    @classmethod
+    def from_communes(cls, communes_df: pd.DataFrame, postal_col: str = "codePostal",
+                      insee_col: str = "codeInsee", arrondissements: bool = True) -> "PostalInseeMapping":
+        """Build from a communes table; adds the arrondissement codes of Paris, Marseille and Lyon (empty without communes)."""
+        if communes_df.empty or postal_col not in communes_df.columns or insee_col not in communes_df.columns:
+            return cls.from_pairs([], [])
+        valid = communes_df[[postal_col, insee_col]].dropna()
+        postal, insee = valid[postal_col].tolist(), valid[insee_col].tolist()
+        if arrondissements:
+            postal = postal + [p for p, _ in ARRONDISSEMENTS]
+            insee = insee + [i for _, i in ARRONDISSEMENTS]
+        return cls.from_pairs(postal, insee)
+
+    @classmethod
+    def from_dict(cls, codes: Dict[str, List[str]]) -> "PostalInseeMapping":
+        postal = [p for p, values in codes.items() for _ in values]
+        insee = [i for values in codes.values() for i in values]
+        return cls.from_pairs(postal, insee)
+
+    def save(self, path: Path, **meta: str) -> None:
+        """Write the arrays (and string metadata, e.g. the source hash) to an .npz file."""
+        # Codes are ASCII: store them as bytes (a quarter of the size of NumPy unicode)
+        np.savez(path, postal=np.char.encode(self.postal, "ascii"), offsets=self.offsets,
+                 insee=np.char.encode(self.insee, "ascii"), version=np.array(self.version),
+                 **{k: np.array(v) for k, v in meta.items()})
+
+    @classmethod
+    def load(cls, path: Path) -> Tuple["PostalInseeMapping", Dict[str, str]]:
+        """Read a saved mapping; returns it with its metadata."""
+        with np.load(path, allow_pickle=False) as f:
+            mapping = cls(f["postal"].astype(str), f["offsets"], f["insee"].astype(str), str(f["version"]))
+            meta = {k: str(f[k]) for k in f.files if k not in ("postal", "offsets", "insee", "version")}
+        return mapping, meta
+
+    def positions(self, postal_codes) -> np.ndarray:
+        """Row of each postal code (vectorized binary search), -1 when unmapped."""
+        codes = np.asarray(postal_codes, dtype=str)
+        if not len(self.postal):
+            return np.full(codes.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.postal, codes)
+        pos = np.minimum(pos, len(self.postal) - 1)
+        return np.where(self.postal[pos] == codes, pos, -1).astype(np.int64)
+
+    def gather(self, postal_codes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Expand postal codes into their communes.
+
+        Returns, for every (input row, mapped commune) pair, the input row and
+        the commune's position in ``insee``, plus the mask of rows whose postal
+        code is mapped.
+        """
+        pos = self.positions(postal_codes)
+        matched = pos >= 0
+        mapped = np.flatnonzero(matched)
+        starts, lengths = self.offsets[pos[mapped]], np.diff(self.offsets)[pos[mapped]]
+        rows = np.repeat(np.arange(len(mapped)), lengths)
+        # Entry k of row r reads insee[starts[r] + k]
+        first = np.cumsum(lengths) - lengths
+        index = starts[rows] + np.arange(len(rows)) - first[rows]
+        return mapped[rows], index, matched
+
+    def weight_of(self, index: np.ndarray) -> np.ndarray:
+        """Even-split share of each commune entry (by position in ``insee``)."""
+        return self.weights[np.searchsorted(self.offsets, index, side="right") - 1]
+
+    def allocate(self, postal_codes, counts, allocation: str = "even_split") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Spread per-postal counts over their communes.
+
+        Returns (INSEE code, value) arrays with one entry per (row, mapped
+        commune), and the mask of rows whose postal code is mapped.
+        ``even_split`` divides a count among the communes, ``no_split`` gives
+        each commune the full count.
+        """
+        rows, index, matched = self.gather(postal_codes)
+        values = np.asarray(counts, dtype="float64")[rows]
+        if allocation == "even_split":
+            values = values * self.weight_of(index)
+        return self.insee[index], values, matched
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {p: self.insee[a:b].tolist() for p, a, b in zip(self.postal.tolist(), self.offsets[:-1], self.offsets[1:])}
+
+    def __getitem__(self, postal: str) -> List[str]:
+        i = int(self.positions([str(postal)])[0])
+        if i < 0:
+            raise KeyError(postal)
+        return self.insee[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def __contains__(self, postal) -> bool:
+        return bool(self.positions([str(postal)])[0] >= 0)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.postal.tolist())
+
+    def __len__(self) -> int:
+        return len(self.postal)
+
+    def __repr__(self) -> str:
+        return f"PostalInseeMapping({len(self.postal)} postal codes, {len(self.insee)} communes, version={self.version})"
+
+
+# st.cache_data(hash_funcs=HASH_FUNCS): key mapping arguments by their version token
+HASH_FUNCS = {PostalInseeMapping: lambda mapping: mapping.version}
@@ -0,0 +1,163 @@
+"""
+Peer percentile ranking of hospital metrics.
+
+"Where does this hospital rank nationally / in its region / among its
+status group / among hospitals of its size?" PeerRanks answers it without
+scanning hospitals: for every metric and year it keeps the sorted values of
+each peer group, so a hospital's percentile, rank position and quartile
+are two binary searches.
+
+Hospital values come from the HOP rows of the benchmark cube
+(navira.benchmark); peer attributes (region, status) from the hospital
+reference list, volume bins from the year's procedure count.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .benchmark import HOP
+
+ID = 'finessGeoDP'
+
+
+class RankMetric(NamedTuple):
+    metric: str  # benchmark cube metric
+    category: Optional[str]  # cube category, as a share of the entity-year total
+    higher_is_better: bool
+
+
+RANK_METRICS: Dict[str, RankMetric] = {
+    'volume': RankMetric('volume', None, True),
+    'complication_rate': RankMetric('complications', None, False),
+    'robotic_share': RankMetric('approach', 'ROB', True),
+}
+
+NATIONAL = 'national'
+REGION = 'region'
+STATUS = 'status'
+VOLUME_BIN = 'volume_bin'
+PEER_GROUPS = (NATIONAL, REGION, STATUS, VOLUME_BIN)
+
+# Annual volume bins, as in the national overview
+VOLUME_BIN_EDGES = [50, 100, 200]
+VOLUME_BIN_LABELS = ["<50", "50–100", "100–200", ">200"]
+
+
+class Rank(NamedTuple):
+    value: float
+    percentile: float  # share of peers doing worse, ties counted half (0-100)
+    position: int  # 1 = best
+    peers: int
+    quartile: int  # 1 = best quarter
+
+
+def volume_bin(volume):
+    """Bin label(s) of annual procedure counts (scalar or array)."""
+    return np.asarray(VOLUME_BIN_LABELS, dtype=object)[np.searchsorted(VOLUME_BIN_EDGES, volume, side='right')]
+
+
+def hospital_values(cube: pd.DataFrame) -> pd.DataFrame:
+    """Long table (finessGeoDP, name, annee, value) of every ranked metric."""
+    hop = cube[cube['level'] == HOP] if not cube.empty else cube
+    parts = []
+    for name, spec in RANK_METRICS.items():
+        rows = hop[hop['metric'] == spec.metric]
+        if rows.empty:
+            continue
+        if spec.category is None:
+            value = rows['num'] if spec.metric == 'volume' else rows['num'] / rows['den'].where(rows['den'] > 0) * 100.0
+            part = pd.DataFrame({ID: rows['entity'], 'annee': rows['annee'], 'value': value})
+        else:
+            # Hospitals reporting the metric but not the category have a zero share
+            totals = rows.drop_duplicates(['entity', 'annee'])[['entity', 'annee', 'den']]
+            hits = rows.loc[rows['category'] == spec.category, ['entity', 'annee', 'num']]
+            part = totals.merge(hits, on=['entity', 'annee'], how='left')
+            part = pd.DataFrame({
+                ID: part['entity'],
+                'annee': part['annee'],
+                'value': part['num'].fillna(0) / part['den'].where(part['den'] > 0) * 100.0,
+            })
+        parts.append(part.assign(name=name))
+    if not parts:
+        return pd.DataFrame(columns=[ID, 'name', 'annee', 'value'])
+    out = pd.concat(parts, ignore_index=True).dropna(subset=['value'])
+    out['annee'] = out['annee'].astype('int64')
+    return out[[ID, 'name', 'annee', 'value']]
+
+
+class PeerRanks:
+    """Sorted peer-group value arrays per (metric, year)."""
+
+    __slots__ = ("values", "peers", "sorted")
+
+    def __init__(self, values: Dict[Tuple[str, int], Dict[str, float]], peers: Dict[str, Dict[str, str]],
+                 sorted_values: Dict[Tuple[str, int, str, str], np.ndarray]):
+        self.values = values  # (metric, year) -> {FINESS: value}
+        self.peers = peers  # FINESS -> {region, status}
+        self.sorted = sorted_values  # (metric, year, peer group, group key) -> ascending values
+
+    @classmethod
+    def from_tables(cls, cube: pd.DataFrame, hospitals: pd.DataFrame) -> "PeerRanks":
+        """Build from the benchmark cube and the hospital reference list."""
+        peers = pd.DataFrame(columns=[REGION, STATUS])
+        if not hospitals.empty and {'finessGeo', 'lib_reg', 'statut'} <= set(hospitals.columns):
+            peers = (hospitals.assign(finessGeo=hospitals['finessGeo'].astype(str))
+                     .drop_duplicates('finessGeo', keep='last')
+                     .set_index('finessGeo')[['lib_reg', 'statut']]
+                     .rename(columns={'lib_reg': REGION, 'statut': STATUS})
+                     .astype(str))
+
+        values = hospital_values(cube)
+        volumes = values[values['name'] == 'volume'].set_index([ID, 'annee'])['value']
+        values = values.join(peers, on=ID)
+        bins = volumes.reindex(pd.MultiIndex.from_frame(values[[ID, 'annee']]))
+        values[VOLUME_BIN] = np.where(bins.notna(), volume_bin(bins.fillna(0).to_numpy()), None)
+        values[NATIONAL] = NATIONAL
+
+        by_metric = {key: dict(zip(g[ID], g['value'])) for key, g in values.groupby(['name', 'annee'])}
+        sorted_values = {}
+        for kind in PEER_GROUPS:
+            for (name, year, group), g in values.dropna(subset=[kind]).groupby(['name', 'annee', kind]):
+                sorted_values[(name, int(year), kind, str(group))] = np.sort(g['value'].to_numpy(dtype='float64'))
+        return cls({(n, int(y)): s for (n, y), s in by_metric.items()}, peers.to_dict('index'), sorted_values)
+
+    def years(self, name: str) -> list:
+        return sorted(y for n, y in self.values if n == name)
+
+    def group_of(self, hospital_id: str, kind: str, year: int) -> Optional[str]:
+        """Peer group key of a hospital (None when unknown)."""
+        if kind == NATIONAL:
+            return NATIONAL
+        if kind == VOLUME_BIN:
+            volume = self.values.get(('volume', year), {}).get(hospital_id)
+            return None if volume is None else str(volume_bin(volume))
+        return self.peers.get(hospital_id, {}).get(kind)
+
+    def rank(self, hospital_id: str, name: str, year: int, kind: str = NATIONAL) -> Optional[Rank]:
+        """Rank of a hospital among one peer group; None without a value or group."""
+        hospital_id, year = str(hospital_id), int(year)
+        value = self.values.get((name, year), {}).get(hospital_id)
+        group = self.group_of(hospital_id, kind, year)
+        peers = self.sorted.get((name, year, kind, group)) if group is not None else None
+        if value is None or peers is None or not len(peers):
+            return None
+        n = len(peers)
+        lo, hi = int(np.searchsorted(peers, value, 'left')), int(np.searchsorted(peers, value, 'right'))
+        if RANK_METRICS[name].higher_is_better:
+            worse, better = lo, n - hi
+        else:
+            worse, better = n - hi, lo
+        percentile = (worse + 0.5 * (hi - lo)) / n * 100.0
+        quartile = 4 - min(int(percentile // 25), 3)
+        return Rank(float(value), percentile, better + 1, n, quartile)
+
+    def ranks(self, hospital_id: str, name: str, year: int) -> Dict[str, Rank]:
+        """Ranks of a hospital among each of its peer groups."""
+        out = {}
+        for kind in PEER_GROUPS:
+            r = self.rank(hospital_id, name, year, kind)
+            if r is not None:
+                out[kind] = r
+        return out
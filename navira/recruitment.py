@@ -0,0 +1,152 @@
+"""
+Hospital x commune recruitment matrix for choropleths.
+
+A recruitment choropleth spreads a hospital's patients per postal code over
+the communes of each postal code (see navira.postal_mapping). Instead of
+redoing this per hospital and per render, RecruitmentMatrix computes it for
+every hospital at once, with vectorized ops, as a sparse matrix in CSR form:
+
+    hospitals  sorted FINESS codes (rows)
+    communes   sorted INSEE codes (columns)
+    indptr     entries of hospitals[i] are entries indptr[i]:indptr[i + 1]
+    columns    commune of each entry
+    even_split / no_split   patients of each entry under either allocation
+
+A hospital's choropleth is then a row slice, and a set of hospitals (a
+focal hospital and its competitors) a multi-row slice. Per-hospital
+diagnostics (rows, patients, unmapped postal codes) are kept alongside.
+"""
+
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .postal_mapping import PostalInseeMapping
+
+ALLOCATIONS = ("even_split", "no_split")
+
+
+class RowStats(NamedTuple):
+    rows: int  # postal code rows of the hospital
+    total: float  # patients over those rows
+    allocated: float  # patients allocated to communes (under the allocation asked)
+    unmatched: np.ndarray  # unmapped postal codes, in row order
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, stop) for each pair, without a Python loop."""
+    lengths = stops - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(int(lengths.sum()))
+
+
+class RecruitmentMatrix:
+    """Patients per (hospital, commune) under both allocations, in CSR form."""
+
+    __slots__ = ("hospitals", "communes", "indptr", "columns", "values", "rows", "totals",
+                 "unmatched_ptr", "unmatched")
+
+    def __init__(self, hospitals: np.ndarray, communes: np.ndarray, indptr: np.ndarray, columns: np.ndarray,
+                 values: dict, rows: np.ndarray, totals: np.ndarray, unmatched_ptr: np.ndarray,
+                 unmatched: np.ndarray):
+        self.hospitals = hospitals
+        self.communes = communes
+        self.indptr = indptr
+        self.columns = columns
+        self.values = values  # allocation -> entry values
+        self.rows = rows  # per hospital: postal code rows
+        self.totals = totals  # per hospital: patients
+        self.unmatched_ptr = unmatched_ptr  # unmapped postal codes of hospitals[i]: unmatched[ptr[i]:ptr[i + 1]]
+        self.unmatched = unmatched
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, mapping: PostalInseeMapping, finess_col: str = "finessGeoDP",
+                   postal_col: str = "codeGeo", count_col: str = "nb") -> "RecruitmentMatrix":
+        """Build from recruitment rows (hospital, postal code, patients)."""
+        if df.empty or any(c not in df.columns for c in (finess_col, postal_col, count_col)):
+            return cls._empty()
+        finess = df[finess_col].astype(str).str.zfill(9).to_numpy(dtype=str)
+        postal = df[postal_col].astype(str).str.zfill(5).to_numpy(dtype=str)
+        counts = pd.to_numeric(df[count_col], errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+
+        hospitals, hospital = np.unique(finess, return_inverse=True)
+        n = len(hospitals)
+        rows, index, matched = mapping.gather(postal)
+        communes, column = np.unique(mapping.insee[index], return_inverse=True)
+
+        # Sum entries of the same (hospital, commune): keys sort by hospital, then commune
+        width = max(len(communes), 1)
+        keys, entry = np.unique(hospital[rows].astype(np.int64) * width + column, return_inverse=True)
+        values = {
+            "even_split": np.bincount(entry, weights=counts[rows] * mapping.weight_of(index), minlength=len(keys)),
+            "no_split": np.bincount(entry, weights=counts[rows], minlength=len(keys)),
+        }
+        indptr = np.searchsorted(keys // width, np.arange(n + 1))
+
+        unmapped = np.flatnonzero(~matched)
+        unmapped = unmapped[np.argsort(hospital[unmapped], kind="stable")]
+        unmatched_ptr = np.searchsorted(hospital[unmapped], np.arange(n + 1))
+
+        return cls(hospitals, communes, indptr, keys % width, values,
+                   np.bincount(hospital, minlength=n), np.bincount(hospital, weights=counts, minlength=n),
+                   unmatched_ptr, postal[unmapped])
+
+    @classmethod
+    def _empty(cls) -> "RecruitmentMatrix":
+        none = np.empty(0, dtype=str)
+        zero = np.zeros(1, dtype=np.int64)
+        return cls(none, none, zero, np.empty(0, np.int64), {a: np.empty(0) for a in ALLOCATIONS},
+                   np.empty(0, np.int64), np.empty(0), zero, none)
+
+    def __len__(self) -> int:
+        return len(self.hospitals)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.columns)
+
+    def position(self, finess: str) -> Optional[int]:
+        """Row of a hospital (binary search), None when it recruits nobody."""
+        finess = str(finess).strip().zfill(9)
+        i = int(np.searchsorted(self.hospitals, finess))
+        if i < len(self.hospitals) and self.hospitals[i] == finess:
+            return i
+        return None
+
+    def row(self, finess: str, allocation: str = "even_split") -> pd.DataFrame:
+        """Choropleth of one hospital: (insee5, value), communes sorted."""
+        i = self.position(finess)
+        if i is None:
+            return pd.DataFrame(columns=["insee5", "value"])
+        entries = slice(self.indptr[i], self.indptr[i + 1])
+        return pd.DataFrame({
+            "insee5": self.communes[self.columns[entries]].astype(object),
+            "value": self.values[allocation][entries],
+        })
+
+    def rows_of(self, finess_codes: Iterable[str], allocation: str = "even_split") -> pd.DataFrame:
+        """Choropleths of several hospitals as one long (finess, insee5, value) frame."""
+        found = [(str(f).strip().zfill(9), i) for f in finess_codes for i in [self.position(f)] if i is not None]
+        if not found:
+            return pd.DataFrame(columns=["finess", "insee5", "value"])
+        positions = np.array([i for _, i in found], dtype=np.int64)
+        entries = _ranges(self.indptr[positions], self.indptr[positions + 1])
+        lengths = self.indptr[positions + 1] - self.indptr[positions]
+        return pd.DataFrame({
+            "finess": np.repeat(np.array([f for f, _ in found], dtype=object), lengths),
+            "insee5": self.communes[self.columns[entries]].astype(object),
+            "value": self.values[allocation][entries],
+        })
+
+    def stats(self, finess: str, allocation: str = "even_split") -> Optional[RowStats]:
+        """Diagnostics of a hospital's row, None when it recruits nobody."""
+        i = self.position(finess)
+        if i is None:
+            return None
+        return RowStats(
+            rows=int(self.rows[i]),
+            total=float(self.totals[i]),
+            allocated=float(self.values[allocation][self.indptr[i]:self.indptr[i + 1]].sum()),
+            unmatched=self.unmatched[self.unmatched_ptr[i]:self.unmatched_ptr[i + 1]],
+        )
@@ -0,0 +1,137 @@
+"""
+Rolling-window complication rates over monthly counts.
+
+The TAB_COMPL_*_ROLL12 tables ship one fixed 12-month rate. MonthlyCounts
+keeps the monthly TOT / COMPL_nb series of every entity (hospital, region,
+status or the national total) as a dense entity x month array of running
+sums, so the rate over any window ending at any month is one subtraction:
+
+    rate = (C[:, end] - C[:, end - w]) / (T[:, end] - T[:, end - w])
+
+for all entities at once. Like the shipped column, a rate is missing until
+the window is covered by the entity's own series (from its first reported
+month) and when the window holds no procedure.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .benchmark import ENTITY_COLUMNS, NATIONAL
+
+# Window lengths offered in the UI (months)
+WINDOWS = (3, 6, 12, 24)
+
+
+def month_ordinal(annee, mois):
+    """Months since year 0 (vectorized): 2021-01 -> 24252."""
+    return annee * 12 + mois - 1
+
+
+def month_label(ordinal: int) -> str:
+    year, month = divmod(int(ordinal), 12)
+    return f"{year}-{month + 1:02d}"
+
+
+class MonthlyCounts:
+    """Running sums of monthly procedure and complication counts per entity."""
+
+    __slots__ = ("entities", "first_month", "starts", "tot", "compl")
+
+    def __init__(self, entities: np.ndarray, first_month: int, starts: np.ndarray, tot: np.ndarray, compl: np.ndarray):
+        self.entities = entities  # sorted entity ids
+        self.first_month = first_month  # ordinal of column 1 (column 0 is the zero prefix)
+        self.starts = starts  # per entity: prefix column before its first reported month
+        self.tot = tot  # (entities, months + 1) running sums
+        self.compl = compl
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MonthlyCounts":
+        """Build from a ROLL12-shaped table (annee, mois, TOT, COMPL_nb).
+
+        The entity column is the first of finessGeoDP / lib_reg / statut
+        present; without one the table is the national series. Months an
+        entity has no row for count as zero.
+        """
+        needed = ['annee', 'mois', 'TOT', 'COMPL_nb']
+        if df.empty or any(c not in df.columns for c in needed):
+            return cls(np.empty(0, dtype=object), 0, np.empty(0, np.int64), np.zeros((0, 1)), np.zeros((0, 1)))
+        entity = next((c for c in ENTITY_COLUMNS.values() if c in df.columns), None)
+        ids = df[entity].astype(str).str.strip().to_numpy(dtype=object) if entity else np.full(len(df), NATIONAL, dtype=object)
+        months = month_ordinal(pd.to_numeric(df['annee'], errors='coerce'), pd.to_numeric(df['mois'], errors='coerce'))
+        valid = months.notna().to_numpy()
+        ids, months = ids[valid], months.to_numpy()[valid].astype(np.int64)
+
+        entities, rows = np.unique(ids, return_inverse=True)
+        first = int(months.min()) if len(months) else 0
+        width = int(months.max()) - first + 1 if len(months) else 0
+        cols = months - first
+        starts = np.full(len(entities), width, dtype=np.int64)
+        np.minimum.at(starts, rows, cols)
+
+        def _dense(column: str) -> np.ndarray:
+            counts = np.zeros((len(entities), width + 1))
+            values = pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype='float64')[valid]
+            np.add.at(counts, (rows, cols + 1), values)
+            return np.cumsum(counts, axis=1)
+
+        return cls(entities, first, starts, _dense('TOT'), _dense('COMPL_nb'))
+
+    @property
+    def months(self) -> np.ndarray:
+        """Month ordinals covered, oldest first."""
+        return np.arange(self.first_month, self.first_month + self.tot.shape[1] - 1)
+
+    @property
+    def last_month(self) -> Optional[int]:
+        return int(self.months[-1]) if self.tot.shape[1] > 1 else None
+
+    def position(self, entity: str) -> Optional[int]:
+        """Row of an entity (binary search), None when absent."""
+        i = int(np.searchsorted(self.entities, entity))
+        if i < len(self.entities) and self.entities[i] == entity:
+            return i
+        return None
+
+    def window(self, months: int, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(procedures, complications) of every entity over ``months`` months ending at ``end``.
+
+        ``end`` is a month ordinal (default: the latest month). Both arrays are
+        NaN for entities whose series starts after the window does.
+        """
+        n = len(self.entities)
+        if self.last_month is None:
+            return np.full(n, np.nan), np.full(n, np.nan)
+        stop = (self.last_month if end is None else int(end)) - self.first_month + 1
+        start = stop - months
+        if start < 0 or stop >= self.tot.shape[1]:
+            return np.full(n, np.nan), np.full(n, np.nan)
+        covered = self.starts <= start
+        tot = np.where(covered, self.tot[:, stop] - self.tot[:, start], np.nan)
+        compl = np.where(covered, self.compl[:, stop] - self.compl[:, start], np.nan)
+        return tot, compl
+
+    def rates(self, months: int, end: Optional[int] = None) -> np.ndarray:
+        """Complication rate (%) of every entity over the window; NaN without procedures."""
+        tot, compl = self.window(months, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(tot > 0, compl / tot * 100.0, np.nan)
+
+    def rate(self, entity: str, months: int, end: Optional[int] = None) -> float:
+        """Rate of one entity over the window (NaN when unknown)."""
+        i = self.position(str(entity))
+        return float(self.rates(months, end)[i]) if i is not None else float('nan')
+
+    def series(self, months: int) -> np.ndarray:
+        """(entities, months) rates for every end month at once; NaN until the window is covered."""
+        tot = np.full(self.tot.shape[:1] + (self.tot.shape[1] - 1,), np.nan)
+        compl = tot.copy()
+        if months < self.tot.shape[1]:
+            tot[:, months - 1:] = self.tot[:, months:] - self.tot[:, :-months]
+            compl[:, months - 1:] = self.compl[:, months:] - self.compl[:, :-months]
+            # Window of column j starts at prefix column j + 1 - months
+            early = np.arange(tot.shape[1])[None, :] + 1 - months < self.starts[:, None]
+            tot[early] = np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(tot > 0, compl / tot * 100.0, np.nan)
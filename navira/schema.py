@@ -0,0 +1,192 @@
+"""
+Schema registry for the TAB_* tables and the hospital reference list.
+
+Every column the readers know about is declared once, with:
+- the pandas dtype it is parsed with (compact integers, categoricals for
+  low-cardinality labels, strings for identifiers), and
+- the Arrow type it is stored with in compiled artifacts.
+
+Loaders pass these types to the CSV parser and rename columns to their
+canonical names in one step, instead of re-coercing every column after
+parsing.
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from .csv_encoding import detect_encoding, read_csv_sniffed
+
+
+class Column(NamedTuple):
+    dtype: Optional[str]  # pandas dtype at parse time (None: parse_dates / inferred)
+    arrow: pa.DataType  # storage type in compiled artifacts
+
+
+_ID = Column('str', pa.string())
+_LABEL = Column('category', pa.string())
+_INT8 = Column('int8', pa.int8())
+_INT32 = Column('int32', pa.int32())
+_NULLABLE_INT32 = Column('Int32', pa.int32())
+_FLOAT = Column('float64', pa.float64())
+
+COLUMNS: Dict[str, Column] = {
+    # Identifiers: never type-inferred (leading zeros, "2A" codes)
+    'finessGeoDP': _ID,
+    'finessGeo': _ID,
+    'finessGeo_index': _ID,
+    'finessGeo_competitor': _ID,
+    'codeGeo': _ID,
+    'code_geo': _ID,
+    'code_dep': _ID,
+    'code_reg': _ID,
+    'lib_dep': _ID,
+    'rs': _ID,
+    # Low-cardinality labels
+    'statut': _LABEL,
+    'lib_reg': _LABEL,
+    'vda': _LABEL,
+    'baria_t': _LABEL,
+    'duree_cat': _LABEL,
+    # Periods
+    'annee': Column('int16', pa.int16()),
+    'mois': _INT8,
+    'date': Column(None, pa.date32()),
+    # Codes and flags
+    'clav_cat_90': _INT8,
+    'cso': _INT8,
+    'LAB_SOFFCO': _INT8,
+    'university': _INT8,
+    'redo': _INT8,
+    # Counts
+    'n': _INT32,
+    'TOT': _INT32,
+    'TOT_rev': _INT32,
+    'TOT_etb': _INT32,
+    'TOT_compet': _INT32,
+    'COMPL_nb': _INT32,
+    'NEVER_nb': _INT32,
+    'LOS_nb': _INT32,
+    'LOS_7_nb': _INT32,
+    'NB_pts': _INT32,
+    'VOL_2024': _INT32,
+    'VOL_2025': _INT32,
+    'Vol_2024': _NULLABLE_INT32,
+    'Vol_2025': _NULLABLE_INT32,
+    # Postal codes have gaps in the reference list; left to inference in pandas
+    'code_postal': Column(None, pa.int32()),
+    'latitude': _FLOAT,
+    'longitude': _FLOAT,
+}
+
+# Canonical column names exposed by each family of loaders
+RENAMES: Dict[str, Dict[str, str]] = {
+    'establishments': {
+        'finessGeo': 'id',
+        'rs': 'name',
+        'ville': 'city',
+        'lib_dep': 'department',
+        'lib_reg': 'region',
+        'statut': 'status',
+    },
+    'app': {
+        'finessGeoDP': 'hospital_id',
+        'annee': 'year',
+        'vda': 'approach',
+        'n': 'count',
+        'pct': 'percentage',
+    },
+    'rev': {
+        'finessGeoDP': 'hospital_id',
+        'annee': 'year',
+        'redo': 'is_revision',
+        'n': 'count',
+    },
+    'tcn': {
+        'finessGeoDP': 'hospital_id',
+        'annee': 'year',
+        'baria_t': 'procedure_type',
+        'n': 'count',
+        'pct': 'percentage',
+    },
+    'vol': {
+        'finessGeoDP': 'hospital_id',
+        'annee': 'year',
+        'mois': 'month',
+        'n': 'count',
+    },
+    'rob': {
+        'finessGeoDP': 'hospital_id',
+        'vda': 'approach',
+        'n': 'count',
+        'TOT': 'total',
+        'PCT_app': 'percentage',
+    },
+    'trend': {
+        'finessGeoDP': 'hospital_id',
+        'Vol_2024': 'volume_2024',
+        'Vol_2025': 'volume_2025',
+        'diff_pct': 'change_percentage',
+    },
+    'complications': {
+        'finessGeoDP': 'hospital_id',
+        'annee': 'year',
+        'mois': 'month',
+        'TOT': 'total_procedures',
+        'COMPL_nb': 'complications_count',
+        'COMPL_pct': 'complications_percentage',
+        'COMPL_pct_roll12': 'complications_percentage_rolling',
+        'clav_cat_90': 'clavien_grade',
+    },
+    'los': {
+        'finessGeoDP': 'hospital_id',
+        'annee': 'year',
+        'duree_cat': 'duration_category',
+        'LOS_nb': 'los_count',
+        'LOS_pct': 'los_percentage',
+        'TOT': 'total_procedures',
+        'LOS_7_nb': 'los_7_count',
+        'LOS_7_pct': 'los_7_percentage',
+    },
+    'never': {
+        'finessGeoDP': 'hospital_id',
+        'TOT': 'total_procedures',
+        'NEVER_nb': 'never_events_count',
+        'NEVER_pct': 'never_events_percentage',
+    },
+}
+
+# Columns parsed as plain strings by the Arrow reader
+STRING_COLUMNS: List[str] = [c for c, col in COLUMNS.items() if pa.types.is_string(col.arrow)]
+
+# Columns parsed as dates
+DATE_COLUMNS: List[str] = [c for c, col in COLUMNS.items() if pa.types.is_date(col.arrow)]
+
+# Storage type of every registered column in compiled artifacts
+ARROW_TYPES: Dict[str, pa.DataType] = {c: col.arrow for c, col in COLUMNS.items()}
+
+
+def read_dtypes(names) -> Dict[str, str]:
+    """pandas parse dtypes for the registered columns among ``names``."""
+    return {c: COLUMNS[c].dtype for c in names if c in COLUMNS and COLUMNS[c].dtype}
+
+
+def read_tab(path: str, family: Optional[str] = None, sep: str = ',') -> pd.DataFrame:
+    """Parse a CSV with registry dtypes and canonical column names.
+
+    Only the header is read ahead so dtypes and date parsing are limited to
+    columns that exist; the data itself is parsed exactly once.
+    """
+    encoding = detect_encoding(path)
+    header = pd.read_csv(path, sep=sep, nrows=0, encoding=encoding).columns
+    df = read_csv_sniffed(
+        path,
+        encoding=encoding,
+        sep=sep,
+        dtype=read_dtypes(header),
+        parse_dates=[c for c in header if c in DATE_COLUMNS],
+    )
+    if family is not None:
+        df = df.rename(columns=RENAMES[family])
+    return df
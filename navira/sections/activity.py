@@ -4,8 +4,8 @@ import plotly.graph_objects as go
 import streamlit as st
 import numpy as np
 
-import os
-from pathlib import Path
+from navira.benchmark import HOP, NATIONAL, NATL, REG, STATUS, compare
+from navira.store import get_table, has_data
 
 
 APPROACH_LABELS = {"LAP": "Open Surgery", "COE": "Coelioscopy", "ROB": "Robotic"}
@@ -60,181 +60,23 @@ def render_activity(hospital_id: str):
     """
     st.subheader("Activity Overview")
 
-    # Even though a repo is accepted for backward compatibility, for this section
-    # we now read totals directly from dedicated VOL CSVs (CSV-first, no recompute)
-    @st.cache_data(show_spinner=False)
-    def _resolve_activity_dir() -> str | None:
-        candidates: list[str] = []
-        env_dir = os.environ.get("NAVIRA_ACTIVITY_DIR")
-        if env_dir:
-            candidates.append(env_dir)
-        try:
-            candidates.append(str(Path.cwd() / "new_data" / "ACTIVITY"))
-        except Exception:
-            pass
-        try:
-            here = Path(__file__).resolve()
-            candidates.append(str((here.parent / ".." / "new_data" / "ACTIVITY").resolve()))
-            candidates.append(str((here.parent.parent / "new_data" / "ACTIVITY").resolve()))
-        except Exception:
-            pass
-        candidates.append("/Users/alexdebelka/Downloads/navira/new_data/ACTIVITY")
-        for c in candidates:
-            try:
-                if Path(c).is_dir():
-                    return c
-            except Exception:
-                continue
-        return None
-
-    def _resolve_complications_dir() -> str | None:
-        """Resolve path to new_data/COMPLICATIONS directory."""
-        candidates: list[str] = []
-        try:
-            candidates.append(str(Path.cwd() / "new_data" / "COMPLICATIONS"))
-        except Exception:
-            pass
-        try:
-            here = Path(__file__).resolve()
-            candidates.append(str((here.parent / ".." / "new_data" / "COMPLICATIONS").resolve()))
-            candidates.append(str((here.parent.parent / "new_data" / "COMPLICATIONS").resolve()))
-        except Exception:
-            pass
-        candidates.append("/Users/alexdebelka/Downloads/navira/new_data/COMPLICATIONS")
-        for c in candidates:
-            if Path(c).is_dir():
-                return c
-        return None
-
-    @st.cache_data(show_spinner=False)
-    def _read_csv_complications(filename: str) -> pd.DataFrame:
-        """Read CSV from COMPLICATIONS folder."""
-        base = _resolve_complications_dir()
-        if not base:
-            return pd.DataFrame()
-        p = Path(base) / filename
-        try:
-            df = pd.read_csv(p)
-            # Same normalization as _read_csv
-            if "annee" in df.columns:
-                df["annee"] = pd.to_numeric(df["annee"], errors="coerce").astype("Int64")
-            if "year" in df.columns:
-                df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-            if "n" in df.columns:
-                df["n"] = pd.to_numeric(df["n"], errors="coerce")
-            if "finessGeoDP" in df.columns:
-                df["finessGeoDP"] = df["finessGeoDP"].astype(str).str.strip()
-            if "lib_reg" in df.columns:
-                df["lib_reg"] = df["lib_reg"].astype(str).str.strip()
-            if "statut" in df.columns:
-                df["statut"] = df["statut"].astype(str).str.strip()
-            # Handle complications columns
-            if "COMPL_pct" in df.columns:
-                df["COMPL_pct"] = pd.to_numeric(df["COMPL_pct"], errors="coerce")
-            if "COMPL_nb" in df.columns:
-                df["COMPL_nb"] = pd.to_numeric(df["COMPL_nb"], errors="coerce")
-            if "clav_cat_90" in df.columns:
-                df["clav_cat_90"] = pd.to_numeric(df["clav_cat_90"], errors="coerce")
-            # Handle never events columns
-            if "NEVER_nb" in df.columns:
-                df["NEVER_nb"] = pd.to_numeric(df["NEVER_nb"], errors="coerce")
-            if "NEVER_pct" in df.columns:
-                df["NEVER_pct"] = pd.to_numeric(df["NEVER_pct"], errors="coerce")
-            # Handle length of stay columns
-            if "LOS_nb" in df.columns:
-                df["LOS_nb"] = pd.to_numeric(df["LOS_nb"], errors="coerce")
-            if "LOS_pct" in df.columns:
-                df["LOS_pct"] = pd.to_numeric(df["LOS_pct"], errors="coerce")
-            if "LOS_7_nb" in df.columns:
-                df["LOS_7_nb"] = pd.to_numeric(df["LOS_7_nb"], errors="coerce")
-            if "LOS_7_pct" in df.columns:
-                df["LOS_7_pct"] = pd.to_numeric(df["LOS_7_pct"], errors="coerce")
-            if "TOT" in df.columns:
-                df["TOT"] = pd.to_numeric(df["TOT"], errors="coerce")
-            return df
-        except Exception:
-            return pd.DataFrame()
-
-    @st.cache_data(show_spinner=False)
-    def _read_csv(filename: str) -> pd.DataFrame:
-        base = _resolve_activity_dir()
-        if not base:
-            return pd.DataFrame()
-        p = Path(base) / filename
-        try:
-            df = pd.read_csv(p)
-            # Normalization: types used below
-            if "annee" in df.columns:
-                df["annee"] = pd.to_numeric(df["annee"], errors="coerce").astype("Int64")
-            if "year" in df.columns:
-                df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-            if "n" in df.columns:
-                df["n"] = pd.to_numeric(df["n"], errors="coerce")
-            if "finessGeoDP" in df.columns:
-                df["finessGeoDP"] = df["finessGeoDP"].astype(str).str.strip()
-            if "lib_reg" in df.columns:
-                df["lib_reg"] = df["lib_reg"].astype(str).str.strip()
-            if "statut" in df.columns:
-                df["statut"] = df["statut"].astype(str).str.strip()
-            # Handle diff_pct column in trend files (may contain "NA" strings)
-            if "diff_pct" in df.columns:
-                df["diff_pct"] = pd.to_numeric(df["diff_pct"], errors="coerce")
-            # Handle PCT_rev and TOT_rev columns in revisional files
-            if "PCT_rev" in df.columns:
-                df["PCT_rev"] = pd.to_numeric(df["PCT_rev"], errors="coerce")
-            if "TOT_rev" in df.columns:
-                df["TOT_rev"] = pd.to_numeric(df["TOT_rev"], errors="coerce")
-            if "TOT" in df.columns:
-                df["TOT"] = pd.to_numeric(df["TOT"], errors="coerce")
-            # Handle complications columns
-            if "COMPL_pct" in df.columns:
-                df["COMPL_pct"] = pd.to_numeric(df["COMPL_pct"], errors="coerce")
-            if "COMPL_nb" in df.columns:
-                df["COMPL_nb"] = pd.to_numeric(df["COMPL_nb"], errors="coerce")
-            if "clav_cat_90" in df.columns:
-                df["clav_cat_90"] = pd.to_numeric(df["clav_cat_90"], errors="coerce")
-            # Handle never events columns
-            if "NEVER_nb" in df.columns:
-                df["NEVER_nb"] = pd.to_numeric(df["NEVER_nb"], errors="coerce")
-            if "NEVER_pct" in df.columns:
-                df["NEVER_pct"] = pd.to_numeric(df["NEVER_pct"], errors="coerce")
-            # Handle length of stay columns
-            if "LOS_nb" in df.columns:
-                df["LOS_nb"] = pd.to_numeric(df["LOS_nb"], errors="coerce")
-            if "LOS_pct" in df.columns:
-                df["LOS_pct"] = pd.to_numeric(df["LOS_pct"], errors="coerce")
-            if "LOS_7_nb" in df.columns:
-                df["LOS_7_nb"] = pd.to_numeric(df["LOS_7_nb"], errors="coerce")
-            if "LOS_7_pct" in df.columns:
-                df["LOS_7_pct"] = pd.to_numeric(df["LOS_7_pct"], errors="coerce")
-            return df
-        except Exception:
-            return pd.DataFrame()
-
-    # Check data directory
-    activity_data_dir = _resolve_activity_dir()
-    if activity_data_dir is None:
+    # Tables come from the process-wide store (parsed once, shared across sessions)
+    if not has_data():
         st.error("❌ Activity data directory not found. Please ensure new_data/ACTIVITY exists.")
         st.info(f"Looking for directory at: new_data/ACTIVITY")
         st.stop()
-    
+
     # Load totals CSVs directly
-    vol_hop_year = _read_csv("TAB_VOL_HOP_YEAR.csv")
-    vol_reg_year = _read_csv("TAB_VOL_REG_YEAR.csv")
-    vol_nat_year = _read_csv("TAB_VOL_NATL_YEAR.csv")
-    vol_status_year = _read_csv("TAB_VOL_STATUS_YEAR.csv")
-    # Approach pies — also use APP CSVs directly
-    app_hop_year = _read_csv("TAB_APP_HOP_YEAR.csv")
-    app_nat_year = _read_csv("TAB_APP_NATL_YEAR.csv")
-    app_reg_year = _read_csv("TAB_APP_REG_YEAR.csv")
-    app_status_year = _read_csv("TAB_APP_STATUS_YEAR.csv")
+    vol_hop_year = get_table("vol_hop_year")
+    # National / regional / same-category volumes and approaches come from the benchmark cube
+    benchmark = get_table("benchmark")
     # Region/Status mapping for this hospital
-    rev_hop_12m = _read_csv("TAB_REV_HOP_12M.csv")
+    rev_hop_12m = get_table("rev_hop_12m")
     # Trend data for YoY bubbles
-    trend_hop = _read_csv("TAB_TREND_HOP.csv")
-    trend_natl = _read_csv("TAB_TREND_NATL.csv")
-    trend_reg = _read_csv("TAB_TREND_REG.csv")
-    trend_status = _read_csv("TAB_TRENDS_STATUS.csv")
+    trend_hop = get_table("trend_hop")
+    trend_natl = get_table("trend_natl")
+    trend_reg = get_table("trend_reg")
+    trend_status = get_table("trend_status")
 
     # Row 1: Hospital volume per year (bar)
     col1, col2 = st.columns([2, 1])
@@ -288,9 +130,13 @@ def render_activity(hospital_id: str):
         region_name = None
         status_val = None
 
+    # One lookup for every comparison level
+    peers = {HOP: str(hospital_id), REG: region_name, STATUS: status_val, NATL: NATIONAL}
+    volume_rows = compare(benchmark, "volume", peers).rename(columns={"num": "n"})
+
     # National
     with c_nat:
-        nat_tot = vol_nat_year.copy()
+        nat_tot = volume_rows[volume_rows["level"] == NATL]
         if not nat_tot.empty:
             s1, s2 = st.columns([4, 1])
             with s1:
@@ -322,8 +168,8 @@ def render_activity(hospital_id: str):
 
     # Regional
     with c_reg:
-        if region_name and not app_reg_year.empty:
-            reg = vol_reg_year[vol_reg_year.get("lib_reg").astype(str).str.strip() == str(region_name)]
+        if region_name:
+            reg = volume_rows[volume_rows["level"] == REG]
             if not reg.empty:
                 s1, s2 = st.columns([4, 1])
                 with s1:
@@ -358,8 +204,8 @@ def render_activity(hospital_id: str):
 
     # Same category
     with c_cat:
-        if status_val and not vol_status_year.empty:
-            cat = vol_status_year[vol_status_year.get("statut").astype(str).str.strip() == str(status_val)]
+        if status_val:
+            cat = volume_rows[volume_rows["level"] == STATUS]
             if not cat.empty:
                 s1, s2 = st.columns([4, 1])
                 with s1:
@@ -478,7 +324,7 @@ def render_activity(hospital_id: str):
     # Monthly procedure volume trends — hospital line + 12‑month average
     st.markdown("---")
     st.markdown("#### Monthly Procedure Volume Trends")
-    vol_hop_month = _read_csv("TAB_VOL_HOP_MONTH.csv")
+    vol_hop_month = get_table("vol_hop_month")
     if vol_hop_month is None or vol_hop_month.empty:
         st.info("Monthly CSV (TAB_VOL_HOP_MONTH.csv) not found or empty.")
     else:
@@ -547,37 +393,19 @@ def render_activity(hospital_id: str):
     APPROACH_COLORS_REGIONAL = { 'Coelioscopy': '#6EDDD4', 'Robotic': '#4ECDC4', 'Open Surgery': '#2E9D95' }
     APPROACH_COLORS_CATEGORY = { 'Coelioscopy': '#C4A8FF', 'Robotic': '#A78BFA', 'Open Surgery': '#8B6FD4' }
 
-    def _approach_bars(df: pd.DataFrame, title: str, filters: dict | None = None, height: int = 260, color_map: dict | None = None):
-        if df is None or df.empty:
-            st.info(f"No data for {title}.")
-            return
-        d = df.copy()
-        if filters:
-            for k, v in filters.items():
-                if k in d.columns and v is not None and str(v):
-                    d = d[d[k].astype(str).str.strip() == str(v)]
+    def _approach_bars(rows: pd.DataFrame, title: str, height: int = 260, color_map: dict | None = None):
+        """Stacked approach shares per year from benchmark cube rows of one level."""
+        d = rows.dropna(subset=['value'])
         if d.empty:
             st.info(f"No data for {title}.")
             return
-        if 'annee' not in d.columns or 'vda' not in d.columns:
-            st.info(f"Missing columns for {title}.")
-            return
-        d['n'] = pd.to_numeric(d.get('n', 0), errors='coerce').fillna(0)
-        agg = d.groupby(['annee','vda'], as_index=False)['n'].sum()
-        # Map labels and compute shares per year
-        agg['Approach'] = agg['vda'].astype(str).str.upper().map(APPROACH_LABELS_BARS).fillna(agg['vda'])
-        totals = agg.groupby('annee', as_index=False)['n'].sum().rename(columns={'n':'tot'})
-        merged = agg.merge(totals, on='annee', how='left')
-        merged = merged[merged['tot'] > 0]
-        merged['Share'] = merged['n'] / merged['tot'] * 100.0
-        merged['annee'] = pd.to_numeric(merged['annee'], errors='coerce').astype('Int64')
-        merged = merged.dropna(subset=['annee'])
-        if merged.empty:
-            st.info(f"No data for {title}.")
-            return
+        d = d.assign(
+            Approach=d['category'].str.upper().map(APPROACH_LABELS_BARS).fillna(d['category']),
+            Share=d['value'],
+        )
         colors = color_map if color_map else APPROACH_COLORS_DEFAULT
         fig = px.bar(
-            merged.sort_values('annee').assign(annee=lambda x: x['annee'].astype(int).astype(str)),
+            d.sort_values('annee').assign(annee=lambda x: x['annee'].astype(int).astype(str)),
             x='annee', y='Share', color='Approach', barmode='stack',
             color_discrete_map=colors
         )
@@ -586,18 +414,20 @@ def render_activity(hospital_id: str):
         fig.update_yaxes(range=[0,100])
         st.plotly_chart(fig, use_container_width=True)
 
+    approach_rows = compare(benchmark, "approach", peers)
+
     # Hospital big chart
     _sp_l, _center, _sp_r = st.columns([1, 1.6, 1])
     with _center:
-        _approach_bars(app_hop_year, 'Hospital', { 'finessGeoDP': str(hospital_id) }, height=300, color_map=APPROACH_COLORS_DEFAULT)
+        _approach_bars(approach_rows[approach_rows['level'] == HOP], 'Hospital', height=300, color_map=APPROACH_COLORS_DEFAULT)
     # Three small charts: national, regional, same category (with theme colors matching procedures per year)
     c_nat, c_reg, c_cat = st.columns(3)
     with c_nat:
-        _approach_bars(app_nat_year, 'National', None, color_map=APPROACH_COLORS_NATIONAL)
+        _approach_bars(approach_rows[approach_rows['level'] == NATL], 'National', color_map=APPROACH_COLORS_NATIONAL)
     with c_reg:
-        _approach_bars(app_reg_year, 'Regional', { 'lib_reg': region_name } if region_name else None, color_map=APPROACH_COLORS_REGIONAL)
+        _approach_bars(approach_rows[approach_rows['level'] == REG], 'Regional', color_map=APPROACH_COLORS_REGIONAL)
     with c_cat:
-        _approach_bars(app_status_year, 'Same category', { 'statut': status_val } if status_val else None, color_map=APPROACH_COLORS_CATEGORY)
+        _approach_bars(approach_rows[approach_rows['level'] == STATUS], 'Same category', color_map=APPROACH_COLORS_CATEGORY)
 
     # --- Robot share (%) — last 12 months scatter ---
     st.markdown("---")
@@ -611,7 +441,7 @@ def render_activity(hospital_id: str):
     )
 
     # Load robotic data from TAB_ROB_HOP_12M.csv
-    rob_data = _read_csv("TAB_ROB_HOP_12M.csv")
+    rob_data = get_table("rob_hop_12m")
     if rob_data is None or rob_data.empty or "TOT" not in rob_data.columns or "PCT_app" not in rob_data.columns:
         st.info("No robotic dataset available for scatter.")
     else:
@@ -671,10 +501,10 @@ def render_activity(hospital_id: str):
         st.caption("Data: 2025")
 
     # Load TCN datasets depending on toggle
-    tcn_hop = _read_csv("TAB_TCN_HOP_12M.csv" if use_12m else "TAB_TCN_HOP_YEAR.csv")
-    tcn_nat = _read_csv("TAB_TCN_NATL_12M.csv" if use_12m else "TAB_TCN_NATL_YEAR.csv")
-    tcn_reg = _read_csv("TAB_TCN_REG_12M.csv" if use_12m else "TAB_TCN_REG_YEAR.csv")
-    tcn_status = _read_csv("TAB_TCN_STATUS_12M.csv" if use_12m else "TAB_TCN_STATUS_YEAR.csv")
+    tcn_hop = get_table("tcn_hop_12m" if use_12m else "tcn_hop_year")
+    tcn_nat = get_table("tcn_natl_12m" if use_12m else "tcn_natl_year")
+    tcn_reg = get_table("tcn_reg_12m" if use_12m else "tcn_reg_year")
+    tcn_status = get_table("tcn_status_12m" if use_12m else "tcn_status_year")
 
     PROC_LABELS = {
         'SLE': 'Sleeve',
@@ -785,7 +615,7 @@ def render_activity(hospital_id: str):
     )
 
     # Build per-hospital SLE/BPG shares from last 12 months
-    tcn12 = _read_csv("TAB_TCN_HOP_12M.csv")
+    tcn12 = get_table("tcn_hop_12m")
     if tcn12 is None or tcn12.empty or "baria_t" not in tcn12.columns:
         st.info("No TCN 12-month dataset available for scatter.")
     else:
@@ -864,10 +694,10 @@ def render_activity(hospital_id: str):
     use_12m_rev = st.toggle("Show last 12 months", value=False, key=f"rev_12m_{hospital_id}")
 
     # Load revisional data based on toggle
-    rev_hop = _read_csv("TAB_REV_HOP_12M.csv" if use_12m_rev else "TAB_REV_HOP.csv")
-    rev_natl = _read_csv("TAB_REV_NATL_12M.csv" if use_12m_rev else "TAB_REV_NATL.csv")
-    rev_reg = _read_csv("TAB_REV_REG_12M.csv" if use_12m_rev else "TAB_REV_REG.csv")
-    rev_status = _read_csv("TAB_REV_STATUS_12M.csv" if use_12m_rev else "TAB_REV_STATUS.csv")
+    rev_hop = get_table("rev_hop_12m" if use_12m_rev else "rev_hop")
+    rev_natl = get_table("rev_natl_12m" if use_12m_rev else "rev_natl")
+    rev_reg = get_table("rev_reg_12m" if use_12m_rev else "rev_reg")
+    rev_status = get_table("rev_status_12m" if use_12m_rev else "rev_status")
 
     # Color scheme matching procedures per year
     REV_COLORS = {
@@ -4,8 +4,9 @@ import plotly.graph_objects as go
 import streamlit as st
 import numpy as np
 
-import os
-from pathlib import Path
+from navira.benchmark import HOP, NATIONAL, NATL, REG, STATUS, compare
+from navira.rolling import WINDOWS, month_label
+from navira.store import get_monthly_counts, get_table, has_data
 
 
 def render_complications(hospital_id: str):
@@ -19,118 +20,11 @@ def render_complications(hospital_id: str):
     """
     st.subheader("Complications Overview")
     
-    def _resolve_complications_dir() -> str | None:
-        """Resolve path to new_data/COMPLICATIONS directory."""
-        candidates: list[str] = []
-        try:
-            candidates.append(str(Path.cwd() / "new_data" / "COMPLICATIONS"))
-        except Exception:
-            pass
-        try:
-            here = Path(__file__).resolve()
-            candidates.append(str((here.parent / ".." / "new_data" / "COMPLICATIONS").resolve()))
-            candidates.append(str((here.parent.parent / "new_data" / "COMPLICATIONS").resolve()))
-        except Exception:
-            pass
-        candidates.append("/Users/alexdebelka/Downloads/navira/new_data/COMPLICATIONS")
-        for c in candidates:
-            if Path(c).is_dir():
-                return c
-        return None
-
-    @st.cache_data(show_spinner=False)
-    def _read_csv_complications(filename: str) -> pd.DataFrame:
-        """Read CSV from COMPLICATIONS folder."""
-        base = _resolve_complications_dir()
-        if not base:
-            return pd.DataFrame()
-        p = Path(base) / filename
-        try:
-            df = pd.read_csv(p)
-            # Normalization
-            if "annee" in df.columns:
-                df["annee"] = pd.to_numeric(df["annee"], errors="coerce").astype("Int64")
-            if "year" in df.columns:
-                df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-            if "n" in df.columns:
-                df["n"] = pd.to_numeric(df["n"], errors="coerce")
-            if "finessGeoDP" in df.columns:
-                df["finessGeoDP"] = df["finessGeoDP"].astype(str).str.strip()
-            if "lib_reg" in df.columns:
-                df["lib_reg"] = df["lib_reg"].astype(str).str.strip()
-            if "statut" in df.columns:
-                df["statut"] = df["statut"].astype(str).str.strip()
-            # Handle complications columns
-            if "COMPL_pct" in df.columns:
-                df["COMPL_pct"] = pd.to_numeric(df["COMPL_pct"], errors="coerce")
-            if "COMPL_nb" in df.columns:
-                df["COMPL_nb"] = pd.to_numeric(df["COMPL_nb"], errors="coerce")
-            if "clav_cat_90" in df.columns:
-                df["clav_cat_90"] = pd.to_numeric(df["clav_cat_90"], errors="coerce")
-            # Handle never events columns
-            if "NEVER_nb" in df.columns:
-                df["NEVER_nb"] = pd.to_numeric(df["NEVER_nb"], errors="coerce")
-            if "NEVER_pct" in df.columns:
-                df["NEVER_pct"] = pd.to_numeric(df["NEVER_pct"], errors="coerce")
-            # Handle length of stay columns
-            if "LOS_nb" in df.columns:
-                df["LOS_nb"] = pd.to_numeric(df["LOS_nb"], errors="coerce")
-            if "LOS_pct" in df.columns:
-                df["LOS_pct"] = pd.to_numeric(df["LOS_pct"], errors="coerce")
-            if "LOS_7_nb" in df.columns:
-                df["LOS_7_nb"] = pd.to_numeric(df["LOS_7_nb"], errors="coerce")
-            if "LOS_7_pct" in df.columns:
-                df["LOS_7_pct"] = pd.to_numeric(df["LOS_7_pct"], errors="coerce")
-            if "TOT" in df.columns:
-                df["TOT"] = pd.to_numeric(df["TOT"], errors="coerce")
-            return df
-        except Exception:
-            return pd.DataFrame()
-
-    # Load complications data
-    compl_hop = _read_csv_complications("TAB_COMPL_HOP_ROLL12.csv")
-    compl_natl = _read_csv_complications("TAB_COMPL_NATL_ROLL12.csv")
-    compl_reg = _read_csv_complications("TAB_COMPL_REG_ROLL12.csv")
-    compl_status = _read_csv_complications("TAB_COMPL_STATUS_ROLL12.csv")
-
     # Load region/status mapping (from ACTIVITY folder for consistency)
-    @st.cache_data(show_spinner=False)
-    def _read_csv_activity(filename: str) -> pd.DataFrame:
-        """Read CSV from ACTIVITY folder for region/status mapping."""
-        candidates: list[str] = []
-        try:
-            candidates.append(str(Path.cwd() / "new_data" / "ACTIVITY"))
-        except Exception:
-            pass
-        try:
-            here = Path(__file__).resolve()
-            candidates.append(str((here.parent / ".." / "new_data" / "ACTIVITY").resolve()))
-            candidates.append(str((here.parent.parent / "new_data" / "ACTIVITY").resolve()))
-        except Exception:
-            pass
-        candidates.append("/Users/alexdebelka/Downloads/navira/new_data/ACTIVITY")
-        for c in candidates:
-            try:
-                if Path(c).is_dir():
-                    p = Path(c) / filename
-                    if p.exists():
-                        df = pd.read_csv(p)
-                        if "finessGeoDP" in df.columns:
-                            df["finessGeoDP"] = df["finessGeoDP"].astype(str).str.strip()
-                        if "lib_reg" in df.columns:
-                            df["lib_reg"] = df["lib_reg"].astype(str).str.strip()
-                        if "statut" in df.columns:
-                            df["statut"] = df["statut"].astype(str).str.strip()
-                        return df
-            except Exception:
-                continue
-        return pd.DataFrame()
-
-    rev_hop_12m = _read_csv_activity("TAB_REV_HOP_12M.csv")
+    rev_hop_12m = get_table("rev_hop_12m")
     
     # Check complications directory
-    complications_data_dir = _resolve_complications_dir()
-    if complications_data_dir is None:
+    if not has_data():
         st.error("❌ Complications data directory not found. Please ensure new_data/COMPLICATIONS exists.")
         st.info(f"Looking for directory at: new_data/COMPLICATIONS")
         st.stop()
@@ -147,19 +41,33 @@ def render_complications(hospital_id: str):
 
     # --- Overall complication rate (90 days) — bubble quartet ---
     st.markdown("### Overall complication rate (90 days)")
-    use_12m_compl = st.toggle("Show last 12 months", value=False, key=f"compl_tab_12m_{hospital_id}")
+    use_12m_compl = st.toggle("Show rolling window", value=False, key=f"compl_tab_12m_{hospital_id}")
 
-    # Reload data based on toggle
+    # Annual rates of the four levels come from the benchmark cube in one lookup;
+    # rolling rates from the monthly counts, for any window and end month
+    peers = {HOP: str(hospital_id), REG: region_name, STATUS: status_val, NATL: NATIONAL}
     if use_12m_compl:
-        compl_hop = _read_csv_complications("TAB_COMPL_HOP_ROLL12.csv")
-        compl_natl = _read_csv_complications("TAB_COMPL_NATL_ROLL12.csv")
-        compl_reg = _read_csv_complications("TAB_COMPL_REG_ROLL12.csv")
-        compl_status = _read_csv_complications("TAB_COMPL_STATUS_ROLL12.csv")
+        rolling = {
+            HOP: get_monthly_counts("compl_hop_roll12"),
+            NATL: get_monthly_counts("compl_natl_roll12"),
+            REG: get_monthly_counts("compl_reg_roll12"),
+            STATUS: get_monthly_counts("compl_status_roll12"),
+        }
+        c_window, c_end = st.columns(2)
+        with c_window:
+            window = st.radio("Window (months)", WINDOWS, index=WINDOWS.index(12), horizontal=True, key=f"compl_tab_window_{hospital_id}")
+        end_month = rolling[NATL].last_month
+        if end_month is not None:
+            with c_end:
+                end_month = st.select_slider(
+                    "Ending month",
+                    options=[int(m) for m in rolling[NATL].months],
+                    value=end_month,
+                    format_func=month_label,
+                    key=f"compl_tab_window_end_{hospital_id}",
+                )
     else:
-        compl_hop = _read_csv_complications("TAB_COMPL_HOP_YEAR.csv")
-        compl_natl = _read_csv_complications("TAB_COMPL_NATL_YEAR.csv")
-        compl_reg = _read_csv_complications("TAB_COMPL_REG_YEAR.csv")
-        compl_status = _read_csv_complications("TAB_COMPL_STATUS_YEAR.csv")
+        compl_rows = compare(get_table("benchmark"), "complications", peers)
 
     # Color scheme matching procedures per year
     COMPL_COLORS = {
@@ -186,134 +94,55 @@ def render_complications(hospital_id: str):
             return int(years_sorted[1])
         # If only one year, use it
         return int(years_sorted[0])
+
+    def _level_rate(level: str) -> str:
+        """Formatted complication rate of one comparison level ("—" when unavailable)."""
+        try:
+            if use_12m_compl:
+                # Rolling window ending at the selected month
+                if not peers[level]:
+                    return "—"
+                compl_val = rolling[level].rate(peers[level], window, end_month)
+            else:
+                # Annual: latest complete year
+                rows = compl_rows[compl_rows["level"] == level]
+                latest_year = _get_latest_complete_year(rows)
+                if not latest_year:
+                    return "—"
+                rows = rows[rows["annee"] == latest_year]
+                if rows.empty:
+                    return "—"
+                compl_val = rows.iloc[0]["value"]
+            if pd.notna(compl_val):
+                return f"{float(compl_val):.1f}%"
+        except Exception:
+            pass
+        return "—"
     
     # Bubble display: Hospital, National, Regional, Same category
     col_hosp, col_nat, col_reg, col_cat = st.columns(4)
     
     # Hospital bubble
     with col_hosp:
-        hosp_compl = "—"
-        try:
-            if not compl_hop.empty and "finessGeoDP" in compl_hop.columns:
-                hosp_rows = compl_hop[compl_hop["finessGeoDP"].astype(str) == str(hospital_id)]
-                if not hosp_rows.empty:
-                    if use_12m_compl:
-                        # ROLL12 file: get latest month, use COMPL_pct_roll12
-                        if "COMPL_pct_roll12" in hosp_rows.columns:
-                            # Sort by date/year/month to get latest
-                            if "annee" in hosp_rows.columns and "mois" in hosp_rows.columns:
-                                hosp_rows["_ym"] = pd.to_numeric(hosp_rows["annee"], errors="coerce") * 100 + pd.to_numeric(hosp_rows["mois"], errors="coerce")
-                                hosp_rows = hosp_rows.sort_values("_ym", ascending=False)
-                            compl_val = hosp_rows.iloc[0]["COMPL_pct_roll12"]
-                            if pd.notna(compl_val):
-                                hosp_compl = f"{float(compl_val):.1f}%"
-                    else:
-                        # YEAR file: get latest complete year, use COMPL_pct
-                        if "COMPL_pct" in hosp_rows.columns and "annee" in hosp_rows.columns:
-                            latest_year = _get_latest_complete_year(hosp_rows)
-                            if latest_year:
-                                hosp_rows = hosp_rows[pd.to_numeric(hosp_rows["annee"], errors="coerce") == latest_year]
-                                if not hosp_rows.empty:
-                                    compl_val = hosp_rows.iloc[0]["COMPL_pct"]
-                                    if pd.notna(compl_val):
-                                        hosp_compl = f"{float(compl_val):.1f}%"
-        except Exception:
-            pass
+        hosp_compl = _level_rate(HOP)
         st.markdown(f"<div class='nv-bubble' style='background:{COMPL_COLORS['hospital']};width:120px;height:120px;font-size:1.8rem'>{hosp_compl}</div>", unsafe_allow_html=True)
         st.caption("Hospital")
 
     # National bubble
     with col_nat:
-        nat_compl = "—"
-        try:
-            if not compl_natl.empty:
-                natl_rows = compl_natl.copy()
-                if use_12m_compl:
-                    # ROLL12 file: get latest month, use COMPL_pct_roll12
-                    if "COMPL_pct_roll12" in natl_rows.columns:
-                        # Sort by date/year/month to get latest
-                        if "annee" in natl_rows.columns and "mois" in natl_rows.columns:
-                            natl_rows["_ym"] = pd.to_numeric(natl_rows["annee"], errors="coerce") * 100 + pd.to_numeric(natl_rows["mois"], errors="coerce")
-                            natl_rows = natl_rows.sort_values("_ym", ascending=False)
-                        compl_val = natl_rows.iloc[0]["COMPL_pct_roll12"]
-                        if pd.notna(compl_val):
-                            nat_compl = f"{float(compl_val):.1f}%"
-                else:
-                    # YEAR file: get latest complete year, use COMPL_pct
-                    if "COMPL_pct" in natl_rows.columns and "annee" in natl_rows.columns:
-                        latest_year = _get_latest_complete_year(natl_rows)
-                        if latest_year:
-                            natl_rows = natl_rows[pd.to_numeric(natl_rows["annee"], errors="coerce") == latest_year]
-                            if not natl_rows.empty:
-                                compl_val = natl_rows.iloc[0]["COMPL_pct"]
-                                if pd.notna(compl_val):
-                                    nat_compl = f"{float(compl_val):.1f}%"
-        except Exception:
-            pass
+        nat_compl = _level_rate(NATL)
         st.markdown(f"<div class='nv-bubble' style='background:{COMPL_COLORS['national']};width:120px;height:120px;font-size:1.8rem'>{nat_compl}</div>", unsafe_allow_html=True)
         st.caption("National")
 
     # Regional bubble
     with col_reg:
-        reg_compl = "—"
-        try:
-            if region_name and not compl_reg.empty and "lib_reg" in compl_reg.columns:
-                reg_rows = compl_reg[compl_reg["lib_reg"].astype(str).str.strip() == str(region_name)]
-                if not reg_rows.empty:
-                    if use_12m_compl:
-                        # ROLL12 file: get latest month, use COMPL_pct_roll12
-                        if "COMPL_pct_roll12" in reg_rows.columns:
-                            # Sort by date/year/month to get latest
-                            if "annee" in reg_rows.columns and "mois" in reg_rows.columns:
-                                reg_rows["_ym"] = pd.to_numeric(reg_rows["annee"], errors="coerce") * 100 + pd.to_numeric(reg_rows["mois"], errors="coerce")
-                                reg_rows = reg_rows.sort_values("_ym", ascending=False)
-                            compl_val = reg_rows.iloc[0]["COMPL_pct_roll12"]
-                            if pd.notna(compl_val):
-                                reg_compl = f"{float(compl_val):.1f}%"
-                    else:
-                        # YEAR file: get latest complete year, use COMPL_pct
-                        if "COMPL_pct" in reg_rows.columns and "annee" in reg_rows.columns:
-                            latest_year = _get_latest_complete_year(reg_rows)
-                            if latest_year:
-                                reg_rows = reg_rows[pd.to_numeric(reg_rows["annee"], errors="coerce") == latest_year]
-                                if not reg_rows.empty:
-                                    compl_val = reg_rows.iloc[0]["COMPL_pct"]
-                                    if pd.notna(compl_val):
-                                        reg_compl = f"{float(compl_val):.1f}%"
-        except Exception:
-            pass
+        reg_compl = _level_rate(REG)
         st.markdown(f"<div class='nv-bubble' style='background:{COMPL_COLORS['regional']};width:120px;height:120px;font-size:1.8rem'>{reg_compl}</div>", unsafe_allow_html=True)
         st.caption("Regional")
 
     # Same category bubble
     with col_cat:
-        status_compl = "—"
-        try:
-            if status_val and not compl_status.empty and "statut" in compl_status.columns:
-                status_rows = compl_status[compl_status["statut"].astype(str).str.strip() == str(status_val)]
-                if not status_rows.empty:
-                    if use_12m_compl:
-                        # ROLL12 file: get latest month, use COMPL_pct_roll12
-                        if "COMPL_pct_roll12" in status_rows.columns:
-                            # Sort by date/year/month to get latest
-                            if "annee" in status_rows.columns and "mois" in status_rows.columns:
-                                status_rows["_ym"] = pd.to_numeric(status_rows["annee"], errors="coerce") * 100 + pd.to_numeric(status_rows["mois"], errors="coerce")
-                                status_rows = status_rows.sort_values("_ym", ascending=False)
-                            compl_val = status_rows.iloc[0]["COMPL_pct_roll12"]
-                            if pd.notna(compl_val):
-                                status_compl = f"{float(compl_val):.1f}%"
-                    else:
-                        # YEAR file: get latest complete year, use COMPL_pct
-                        if "COMPL_pct" in status_rows.columns and "annee" in status_rows.columns:
-                            latest_year = _get_latest_complete_year(status_rows)
-                            if latest_year:
-                                status_rows = status_rows[pd.to_numeric(status_rows["annee"], errors="coerce") == latest_year]
-                                if not status_rows.empty:
-                                    compl_val = status_rows.iloc[0]["COMPL_pct"]
-                                    if pd.notna(compl_val):
-                                        status_compl = f"{float(compl_val):.1f}%"
-        except Exception:
-            pass
+        status_compl = _level_rate(STATUS)
         st.markdown(f"<div class='nv-bubble' style='background:{COMPL_COLORS['status']};width:120px;height:120px;font-size:1.8rem'>{status_compl}</div>", unsafe_allow_html=True)
         st.caption("Same category Hospitals")
 
@@ -331,7 +160,7 @@ def render_complications(hospital_id: str):
     )
 
     # Use Annual data directly
-    compl_hop_year = _read_csv_complications("TAB_COMPL_HOP_YEAR.csv")
+    compl_hop_year = get_table("compl_hop_year")
     
     if compl_hop_year is None or compl_hop_year.empty or "COMPL_pct" not in compl_hop_year.columns:
         st.info("No annual complications data available for funnel plot.")
@@ -471,16 +300,16 @@ def render_complications(hospital_id: str):
     st.markdown("#### Complication rate by Clavien-Dindo grade (90 days)")
 
     # Load Clavien-Dindo grade data
-    grade_hop = _read_csv_complications("TAB_COMPL_GRADE_HOP_YEAR.csv")
-    grade_natl = _read_csv_complications("TAB_COMPL_GRADE_NATL_YEAR.csv")
-    grade_reg = _read_csv_complications("TAB_COMPL_GRADE_REG_YEAR.csv")
-    grade_status = _read_csv_complications("TAB_COMPL_GRADE_STATUS_YEAR.csv")
+    grade_hop = get_table("compl_grade_hop_year")
+    grade_natl = get_table("compl_grade_natl_year")
+    grade_reg = get_table("compl_grade_reg_year")
+    grade_status = get_table("compl_grade_status_year")
 
     # Load Never events data
-    never_hop = _read_csv_complications("TAB_NEVER_HOP.csv")
-    never_natl = _read_csv_complications("TAB_NEVER_NATL.csv")
-    never_reg = _read_csv_complications("TAB_NEVER_REG.csv")
-    never_status = _read_csv_complications("TAB_NEVER_STATUS.csv")
+    never_hop = get_table("never_hop")
+    never_natl = get_table("never_natl")
+    never_reg = get_table("never_reg")
+    never_status = get_table("never_status")
 
     # Color scheme for bar plot
     GRADE_COLORS = {
@@ -641,10 +470,10 @@ def render_complications(hospital_id: str):
     st.markdown("#### Length of stay – index admission")
     
     # Load LOS data
-    los_hop = _read_csv_complications("TAB_LOS_HOP.csv")
-    los_natl = _read_csv_complications("TAB_LOS_NATL.csv")
-    los_reg = _read_csv_complications("TAB_LOS_REG.csv")
-    los_status = _read_csv_complications("TAB_LOS_STATUS.csv")
+    los_hop = get_table("los_hop")
+    los_natl = get_table("los_natl")
+    los_reg = get_table("los_reg")
+    los_status = get_table("los_status")
     
     # Color schemes matching the procedures per year section
     # Hospital: variations of dark blue (#1f4e79)
@@ -747,10 +576,10 @@ def render_complications(hospital_id: str):
         st.plotly_chart(fig, use_container_width=True, key=chart_key if chart_key else None)
     
     # Load >7 days LOS data for bubble panel (before column split)
-    los7_hop_bubble = _read_csv_complications("TAB_LOS7_HOP.csv")
-    los7_natl_bubble = _read_csv_complications("TAB_LOS7_NATL.csv")
-    los7_reg_bubble = _read_csv_complications("TAB_LOS7_REG.csv")
-    los7_status_bubble = _read_csv_complications("TAB_LOS7_STATUS.csv")
+    los7_hop_bubble = get_table("los7_hop")
+    los7_natl_bubble = get_table("los7_natl")
+    los7_reg_bubble = get_table("los7_reg")
+    los7_status_bubble = get_table("los7_status")
     
     # Layout: LOS distribution charts on left, bubble panel on right
     left_charts, right_bubbles = st.columns([2.5, 1])
@@ -4,8 +4,7 @@ import plotly.graph_objects as go
 import streamlit as st
 import numpy as np
 
-import os
-from pathlib import Path
+from navira.store import get_table, has_data
 
 
 def render_complication_national(data=None):
@@ -18,77 +17,8 @@ def render_complication_national(data=None):
     """
     st.subheader("Complications Overview (National)")
     
-    def _resolve_complications_dir() -> str | None:
-        """Resolve path to new_data/COMPLICATIONS directory."""
-        candidates: list[str] = []
-        try:
-            candidates.append(str(Path.cwd() / "new_data" / "COMPLICATIONS"))
-        except Exception:
-            pass
-        try:
-            here = Path(__file__).resolve()
-            candidates.append(str((here.parent / ".." / "new_data" / "COMPLICATIONS").resolve()))
-            candidates.append(str((here.parent.parent / "new_data" / "COMPLICATIONS").resolve()))
-        except Exception:
-            pass
-        candidates.append("/Users/alexdebelka/Downloads/navira/new_data/COMPLICATIONS")
-        for c in candidates:
-            if Path(c).is_dir():
-                return c
-        return None
-
-    @st.cache_data(show_spinner=False)
-    def _read_csv_complications(filename: str) -> pd.DataFrame:
-        """Read CSV from COMPLICATIONS folder."""
-        base = _resolve_complications_dir()
-        if not base:
-            return pd.DataFrame()
-        p = Path(base) / filename
-        try:
-            df = pd.read_csv(p)
-            # Normalization
-            if "annee" in df.columns:
-                df["annee"] = pd.to_numeric(df["annee"], errors="coerce").astype("Int64")
-            if "year" in df.columns:
-                df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-            if "n" in df.columns:
-                df["n"] = pd.to_numeric(df["n"], errors="coerce")
-            if "finessGeoDP" in df.columns:
-                df["finessGeoDP"] = df["finessGeoDP"].astype(str).str.strip()
-            if "lib_reg" in df.columns:
-                df["lib_reg"] = df["lib_reg"].astype(str).str.strip()
-            if "statut" in df.columns:
-                df["statut"] = df["statut"].astype(str).str.strip()
-            # Handle complications columns
-            if "COMPL_pct" in df.columns:
-                df["COMPL_pct"] = pd.to_numeric(df["COMPL_pct"], errors="coerce")
-            if "COMPL_nb" in df.columns:
-                df["COMPL_nb"] = pd.to_numeric(df["COMPL_nb"], errors="coerce")
-            if "clav_cat_90" in df.columns:
-                df["clav_cat_90"] = pd.to_numeric(df["clav_cat_90"], errors="coerce")
-            # Handle never events columns
-            if "NEVER_nb" in df.columns:
-                df["NEVER_nb"] = pd.to_numeric(df["NEVER_nb"], errors="coerce")
-            if "NEVER_pct" in df.columns:
-                df["NEVER_pct"] = pd.to_numeric(df["NEVER_pct"], errors="coerce")
-            # Handle length of stay columns
-            if "LOS_nb" in df.columns:
-                df["LOS_nb"] = pd.to_numeric(df["LOS_nb"], errors="coerce")
-            if "LOS_pct" in df.columns:
-                df["LOS_pct"] = pd.to_numeric(df["LOS_pct"], errors="coerce")
-            if "LOS_7_nb" in df.columns:
-                df["LOS_7_nb"] = pd.to_numeric(df["LOS_7_nb"], errors="coerce")
-            if "LOS_7_pct" in df.columns:
-                df["LOS_7_pct"] = pd.to_numeric(df["LOS_7_pct"], errors="coerce")
-            if "TOT" in df.columns:
-                df["TOT"] = pd.to_numeric(df["TOT"], errors="coerce")
-            return df
-        except Exception:
-            return pd.DataFrame()
-    
     # Check complications directory
-    complications_data_dir = _resolve_complications_dir()
-    if complications_data_dir is None:
+    if not has_data():
         st.error("❌ Complications data directory not found. Please ensure new_data/COMPLICATIONS exists.")
         st.info(f"Looking for directory at: new_data/COMPLICATIONS")
         st.stop()
@@ -137,7 +67,7 @@ def render_complication_national(data=None):
         """)
     
     # Load annual data for trend visualization
-    compl_natl = _read_csv_complications("TAB_COMPL_NATL_YEAR.csv")
+    compl_natl = get_table("compl_natl_year")
 
     # Prepare data for line chart
     if not compl_natl.empty and "annee" in compl_natl.columns and "COMPL_pct" in compl_natl.columns:
@@ -216,10 +146,10 @@ def render_complication_national(data=None):
         """)
 
     # Load Clavien-Dindo grade data
-    grade_natl = _read_csv_complications("TAB_COMPL_GRADE_NATL_YEAR.csv")
+    grade_natl = get_table("compl_grade_natl_year")
 
     # Load Never events data
-    never_natl = _read_csv_complications("TAB_NEVER_NATL.csv")
+    never_natl = get_table("never_natl")
 
     # Color scheme for bar plot (matching overall_trends.py)
     GRADE_COLORS = {
@@ -424,7 +354,7 @@ def render_complication_national(data=None):
         """)
     
     # Load LOS data (national only)
-    los_natl = _read_csv_complications("TAB_LOS_NATL.csv")
+    los_natl = get_table("los_natl")
     
     # Color schemes matching national theme (using blue palette like techniques.py)
     # Using blue shades for better visual hierarchy
@@ -506,7 +436,7 @@ def render_complication_national(data=None):
         st.plotly_chart(fig, use_container_width=True, key=chart_key if chart_key else None)
     
     # Load >7 days LOS data for bubble (national only)
-    los7_natl_bubble = _read_csv_complications("TAB_LOS7_NATL.csv")
+    los7_natl_bubble = get_table("los7_natl")
     
     # Layout: LOS distribution chart on left, bubble on right
     left_charts, right_bubbles = st.columns([2.5, 1])
@@ -571,7 +501,7 @@ def render_complication_national(data=None):
                 # Fallback to static bubble if no trend data
                 natl_los7_pct = "—"
                 try:
-                    los7_natl_bubble = _read_csv_complications("TAB_LOS7_NATL.csv")
+                    los7_natl_bubble = get_table("los7_natl")
                     if not los7_natl_bubble.empty and "LOS_7_pct" in los7_natl_bubble.columns:
                         pct_val = los7_natl_bubble.iloc[0]["LOS_7_pct"]
                         if pd.notna(pct_val):
@@ -584,7 +514,7 @@ def render_complication_national(data=None):
             # Fallback to static bubble
             natl_los7_pct = "—"
             try:
-                los7_natl_bubble = _read_csv_complications("TAB_LOS7_NATL.csv")
+                los7_natl_bubble = get_table("los7_natl")
                 if not los7_natl_bubble.empty and "LOS_7_pct" in los7_natl_bubble.columns:
                     pct_val = los7_natl_bubble.iloc[0]["LOS_7_pct"]
                     if pd.notna(pct_val):
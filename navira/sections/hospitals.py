@@ -10,11 +10,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from lib.national_utils import (
     compute_affiliation_breakdown_2024,
     compute_affiliation_trends_2020_2024,
-    BARIATRIC_PROCEDURE_NAMES
+    label_category_column,
+    volume_bin_column,
+    BARIATRIC_PROCEDURE_NAMES,
+    NationalAggregates
 )
+from navira.store import get_table
 
 
-def render_hospitals(df: pd.DataFrame, procedure_details: pd.DataFrame):
+def render_hospitals(national: NationalAggregates, procedure_details: pd.DataFrame):
     """Render the Hospitals section for national page.
     
     This section contains:
@@ -52,24 +56,13 @@ def render_hospitals(df: pd.DataFrame, procedure_details: pd.DataFrame):
     
     # Load and Process Data Locally
     try:
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        vol_csv_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_VOL_HOP_YEAR.csv")
-        vol_natl_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_VOL_NATL_YEAR.csv")
-        
-        df_vol = pd.read_csv(vol_csv_path)
-        df_natl = pd.read_csv(vol_natl_path)
+        df_vol = get_table("vol_hop_year")
+        df_natl = get_table("vol_natl_year")
     
         df_vol = df_vol[df_vol['annee'].isin([2021, 2022, 2023, 2024])]
         df_natl = df_natl[df_natl['annee'].isin([2021, 2022, 2023, 2024])]
     
-        # Define Bins
-        def assign_bin(n):
-            if n < 50: return "<50"
-            elif 50 <= n < 100: return "50–100"
-            elif 100 <= n < 200: return "100–200"
-            else: return ">200"
-    
-        df_vol['bin'] = df_vol['n'].apply(assign_bin)
+        df_vol['bin'] = volume_bin_column(df_vol['n'])
         
         # KPIs for 2024
         df_2024 = df_vol[df_vol['annee'] == 2024]
@@ -209,14 +202,9 @@ def render_hospitals(df: pd.DataFrame, procedure_details: pd.DataFrame):
         """)
     
     try:
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        rev_natl_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_REV_NATL.csv")
-        rev_status_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_REV_STATUS.csv")
-        rev_12m_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_REV_NATL_12M.csv")
-        
-        df_rev_natl = pd.read_csv(rev_natl_path)
-        df_rev_status = pd.read_csv(rev_status_path)
-        df_rev_12m = pd.read_csv(rev_12m_path)
+        df_rev_natl = get_table("rev_natl")
+        df_rev_status = get_table("rev_status")
+        df_rev_12m = get_table("rev_natl_12m")
         
         # National metrics
         if not df_rev_natl.empty:
@@ -322,11 +310,9 @@ def render_hospitals(df: pd.DataFrame, procedure_details: pd.DataFrame):
     # --- (2) HOSPITAL AFFILIATION ---
     st.header("Hospital Affiliation (2025)")
     
-    if not df.empty:
+    if not national.frame.empty:
         # Load hospital data from the new CSV file
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        hosp_csv_path = os.path.join(base_dir, "new_data", "01_hospitals_redux.csv")
-        df_hosp = pd.read_csv(hosp_csv_path)
+        df_hosp = get_table("hospitals_redux")
         
         # Filter for 2025 data
         df_hosp_2025 = df_hosp[df_hosp['annee'] == 2025].copy()
@@ -346,30 +332,16 @@ def render_hospitals(df: pd.DataFrame, procedure_details: pd.DataFrame):
         affiliation_counts = df_hosp_2025['Affiliation'].value_counts().to_dict()
         
         # Calculate label categories
-        def get_label_category(row):
-            has_cso = row['cso'] == 1
-            has_soffco = row['LAB_SOFFCO'] == 1
-            
-            if has_cso and has_soffco:
-                return 'Both'
-            elif has_soffco:
-                return 'SOFFCO Label'
-            elif has_cso:
-                return 'CSO Label'
-            else:
-                return 'None'
-        
-        df_hosp_2025['Label_Category'] = df_hosp_2025.apply(get_label_category, axis=1)
+        df_hosp_2025['Label_Category'] = label_category_column(df_hosp_2025['cso'], df_hosp_2025['LAB_SOFFCO'])
         
         # Create label_breakdown dictionary to match the old structure
-        label_breakdown = {}
-        for affiliation in affiliation_counts.keys():
-            label_breakdown[affiliation] = {}
-            affil_data = df_hosp_2025[df_hosp_2025['Affiliation'] == affiliation]
-            for label_cat in ['SOFFCO Label', 'CSO Label', 'Both', 'None']:
-                label_breakdown[affiliation][label_cat] = len(affil_data[affil_data['Label_Category'] == label_cat])
-        
-        affiliation_trends = compute_affiliation_trends_2020_2024(df)
+        label_counts = df_hosp_2025.groupby(['Affiliation', 'Label_Category'], observed=False).size().unstack(fill_value=0)
+        label_breakdown = {
+            affiliation: {label_cat: int(n) for label_cat, n in label_counts.loc[affiliation].items()}
+            for affiliation in affiliation_counts.keys()
+        }
+        
+        affiliation_trends = compute_affiliation_trends_2020_2024(national)
 
         
         col1, col2 = st.columns(2)
@@ -511,9 +483,7 @@ def render_hospitals(df: pd.DataFrame, procedure_details: pd.DataFrame):
         
         # Load data locally from CSV
         try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            status_csv_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_VOL_STATUS_YEAR.csv")
-            df_status = pd.read_csv(status_csv_path)
+            df_status = get_table("vol_status_year")
         
             df_status = df_status[df_status['annee'].isin([2021, 2022, 2023, 2024])]
             status_mapping = {
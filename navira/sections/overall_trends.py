@@ -11,10 +11,11 @@ import branca.colormap as cm
 
 # Add the parent directory to the Python path to import lib
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from lib.national_utils import compute_affiliation_breakdown_2024
+from lib.national_utils import NationalAggregates, compute_affiliation_breakdown_2024, label_category_column
+from navira.store import get_table
 
 
-def render_overall_trends(df: pd.DataFrame):
+def render_overall_trends(national: NationalAggregates):
     """Render the Overall Trends section (formerly Summary section) for national page.
     
     This section contains summary cards showing:
@@ -84,9 +85,7 @@ def render_overall_trends(df: pd.DataFrame):
     with col1:
         with st.container():
             try:
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                csv_path_c1 = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_TCN_NATL_YEAR.csv")
-                df_c1 = pd.read_csv(csv_path_c1)
+                df_c1 = get_table("tcn_natl_year")
                 df_c1 = df_c1[df_c1['annee'].isin([2022, 2023, 2024])]
                 yearly_totals = df_c1.groupby('annee')['n'].sum().reset_index().sort_values('annee')
                 c1_years  = yearly_totals['annee'].astype(str).tolist() + ['2025*']
@@ -135,9 +134,7 @@ def render_overall_trends(df: pd.DataFrame):
         with st.container():
             # Load the CSV data
             try:
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                csv_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_TCN_NATL_YEAR.csv")
-                df_activ = pd.read_csv(csv_path)
+                df_activ = get_table("tcn_natl_year")
     
                 df_activ = df_activ[df_activ['annee'].isin([2021, 2022, 2023, 2024])]
                 total_procs = df_activ['n'].sum()
@@ -151,10 +148,9 @@ def render_overall_trends(df: pd.DataFrame):
                 other_pct = (others_n / total_procs * 100) if total_procs > 0 else 0
     
                 # Load Trend Data for Prediction
-                trend_csv_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_TREND_NATL.csv")
                 diff_pct_val = 0
-                if os.path.exists(trend_csv_path):
-                    df_trend = pd.read_csv(trend_csv_path)
+                df_trend = get_table("trend_natl")
+                if not df_trend.empty:
                     diff_pct_val = df_trend['diff_pct'].iloc[0]
                     prediction_text = f"{diff_pct_val:+.1f}%"
                 else:
@@ -224,9 +220,7 @@ def render_overall_trends(df: pd.DataFrame):
     with col3:
         with st.container():
             try:
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                rob_csv_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_APP_NATL_YEAR.csv")
-                df_rob = pd.read_csv(rob_csv_path)
+                df_rob = get_table("app_natl_year")
                 df_rob = df_rob[(df_rob['vda'] == 'ROB') & (df_rob['annee'].isin([2021, 2022, 2023, 2024]))]
                 df_rob = df_rob.sort_values('annee')
                 years = df_rob['annee'].tolist()
@@ -261,9 +255,7 @@ def render_overall_trends(df: pd.DataFrame):
     with col4:
         with st.container():
             try:
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                comp_csv_path = os.path.join(base_dir, "new_data", "COMPLICATIONS", "TAB_COMPL_GRADE_NATL_YEAR.csv")
-                df_comp = pd.read_csv(comp_csv_path)
+                df_comp = get_table("compl_grade_natl_year")
                 df_comp = df_comp[(df_comp['annee'].isin([2021, 2022, 2023, 2024])) & (df_comp['clav_cat_90'].isin([3, 4, 5]))]
                 yearly_severe = df_comp.groupby('annee')['COMPL_pct'].sum().reset_index().sort_values('annee')
                 comp_years = yearly_severe['annee'].tolist()
@@ -304,7 +296,7 @@ def render_overall_trends(df: pd.DataFrame):
             
             try:
                 population_data = load_population_data()
-                surgery_data = calculate_surgery_by_department(df)
+                surgery_data = calculate_surgery_by_department(national.frame)
                 
                 if not population_data.empty and not surgery_data.empty:
                     ratio_data = pd.merge(surgery_data, population_data, on='dept_code', how='inner')
@@ -347,9 +339,7 @@ def render_overall_trends(df: pd.DataFrame):
         with st.container():
             try:
                 # Load hospital data from the new CSV file
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                hosp_csv_path = os.path.join(base_dir, "new_data", "01_hospitals_redux.csv")
-                df_hosp = pd.read_csv(hosp_csv_path)
+                df_hosp = get_table("hospitals_redux")
                 
                 # Filter for 2025 data
                 df_hosp_2025 = df_hosp[df_hosp['annee'] == 2025].copy()
@@ -366,20 +356,7 @@ def render_overall_trends(df: pd.DataFrame):
                 df_hosp_2025 = df_hosp_2025.dropna(subset=['Affiliation'])
                 
                 # Calculate label categories based on cso and LAB_SOFFCO columns
-                def get_label_category(row):
-                    has_cso = row['cso'] == 1
-                    has_soffco = row['LAB_SOFFCO'] == 1
-                    
-                    if has_cso and has_soffco:
-                        return 'Both'
-                    elif has_soffco:
-                        return 'SOFFCO Label'
-                    elif has_cso:
-                        return 'CSO Label'
-                    else:
-                        return 'None'
-                
-                df_hosp_2025['Label_Category'] = df_hosp_2025.apply(get_label_category, axis=1)
+                df_hosp_2025['Label_Category'] = label_category_column(df_hosp_2025['cso'], df_hosp_2025['LAB_SOFFCO'])
                 
                 # Group by affiliation and label category
                 label_counts = df_hosp_2025.groupby(['Affiliation', 'Label_Category']).size().unstack(fill_value=0)
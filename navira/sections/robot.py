@@ -15,12 +15,14 @@ from lib.national_utils import (
     compute_robotic_volume_analysis,
     compute_robotic_temporal_analysis,
     compute_robotic_institutional_analysis,
-    compute_robotic_volume_distribution
+    compute_robotic_volume_distribution,
+    NationalAggregates
 )
 from navira.data_loader import get_dataframes
+from navira.store import get_table
 
 
-def render_robot(df: pd.DataFrame):
+def render_robot(national: NationalAggregates):
     """Render the Robot section for national page.
     
     This section contains:
@@ -30,16 +32,12 @@ def render_robot(df: pd.DataFrame):
     
     st.header("Approach Trends")
     
-    # Get base directory for CSV loading
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    
     # Add toggle for year filtering
     toggle_robot_2024_only = st.toggle("Show 2024 data only", value=False, key="robot_approach_toggle_2024")
     
     # Load data from CSV
     try:
-        app_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_APP_NATL_YEAR.csv")
-        df_app = pd.read_csv(app_path)
+        df_app = get_table("app_natl_year")
         
         # Filter by year based on toggle
         if toggle_robot_2024_only:
@@ -169,8 +167,8 @@ def render_robot(df: pd.DataFrame):
         st.error(f"Error loading approach data: {e}")
         st.info("Unable to load surgical approach data from CSV.")
     
-    # Compute approach trends for the line chart (keep using df for now)
-    approach_trends = compute_approach_trends(df)
+    # Compute approach trends for the line chart
+    approach_trends = compute_approach_trends(national)
 
     
     # Single column layout for trends
@@ -192,8 +190,7 @@ def render_robot(df: pd.DataFrame):
         
         # Load hospital-level robotic data for additional metrics
         try:
-            rob_hosp_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_ROB_HOP_12M.csv")
-            df_rob_hosp = pd.read_csv(rob_hosp_path)
+            df_rob_hosp = get_table("rob_hop_12m")
             
             # Calculate metrics
             num_hospitals = len(df_rob_hosp)
@@ -310,8 +307,7 @@ def render_robot(df: pd.DataFrame):
     
     # Load robotic data from TAB_ROB_HOP_12M.csv
     try:
-        rob_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_ROB_HOP_12M.csv")
-        rob_data = pd.read_csv(rob_path)
+        rob_data = get_table("rob_hop_12m")
         
         if not rob_data.empty and "TOT" in rob_data.columns and "PCT_app" in rob_data.columns:
             d = rob_data.copy()
@@ -373,8 +369,7 @@ def render_robot(df: pd.DataFrame):
         """)
     
     try:
-        app_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_APP_NATL_YEAR.csv")
-        df_app_trends = pd.read_csv(app_path)
+        df_app_trends = get_table("app_natl_year")
         
         # Filter to 2021-2024 and get robotic percentage
         df_trends = df_app_trends[(df_app_trends['annee'] >= 2021) & (df_app_trends['annee'] <= 2024)].copy()
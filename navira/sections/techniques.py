@@ -11,11 +11,13 @@ from lib.national_utils import (
     compute_procedure_averages_2020_2024,
     get_2024_procedure_totals,
     get_2020_2024_procedure_totals,
-    BARIATRIC_PROCEDURE_NAMES
+    BARIATRIC_PROCEDURE_NAMES,
+    NationalAggregates
 )
+from navira.store import get_table
 
 
-def render_techniques(df: pd.DataFrame, national_averages: dict):
+def render_techniques(national: NationalAggregates, national_averages: dict):
     """Render the Techniques section for national page.
     
     This section contains:
@@ -27,9 +29,9 @@ def render_techniques(df: pd.DataFrame, national_averages: dict):
     st.header("Procedures")
     
     # Compute procedure data
-    procedure_averages = compute_procedure_averages_2020_2024(df)
-    procedure_totals_2024 = get_2024_procedure_totals(df)
-    procedure_totals_2020_2024 = get_2020_2024_procedure_totals(df)
+    procedure_averages = compute_procedure_averages_2020_2024(national)
+    procedure_totals_2024 = get_2024_procedure_totals(national)
+    procedure_totals_2020_2024 = get_2020_2024_procedure_totals(national)
     
     # Toggle between 2020-2024 totals and 2024 only
     toggle_2024_only = st.toggle("Show 2024 data only", value=False, key="techniques_toggle_2024")
@@ -40,9 +42,7 @@ def render_techniques(df: pd.DataFrame, national_averages: dict):
     with col1:
         # Load data from CSV
         try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            csv_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_TCN_NATL_YEAR.csv")
-            df_activity = pd.read_csv(csv_path)
+            df_activity = get_table("tcn_natl_year")
             
             # Filter to 2024 only as requested
             df_activity = df_activity[df_activity['annee'] <= 2024]
@@ -446,8 +446,7 @@ def render_techniques(df: pd.DataFrame, national_averages: dict):
                         year_filter = lambda df: df[(df['annee'] >= 2021) & (df['annee'] <= 2024)]
                     
                     # 1. Avg Procedures per Hospital from TAB_VOL_HOP_YEAR.csv
-                    vol_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_VOL_HOP_YEAR.csv")
-                    df_vol = pd.read_csv(vol_path)
+                    df_vol = get_table("vol_hop_year")
                     df_vol_filtered = year_filter(df_vol)
                     
                     # Calculate average: sum procedures per hospital, then average across hospitals
@@ -455,8 +454,7 @@ def render_techniques(df: pd.DataFrame, national_averages: dict):
                     avg_procedures_per_hospital = int(hospital_totals.mean()) if not hospital_totals.empty else 0
                     
                     # 2. Avg Sleeve Gastrectomy % from TAB_TCN_NATL_YEAR.csv
-                    tcn_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_TCN_NATL_YEAR.csv")
-                    df_tcn = pd.read_csv(tcn_path)
+                    df_tcn = get_table("tcn_natl_year")
                     df_tcn_filtered = year_filter(df_tcn)
                     
                     total_procedures_tcn = df_tcn_filtered['n'].sum()
@@ -464,8 +462,7 @@ def render_techniques(df: pd.DataFrame, national_averages: dict):
                     sleeve_pct = (sleeve_procedures / total_procedures_tcn * 100) if total_procedures_tcn > 0 else 0.0
                     
                     # 3. Avg Robotic Approach % from TAB_APP_NATL_YEAR.csv
-                    app_path = os.path.join(base_dir, "new_data", "ACTIVITY", "TAB_APP_NATL_YEAR.csv")
-                    df_app = pd.read_csv(app_path)
+                    df_app = get_table("app_natl_year")
                     df_app_filtered = year_filter(df_app)
                     
                     total_procedures_app = df_app_filtered['n'].sum()
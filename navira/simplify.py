@@ -0,0 +1,151 @@
+"""
+Topology-preserving simplification of polygon rings (Douglas-Peucker).
+
+Simplifying each commune on its own moves a shared border differently on
+either side, opening slivers and overlaps between neighbours. Here the
+rings of all communes are simplified together:
+
+1. Vertices are matched by exact (quantized) coordinates, and each vertex
+   gets a signature of the set of rings through it.
+2. A ring is cut into chains wherever the signature changes: between two
+   cuts, every vertex borders the same communes, so a border shared by two
+   communes is the same chain (possibly reversed) in both rings.
+3. Each chain is simplified in a canonical direction, so both rings drop
+   the same vertices and neighbours keep sharing their edges.
+
+Douglas-Peucker runs once per chain and records, for every vertex, the
+largest tolerance at which it survives; all levels are then thresholds of
+that importance. Chain ends are always kept, and so is the farthest point
+of every chain (two points for a ring without cuts), so rings do not
+collapse into lines.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, stop) for each pair, without a Python loop."""
+    lengths = stops - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(int(lengths.sum()))
+
+
+def _importance(points: np.ndarray, starts: np.ndarray, stops: np.ndarray, keep_depth: np.ndarray,
+                floor: float) -> np.ndarray:
+    """Largest tolerance at which each point survives Douglas-Peucker on its chain.
+
+    Chains are ``points[starts[i]:stops[i] + 1]``, all split together, one
+    recursion depth per pass. Ends, and the split points of the first
+    ``keep_depth`` depths, never go. Points that cannot outlive ``floor``
+    are left at 0 without splitting further.
+    """
+    importance = np.zeros(len(points))
+    importance[starts] = importance[stops] = np.inf
+    a, b = starts.astype(np.int64), stops.astype(np.int64)
+    cap, depth, keep = np.full(len(a), np.inf), np.zeros(len(a), np.int64), keep_depth.astype(np.int64)
+    while len(a):
+        inner = b - a >= 2
+        a, b, cap, depth, keep = a[inner], b[inner], cap[inner], depth[inner], keep[inner]
+        if not len(a):
+            break
+        index = _ranges(a + 1, b)
+        segment = np.repeat(np.arange(len(a)), b - a - 1)
+        start, chord = points[a][segment], (points[b] - points[a])[segment]
+        length2 = (chord * chord).sum(axis=1)
+        t = np.clip(np.divide(((points[index] - start) * chord).sum(axis=1), length2,
+                              out=np.zeros(len(index)), where=length2 > 0), 0.0, 1.0)
+        offset = points[index] - start - t[:, None] * chord
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        # Farthest point of each segment (first one on ties)
+        first = np.cumsum(b - a - 1) - (b - a - 1)
+        farthest = np.maximum.reduceat(distance, first)
+        hit = np.flatnonzero(distance == farthest[segment])
+        split = index[hit[np.unique(segment[hit], return_index=True)[1]]]
+        # A point never outlives the split that exposed it
+        value = np.where(depth < keep, np.inf, np.minimum(farthest, cap))
+        importance[split] = value
+        go = value > floor
+        a, b = np.concatenate([a[go], split[go]]), np.concatenate([split[go], b[go]])
+        cap, depth, keep = np.tile(value[go], 2), np.tile(depth[go] + 1, 2), np.tile(keep[go], 2)
+    return importance
+
+
+def _ring_chains(vertex: np.ndarray, signature: np.ndarray) -> List[Tuple[np.ndarray, bool]]:
+    """Chains of an open ring as (positions in canonical direction, closed)."""
+    n = len(vertex)
+    cut = (signature != np.roll(signature, 1)) | (signature != np.roll(signature, -1))
+    cuts = np.flatnonzero(cut)
+    if len(cuts) == 0:
+        # No neighbour change (island, enclave): one closed chain from the
+        # lowest vertex, which both sides of an enclave border agree on
+        cuts = np.array([int(np.argmin(vertex))])
+    chains = []
+    for j, a in enumerate(cuts):
+        b = cuts[j + 1] if j + 1 < len(cuts) else cuts[0] + n
+        index = np.arange(a, b + 1) % n
+        ids = vertex[index]
+        closed = bool(ids[0] == ids[-1])
+        # Canonical direction: by end vertices, or second vs penultimate when they coincide
+        if ids[0] > ids[-1] or (closed and len(ids) > 2 and ids[1] > ids[-2]):
+            index = index[::-1]
+        chains.append((index, closed))
+    return chains
+
+
+def simplify_rings(rings: Sequence[np.ndarray], tolerances: Sequence[float]) -> List[List[np.ndarray]]:
+    """Simplify closed rings together; returns, per tolerance, the rings at that level.
+
+    ``rings`` are integer (n, 2) coordinate arrays whose last point repeats the
+    first; tolerances are in the same units. A tolerance of 0 returns the
+    rings unchanged.
+    """
+    rings = [np.asarray(r).reshape(-1, 2) for r in rings]
+    open_rings = [r[:-1] if len(r) > 1 and (r[0] == r[-1]).all() else r for r in rings]
+    lengths = np.array([len(r) for r in open_rings], dtype=np.int64)
+    positive = [t for t in tolerances if t > 0]
+    if not positive or not len(rings) or not lengths.sum():
+        return [list(rings) for _ in tolerances]
+
+    points = np.concatenate(open_rings).astype(np.int64)
+    keys = (points[:, 0] << 32) + (points[:, 1] + (1 << 31))
+    _, vertex = np.unique(keys, return_inverse=True)
+    ring_of = np.repeat(np.arange(len(rings)), lengths)
+
+    # Signature of a vertex: sum of random 64-bit tags of the distinct rings through it
+    tags = np.random.default_rng(0).integers(0, np.iinfo(np.int64).max, len(rings), dtype=np.uint64)
+    pairs = np.sort(vertex.astype(np.int64) * len(rings) + ring_of)
+    pairs = pairs[np.append(True, pairs[1:] != pairs[:-1])]
+    signature = np.zeros(int(vertex.max()) + 1, dtype=np.uint64)
+    np.add.at(signature, pairs // len(rings), tags[pairs % len(rings)])
+
+    # Lay every chain out end to end (global point positions), then simplify them all at once
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    order, starts, keep_depth = [], [], []
+    size = 0
+    for i in np.flatnonzero(lengths >= 3):
+        ids = vertex[bounds[i]:bounds[i + 1]]
+        for index, closed in _ring_chains(ids, signature[ids]):
+            order.append(index + bounds[i])
+            starts.append(size)
+            keep_depth.append(2 if closed else 1)
+            size += len(index)
+    order = np.concatenate(order)
+    starts = np.array(starts, dtype=np.int64)
+    stops = np.append(starts[1:], size) - 1
+    chain_importance = _importance(points[order].astype("float64"), starts, stops,
+                                   np.array(keep_depth), min(positive))
+    importance = np.full(len(points), np.inf)
+    importance[order] = chain_importance
+
+    levels: List[List[np.ndarray]] = [[] for _ in tolerances]
+    for i, ring in enumerate(rings):
+        ring_importance = importance[bounds[i]:bounds[i + 1]]
+        for level, tolerance in zip(levels, tolerances):
+            if tolerance <= 0 or lengths[i] < 3:
+                level.append(ring)
+                continue
+            kept = open_rings[i][ring_importance > tolerance]
+            level.append(np.concatenate([kept, kept[:1]]))
+    return levels
@@ -0,0 +1,164 @@
+"""
+Great-circle nearest-neighbour index over latitude / longitude points.
+
+Points are stored as unit vectors: the straight-line (chord) distance
+between two unit vectors grows with their great-circle distance, so a
+KD-tree on the 3-D vectors answers haversine queries exactly while pruning
+with plain axis-aligned boxes. The tree is a flat set of arrays (node
+ranges, children and bounding boxes over a permutation of the points),
+built once with NumPy. ``nearest`` (k nearest) walks it best-first and
+``within`` (radius) collects the leaves the radius reaches; both measure
+leaf points with vectorized distances.
+"""
+
+import heapq
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 32
+
+
+def to_unit_vectors(latitude, longitude) -> np.ndarray:
+    """(n, 3) unit vectors of points given in degrees."""
+    lat = np.radians(np.asarray(latitude, dtype="float64"))
+    lon = np.radians(np.asarray(longitude, dtype="float64"))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord) -> np.ndarray:
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def km_to_chord(km) -> np.ndarray:
+    return 2.0 * np.sin(np.clip(np.asarray(km, dtype="float64") / (2.0 * EARTH_RADIUS_KM), 0.0, np.pi / 2))
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km (broadcasting)."""
+    return chord_to_km(np.linalg.norm(to_unit_vectors(lat1, lon1) - to_unit_vectors(lat2, lon2), axis=-1))
+
+
+class SpatialIndex:
+    """KD-tree of points on the sphere; query results are positions in the input arrays."""
+
+    __slots__ = ("points", "ids", "start", "stop", "left", "right", "lo", "hi", "_nodes")
+
+    def __init__(self, latitude, longitude, leaf_size: int = LEAF_SIZE):
+        xyz = to_unit_vectors(latitude, longitude).reshape(-1, 3)
+        valid = np.flatnonzero(np.isfinite(xyz).all(axis=1))
+        self.ids = valid  # input position of each stored point (missing coordinates skipped)
+        self.points = xyz[valid]
+        start, stop, left, right, lo, hi = [], [], [], [], [], []
+        order = np.arange(len(valid))
+        stack = [(0, len(valid), -1, False)]
+        while stack:
+            a, b, parent, is_right = stack.pop()
+            node = len(start)
+            if parent >= 0:
+                (right if is_right else left)[parent] = node
+            box = self.points[order[a:b]]
+            start.append(a)
+            stop.append(b)
+            left.append(-1)
+            right.append(-1)
+            lo.append(box.min(axis=0) if b > a else np.zeros(3))
+            hi.append(box.max(axis=0) if b > a else np.zeros(3))
+            if b - a > leaf_size:
+                # Split the widest axis at the median
+                axis = int(np.argmax(hi[-1] - lo[-1]))
+                mid = (a + b) // 2
+                part = np.argpartition(box[:, axis], mid - a)
+                order[a:b] = order[a:b][part]
+                stack.append((mid, b, node, True))
+                stack.append((a, mid, node, False))
+        self.ids = self.ids[order]
+        self.points = self.points[order]
+        self.start, self.stop = np.array(start), np.array(stop)
+        self.left, self.right = np.array(left), np.array(right)
+        self.lo, self.hi = np.array(lo).reshape(-1, 3), np.array(hi).reshape(-1, 3)
+        # Plain tuples for the traversal: per-node NumPy calls cost more than the arithmetic
+        self._nodes = list(zip(self.start.tolist(), self.stop.tolist(), self.left.tolist(), self.right.tolist(),
+                               self.lo.tolist(), self.hi.tolist()))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, lat_col: str = "latitude", lon_col: str = "longitude",
+                   leaf_size: int = LEAF_SIZE) -> "SpatialIndex":
+        """Index of a table's rows; query results are row positions (``df.iloc``)."""
+        if df.empty or lat_col not in df.columns or lon_col not in df.columns:
+            return cls(np.empty(0), np.empty(0), leaf_size)
+        latitude = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype="float64")
+        longitude = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype="float64")
+        return cls(latitude, longitude, leaf_size)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _box_distance2(self, node: int, q: Tuple[float, float, float]) -> float:
+        _, _, _, _, lo, hi = self._nodes[node]
+        total = 0.0
+        for c, low, high in zip(q, lo, hi):
+            gap = low - c if c < low else (c - high if c > high else 0.0)
+            total += gap * gap
+        return total
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of the ``k`` nearest points and their distances (km), closest first."""
+        if not len(self.ids) or k < 1:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        q = to_unit_vectors(latitude, longitude)
+        qt = tuple(q.tolist())
+        best: list = []  # max-heap of (-distance², position)
+        frontier = [(0.0, 0)]
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            a, b, left, right, _, _ = self._nodes[node]
+            if left < 0:
+                diff = self.points[a:b] - q
+                d2 = np.einsum("ij,ij->i", diff, diff)
+                for i in np.argsort(d2)[:k]:
+                    item = (-float(d2[i]), int(a + i))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+                    else:
+                        break
+                continue
+            for child in (left, right):
+                heapq.heappush(frontier, (self._box_distance2(child, qt), child))
+        best.sort(reverse=True)
+        positions = np.array([p for _, p in best], dtype=np.int64)
+        distances = chord_to_km(np.sqrt([-d for d, _ in best]))
+        return self.ids[positions], np.asarray(distances, dtype="float64")
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of the points within ``radius_km`` and their distances (km), closest first."""
+        if not len(self.ids) or not radius_km >= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        q = to_unit_vectors(latitude, longitude)
+        qt = tuple(q.tolist())
+        limit = float(km_to_chord(radius_km)) ** 2
+        found, stack = [], [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance2(node, qt) > limit:
+                continue
+            a, b, left, right, _, _ = self._nodes[node]
+            if left < 0:
+                found.append(np.arange(a, b))
+            else:
+                stack.extend((right, left))
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        candidates = np.concatenate(found)
+        diff = self.points[candidates] - q
+        d2 = np.einsum("ij,ij->i", diff, diff)
+        inside = np.flatnonzero(d2 <= limit)
+        inside = inside[np.argsort(d2[inside], kind="stable")]
+        return self.ids[candidates[inside]], chord_to_km(np.sqrt(d2[inside]))
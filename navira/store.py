@@ -0,0 +1,521 @@
+"""
+Process-wide columnar store for the new_data tables.
+
+This module provides a single entry point for every TAB_* table shipped in
+new_data/ACTIVITY, new_data/COMPLICATIONS and new_data/GEOGRAPHY:
+- Tables are addressed by logical name (e.g. "vol_hop_year") instead of file paths
+- Compiled artifacts (scripts/build_parquet.py) are preferred over raw CSVs;
+  Arrow IPC files are memory-mapped rather than read
+- Each file is read once per process with pyarrow and normalized once
+- The parsed Arrow table and its pandas view are shared by all sessions
+- Readers stay pinned to one published data version; refresh_data() (run
+  by a background watcher) loads the next version, switches readers over
+  and evicts only the previous version's cache entries
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import streamlit as st
+
+from .artifacts import MANIFEST_NAME, artifact_path, compiled_dir, compiled_root, open_ipc, read_manifest
+from .benchmark import BENCHMARK_SOURCES, benchmark_table
+from .finess_index import FinessIndex
+from .ranking import PeerRanks
+from .rolling import MonthlyCounts
+from .schema import ARROW_TYPES
+from .summary import SUMMARY_SOURCES, summary_table
+
+
+logger = logging.getLogger(__name__)
+
+# Logical name -> (sub-folder of new_data, file name)
+TABLES: Dict[str, Tuple[str, str]] = {
+    # ACTIVITY
+    'app_hop_year': ('ACTIVITY', 'TAB_APP_HOP_YEAR.csv'),
+    'app_natl_year': ('ACTIVITY', 'TAB_APP_NATL_YEAR.csv'),
+    'app_reg_year': ('ACTIVITY', 'TAB_APP_REG_YEAR.csv'),
+    'app_status_year': ('ACTIVITY', 'TAB_APP_STATUS_YEAR.csv'),
+    'rev_hop': ('ACTIVITY', 'TAB_REV_HOP.csv'),
+    'rev_hop_12m': ('ACTIVITY', 'TAB_REV_HOP_12M.csv'),
+    'rev_natl': ('ACTIVITY', 'TAB_REV_NATL.csv'),
+    'rev_natl_12m': ('ACTIVITY', 'TAB_REV_NATL_12M.csv'),
+    'rev_reg': ('ACTIVITY', 'TAB_REV_REG.csv'),
+    'rev_reg_12m': ('ACTIVITY', 'TAB_REV_REG_12M.csv'),
+    'rev_status': ('ACTIVITY', 'TAB_REV_STATUS.csv'),
+    'rev_status_12m': ('ACTIVITY', 'TAB_REV_STATUS_12M.csv'),
+    'rob_hop_12m': ('ACTIVITY', 'TAB_ROB_HOP_12M.csv'),
+    'tcn_hop': ('ACTIVITY', 'TAB_TCN_HOP.csv'),
+    'tcn_hop_12m': ('ACTIVITY', 'TAB_TCN_HOP_12M.csv'),
+    'tcn_hop_month': ('ACTIVITY', 'TAB_TCN_HOP_MONTH.csv'),
+    'tcn_hop_year': ('ACTIVITY', 'TAB_TCN_HOP_YEAR.csv'),
+    'tcn_natl': ('ACTIVITY', 'TAB_TCN_NATL.csv'),
+    'tcn_natl_12m': ('ACTIVITY', 'TAB_TCN_NATL_12M.csv'),
+    'tcn_natl_year': ('ACTIVITY', 'TAB_TCN_NATL_YEAR.csv'),
+    'tcn_reg': ('ACTIVITY', 'TAB_TCN_REG.csv'),
+    'tcn_reg_12m': ('ACTIVITY', 'TAB_TCN_REG_12M.csv'),
+    'tcn_reg_year': ('ACTIVITY', 'TAB_TCN_REG_YEAR.csv'),
+    'tcn_status': ('ACTIVITY', 'TAB_TCN_STATUS.csv'),
+    'tcn_status_12m': ('ACTIVITY', 'TAB_TCN_STATUS_12M.csv'),
+    'tcn_status_year': ('ACTIVITY', 'TAB_TCN_STATUS_YEAR.csv'),
+    'trend_hop': ('ACTIVITY', 'TAB_TREND_HOP.csv'),
+    'trend_natl': ('ACTIVITY', 'TAB_TREND_NATL.csv'),
+    'trend_reg': ('ACTIVITY', 'TAB_TREND_REG.csv'),
+    'trend_status': ('ACTIVITY', 'TAB_TRENDS_STATUS.csv'),
+    'vol_hop_month': ('ACTIVITY', 'TAB_VOL_HOP_MONTH.csv'),
+    'vol_hop_year': ('ACTIVITY', 'TAB_VOL_HOP_YEAR.csv'),
+    'vol_natl_year': ('ACTIVITY', 'TAB_VOL_NATL_YEAR.csv'),
+    'vol_reg_year': ('ACTIVITY', 'TAB_VOL_REG_YEAR.csv'),
+    'vol_status_year': ('ACTIVITY', 'TAB_VOL_STATUS_YEAR.csv'),
+    # COMPLICATIONS
+    'compl_grade_hop_year': ('COMPLICATIONS', 'TAB_COMPL_GRADE_HOP_YEAR.csv'),
+    'compl_grade_natl_year': ('COMPLICATIONS', 'TAB_COMPL_GRADE_NATL_YEAR.csv'),
+    'compl_grade_reg_year': ('COMPLICATIONS', 'TAB_COMPL_GRADE_REG_YEAR.csv'),
+    'compl_grade_status_year': ('COMPLICATIONS', 'TAB_COMPL_GRADE_STATUS_YEAR.csv'),
+    'compl_hop_roll12': ('COMPLICATIONS', 'TAB_COMPL_HOP_ROLL12.csv'),
+    'compl_hop_year': ('COMPLICATIONS', 'TAB_COMPL_HOP_YEAR.csv'),
+    'compl_natl_roll12': ('COMPLICATIONS', 'TAB_COMPL_NATL_ROLL12.csv'),
+    'compl_natl_year': ('COMPLICATIONS', 'TAB_COMPL_NATL_YEAR.csv'),
+    'compl_reg_roll12': ('COMPLICATIONS', 'TAB_COMPL_REG_ROLL12.csv'),
+    'compl_reg_year': ('COMPLICATIONS', 'TAB_COMPL_REG_YEAR.csv'),
+    'compl_status_roll12': ('COMPLICATIONS', 'TAB_COMPL_STATUS_ROLL12.csv'),
+    'compl_status_year': ('COMPLICATIONS', 'TAB_COMPL_STATUS_YEAR.csv'),
+    'los7_hop': ('COMPLICATIONS', 'TAB_LOS7_HOP.csv'),
+    'los7_natl': ('COMPLICATIONS', 'TAB_LOS7_NATL.csv'),
+    'los7_reg': ('COMPLICATIONS', 'TAB_LOS7_REG.csv'),
+    'los7_status': ('COMPLICATIONS', 'TAB_LOS7_STATUS.csv'),
+    'los_hop': ('COMPLICATIONS', 'TAB_LOS_HOP.csv'),
+    'los_natl': ('COMPLICATIONS', 'TAB_LOS_NATL.csv'),
+    'los_reg': ('COMPLICATIONS', 'TAB_LOS_REG.csv'),
+    'los_status': ('COMPLICATIONS', 'TAB_LOS_STATUS.csv'),
+    'never_hop': ('COMPLICATIONS', 'TAB_NEVER_HOP.csv'),
+    'never_natl': ('COMPLICATIONS', 'TAB_NEVER_NATL.csv'),
+    'never_reg': ('COMPLICATIONS', 'TAB_NEVER_REG.csv'),
+    'never_status': ('COMPLICATIONS', 'TAB_NEVER_STATUS.csv'),
+    # GEOGRAPHY
+    'competitors': ('GEOGRAPHY', 'TAB_COMPETITORS.csv'),
+    'recrut_hop': ('GEOGRAPHY', 'TAB_RECRUT_HOP.csv'),
+    'town_to_hosp': ('GEOGRAPHY', 'TAB_TOWN_TO_HOSP.csv'),
+    # Hospital reference list (new_data root)
+    'hospitals_redux': ('', '01_hospitals_redux.csv'),
+}
+
+# Tables computed from other tables: name -> (builder, source table names). The build
+# compiles them like the CSV tables; without an artifact they are computed on first use.
+DERIVED_TABLES: Dict[str, Tuple[Callable[..., pa.Table], Tuple[str, ...]]] = {
+    'hospital_summary': (summary_table, SUMMARY_SOURCES),
+    'benchmark': (benchmark_table, BENCHMARK_SOURCES),
+}
+
+# Cache path of a derived table computed in-process
+DERIVED_PREFIX = "derived:"
+
+# Identifier / label columns that are whitespace-stripped after parsing
+STRIP_COLUMNS = ['finessGeoDP', 'lib_reg', 'statut']
+
+# Year columns are exposed as nullable integers, like the section readers did
+YEAR_COLUMNS = ['annee', 'year']
+
+NULL_VALUES = ['', 'NA', 'N/A', 'NaN', 'nan', 'NULL']
+
+# Storage types come from the schema registry (columns not listed keep their parsed type)
+COLUMN_TYPES = ARROW_TYPES
+
+# Hospital identifier columns, in lookup order; tables are sorted on the first present
+FINESS_COLUMNS = ['finessGeoDP', 'finessGeo', 'finessGeo_index']
+
+# Secondary sort keys after the FINESS column, when present
+SORT_COLUMNS = ['annee', 'mois', 'date']
+
+# Seconds between checks for a newly published data version (0 disables the watcher)
+WATCH_INTERVAL = float(os.environ.get("NAVIRA_WATCH_INTERVAL", "30"))
+
+
+def resolve_new_data_dir() -> Optional[Path]:
+    """Resolve the new_data directory (NAVIRA_NEW_DATA_DIR, cwd, then package-relative)."""
+    candidates = []
+    env_dir = os.environ.get("NAVIRA_NEW_DATA_DIR")
+    if env_dir:
+        candidates.append(Path(env_dir))
+    activity_dir = os.environ.get("NAVIRA_ACTIVITY_DIR")
+    if activity_dir:
+        candidates.append(Path(activity_dir).parent)
+    candidates.append(Path.cwd() / "new_data")
+    candidates.append(Path(__file__).resolve().parent.parent / "new_data")
+    for c in candidates:
+        if c.is_dir():
+            return c
+    return None
+
+
+def table_path(name: str, base_dir: Optional[Path] = None) -> Path:
+    """Return the source CSV path for a logical table name."""
+    if name not in TABLES:
+        raise KeyError(f"Unknown table '{name}'")
+    base = base_dir or resolve_new_data_dir()
+    if base is None:
+        raise FileNotFoundError("new_data directory not found")
+    folder, filename = TABLES[name]
+    return base / folder / filename if folder else base / filename
+
+
+def finess_column(names) -> Optional[str]:
+    """Return the hospital identifier column of a table, if any."""
+    for col in FINESS_COLUMNS:
+        if col in names:
+            return col
+    return None
+
+
+def apply_column_types(table: pa.Table) -> pa.Table:
+    """Cast known columns to their explicit storage type."""
+    for idx, col in enumerate(table.column_names):
+        target = COLUMN_TYPES.get(col)
+        if target is not None and table.schema.field(idx).type != target:
+            table = table.set_column(idx, col, table[col].cast(target))
+    return table
+
+
+def sort_table(table: pa.Table) -> pa.Table:
+    """Sort a table by FINESS (then period) so each hospital's rows are contiguous."""
+    finess = finess_column(table.column_names)
+    if not finess:
+        return table
+    keys = [finess] + [c for c in SORT_COLUMNS if c in table.column_names]
+    return table.sort_by([(k, "ascending") for k in keys])
+
+
+def read_table_csv(path: Path) -> pa.Table:
+    """Parse one TAB_* CSV into a normalized Arrow table."""
+    with open(path, encoding="utf-8") as f:
+        header = [h.strip().strip('"') for h in f.readline().split(",")]
+    column_types = {c: COLUMN_TYPES[c] for c in header if c in COLUMN_TYPES}
+    table = pacsv.read_csv(
+        path,
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types,
+            null_values=NULL_VALUES,
+            strings_can_be_null=False,
+        ),
+    )
+    for col in STRIP_COLUMNS:
+        if col in table.column_names:
+            idx = table.column_names.index(col)
+            table = table.set_column(idx, col, pc.utf8_trim_whitespace(table[col]))
+    return table
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    # split_blocks keeps null-free numeric columns as views of the Arrow buffers
+    df = table.to_pandas(date_as_object=False, split_blocks=True)
+    for col in YEAR_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    return df
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return -1.0
+
+
+@st.cache_resource(show_spinner=False)
+def _load_manifest(path: str, version: float) -> Optional[dict]:
+    if version < 0:
+        return None
+    return read_manifest(Path(path).parent)
+
+
+class DataVersion(NamedTuple):
+    """A published set of compiled artifacts."""
+    name: Optional[str]  # manifest version, None when nothing was built
+    directory: Path
+
+
+# Compiled root -> version readers are pinned to; switched only by refresh_data()
+_active: Dict[str, DataVersion] = {}
+_active_lock = threading.Lock()
+
+# Cache keys handed out, for evicting a retired version: (name, path, mtime) and (manifest, mtime)
+_loaded: Set[Tuple[str, str, float]] = set()
+_loaded_manifests: Set[Tuple[str, float]] = set()
+
+# Callables run with the retired version name after each switch
+_version_hooks: List[Callable[[Optional[str]], None]] = []
+
+
+def _resolve_version(root: Path) -> DataVersion:
+    directory = compiled_dir(root)
+    manifest = read_manifest(directory)
+    return DataVersion(manifest.get("version") if manifest else None, directory)
+
+
+def active_version() -> DataVersion:
+    """The data version this process currently serves."""
+    root = compiled_root()
+    version = _active.get(str(root))
+    if version is None:
+        with _active_lock:
+            version = _active.setdefault(str(root), _resolve_version(root))
+    return version
+
+
+def data_version() -> Optional[str]:
+    """Name of the served data version, for keying caches derived from it."""
+    return active_version().name
+
+
+def on_version_change(hook: Callable[[Optional[str]], None]) -> None:
+    """Register a callable evicting caches keyed on a retired version name."""
+    if hook not in _version_hooks:
+        _version_hooks.append(hook)
+
+
+def _manifest(directory: Path) -> Optional[dict]:
+    path = directory / MANIFEST_NAME
+    key = (str(path), _mtime(path))
+    _loaded_manifests.add(key)
+    return _load_manifest(*key)
+
+
+def load_manifest() -> Optional[dict]:
+    """Return the compiled-artifact manifest, or None when nothing was built."""
+    return _manifest(active_version().directory)
+
+
+def _source(name: str, version: Optional[DataVersion] = None) -> Optional[Path]:
+    """Compiled artifact (Arrow IPC, then Parquet) when the manifest lists one, else the raw CSV.
+
+    Derived tables without an artifact have no file: None.
+    """
+    if name not in TABLES and name not in DERIVED_TABLES:
+        raise KeyError(f"Unknown table '{name}'")
+    directory = (version or active_version()).directory
+    manifest = _manifest(directory)
+    entry = (manifest or {}).get("tables", {}).get(name)
+    if entry:
+        artifact = artifact_path(entry, directory)
+        if artifact is not None:
+            return artifact
+    if name in DERIVED_TABLES:
+        if manifest is not None:
+            logger.warning("Table '%s' missing from compiled artifacts; computing it", name)
+        return None
+    if manifest is not None:
+        logger.warning("Table '%s' missing from compiled artifacts; parsing CSV", name)
+    return table_path(name)
+
+
+def _key(name: str, version: Optional[DataVersion] = None) -> Tuple[str, str, float]:
+    path = _source(name, version)
+    if path is None:
+        # Derived in-process: stale as soon as any source file changes
+        stamp = max(_key(s, version)[2] for s in DERIVED_TABLES[name][1])
+        return (name, DERIVED_PREFIX + name, stamp)
+    key = (name, str(path), _mtime(path))
+    _loaded.add(key)
+    return key
+
+
+@st.cache_resource(show_spinner=False)
+def _load_arrow(name: str, path: str, version: float) -> pa.Table:
+    if path.startswith(DERIVED_PREFIX):
+        build, sources = DERIVED_TABLES[name]
+        return build(*(get_table(s) for s in sources))
+    if path.endswith(".arrow"):
+        return open_ipc(Path(path))
+    if path.endswith(".parquet"):
+        return pq.read_table(path)
+    return sort_table(read_table_csv(Path(path)))
+
+
+@st.cache_resource(show_spinner=False)
+def _load_frame(name: str, path: str, version: float) -> pd.DataFrame:
+    return _to_frame(_load_arrow(name, path, version))
+
+
+def get_arrow(name: str) -> pa.Table:
+    """Return the shared, immutable Arrow table for a logical name."""
+    return _load_arrow(*_key(name))
+
+
+@st.cache_resource(show_spinner=False)
+def _load_index(name: str, path: str, version: float) -> Optional[FinessIndex]:
+    df = _load_frame(name, path, version)
+    finess = finess_column(df.columns)
+    return FinessIndex.from_column(df[finess]) if finess else None
+
+
+@st.cache_resource(show_spinner=False)
+def _load_counts(name: str, path: str, version: float) -> MonthlyCounts:
+    return MonthlyCounts.from_frame(_load_frame(name, path, version))
+
+
+def get_monthly_counts(name: str) -> MonthlyCounts:
+    """Return the rolling-window engine over a monthly TOT / COMPL_nb table.
+
+    The running sums are built once per process and data version; any
+    window or end month is then an O(entities) array subtraction.
+    """
+    try:
+        return _load_counts(*_key(name))
+    except KeyError:
+        raise
+    except Exception:
+        return MonthlyCounts.from_frame(pd.DataFrame())
+
+
+@st.cache_resource(show_spinner=False)
+def _load_ranks(benchmark: Tuple[str, str, float], hospitals: Tuple[str, str, float]) -> PeerRanks:
+    return PeerRanks.from_tables(_load_frame(*benchmark), _load_frame(*hospitals))
+
+
+def get_peer_ranks() -> PeerRanks:
+    """Return the peer ranking engine (sorted peer-group values, built once per data version)."""
+    try:
+        return _load_ranks(_key("benchmark"), _key("hospitals_redux"))
+    except Exception:
+        return PeerRanks.from_tables(pd.DataFrame(), pd.DataFrame())
+
+
+def get_hospital_rows(name: str, hospital_id: str) -> pd.DataFrame:
+    """Return one hospital's rows of a HOP-level table.
+
+    Tables are sorted by FINESS, so this is a binary search in a per-process
+    offset index followed by a positional slice of the shared frame.
+    """
+    try:
+        key = _key(name)
+        df = _load_frame(*key)
+        index = _load_index(*key)
+    except KeyError:
+        raise
+    except Exception:
+        return pd.DataFrame()
+    if index is None:
+        finess = finess_column(df.columns)
+        return df[df[finess] == str(hospital_id)] if finess else df.iloc[0:0]
+    return index.slice(df, str(hospital_id))
+
+
+def get_table(name: str) -> pd.DataFrame:
+    """Return a table by logical name as a pandas frame.
+
+    The underlying frame is parsed once per process and shared by every
+    session; callers get a shallow copy so adding columns never leaks back.
+    Missing or unreadable files yield an empty DataFrame, matching the
+    previous per-section readers.
+    """
+    try:
+        return _load_frame(*_key(name)).copy(deep=False)
+    except KeyError:
+        raise
+    except Exception:
+        return pd.DataFrame()
+
+
+def has_data() -> bool:
+    """True when compiled artifacts or the new_data directory are available."""
+    return load_manifest() is not None or resolve_new_data_dir() is not None
+
+
+def _warm(version: DataVersion) -> Set[Tuple[str, str, float]]:
+    """Load every table of a version (frame and FINESS index) into the shared caches."""
+    keys = set()
+    manifest = read_manifest(version.directory) or {}
+    for name in manifest.get("tables", {}):
+        if name not in TABLES and name not in DERIVED_TABLES:
+            continue
+        try:
+            key = _key(name, version)
+            _load_frame(*key)
+            _load_index(*key)
+            keys.add(key)
+        except Exception:
+            logger.exception("Could not preload '%s' of version %s", name, version.name)
+    return keys
+
+
+def _evict(retired: DataVersion, latest: DataVersion, keep: Set[Tuple[str, str, float]]) -> None:
+    """Drop the cache entries loaded from a retired version's directory."""
+    prefix = str(retired.directory) + os.sep
+    current_manifest = (str(latest.directory / MANIFEST_NAME), _mtime(latest.directory / MANIFEST_NAME))
+    with _active_lock:
+        stale = [k for k in _loaded if k[1].startswith(prefix) and k not in keep]
+        stale_manifests = [k for k in _loaded_manifests if k[0].startswith(prefix) and k != current_manifest]
+        _loaded.difference_update(stale)
+        _loaded_manifests.difference_update(stale_manifests)
+    for key in stale:
+        _load_counts.clear(*key)
+        _load_index.clear(*key)
+        _load_frame.clear(*key)
+        _load_arrow.clear(*key)
+    for key in stale_manifests:
+        _load_manifest.clear(*key)
+    if stale:
+        # One entry per version, keyed on two tables: drop them all, the next read rebuilds
+        _load_ranks.clear()
+
+
+def refresh_data(warm: bool = True) -> bool:
+    """Switch this process to the published data version if it changed.
+
+    The new version is loaded before readers are switched, so no session
+    waits on a cold cache; afterwards only the entries of the previous
+    version are evicted. Returns True when the version changed.
+    """
+    root = compiled_root()
+    retired = active_version()
+    latest = _resolve_version(root)
+    if latest == retired:
+        return False
+    keep = _warm(latest) if warm else set()
+    with _active_lock:
+        _active[str(root)] = latest
+    _evict(retired, latest, keep)
+    for hook in list(_version_hooks):
+        try:
+            hook(retired.name)
+        except Exception:
+            logger.exception("Version change hook %r failed", hook)
+    logger.info("Switched data version %s -> %s", retired.name, latest.name)
+    return True
+
+
+class DataWatcher(threading.Thread):
+    """Daemon thread polling the ``current`` pointer and calling refresh_data()."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="navira-data-watcher", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                refresh_data()
+            except Exception:
+                logger.exception("Data refresh failed")
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+@st.cache_resource(show_spinner=False)
+def start_watcher(interval: float = WATCH_INTERVAL) -> Optional[DataWatcher]:
+    """Start the process-wide data watcher once; None when disabled."""
+    if interval <= 0:
+        return None
+    watcher = DataWatcher(interval)
+    watcher.start()
+    return watcher
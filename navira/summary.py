@@ -0,0 +1,187 @@
+"""
+Per-hospital summary table.
+
+The dashboard Summary block and the API's /api/summary endpoint show the
+same headline numbers for one hospital. They are computed here for every
+hospital at once, from six HOP-level tables:
+- procedures over 2021-2024 and in the ongoing year, plus its expected trend
+- revisional and complication rates
+- volume history and approach / procedure mix, as nested lists
+
+The result has one row per FINESS and is sorted by it, so a summary is a
+single indexed row fetch. scripts/build_parquet.py compiles it to the
+``hospital_summary`` artifact; when it is not compiled, the FastAPI backend
+computes it with ``summary_table`` itself.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+ID = 'finessGeoDP'
+
+# Source tables, in the argument order of summary_table()
+SUMMARY_SOURCES = ('vol_hop_year', 'trend_hop', 'tcn_hop_12m', 'app_hop_year', 'rev_hop_12m', 'compl_hop_year')
+
+PERIOD_YEARS = (2021, 2024)
+ONGOING_YEAR = 2025
+APPROACH_YEAR = 2024
+HISTORY_YEARS = 5
+
+PROCEDURE_LABELS = {'SLE': 'Sleeve', 'BPG': 'Gastric Bypass'}
+PROCEDURE_ORDER = ['Sleeve', 'Gastric Bypass', 'Other']
+APPROACH_LABELS = {'ROB': 'Robotic', 'COE': 'Coelioscopy', 'LAP': 'Open Surgery'}
+
+SCHEMA = pa.schema([
+    (ID, pa.string()),
+    ('procedures_2021_2024', pa.int64()),
+    ('procedures_2025', pa.int64()),
+    ('trend_2025_pct', pa.float64()),
+    ('revisional_rate', pa.float64()),
+    ('complication_year', pa.int16()),
+    ('complication_rate', pa.float64()),
+    ('volume_history', pa.list_(pa.struct([('year', pa.int16()), ('count', pa.int64())]))),
+    ('approach_year', pa.int16()),
+    ('approach_mix', pa.list_(pa.struct([('approach', pa.string()), ('count', pa.float64())]))),
+    ('procedure_mix', pa.list_(pa.struct([('procedure', pa.string()), ('count', pa.float64())]))),
+])
+
+
+def _has(df: pd.DataFrame, *columns: str) -> bool:
+    return not df.empty and all(c in df.columns for c in (ID,) + columns)
+
+
+def _ids(df: pd.DataFrame) -> pd.Series:
+    return df[ID].astype(str)
+
+
+def _first_value(df: pd.DataFrame, column: str) -> pd.Series:
+    """Value of ``column`` in each hospital's first row (NaN included, like .iloc[0])."""
+    if not _has(df, column):
+        return pd.Series(dtype='float64')
+    first = df.assign(**{ID: _ids(df)}).drop_duplicates(ID)
+    return pd.to_numeric(first.set_index(ID)[column], errors='coerce')
+
+
+def _nested(ids: np.ndarray, child_ids: np.ndarray, fields: Dict[str, pa.Array], type_: pa.DataType) -> pa.Array:
+    """List column aligned on ``ids`` from child rows sorted by hospital."""
+    # Child ids are a subset of ids, so each hospital's block starts where the previous one ends
+    offsets = np.append(np.searchsorted(child_ids, ids, side='left'), len(child_ids)).astype(np.int32)
+    values = pa.StructArray.from_arrays(list(fields.values()), fields=list(type_.value_type))
+    return pa.ListArray.from_arrays(pa.array(offsets), values, type=type_)
+
+
+def _by_hospital(df: pd.DataFrame, *by: str) -> pd.DataFrame:
+    """Child rows grouped by hospital (stable, so ties keep their order)."""
+    return df.sort_values([ID, *by], kind='stable', ignore_index=True)
+
+
+def summary_table(vol: pd.DataFrame, trend: pd.DataFrame, tcn: pd.DataFrame, app: pd.DataFrame,
+                  rev: pd.DataFrame, compl: pd.DataFrame) -> pa.Table:
+    """Compute the summary of every hospital (see SCHEMA) from the HOP-level tables."""
+    frames = [vol, trend, tcn, app, rev, compl]
+    ids = np.array(sorted(set().union(*(set(_ids(f)) for f in frames if _has(f)))), dtype=object)
+    index = pd.Index(ids, dtype=object)
+
+    # Procedures in the reference period and in the ongoing year
+    period = pd.Series(0, index=index, dtype='int64')
+    ongoing = pd.Series(0, index=index, dtype='int64')
+    history_ids = np.empty(0, dtype=object)
+    history = {'year': pa.array([], pa.int16()), 'count': pa.array([], pa.int64())}
+    if _has(vol, 'annee', 'n'):
+        v = pd.DataFrame({
+            ID: _ids(vol),
+            'annee': pd.to_numeric(vol['annee'], errors='coerce'),
+            'n': pd.to_numeric(vol['n'], errors='coerce').fillna(0),
+        })
+        lo, hi = PERIOD_YEARS
+        period = period.add(v['n'].where(v['annee'].between(lo, hi), 0).groupby(v[ID]).sum(), fill_value=0)
+        ongoing = ongoing.add(v['n'].where(v['annee'] == ONGOING_YEAR, 0).groupby(v[ID]).sum(), fill_value=0)
+
+        h = _by_hospital(v.dropna(subset=['annee']), 'annee')
+        h = h.groupby(ID, sort=False).tail(HISTORY_YEARS)
+        history_ids = h[ID].to_numpy(dtype=object)
+        history = {
+            'year': pa.array(h['annee'].to_numpy(dtype='int64'), pa.int16()),
+            'count': pa.array(h['n'].to_numpy(dtype='int64'), pa.int64()),
+        }
+
+    # Complication rate of the latest complete year: the second most recent, or the only one
+    compl_year = pd.Series(np.nan, index=index)
+    compl_rate = pd.Series(np.nan, index=index)
+    if _has(compl, 'annee', 'COMPL_pct'):
+        c = pd.DataFrame({
+            ID: _ids(compl),
+            'annee': pd.to_numeric(compl['annee'], errors='coerce'),
+            'COMPL_pct': pd.to_numeric(compl['COMPL_pct'], errors='coerce'),
+        })
+        years = c.dropna(subset=['annee']).drop_duplicates([ID, 'annee'])
+        years = years.sort_values([ID, 'annee'], ascending=[True, False], kind='stable')
+        rank = years.groupby(ID, sort=False).cumcount()
+        count = years.groupby(ID, sort=False)[ID].transform('size')
+        target = years.loc[(rank == 1) | ((count == 1) & (rank == 0)), [ID, 'annee']]
+        rows = c.merge(target, on=[ID, 'annee']).drop_duplicates(ID).set_index(ID)
+        compl_year = compl_year.fillna(target.set_index(ID)['annee'])
+        compl_rate = compl_rate.fillna(rows['COMPL_pct'])
+
+    # Approach mix of the reference year (2024, else the hospital's latest year)
+    approach_year = pd.Series(np.nan, index=index)
+    approach_ids = np.empty(0, dtype=object)
+    approaches = {'approach': pa.array([], pa.string()), 'count': pa.array([], pa.float64())}
+    if _has(app, 'annee', 'vda', 'n'):
+        a = pd.DataFrame({
+            ID: _ids(app),
+            'annee': pd.to_numeric(app['annee'], errors='coerce'),
+            'approach': app['vda'].astype(str).str.upper().str.strip(),
+            'n': pd.to_numeric(app['n'], errors='coerce').astype('float64'),
+        })
+        has_ref = a.loc[a['annee'] == APPROACH_YEAR, ID].unique()
+        latest = a.groupby(ID)['annee'].max()
+        latest[latest.index.isin(has_ref)] = APPROACH_YEAR
+        approach_year = approach_year.fillna(latest)
+        a = a[a['annee'] == a[ID].map(latest)]
+        mix = a.groupby([ID, 'approach'], sort=False)['n'].sum().reset_index()
+        mix = _by_hospital(mix)
+        approach_ids = mix[ID].to_numpy(dtype=object)
+        approaches = {
+            'approach': pa.array(mix['approach'].tolist(), pa.string()),
+            'count': pa.array(mix['n'].to_numpy(), pa.float64()),
+        }
+
+    # Procedure mix over the last 12 months, in three categories
+    procedure_ids = np.empty(0, dtype=object)
+    procedures = {'procedure': pa.array([], pa.string()), 'count': pa.array([], pa.float64())}
+    if _has(tcn, 'baria_t', 'n'):
+        t = pd.DataFrame({
+            ID: _ids(tcn),
+            'procedure': tcn['baria_t'].astype(str).str.upper().str.strip().map(PROCEDURE_LABELS).fillna('Other'),
+            'n': pd.to_numeric(tcn['n'], errors='coerce').astype('float64'),
+        })
+        wide = t.pivot_table(index=ID, columns='procedure', values='n', aggfunc='sum', fill_value=0)
+        wide = wide.reindex(columns=PROCEDURE_ORDER, fill_value=0).sort_index()
+        procedure_ids = np.repeat(wide.index.to_numpy(dtype=object), len(PROCEDURE_ORDER))
+        procedures = {
+            'procedure': pa.array(PROCEDURE_ORDER * len(wide), pa.string()),
+            'count': pa.array(wide.to_numpy(dtype='float64').ravel(), pa.float64()),
+        }
+
+    def _column(s: pd.Series, type_: pa.DataType) -> pa.Array:
+        values = pd.to_numeric(s.reindex(index), errors='coerce').astype('float64').to_numpy()
+        return pa.array(values, type=pa.float64(), from_pandas=True).cast(type_)
+
+    columns: List[pa.Array] = [
+        pa.array(ids.tolist(), pa.string()),
+        pa.array(period.reindex(index).to_numpy(dtype='int64'), pa.int64()),
+        pa.array(ongoing.reindex(index).to_numpy(dtype='int64'), pa.int64()),
+        _column(_first_value(trend, 'diff_pct'), pa.float64()),
+        _column(_first_value(rev, 'PCT_rev'), pa.float64()),
+        _column(compl_year, pa.int16()),
+        _column(compl_rate, pa.float64()),
+        _nested(ids, history_ids, history, SCHEMA.field('volume_history').type),
+        _column(approach_year, pa.int16()),
+        _nested(ids, approach_ids, approaches, SCHEMA.field('approach_mix').type),
+        _nested(ids, procedure_ids, procedures, SCHEMA.field('procedure_mix').type),
+    ]
+    return pa.Table.from_arrays(columns, schema=SCHEMA)
@@ -1,8 +1,12 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import math
+import os
+import sys
 
 app = FastAPI()
 
@@ -20,31 +24,143 @@ app.add_middleware(
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "new_data"
 
+sys.path.insert(0, str(BASE_DIR))
+from navira.artifacts import artifact_path, compiled_dir, compiled_root, open_ipc, read_manifest  # noqa: E402
+from navira.finess_index import hospital_rows  # noqa: E402
+from navira.benchmark import BENCHMARK_SOURCES, benchmark_table  # noqa: E402
+from navira.ranking import RANK_METRICS, PeerRanks  # noqa: E402
+from navira.schema import STRING_COLUMNS  # noqa: E402
+from navira.summary import APPROACH_LABELS, SUMMARY_SOURCES, summary_table  # noqa: E402
+
+# (source path, mtime) -> frame; compiled tables are memory-mapped Arrow IPC files
+# shared with the Streamlit processes through the page cache
+_frames: Dict[str, Tuple[float, pd.DataFrame]] = {}
+
+
+def _compiled_artifact(folder: str, filename: str) -> Optional[Path]:
+    # Resolve the published version once so the manifest and the file agree across a swap
+    directory = compiled_dir()
+    manifest = read_manifest(directory)
+    if not manifest:
+        return None
+    source = f"{folder}/{filename}" if folder else filename
+    for entry in manifest.get("tables", {}).values():
+        if entry.get("source") == source:
+            return artifact_path(entry, directory)
+    return None
+
+
+def _evict_retired(active: Path) -> None:
+    """Drop frames of compiled versions other than the one being served."""
+    root, keep = str(compiled_root()), str(active) + os.sep
+    for key in [k for k in _frames if k.startswith(root) and not k.startswith(keep)]:
+        del _frames[key]
+
+
+def _read_artifact(path: Path) -> pd.DataFrame:
+    if path.suffix == ".arrow":
+        table = open_ipc(path)
+    else:
+        table = pq.read_table(path)
+    return table.to_pandas(split_blocks=True)
+
+
 def read_csv(folder: str, filename: str) -> pd.DataFrame:
-    p = DATA_DIR / folder / filename
+    artifact = _compiled_artifact(folder, filename)
+    p = artifact or DATA_DIR / folder / filename
     if not p.exists():
         return pd.DataFrame()
+    mtime = p.stat().st_mtime
+    cached = _frames.get(str(p))
+    if cached and cached[0] == mtime:
+        return cached[1]
     try:
-        df = pd.read_csv(p, dtype={'finessGeoDP': str})
-        # Normalize common columns
-        if 'finessGeoDP' in df.columns:
-            df['finessGeoDP'] = df['finessGeoDP'].astype(str).str.strip()
-        if 'annee' in df.columns:
-            df['annee'] = pd.to_numeric(df['annee'], errors='coerce')
+        if artifact is not None:
+            df = _read_artifact(artifact)
+        else:
+            df = pd.read_csv(p, dtype={c: str for c in STRING_COLUMNS})
+            # Normalize common columns
+            if 'finessGeoDP' in df.columns:
+                df['finessGeoDP'] = df['finessGeoDP'].astype(str).str.strip()
+            if 'annee' in df.columns:
+                df['annee'] = pd.to_numeric(df['annee'], errors='coerce')
+        if artifact is not None and str(p) not in _frames:
+            _evict_retired(artifact.parent)
+        _frames[str(p)] = (mtime, df)
         return df
     except Exception as e:
         print(f"Error reading {filename}: {e}")
         return pd.DataFrame()
 
+# Source CSVs of the derived tables, used when they were not compiled
+_SOURCE_CSVS = {
+    'vol_hop_year': ("ACTIVITY", "TAB_VOL_HOP_YEAR.csv"),
+    'trend_hop': ("ACTIVITY", "TAB_TREND_HOP.csv"),
+    'tcn_hop_12m': ("ACTIVITY", "TAB_TCN_HOP_12M.csv"),
+    'app_hop_year': ("ACTIVITY", "TAB_APP_HOP_YEAR.csv"),
+    'rev_hop_12m': ("ACTIVITY", "TAB_REV_HOP_12M.csv"),
+    'compl_hop_year': ("COMPLICATIONS", "TAB_COMPL_HOP_YEAR.csv"),
+    'hospitals_redux': ("", "01_hospitals_redux.csv"),
+}
+for _name in BENCHMARK_SOURCES:
+    if _name not in _SOURCE_CSVS:
+        _folder = "ACTIVITY" if _name.split("_")[0] in ("vol", "app", "tcn") else "COMPLICATIONS"
+        _SOURCE_CSVS[_name] = (_folder, f"TAB_{_name.upper()}.csv")
+
+# Derived table -> (builder, source names)
+_DERIVED = {
+    'hospital_summary': (summary_table, SUMMARY_SOURCES),
+    'benchmark': (benchmark_table, BENCHMARK_SOURCES),
+}
+# name -> (source frames, table) computed from the CSVs
+_computed: Dict[str, Tuple[List[pd.DataFrame], pd.DataFrame]] = {}
+# (benchmark, hospitals) frames -> peer ranks
+_ranks: Optional[Tuple[pd.DataFrame, pd.DataFrame, PeerRanks]] = None
+
+
+def read_derived(name: str) -> pd.DataFrame:
+    """A derived table (navira.summary, navira.benchmark): compiled artifact, else computed."""
+    directory = compiled_dir()
+    entry = ((read_manifest(directory) or {}).get("tables") or {}).get(name)
+    artifact = artifact_path(entry, directory) if entry else None
+    if artifact is not None:
+        mtime = artifact.stat().st_mtime
+        cached = _frames.get(str(artifact))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        df = _read_artifact(artifact)
+        if str(artifact) not in _frames:
+            _evict_retired(artifact.parent)
+        _frames[str(artifact)] = (mtime, df)
+        return df
+
+    # Not compiled: compute it from the source frames, again only when one of them is reloaded
+    build, names = _DERIVED[name]
+    sources = [read_csv(*_SOURCE_CSVS[n]) for n in names]
+    cached = _computed.get(name)
+    if cached and all(a is b for a, b in zip(cached[0], sources)):
+        return cached[1]
+    df = build(*sources).to_pandas()
+    _computed[name] = (sources, df)
+    return df
+
+
+def read_summary() -> pd.DataFrame:
+    """Per-hospital summary table (navira.summary), sorted by FINESS."""
+    return read_derived("hospital_summary")
+
+
+def peer_ranks() -> PeerRanks:
+    """Peer ranking engine (navira.ranking), rebuilt when the cube or hospital list is reloaded."""
+    global _ranks
+    cube, hospitals = read_derived("benchmark"), read_csv(*_SOURCE_CSVS["hospitals_redux"])
+    if _ranks is None or _ranks[0] is not cube or _ranks[1] is not hospitals:
+        _ranks = (cube, hospitals, PeerRanks.from_tables(cube, hospitals))
+    return _ranks[2]
+
+
 @app.get("/api/summary/{hospital_id}")
 def get_summary(hospital_id: str):
-    # 1. Load Data
-    vol_hop = read_csv("ACTIVITY", "TAB_VOL_HOP_YEAR.csv")
-    trend_hop = read_csv("ACTIVITY", "TAB_TREND_HOP.csv")
-    rev_hop = read_csv("ACTIVITY", "TAB_REV_HOP_12M.csv")
-    compl_hop = read_csv("COMPLICATIONS", "TAB_COMPL_HOP_YEAR.csv")
-    
-    # Initialize metrics
     metrics = {
         "procedures_2021_2024": 0,
         "procedures_2025": 0,
@@ -55,95 +171,45 @@ def get_summary(hospital_id: str):
         "approach_mix": []
     }
 
-    # 2. Calculate Metrics
-    
-    # Volume 2021-2024
-    if not vol_hop.empty:
-        hosp_vol = vol_hop[vol_hop['finessGeoDP'] == hospital_id]
-        period_data = hosp_vol[(hosp_vol['annee'] >= 2021) & (hosp_vol['annee'] <= 2024)]
-        metrics["procedures_2021_2024"] = int(period_data['n'].fillna(0).sum())
-        
-        # Volume 2025
-        ongoing_data = hosp_vol[hosp_vol['annee'] == 2025]
-        metrics["procedures_2025"] = int(ongoing_data['n'].fillna(0).sum())
-
-    # Trend
-    if not trend_hop.empty:
-        hosp_trend = trend_hop[trend_hop['finessGeoDP'] == hospital_id]
-        if not hosp_trend.empty and 'diff_pct' in hosp_trend.columns:
-            val = hosp_trend.iloc[0]['diff_pct']
-            if pd.notna(val):
-                metrics["trend_2025"] = f"{float(val):+.1f}%"
-
-    # Revisional Rate
-    if not rev_hop.empty:
-        hosp_rev = rev_hop[rev_hop['finessGeoDP'] == hospital_id]
-        if not hosp_rev.empty and 'PCT_rev' in hosp_rev.columns:
-            val = hosp_rev.iloc[0]['PCT_rev']
-            if pd.notna(val):
-                metrics["revisional_rate"] = float(val)
-
-    # Complication Rate (Latest complete year)
-    if not compl_hop.empty:
-        hosp_compl = compl_hop[compl_hop['finessGeoDP'] == hospital_id]
-        if not hosp_compl.empty and 'COMPL_pct' in hosp_compl.columns and 'annee' in hosp_compl.columns:
-            years = sorted(hosp_compl['annee'].dropna().unique(), reverse=True)
-            target_year = None
-            if len(years) >= 2:
-                target_year = years[1] # Skip partial current year
-            elif len(years) == 1:
-                target_year = years[0]
-            
-            if target_year:
-                row = hosp_compl[hosp_compl['annee'] == target_year]
-                if not row.empty:
-                    val = row.iloc[0]['COMPL_pct']
-                    if pd.notna(val):
-                        metrics["complication_rate"] = float(val)
-
-    # 3. Additional Data for Charts
-    metrics["volume_history"] = []
-    if not vol_hop.empty:
-        hosp_vol = vol_hop[vol_hop['finessGeoDP'] == hospital_id]
-        if not hosp_vol.empty:
-            # Get last 5 years
-            hosp_vol = hosp_vol.sort_values('annee')
-            for _, row in hosp_vol.tail(5).iterrows():
-                metrics["volume_history"].append({
-                    "year": int(row['annee']),
-                    "count": int(row['n'])
-                })
-
-    metrics["approach_mix"] = []
-    # Load APP data for approach shares (latest year)
-    app_hop = read_csv("ACTIVITY", "TAB_APP_HOP_YEAR.csv")
-    if not app_hop.empty:
-        hosp_app = app_hop[app_hop['finessGeoDP'] == hospital_id]
-        if not hosp_app.empty:
-            latest_yr = 2024 # Default to 2024 as per dashboard logic
-            if (hosp_app['annee'] == 2024).any():
-                latest_yr = 2024
-            else:
-                latest_yr = hosp_app['annee'].max()
-            
-            hosp_app_yr = hosp_app[hosp_app['annee'] == latest_yr]
-            
-            totals = {}
-            for _, r in hosp_app_yr.iterrows():
-                approach = str(r.get('vda', '')).upper().strip()
-                count = float(r.get('n', 0))
-                totals[approach] = totals.get(approach, 0.0) + count
-            
-            approach_map = {'ROB': 'Robotic', 'COE': 'Coelioscopy', 'LAP': 'Open Surgery'}
-            for k, v in totals.items():
-                if v > 0:
-                    metrics["approach_mix"].append({
-                        "name": approach_map.get(k, k),
-                        "value": v
-                    })
+    summary = hospital_rows(read_summary(), hospital_id, "hospital_summary", column="finessGeoDP")
+    if summary.empty:
+        return metrics
+    row = summary.iloc[0]
 
+    metrics["procedures_2021_2024"] = int(row["procedures_2021_2024"])
+    metrics["procedures_2025"] = int(row["procedures_2025"])
+    if pd.notna(row["trend_2025_pct"]):
+        metrics["trend_2025"] = f"{float(row['trend_2025_pct']):+.1f}%"
+    if pd.notna(row["revisional_rate"]):
+        metrics["revisional_rate"] = float(row["revisional_rate"])
+    if pd.notna(row["complication_rate"]):
+        metrics["complication_rate"] = float(row["complication_rate"])
+
+    metrics["volume_history"] = [
+        {"year": int(v["year"]), "count": int(v["count"])} for v in row["volume_history"]
+    ]
+    metrics["approach_mix"] = [
+        {"name": APPROACH_LABELS.get(a["approach"], a["approach"]), "value": float(a["count"])}
+        for a in row["approach_mix"] if a["count"] > 0
+    ]
     return metrics
 
+@app.get("/api/ranks/{hospital_id}")
+def get_ranks(hospital_id: str, year: Optional[int] = None):
+    """Percentile, rank position and quartile of a hospital among each peer group, per metric."""
+    ranks = peer_ranks()
+    out = {}
+    for name in RANK_METRICS:
+        years = ranks.years(name)
+        metric_year = year if year is not None else (2024 if 2024 in years else (years[-1] if years else None))
+        if metric_year is None:
+            continue
+        out[name] = {
+            "year": metric_year,
+            "ranks": {kind: r._asdict() for kind, r in ranks.ranks(hospital_id, name, metric_year).items()},
+        }
+    return out
+
 @app.get("/")
 def root():
     return {"message": "Navira API is running"}
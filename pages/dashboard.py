@@ -23,6 +23,11 @@ from streamlit_folium import st_folium
 import plotly.express as px
 import plotly.graph_objects as go
 from navira.data_loader import get_dataframes, get_all_dataframes
+from navira.finess_index import hospital_rows
+from navira.hashing import HASH_FUNCS
+from navira.ranking import PEER_GROUPS
+from navira.store import data_version, get_hospital_rows, get_peer_ranks, refresh_data, start_watcher
+from navira.summary import APPROACH_LABELS
 from auth_wrapper import add_auth_to_page
 from navigation_utils import handle_navigation_request
 from charts import (
@@ -58,17 +63,14 @@ try:
 except Exception:
     _build_id = None
 
-# --- Cache Control ---
-if st.button("♻️ Clear cache"):
-    try:
-        st.cache_data.clear()
-    except Exception:
-        pass
-    try:
-        st.cache_resource.clear()
-    except Exception:
-        pass
-    st.success("Cache cleared. Reloading…")
+# --- Data version ---
+# New builds are picked up by the background watcher; the button only forces an immediate check
+start_watcher()
+if st.button("♻️ Reload data"):
+    if refresh_data():
+        st.success(f"Switched to data version {data_version()}. Reloading…")
+    else:
+        st.info("Already serving the latest data.")
     try:
         st.rerun()
     except Exception:
@@ -188,7 +190,7 @@ selected_hospital_id = st.session_state.selected_hospital_id
 national_averages = st.session_state.get('national_averages', {})
 
 # Fallback: compute national averages locally if missing (when landing directly here)
-@st.cache_data(show_spinner=False)
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def _compute_national_averages_fallback(annual_df: pd.DataFrame) -> dict:
     try:
         if annual_df is None or annual_df.empty:
@@ -223,36 +225,34 @@ if not national_averages:
     st.session_state.national_averages = national_averages
 
 # --- Helper: robust complications lookup by hospital id ---
-@st.cache_data(show_spinner=False)
+# The frame comes from load_complications, normalized and FINESS-sorted once;
+# an exact match is a slice, the other identifier forms scan only on a miss
 def _get_hospital_complications(complications_df: pd.DataFrame, hospital_id: str) -> pd.DataFrame:
     try:
         if complications_df is None or complications_df.empty:
             return pd.DataFrame()
-        df = complications_df.copy()
-        if 'hospital_id' not in df.columns:
+        if 'hospital_id' not in complications_df.columns:
             return pd.DataFrame()
-        # Normalize types/strings
-        df['hospital_id'] = df['hospital_id'].astype(str).str.strip()
+        ids = complications_df['hospital_id']
         hid = str(hospital_id).strip()
-        # Exact string match first
-        exact = df[df['hospital_id'] == hid]
+        # Exact string match first (binary search in the FINESS offset index)
+        exact = hospital_rows(complications_df, hid, "dashboard/complications", version=data_version())
         if not exact.empty:
             return exact
         # Try zero-pad to 9 digits (common FINESS length)
         if hid.isdigit():
             pad9 = hid.zfill(9)
-            pad_match = df[df['hospital_id'].str.zfill(9) == pad9]
+            pad_match = complications_df[ids.str.zfill(9) == pad9]
             if not pad_match.empty:
                 return pad_match
         # Remove non-digits and compare numeric-only identifiers
         import re
-        df['_hid_digits'] = df['hospital_id'].apply(lambda s: re.sub(r'\D+', '', s))
         hid_digits = re.sub(r'\D+', '', hid)
-        digit_match = df[df['_hid_digits'] == hid_digits]
+        digit_match = complications_df[ids.str.replace(r'\D+', '', regex=True) == hid_digits]
         if not digit_match.empty:
-            return digit_match.drop(columns=['_hid_digits'])
+            return digit_match
         # Fallback: case-insensitive compare
-        ci = df[df['hospital_id'].str.lower() == hid.lower()]
+        ci = complications_df[ids.str.lower() == hid.lower()]
         if not ci.empty:
             return ci
         return pd.DataFrame()
@@ -339,144 +339,49 @@ st.markdown("---")
 # --- New SUMMARY (layout inspired by slide) ---
 st.markdown("### Summary")
 
-# Load data from new CSV sources for Summary
-@st.cache_data(show_spinner=False)
-def _load_summary_data():
-    """Load all data needed for Summary section from new_data CSVs."""
-    from pathlib import Path
-    
-    # Find new_data directory
-    candidates = []
-    try:
-        candidates.append(Path.cwd() / "new_data")
-    except Exception:
-        pass
-    try:
-        candidates.append(Path(__file__).parent.parent / "new_data")
-    except Exception:
-        pass
-    candidates.append(Path("/Users/alexdebelka/Downloads/navira/new_data"))
-    
-    base_dir = None
-    for c in candidates:
-        if c.is_dir():
-            base_dir = c
-            break
-    
-    if base_dir is None:
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-    
-    # Load volume data
-    try:
-        vol_hop = pd.read_csv(base_dir / "ACTIVITY" / "TAB_VOL_HOP_YEAR.csv", dtype={'finessGeoDP': str})
-        vol_hop['finessGeoDP'] = vol_hop['finessGeoDP'].astype(str).str.strip()
-        vol_hop['annee'] = pd.to_numeric(vol_hop['annee'], errors='coerce')
-        vol_hop['n'] = pd.to_numeric(vol_hop['n'], errors='coerce')
-    except Exception:
-        vol_hop = pd.DataFrame()
-    
-    # Load trend data
-    try:
-        trend_hop = pd.read_csv(base_dir / "ACTIVITY" / "TAB_TREND_HOP.csv", dtype={'finessGeoDP': str})
-        trend_hop['finessGeoDP'] = trend_hop['finessGeoDP'].astype(str).str.strip()
-        trend_hop['diff_pct'] = pd.to_numeric(trend_hop['diff_pct'], errors='coerce')
-    except Exception:
-        trend_hop = pd.DataFrame()
-    
-    # Load TCN data for procedure mix
-    try:
-        tcn_hop = pd.read_csv(base_dir / "ACTIVITY" / "TAB_TCN_HOP_12M.csv", dtype={'finessGeoDP': str})
-        tcn_hop['finessGeoDP'] = tcn_hop['finessGeoDP'].astype(str).str.strip()
-        tcn_hop['n'] = pd.to_numeric(tcn_hop.get('n', 0), errors='coerce')
-    except Exception:
-        tcn_hop = pd.DataFrame()
-    
-    # Load approach data (for robotic share bar)
-    try:
-        app_hop = pd.read_csv(base_dir / "ACTIVITY" / "TAB_APP_HOP_YEAR.csv", dtype={'finessGeoDP': str})
-        app_hop['finessGeoDP'] = app_hop['finessGeoDP'].astype(str).str.strip()
-        app_hop['annee'] = pd.to_numeric(app_hop.get('annee', 0), errors='coerce')
-        app_hop['n'] = pd.to_numeric(app_hop.get('n', 0), errors='coerce')
-    except Exception:
-        app_hop = pd.DataFrame()
-    
-    # Load revisional data
-    try:
-        rev_hop = pd.read_csv(base_dir / "ACTIVITY" / "TAB_REV_HOP_12M.csv", dtype={'finessGeoDP': str})
-        rev_hop['finessGeoDP'] = rev_hop['finessGeoDP'].astype(str).str.strip()
-        rev_hop['PCT_rev'] = pd.to_numeric(rev_hop.get('PCT_rev', 0), errors='coerce')
-    except Exception:
-        rev_hop = pd.DataFrame()
-    
-    # Load complications data (Annual)
-    try:
-        compl_hop = pd.read_csv(base_dir / "COMPLICATIONS" / "TAB_COMPL_HOP_YEAR.csv", dtype={'finessGeoDP': str})
-        compl_hop['finessGeoDP'] = compl_hop['finessGeoDP'].astype(str).str.strip()
-        compl_hop['annee'] = pd.to_numeric(compl_hop['annee'], errors='coerce')
-        compl_hop['COMPL_pct'] = pd.to_numeric(compl_hop.get('COMPL_pct', 0), errors='coerce')
-    except Exception:
-        compl_hop = pd.DataFrame()
-    
-    return vol_hop, trend_hop, tcn_hop, app_hop, rev_hop, compl_hop
-
-vol_hop_summary, trend_hop_summary, tcn_hop_summary, app_hop_summary, rev_hop_summary, compl_hop_summary = _load_summary_data()
+# Precomputed per-hospital KPIs (navira.summary): one indexed row fetch
+_summary = get_hospital_rows("hospital_summary", str(selected_hospital_id))
+summary_row = _summary.iloc[0] if not _summary.empty else None
 
-# Calculate metrics from CSV data
 # 1. Number of procedures 2021-2024
-period_total = 0
-if not vol_hop_summary.empty:
-    hosp_vol = vol_hop_summary[vol_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-    period_data = hosp_vol[(hosp_vol['annee'] >= 2021) & (hosp_vol['annee'] <= 2024)]
-    period_total = int(period_data['n'].fillna(0).sum())
+period_total = int(summary_row['procedures_2021_2024']) if summary_row is not None else 0
 
 # 2. Number of procedures ongoing year (2025)
-ongoing_total = 0
+ongoing_total = int(summary_row['procedures_2025']) if summary_row is not None else 0
 ongoing_year_display = 2025
-if not vol_hop_summary.empty:
-    hosp_vol = vol_hop_summary[vol_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-    ongoing_data = hosp_vol[hosp_vol['annee'] == 2025]
-    ongoing_total = int(ongoing_data['n'].fillna(0).sum())
 
 # 3. Expected trend from TREND file
 yoy_text = "—"
-if not trend_hop_summary.empty:
-    hosp_trend = trend_hop_summary[trend_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-    if not hosp_trend.empty and 'diff_pct' in hosp_trend.columns:
-        diff_val = hosp_trend.iloc[0]['diff_pct']
-        if pd.notna(diff_val):
-            yoy_text = f"{float(diff_val):+.1f}%"
+if summary_row is not None and pd.notna(summary_row['trend_2025_pct']):
+    yoy_text = f"{float(summary_row['trend_2025_pct']):+.1f}%"
 
 # 4. Revisional rate from REV file
 hospital_revision_pct = 0.0
-if not rev_hop_summary.empty:
-    hosp_rev = rev_hop_summary[rev_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-    if not hosp_rev.empty and 'PCT_rev' in hosp_rev.columns:
-        rev_val = hosp_rev.iloc[0]['PCT_rev']
-        if pd.notna(rev_val):
-            hospital_revision_pct = float(rev_val)
+if summary_row is not None and pd.notna(summary_row['revisional_rate']):
+    hospital_revision_pct = float(summary_row['revisional_rate'])
 
 # 5. Complication rate from COMPL file (Annual - Latest complete year)
 complication_rate = None
-if not compl_hop_summary.empty:
-    hosp_compl = compl_hop_summary[compl_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-    if not hosp_compl.empty and 'COMPL_pct' in hosp_compl.columns and 'annee' in hosp_compl.columns:
-        # Logic matching complication.py: get latest complete year
-        # Sort years descending
-        years = sorted(hosp_compl['annee'].dropna().unique(), reverse=True)
-        target_year = None
-        if len(years) >= 2:
-            # If we have multiple years, use second-to-last (skip partial current year)
-            target_year = years[1]
-        elif len(years) == 1:
-            # If only one year, use it
-            target_year = years[0]
-            
-        if target_year:
-            row_yr = hosp_compl[hosp_compl['annee'] == target_year]
-            if not row_yr.empty:
-                compl_val = row_yr.iloc[0]['COMPL_pct']
-                if pd.notna(compl_val):
-                    complication_rate = float(compl_val)
+if summary_row is not None and pd.notna(summary_row['complication_rate']):
+    complication_rate = float(summary_row['complication_rate'])
+
+# Peer ranks (navira.ranking): binary searches in sorted peer-group values
+_peer_ranks = get_peer_ranks()
+_PEER_LABELS = {'national': 'National', 'region': 'Region', 'status': 'Same status', 'volume_bin': 'Same size'}
+
+
+def _rank_caption(name: str, year) -> str:
+    """'National #12/331 (Q1) · Region #3/36 · ...' for one metric and year, '' when unranked."""
+    if year is None or pd.isna(year):
+        return ""
+    ranks = _peer_ranks.ranks(str(selected_hospital_id), name, int(year))
+    parts = []
+    for kind in PEER_GROUPS:
+        r = ranks.get(kind)
+        if r is not None:
+            parts.append(f"{_PEER_LABELS[kind]} #{r.position}/{r.peers}" + (f" (Q{r.quartile})" if kind == 'national' else ""))
+    return f"{int(year)} rank: " + " · ".join(parts) if parts else ""
+
 
 # First row: Left labels + three headline metrics
 left, m1, m2, m3 = st.columns([1.3, 1, 1, 1.05])
@@ -503,6 +408,9 @@ with left:
 
 with m1:
     st.metric(label="Nb procedures (2021–2024)", value=f"{period_total:,}")
+    _volume_rank = _rank_caption('volume', 2024)
+    if _volume_rank:
+        st.caption(_volume_rank)
 with m2:
     _suffix = f"{ongoing_year_display}"
     if ongoing_year_display == 2025:
@@ -520,71 +428,49 @@ c_donut, c_robot, c_rates = st.columns([1.2, 1.2, 1.5])
 
 with c_donut:
     st.markdown("##### Type of procedures")
-    # Use TCN data for procedure casemix (last 12 months)
-    if not tcn_hop_summary.empty and 'baria_t' in tcn_hop_summary.columns:
-        hosp_tcn = tcn_hop_summary[tcn_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-        if not hosp_tcn.empty:
-            # Map to three categories
-            PROC_MAP = {'SLE': 'Sleeve', 'BPG': 'Gastric Bypass'}
-            totals = {'Sleeve': 0.0, 'Gastric Bypass': 0.0, 'Other': 0.0}
-            for _, r in hosp_tcn.iterrows():
-                code = str(r['baria_t']).upper().strip()
-                label = PROC_MAP.get(code, 'Other')
-                totals[label] += float(r.get('n', 0))
-            
-            data_rows = [{'Procedure': k, 'Count': v} for k, v in totals.items() if v > 0]
-            if data_rows:
-                d = pd.DataFrame(data_rows)
-                fig = px.pie(d, values='Count', names='Procedure', hole=0.45, color='Procedure', 
-                            color_discrete_map={'Sleeve':'#1f77b4','Gastric Bypass':'#ff7f0e','Other':'#2ca02c'})
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                fig.update_layout(height=240, margin=dict(l=10, r=10, t=10, b=10), showlegend=False, 
-                                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-                st.plotly_chart(fig, use_container_width=True, key=f"summary_proc_pie_{selected_hospital_id}")
-            else:
-                st.info("No procedure data available.")
+    # Procedure casemix over the last 12 months (TCN), in three categories
+    procedure_mix = list(summary_row['procedure_mix']) if summary_row is not None else []
+    if procedure_mix:
+        data_rows = [{'Procedure': m['procedure'], 'Count': m['count']} for m in procedure_mix if m['count'] > 0]
+        if data_rows:
+            d = pd.DataFrame(data_rows)
+            fig = px.pie(d, values='Count', names='Procedure', hole=0.45, color='Procedure', 
+                        color_discrete_map={'Sleeve':'#1f77b4','Gastric Bypass':'#ff7f0e','Other':'#2ca02c'})
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            fig.update_layout(height=240, margin=dict(l=10, r=10, t=10, b=10), showlegend=False, 
+                            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(fig, use_container_width=True, key=f"summary_proc_pie_{selected_hospital_id}")
         else:
-            st.info("No procedure data for this hospital.")
+            st.info("No procedure data available.")
     else:
-        st.info("Procedure mix unavailable.")
+        st.info("No procedure data for this hospital.")
 
 with c_robot:
     st.markdown("##### Robotic share")
-    # Use APP data for approach shares (latest year with data - 2024)
-    if not app_hop_summary.empty and 'vda' in app_hop_summary.columns:
-        hosp_app = app_hop_summary[app_hop_summary['finessGeoDP'] == str(selected_hospital_id)]
-        if not hosp_app.empty:
-            latest_yr = 2024 if (hosp_app['annee'] == 2024).any() else hosp_app['annee'].max()
-            hosp_app_yr = hosp_app[hosp_app['annee'] == latest_yr]
-            
-            # Calculate shares by approach
-            totals = {}
-            for _, r in hosp_app_yr.iterrows():
-                approach = str(r.get('vda', '')).upper().strip()
-                count = float(r.get('n', 0))
-                totals[approach] = totals.get(approach, 0.0) + count
-            
-            total_all = sum(totals.values())
-            if total_all > 0:
-                # Map to display names
-                approach_map = {'ROB': 'Robotic', 'COE': 'Coelioscopy', 'LAP': 'Open Surgery'}
-                df_bar = pd.DataFrame([
-                    {'Year': str(int(latest_yr)), 'Approach': approach_map.get(k, k), 'Share': (v / total_all * 100)}
-                    for k, v in totals.items()
-                ])
-                figb = px.bar(df_bar, x='Year', y='Share', color='Approach', barmode='stack', 
-                             color_discrete_map={'Open Surgery':'#A23B72','Coelioscopy':'#2E86AB','Robotic':'#F7931E'},
-                             category_orders={'Approach': ['Robotic', 'Coelioscopy', 'Open Surgery']})
-                figb.update_layout(height=240, yaxis=dict(range=[0,100], title=''), xaxis_title=None, 
-                                 paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-                figb.update_traces(hovertemplate='Approach: %{fullData.name}<br>%{y:.1f}%<extra></extra>')
-                st.plotly_chart(figb, use_container_width=True, key=f"summary_rob_bar_{selected_hospital_id}")
-            else:
-                st.info("No approach data for selected year.")
+    # Approach shares (APP) of 2024, or the hospital's latest year
+    approach_mix = list(summary_row['approach_mix']) if summary_row is not None else []
+    if approach_mix:
+        latest_yr = summary_row['approach_year']
+        total_all = sum(m['count'] for m in approach_mix)
+        if total_all > 0:
+            df_bar = pd.DataFrame([
+                {'Year': str(int(latest_yr)), 'Approach': APPROACH_LABELS.get(m['approach'], m['approach']), 'Share': (m['count'] / total_all * 100)}
+                for m in approach_mix
+            ])
+            figb = px.bar(df_bar, x='Year', y='Share', color='Approach', barmode='stack', 
+                         color_discrete_map={'Open Surgery':'#A23B72','Coelioscopy':'#2E86AB','Robotic':'#F7931E'},
+                         category_orders={'Approach': ['Robotic', 'Coelioscopy', 'Open Surgery']})
+            figb.update_layout(height=240, yaxis=dict(range=[0,100], title=''), xaxis_title=None, 
+                             paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            figb.update_traces(hovertemplate='Approach: %{fullData.name}<br>%{y:.1f}%<extra></extra>')
+            st.plotly_chart(figb, use_container_width=True, key=f"summary_rob_bar_{selected_hospital_id}")
+            _robotic_rank = _rank_caption('robotic_share', latest_yr)
+            if _robotic_rank:
+                st.caption(_robotic_rank)
         else:
-            st.info("No approach data for this hospital.")
+            st.info("No approach data for selected year.")
     else:
-        st.info("Robotic share unavailable.")
+        st.info("No approach data for this hospital.")
 
 with c_rates:
     r1, r2 = st.columns(2)
@@ -595,6 +481,9 @@ with c_rates:
         pct = f"{complication_rate:.1f}%" if complication_rate is not None else "N/A"
         st.markdown(f"<div class='nv-bubble purple'>{pct}</div>", unsafe_allow_html=True)
         st.markdown("<div class='nv-bubble-label'>Complication rate</div>", unsafe_allow_html=True)
+    _complication_rank = _rank_caption('complication_rate', summary_row['complication_year'] if summary_row is not None else None)
+    if _complication_rank:
+        st.caption(_complication_rank)
 
 
 # --- New Tabbed Layout: Activity, Complications, Geography ---
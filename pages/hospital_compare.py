@@ -4,6 +4,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from navira.data_loader import get_dataframes
+from navira.store import refresh_data, start_watcher
 from auth_wrapper import add_auth_to_page
 from navigation_utils import handle_navigation_request
 
@@ -34,20 +35,15 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# --- Cache Control ---
-if st.button("♻️ Clear cache and reload"):
-    try:
-        st.cache_data.clear()
-    except Exception:
-        pass
-    try:
-        st.cache_resource.clear()
-    except Exception:
-        pass
+# --- Data version ---
+# New builds are picked up by the background watcher; the button only forces an immediate check
+start_watcher()
+if st.button("♻️ Reload data"):
+    refresh_data()
     # Clear any session state that might cache data
     if 'hospital_compare_data' in st.session_state:
         del st.session_state['hospital_compare_data']
-    st.success("Cache cleared! Page will reload...")
+    st.success("Data reloaded! Page will reload...")
     st.rerun()
 
 # Define color palettes for consistency (matching dashboard.py)
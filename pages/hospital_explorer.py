@@ -4,13 +4,21 @@ import folium
 import plotly.express as px
 from folium.plugins import MarkerCluster
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 from streamlit_folium import st_folium
+import os
+import numpy as np
 from navira.data_loader import get_dataframes, get_all_dataframes
+from navira.data_loaders import get_geocoder, get_spatial_index
+from navira.spatial import haversine_km
+from navira.hashing import HASH_FUNCS
 from auth_wrapper import add_auth_to_page
 from navigation_utils import handle_navigation_request
 handle_navigation_request()
 
+# Addresses resolve offline to their commune; set NAVIRA_NOMINATIM_FALLBACK=1 to
+# fall back to the Nominatim service for addresses the communes file cannot place
+NOMINATIM_FALLBACK = os.environ.get("NAVIRA_NOMINATIM_FALLBACK", "0") == "1"
+
 # Identify this page early to avoid redirect loops for limited users
 st.session_state.current_page = "hospital_explorer"
 
@@ -81,7 +89,7 @@ try:
     }
     
     # --- Function to Calculate National Averages ---
-    @st.cache_data(show_spinner=False)
+    @st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
     def calculate_national_averages(annual_df: pd.DataFrame):
         dataf_clean = annual_df.drop_duplicates(subset=['id', 'annee'], keep='first')
         dataf_eligible = dataf_clean[dataf_clean['total_procedures_year'] >= 25]
@@ -170,20 +178,15 @@ try:
     def geocode_address(address):
         if not address: return None
         
-        # First try to extract postal code and use it directly
-        postal_code = _extract_postal_code(address)
-        if postal_code:
-            # Try to find coordinates from cities data using postal code
-            if not cities.empty and 'postal_code' in cities.columns:
-                matching_cities = cities[cities['postal_code'] == postal_code]
-                if not matching_cities.empty:
-                    # Use the first matching city's coordinates
-                    city_coords = matching_cities.iloc[0]
-                    if not pd.isna(city_coords['latitude']) and not pd.isna(city_coords['longitude']):
-                        st.success(f"Found coordinates for postal code {postal_code}")
-                        return (city_coords['latitude'], city_coords['longitude'])
+        # Offline lookup first: postal code or commune name -> commune centroid
+        place = get_geocoder().geocode(address)
+        if place and not pd.isna(place.latitude) and not pd.isna(place.longitude):
+            return (place.latitude, place.longitude)
         
-        # Fallback to geocoding service
+        # Street-level geocoding service, only when enabled (network, rate-limited)
+        if not NOMINATIM_FALLBACK:
+            return None
+        postal_code = _extract_postal_code(address)
         try:
             geolocator = Nominatim(user_agent="navira_streamlit_app_v26")
             location = geolocator.geocode(f"{address.strip()}, France", timeout=10)
@@ -205,19 +208,24 @@ try:
             return None
     
     # Helper to find nearest city with data from given coordinates (reusable)
-    def _find_nearest_city_with_data(coords, cities_with_data, max_distance_km=50):
+    def _find_nearest_city_with_data(coords, cities_with_data, max_distance_km=50, index=None):
+        """Nearest row and its distance (km): one tree query with ``index`` (built over
+        ``cities_with_data``), else one vectorized pass. None beyond max(max_distance_km, 200) km."""
         if not coords or cities_with_data.empty:
             return None
-        distances = cities_with_data.apply(
-            lambda row: geodesic(coords, (row['latitude'], row['longitude'])).km, 
-            axis=1
-        )
-        min_distance_idx = distances.idxmin()
-        min_distance = distances[min_distance_idx]
-        for threshold in (max_distance_km, 100, 150, 200):
-            if min_distance <= threshold:
-                return cities_with_data.loc[min_distance_idx], min_distance
-        return None
+        if index is not None:
+            positions, distances = index.nearest(coords[0], coords[1], k=1)
+        else:
+            distances = np.nan_to_num(haversine_km(
+                coords[0], coords[1],
+                pd.to_numeric(cities_with_data['latitude'], errors='coerce').to_numpy(dtype=float),
+                pd.to_numeric(cities_with_data['longitude'], errors='coerce').to_numpy(dtype=float),
+            ), nan=np.inf)
+            positions = np.argsort(distances, kind='stable')[:1]
+            distances = distances[positions]
+        if not len(positions) or not distances[0] <= max(max_distance_km, 200):
+            return None
+        return cities_with_data.iloc[int(positions[0])], float(distances[0])
 
     # Extract a 5-digit postal code from a freeform address
     def _extract_postal_code(address: str | None) -> str | None:
@@ -232,9 +240,14 @@ try:
 
     @st.cache_data(show_spinner=False)
     def _reverse_postal_from_coords(coords):
+        if not coords:
+            return None
+        place = get_geocoder().reverse(coords[0], coords[1])
+        if place:
+            return place.postal
+        if not NOMINATIM_FALLBACK:
+            return None
         try:
-            if not coords:
-                return None
             geolocator = Nominatim(user_agent="navira_streamlit_app_v26")
             location = geolocator.reverse(coords, timeout=5, language='en')
             if location and isinstance(location.raw, dict):
@@ -246,8 +259,8 @@ try:
             return None
         return None
 
-    def _choose_city_for_address(coords, address_text, cities_with_data, max_distance_km):
-        """Prefer exact postal code match (from address or reverse geocode). Otherwise pick nearest within tightening thresholds."""
+    def _choose_city_for_address(coords, address_text, cities_with_data, max_distance_km, index=None):
+        """Prefer exact postal code match (from address or reverse geocode). Otherwise pick the nearest city within 200 km."""
         if cities_with_data.empty:
             return None
         postal = _extract_postal_code(address_text)
@@ -260,21 +273,16 @@ try:
                 chosen = _find_nearest_city_with_data(coords, same_pc, max_distance_km=max_distance_km)
                 if chosen:
                     return chosen
-        # Try progressively closer distances to ensure actual closeness
-        for threshold in (10, 20, 30, 50, 100, 150, 200):
-            chosen = _find_nearest_city_with_data(coords, cities_with_data, max_distance_km=threshold)
-            if chosen:
-                return chosen
-        return None
+        return _find_nearest_city_with_data(coords, cities_with_data, index=index)
             
     if st.session_state.get('search_triggered', False):
         user_coords = geocode_address(st.session_state.address)
         if user_coords:
             # Persist user coordinates for neighbor flow visualization
             st.session_state.user_address_coords = user_coords
-            temp_df = establishments.copy()
-            temp_df['Distance (km)'] = temp_df.apply(lambda row: geodesic(user_coords, (row['latitude'], row['longitude'])).km, axis=1)
-            temp_df = temp_df[temp_df['Distance (km)'] <= radius_km]
+            positions, distances = get_spatial_index("hospitals", establishments).within(user_coords[0], user_coords[1], radius_km)
+            temp_df = establishments.iloc[positions].copy()
+            temp_df['Distance (km)'] = distances
             # Normalize and map status values for filtering
             temp_df['statut_norm'] = temp_df['statut'].astype(str).str.strip().str.lower()
             selected_statuses = []
@@ -291,7 +299,8 @@ try:
                 available_cities = recruitment_zones['city_code'].unique()
                 cities_with_names = cities[cities['city_code'].isin(available_cities)]
                 cities_with_names = cities_with_names[cities_with_names['city_name'].notna()]
-                chosen = _choose_city_for_address(user_coords, st.session_state.address, cities_with_names, max_distance_km=radius_km)
+                chosen = _choose_city_for_address(user_coords, st.session_state.address, cities_with_names, max_distance_km=radius_km,
+                                                  index=get_spatial_index("cities_with_recruitment", cities_with_names))
                 if chosen:
                     nearest_city, nf_distance = chosen
                     st.session_state.neighbor_flow_city_code = nearest_city['city_code']
@@ -397,7 +406,7 @@ try:
                 weight=3,
                 color='red',
                 opacity=0.7,
-                popup=f"<b>Connection</b><br>Your address → {origin_name}<br>Distance: {geodesic((user_lat, user_lon), (origin_lat, origin_lon)).km:.1f} km"
+                popup=f"<b>Connection</b><br>Your address → {origin_name}<br>Distance: {float(haversine_km(user_lat, user_lon, origin_lat, origin_lon)):.1f} km"
             ).add_to(folium_map)
             
             # Add a small info circle at the midpoint
@@ -458,8 +467,9 @@ try:
             
         # If we know the user's location, compute distances and prefer closest destinations
         if user_address_coords:
-            destination_hospitals['distance_km'] = destination_hospitals.apply(
-                lambda r: geodesic(user_address_coords, (r['latitude'], r['longitude'])).km, axis=1
+            destination_hospitals['distance_km'] = haversine_km(
+                user_address_coords[0], user_address_coords[1],
+                destination_hospitals['latitude'].to_numpy(dtype=float), destination_hospitals['longitude'].to_numpy(dtype=float)
             )
             if distance_limit_km is not None:
                 destination_hospitals = destination_hospitals[destination_hospitals['distance_km'] <= float(distance_limit_km)]
@@ -612,9 +622,12 @@ try:
         map_data = st_folium(m, width="100%", height=500, key="folium_map")
         if map_data and map_data.get("last_object_clicked"):
             clicked_coords = (map_data["last_object_clicked"]["lat"], map_data["last_object_clicked"]["lng"])
-            distances = unique_hospitals_df.apply(lambda row: geodesic(clicked_coords, (row['latitude'], row['longitude'])).km, axis=1)
-            if distances.min() < 0.1:
-                st.session_state.selected_hospital_id = unique_hospitals_df.loc[distances.idxmin()]['id']
+            positions, _ = get_spatial_index("hospitals", establishments).within(clicked_coords[0], clicked_coords[1], 0.1)
+            # Closest first; only hospitals shown on the map
+            clicked_ids = establishments['id'].iloc[positions]
+            clicked_ids = clicked_ids[clicked_ids.isin(unique_hospitals_df['id'])]
+            if not clicked_ids.empty:
+                st.session_state.selected_hospital_id = clicked_ids.iloc[0]
                 st.switch_page("pages/dashboard.py")
         
         st.subheader("Hospital List")
@@ -64,6 +64,8 @@ st.markdown("""
 # Navigation is now handled by the sidebar
 
 # --- Load Data (Parquet via loader) ---
+# Built once per data version; the sections read views over it
+national = get_national_aggregates()
 df = load_and_prepare_data()
 
 # Load additional datasets
@@ -93,11 +95,11 @@ complications = all_data.get('complications', pd.DataFrame())
 procedure_details = all_data.get('procedure_details', pd.DataFrame())
 
 # Calculate national averages for comparisons
-def calculate_national_averages(df: pd.DataFrame):
+def calculate_national_averages(national: NationalAggregates):
     """Calculate national averages for hospital comparisons"""
     try:
-        # Filter for eligible hospitals (≥25 procedures per year)
-        eligible = df[df['total_procedures_year'] >= 25].copy()
+        # Eligible hospitals (≥25 procedures per year)
+        eligible = national.eligible
         if eligible.empty:
             return {}
         
@@ -124,7 +126,7 @@ def calculate_national_averages(df: pd.DataFrame):
         print(f"Error calculating national averages: {e}")
         return {}
 
-national_averages = calculate_national_averages(df)
+national_averages = calculate_national_averages(national)
 
 # --- MAP DATA HELPERS ---
 @st.cache_data(show_spinner=False)
@@ -290,19 +292,19 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 ])
 
 with tab1:
-    render_overall_trends(df)
+    render_overall_trends(national)
 
 with tab2:
-    render_techniques(df, national_averages)
+    render_techniques(national, national_averages)
 
 with tab3:
-    render_robot(df)
+    render_robot(national)
 
 with tab4:
     render_complication_national(all_data)
 
 with tab5:
-    render_hospitals(df, procedure_details)
+    render_hospitals(national, procedure_details)
 
 
 
@@ -1,149 +1,497 @@
+"""
+Compile raw CSV inputs into the Parquet artifacts loaded by the app.
+
+Two groups of outputs are produced:
+- Legacy datasets from data/*.csv: establishments.parquet, annual_procedures.parquet,
+  postal_insee.npz, the postal code -> INSEE communes mapping compiled
+  into CSR arrays (see navira.postal_mapping), communes_geo.bin, the
+  communes GeoJSON as an indexed binary geometry store (see navira.geo_store),
+  and display_polygons.npz, the polygon drawing each INSEE code in every
+  geometry set (see navira.display_polygons)
+- One Parquet file per new_data table (see navira.store.TABLES, plus the
+  tables derived from them in navira.store.DERIVED_TABLES) under
+  <out>/new_data/, with explicit column types, zstd compression and rows
+  sorted by hospital FINESS, an uncompressed Arrow IPC copy of it for
+  memory-mapped loading, and a manifest.json recording content hashes and
+  row counts; every new manifest version is published as an immutable
+  snapshot under <out>/new_data/versions/ and the ``current`` pointer is
+  swapped atomically (running apps pick it up without a cache clear)
+
+Every output is a build target declaring its input files. A target is
+rebuilt only when the SHA-256 of one of its inputs (or of its own output)
+differs from the last recorded build in <out>/build_state.json; inputs
+that are themselves outputs of other targets order the build. Independent
+targets run in parallel on a process pool.
+
+Usage:
+    python scripts/build_parquet.py [--only legacy|new_data] [--dry-run] [--force] [--jobs N]
+"""
+
+import argparse
+import functools
+import hashlib
+import json
 import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from navira.artifacts import MANIFEST_NAME, current_version, publish_version, read_manifest, write_ipc  # noqa: E402
+from navira.geo import detect_insee_property  # noqa: E402
+from navira.display_polygons import (  # noqa: E402
+    ARTIFACT_NAME as DISPLAY_POLYGONS,
+    PARIS_CODE_PROPERTY,
+    DisplayPolygons,
+    geometry_sets,
+)
+from navira.geo_store import STORE_NAME as COMMUNES_GEO_STORE, GeoStore, write_store  # noqa: E402
+from navira.postal_mapping import ARTIFACT_NAME as POSTAL_INSEE_ARTIFACT, PostalInseeMapping  # noqa: E402
+from navira.store import (  # noqa: E402
+    DERIVED_TABLES,
+    TABLES,
+    apply_column_types,
+    read_table_csv,
+    resolve_new_data_dir,
+    sort_table,
+    table_path,
+)
+
+RAW_DIR = os.environ.get("NAVIRA_RAW_DIR", "data")
+COMMUNES_GEOJSON = os.environ.get("COMMUNES_GEOJSON_PATH")
+OUT_DIR = os.environ.get("NAVIRA_OUT_DIR", "data/processed")
+
+STATE_NAME = "build_state.json"
+
+
+class Target(NamedTuple):
+    """One build output and the files it is computed from."""
+    name: str
+    group: str
+    output: Path
+    inputs: Tuple[Path, ...]
+    build: Callable[..., int]  # build(output, *inputs) -> row count
+
+
+def _read_raw(path: Path, **kwargs) -> pd.DataFrame:
+    df = pd.read_csv(path, sep=';', encoding='latin1', **kwargs)
+    if df.columns[0].startswith('Unnamed'):
+        df = df.iloc[:, 1:]
+    return df
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_establishments(output: Path, hospitals_csv: Path, redo_csv: Path) -> int:
+    """Build establishments.parquet: one row per hospital with revision totals."""
+    hospitals_df = _read_raw(hospitals_csv)
+    redo_df = _read_raw(redo_csv, decimal=',')
+
+    # Clean hospitals data
+    hospitals_df = hospitals_df.rename(columns={
+        'finessGeo': 'id',
+        'rs': 'name'
+    }).copy()
+
+    # Keep 1 row / id
+    hospitals_df = hospitals_df.drop_duplicates(subset='id', keep='first')
+
+    # Strip strings
+    for col in hospitals_df.select_dtypes(include=['object']).columns:
+        hospitals_df[col] = hospitals_df[col].astype(str).str.strip()
+
+    # Coerce numeric columns
+    for col in ['latitude', 'longitude', 'university', 'cso', 'LAB_SOFFCO']:
+        if col in hospitals_df.columns:
+            hospitals_df[col] = pd.to_numeric(hospitals_df[col], errors='coerce')
+
+    # Drop rows with invalid coordinates
+    if {'latitude', 'longitude'}.issubset(hospitals_df.columns):
+        hospitals_df = hospitals_df.dropna(subset=['latitude', 'longitude'])
+        hospitals_df = hospitals_df[
+            hospitals_df['latitude'].between(-90, 90) & hospitals_df['longitude'].between(-180, 180)
+        ]
+
+    # Prepare establishments
+    redo_df = redo_df.rename(columns={
+        'finessGeoDP': 'id',
+        'n': 'revision_surgeries_n',
+        'PCT': 'revision_surgeries_pct',
+        'TOT': 'total_procedures_period'
+    }).copy()
+
+    redo_df = redo_df.drop_duplicates(subset='id', keep='first')
+    establishments_df = hospitals_df.merge(redo_df, on='id', how='left', suffixes=('', '_redo'))
+
+    # Set dtypes
+    if 'revision_surgeries_n' in establishments_df:
+        establishments_df['revision_surgeries_n'] = establishments_df['revision_surgeries_n'].fillna(0).astype('Int64')
+    if 'revision_surgeries_pct' in establishments_df:
+        establishments_df['revision_surgeries_pct'] = establishments_df['revision_surgeries_pct'].astype(float)
+    if 'total_procedures_period' in establishments_df:
+        establishments_df['total_procedures_period'] = establishments_df['total_procedures_period'].fillna(0).astype('Int64')
+
+    establishments_df = establishments_df.reset_index(drop=True)
+    establishments_df.to_parquet(output, engine="pyarrow", index=False)
+    return len(establishments_df)
+
+
+def build_annual_procedures(output: Path, tcn_csv: Path, vda_csv: Path) -> int:
+    """Build annual_procedures.parquet: per hospital-year procedure and approach counts."""
+    tcn_df = _read_raw(tcn_csv, decimal=',')
+    vda_df = _read_raw(vda_csv, decimal=',')
+
+    tcn = tcn_df.rename(columns={'finessGeoDP': 'id'}).copy()
+
+    # Pivot counts by 'baria_t' category
+    proc_pivot = tcn.pivot_table(
+        index=['id', 'annee'],
+        columns='baria_t',
+        values='n',
+        aggfunc='sum',
+        fill_value=0
+    ).reset_index()
+
+    # Bring yearly totals
+    yearly_totals = tcn[['id', 'annee', 'TOT_y']].drop_duplicates()
+    yearly_totals = yearly_totals.rename(columns={'TOT_y': 'total_procedures_year'})
+
+    procedures_df = pd.merge(proc_pivot, yearly_totals, on=['id', 'annee'], how='left')
+
+    # Surgical approaches
+    vda = vda_df.rename(columns={'finessGeoDP': 'id'}).copy()
+    appr_pivot = vda.pivot_table(
+        index=['id', 'annee'],
+        columns='vda',
+        values='n',
+        aggfunc='sum',
+        fill_value=0
+    ).reset_index()
+
+    # Merge both pivots
+    annual_df = pd.merge(procedures_df, appr_pivot, on=['id', 'annee'], how='outer').fillna(0)
+
+    # Types & hygiene
+    annual_df['id'] = annual_df['id'].astype(str)
+    if 'annee' in annual_df:
+        annual_df['annee'] = pd.to_numeric(annual_df['annee'], errors='coerce').fillna(0).astype('int16')
+
+    # Validation
+    non_proc = {'id', 'annee', 'total_procedures_year'} | set(appr_pivot.columns) - {'id', 'annee'}
+    candidate_proc_cols = [c for c in procedures_df.columns if c not in non_proc and c not in {'id', 'annee'}]
+    if candidate_proc_cols:
+        annual_df['calculated_total_primary'] = annual_df[candidate_proc_cols].sum(axis=1).astype('Int64')
+        if 'total_procedures_year' in annual_df:
+            annual_df['total_procedures_year'] = annual_df['total_procedures_year'].fillna(annual_df['calculated_total_primary'])
+        else:
+            annual_df['total_procedures_year'] = annual_df['calculated_total_primary']
+
+    annual_df.to_parquet(output, engine="pyarrow", index=False)
+    return len(annual_df)
+
+
+def build_postal_insee(output: Path, communes_csv: Path) -> int:
+    """Build postal_insee.npz: postal code -> INSEE communes as CSR arrays, tagged with the source hash."""
+    communes = pd.read_csv(communes_csv, sep=';', dtype=str, usecols=['codeInsee', 'codePostal'])
+    mapping = PostalInseeMapping.from_communes(communes)
+    tmp = output.with_name(output.name + ".tmp.npz")
+    mapping.save(tmp, source_sha256=sha256_file(communes_csv))
+    os.replace(tmp, output)
+    return len(mapping.insee)
+
+
+def build_communes_geo(output: Path, communes_geojson: Path) -> int:
+    """Build communes_geo.bin: binary geometry blobs per INSEE code (source and simplified levels) plus offset indexes."""
+    with open(communes_geojson, encoding='utf-8') as f:
+        geojson = json.load(f)
+    key = detect_insee_property(geojson)
+    if key is None:
+        raise ValueError(f"No INSEE code property found in {communes_geojson}")
+    return write_store(geojson, output, key, source_sha256=sha256_file(communes_geojson))
+
+
+def build_display_polygons(output: Path, communes_geo: Path, paris_geojson: Path, communes_csv: Path) -> int:
+    """Build display_polygons.npz: the polygon drawing each INSEE code in every geometry set."""
+    store = GeoStore(communes_geo)
+    with open(paris_geojson, encoding='utf-8') as f:
+        paris = json.load(f)
+    paris_codes = [str(feat['properties'][PARIS_CODE_PROPERTY]).strip().zfill(5) for feat in paris.get('features', [])
+                   if (feat.get('properties') or {}).get(PARIS_CODE_PROPERTY)]
+    insee = pd.read_csv(communes_csv, sep=';', dtype=str, usecols=['codeInsee'])['codeInsee'].dropna()
+    table = DisplayPolygons.from_geometry(geometry_sets(store.codes.astype(str), paris_codes), insee)
+    tmp = output.with_name(output.name + ".tmp.npz")
+    table.save(tmp, communes_sha256=store.header.get("source_sha256", ""), paris_sha256=sha256_file(paris_geojson))
+    os.replace(tmp, output)
+    return len(table)
+
+
+def _write_parquet(table: pa.Table, output: Path) -> int:
+    tmp = output.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, output)
+    return table.num_rows
+
+
+def compile_table(output: Path, source: Path) -> int:
+    """Compile one new_data CSV into a typed, FINESS-sorted, zstd Parquet file."""
+    return _write_parquet(sort_table(apply_column_types(read_table_csv(source))), output)
+
+
+def compile_derived(name: str, output: Path, *sources: Path) -> int:
+    """Compute a derived table from the compiled Parquet files of its source tables."""
+    build, _ = DERIVED_TABLES[name]
+    table = build(*(pq.read_table(p).to_pandas() for p in sources))
+    return _write_parquet(sort_table(table), output)
+
+
+def build_ipc(output: Path, parquet: Path) -> int:
+    """Re-encode a compiled Parquet table as an uncompressed Arrow IPC file for memory mapping."""
+    table = pq.read_table(parquet)
+    write_ipc(table, output)
+    return table.num_rows
+
+
+def legacy_targets(raw_dir: Path, out_dir: Path) -> Dict[str, Target]:
+    return {
+        "establishments": Target(
+            "establishments", "legacy", out_dir / "establishments.parquet",
+            (raw_dir / "01_hospitals.csv", raw_dir / "04_tab_redo.csv"),
+            build_establishments,
+        ),
+        "annual_procedures": Target(
+            "annual_procedures", "legacy", out_dir / "annual_procedures.parquet",
+            (raw_dir / "06_tab_tcn_redo_new.csv", raw_dir / "03_tab_vda_new.csv"),
+            build_annual_procedures,
+        ),
+        "postal_insee": Target(
+            "postal_insee", "legacy", out_dir / POSTAL_INSEE_ARTIFACT,
+            (raw_dir / "COMMUNES_FRANCE_INSEE.csv",),
+            build_postal_insee,
+        ),
+        "communes_geo": Target(
+            "communes_geo", "legacy", out_dir / COMMUNES_GEO_STORE,
+            (Path(COMMUNES_GEOJSON) if COMMUNES_GEOJSON else raw_dir / "communes.geojson",),
+            build_communes_geo,
+        ),
+        "display_polygons": Target(
+            "display_polygons", "legacy", out_dir / DISPLAY_POLYGONS,
+            (out_dir / COMMUNES_GEO_STORE, raw_dir / "paris_arrondissements_official.geojson",
+             raw_dir / "COMMUNES_FRANCE_INSEE.csv"),
+            build_display_polygons,
+        ),
+    }
+
+
+def new_data_targets(new_data_dir: Path, out_dir: Path) -> Dict[str, Target]:
+    """One Parquet target per table, plus an Arrow IPC target fed by that Parquet file.
+
+    Derived tables read the Parquet files of their sources, which orders them after those.
+    """
+    dest_dir = out_dir / "new_data"
+    targets = {}
+    for name in sorted(TABLES) + sorted(DERIVED_TABLES):
+        parquet = dest_dir / f"{name}.parquet"
+        if name in DERIVED_TABLES:
+            inputs = tuple(dest_dir / f"{s}.parquet" for s in DERIVED_TABLES[name][1])
+            targets[name] = Target(name, "new_data", parquet, inputs, functools.partial(compile_derived, name))
+        else:
+            targets[name] = Target(name, "new_data", parquet, (table_path(name, new_data_dir),), compile_table)
+        targets[f"{name}.arrow"] = Target(
+            f"{name}.arrow", "new_data", dest_dir / f"{name}.arrow", (parquet,), build_ipc,
+        )
+    return targets
+
+
+def load_state(out_dir: Path) -> dict:
+    try:
+        with open(out_dir / STATE_NAME, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _stale_reason(target: Target, hashes: List[str], previous: Optional[dict]) -> Optional[str]:
+    if previous is None:
+        return "never built"
+    if not target.output.exists():
+        return "output missing"
+    recorded = previous.get("inputs", [])
+    if len(recorded) != len(hashes):
+        return "inputs changed"
+    changed = [p.name for p, h, r in zip(target.inputs, hashes, recorded) if h != r]
+    if changed:
+        return "changed: " + ", ".join(changed)
+    if sha256_file(target.output) != previous.get("sha256"):
+        return "output modified"
+    return None
+
+
+def run(targets: Dict[str, Target], state: dict, jobs: Optional[int] = None,
+        dry_run: bool = False, force: bool = False) -> Dict[str, str]:
+    """Build stale targets in dependency order; returns {name: status}.
+
+    ``state`` is updated in place with the input hashes (in input order), output hash and
+    row count of every target that was rebuilt.
+    """
+    producers = {t.output: t.name for t in targets.values()}
+    deps = {n: {producers[p] for p in t.inputs if p in producers} for n, t in targets.items()}
+    status: Dict[str, str] = {}
+    pending = dict(targets)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in [n for n in pending if deps[n] <= status.keys()]:
+                target = pending.pop(name)
+                if any(status[d] in ("skipped", "failed") for d in deps[name]):
+                    status[name] = "skipped"
+                    continue
+                missing = [p for p in target.inputs if not p.exists() and p not in producers]
+                if missing:
+                    print(f"⚠️  Skipping {name}: {missing[0]} not found")
+                    status[name] = "skipped"
+                    continue
+                if dry_run and any(status[d] == "rebuilt" for d in deps[name]):
+                    print(f"🔁 {name}: upstream rebuilt")
+                    status[name] = "rebuilt"
+                    continue
+                hashes = [sha256_file(p) for p in target.inputs]
+                reason = "forced" if force else _stale_reason(target, hashes, state.get(name))
+                if reason is None:
+                    status[name] = "up to date"
+                elif dry_run:
+                    print(f"🔁 {name}: {reason}")
+                    status[name] = "rebuilt"
+                else:
+                    target.output.parent.mkdir(parents=True, exist_ok=True)
+                    running[pool.submit(target.build, target.output, *target.inputs)] = (name, hashes)
+
+            if not running:
+                if pending and not any(deps[n] <= status.keys() for n in pending):
+                    raise RuntimeError(f"Dependency cycle among: {', '.join(sorted(pending))}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, hashes = running.pop(future)
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    print(f"❌ {name} failed: {e}")
+                    status[name] = "failed"
+                    continue
+                output = targets[name].output
+                state[name] = {"inputs": hashes, "sha256": sha256_file(output), "rows": rows}
+                status[name] = "rebuilt"
+                print(f"✅ Wrote {output.name} ({rows:,} rows)")
+    return status
+
+
+def write_manifest(targets: Dict[str, Target], state: dict, new_data_dir: Path) -> dict:
+    """Write the new_data manifest from the recorded build state."""
+    tables = {}
+    for name in sorted(TABLES) + sorted(DERIVED_TABLES):
+        target, entry = targets.get(name), state.get(name)
+        if target is None or entry is None or not target.output.exists():
+            continue
+        if name in DERIVED_TABLES:
+            tables[name] = {"sources": list(DERIVED_TABLES[name][1]), "sources_sha256": entry["inputs"]}
+        else:
+            tables[name] = {
+                "source": str(target.inputs[0].relative_to(new_data_dir)),
+                "source_sha256": entry["inputs"][0],
+            }
+        tables[name].update({
+            "file": target.output.name,
+            "sha256": entry["sha256"],
+            "rows": entry["rows"],
+        })
+        ipc_target, ipc_entry = targets.get(f"{name}.arrow"), state.get(f"{name}.arrow")
+        if ipc_target is not None and ipc_entry is not None and ipc_target.output.exists():
+            tables[name]["ipc"] = ipc_target.output.name
+            tables[name]["ipc_sha256"] = ipc_entry["sha256"]
+    version = hashlib.sha256(
+        "".join(tables[n]["sha256"] for n in sorted(tables)).encode()
+    ).hexdigest()[:16]
+    manifest = {
+        "version": version,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tables": tables,
+    }
+    dest_dir = next(t.output.parent for t in targets.values() if t.group == "new_data")
+    _write_json(dest_dir / MANIFEST_NAME, manifest)
+    print(f"✅ Wrote {MANIFEST_NAME} ({len(tables)} tables, version {version})")
+    return manifest
+
+
+def build(raw_dir: Path, new_data_dir: Optional[Path], out_dir: Path, only: Optional[str] = None,
+          jobs: Optional[int] = None, dry_run: bool = False, force: bool = False) -> Dict[str, str]:
+    """Build every stale target of the selected groups and refresh the manifest."""
+    targets: Dict[str, Target] = {}
+    if only in (None, "legacy"):
+        targets.update(legacy_targets(raw_dir, out_dir))
+    if only in (None, "new_data") and new_data_dir is not None:
+        targets.update(new_data_targets(new_data_dir, out_dir))
+
+    state = load_state(out_dir)
+    status = run(targets, state, jobs=jobs, dry_run=dry_run, force=force)
+    if dry_run:
+        return status
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    _write_json(out_dir / STATE_NAME, state)
+    new_data = [n for n, t in targets.items() if t.group == "new_data"]
+    if new_data:
+        root = out_dir / "new_data"
+        manifest = read_manifest(root)
+        if manifest is None or any(status[n] == "rebuilt" for n in new_data):
+            manifest = write_manifest(targets, state, new_data_dir)
+        if current_version(root) != manifest["version"]:
+            publish_version(root, manifest["version"])
+            print(f"✅ Published version {manifest['version']}")
+    return status
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", choices=["legacy", "new_data"], help="Build a single group of outputs")
+    parser.add_argument("--dry-run", action="store_true", help="List targets that would be rebuilt")
+    parser.add_argument("--force", action="store_true", help="Rebuild every target")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    new_data_dir = resolve_new_data_dir()
+    if new_data_dir is None and args.only == "new_data":
+        print("❌ new_data directory not found (set NAVIRA_NEW_DATA_DIR)")
+        return 1
+
+    status = build(Path(RAW_DIR), new_data_dir, Path(OUT_DIR), only=args.only,
+                   jobs=args.jobs, dry_run=args.dry_run, force=args.force)
+    counts = {s: sum(1 for v in status.values() if v == s) for s in sorted(set(status.values()))}
+    verb = "would rebuild" if args.dry_run else "rebuilt"
+    summary = [f"{counts.pop('rebuilt', 0)} {verb}"] + [f"{n} {s}" for s, n in counts.items()]
+    print(", ".join(summary))
+    return 1 if counts.get("failed") else 0
+
 
-# Create output directory
-os.makedirs("data/processed", exist_ok=True)
-
-print("Loading CSV files...")
-
-# Load hospitals data
-print("Loading hospitals...")
-hospitals_df = pd.read_csv("data/01_hospitals.csv", sep=';', encoding='latin1')
-if hospitals_df.columns[0].startswith('Unnamed'):
-    hospitals_df = hospitals_df.iloc[:, 1:]
-print(f"Hospitals shape: {hospitals_df.shape}")
-
-# Load TCN data (procedure types)
-print("Loading TCN data...")
-tcn_df = pd.read_csv("data/06_tab_tcn_redo_new.csv", sep=';', encoding='latin1', decimal=',')
-if tcn_df.columns[0].startswith('Unnamed'):
-    tcn_df = tcn_df.iloc[:, 1:]
-print(f"TCN shape: {tcn_df.shape}")
-
-# Load VDA data (surgical approaches)
-print("Loading VDA data...")
-vda_df = pd.read_csv("data/03_tab_vda_new.csv", sep=';', encoding='latin1', decimal=',')
-if vda_df.columns[0].startswith('Unnamed'):
-    vda_df = vda_df.iloc[:, 1:]
-print(f"VDA shape: {vda_df.shape}")
-
-# Load redo data
-print("Loading redo data...")
-redo_df = pd.read_csv("data/04_tab_redo.csv", sep=';', encoding='latin1', decimal=',')
-if redo_df.columns[0].startswith('Unnamed'):
-    redo_df = redo_df.iloc[:, 1:]
-print(f"Redo shape: {redo_df.shape}")
-
-print("\nProcessing data...")
-
-# Clean hospitals data
-hospitals_df = hospitals_df.rename(columns={
-    'finessGeo': 'id',
-    'rs': 'name'
-}).copy()
-
-# Keep 1 row / id
-hospitals_df = hospitals_df.drop_duplicates(subset='id', keep='first')
-
-# Strip strings
-for col in hospitals_df.select_dtypes(include=['object']).columns:
-    hospitals_df[col] = hospitals_df[col].astype(str).str.strip()
-
-# Coerce numeric columns
-for col in ['latitude', 'longitude', 'university', 'cso', 'LAB_SOFFCO']:
-    if col in hospitals_df.columns:
-        hospitals_df[col] = pd.to_numeric(hospitals_df[col], errors='coerce')
-
-# Drop rows with invalid coordinates
-if {'latitude', 'longitude'}.issubset(hospitals_df.columns):
-    hospitals_df = hospitals_df.dropna(subset=['latitude', 'longitude'])
-    hospitals_df = hospitals_df[
-        hospitals_df['latitude'].between(-90, 90) & hospitals_df['longitude'].between(-180, 180)
-    ]
-
-# Prepare establishments
-redo_df = redo_df.rename(columns={
-    'finessGeoDP': 'id',
-    'n': 'revision_surgeries_n',
-    'PCT': 'revision_surgeries_pct',
-    'TOT': 'total_procedures_period'
-}).copy()
-
-redo_df = redo_df.drop_duplicates(subset='id', keep='first')
-establishments_df = hospitals_df.merge(redo_df, on='id', how='left', suffixes=('', '_redo'))
-
-# Set dtypes
-if 'revision_surgeries_n' in establishments_df:
-    establishments_df['revision_surgeries_n'] = establishments_df['revision_surgeries_n'].fillna(0).astype('Int64')
-if 'revision_surgeries_pct' in establishments_df:
-    establishments_df['revision_surgeries_pct'] = establishments_df['revision_surgeries_pct'].astype(float)
-if 'total_procedures_period' in establishments_df:
-    establishments_df['total_procedures_period'] = establishments_df['total_procedures_period'].fillna(0).astype('Int64')
-
-establishments_df = establishments_df.reset_index(drop=True)
-
-# Prepare annual procedures
-tcn = tcn_df.rename(columns={'finessGeoDP': 'id'}).copy()
-
-# Pivot counts by 'baria_t' category
-proc_pivot = tcn.pivot_table(
-    index=['id', 'annee'],
-    columns='baria_t',
-    values='n',
-    aggfunc='sum',
-    fill_value=0
-).reset_index()
-
-# Bring yearly totals
-yearly_totals = tcn[['id', 'annee', 'TOT_y']].drop_duplicates()
-yearly_totals = yearly_totals.rename(columns={'TOT_y': 'total_procedures_year'})
-
-procedures_df = pd.merge(proc_pivot, yearly_totals, on=['id', 'annee'], how='left')
-
-# Surgical approaches
-vda = vda_df.rename(columns={'finessGeoDP': 'id'}).copy()
-appr_pivot = vda.pivot_table(
-    index=['id', 'annee'],
-    columns='vda',
-    values='n',
-    aggfunc='sum',
-    fill_value=0
-).reset_index()
-
-# Merge both pivots
-annual_df = pd.merge(procedures_df, appr_pivot, on=['id', 'annee'], how='outer').fillna(0)
-
-# Types & hygiene
-annual_df['id'] = annual_df['id'].astype(str)
-if 'annee' in annual_df:
-    annual_df['annee'] = pd.to_numeric(annual_df['annee'], errors='coerce').fillna(0).astype('int16')
-
-# Validation
-non_proc = {'id', 'annee', 'total_procedures_year'} | set(appr_pivot.columns) - {'id', 'annee'}
-candidate_proc_cols = [c for c in procedures_df.columns if c not in non_proc and c not in {'id', 'annee'}]
-if candidate_proc_cols:
-    annual_df['calculated_total_primary'] = annual_df[candidate_proc_cols].sum(axis=1).astype('Int64')
-    if 'total_procedures_year' in annual_df:
-        annual_df['total_procedures_year'] = annual_df['total_procedures_year'].fillna(annual_df['calculated_total_primary'])
-    else:
-        annual_df['total_procedures_year'] = annual_df['calculated_total_primary']
-
-print("\nSaving parquet files...")
-
-# Save parquet files
-establishments_df.to_parquet("data/processed/establishments.parquet", engine="pyarrow", index=False)
-annual_df.to_parquet("data/processed/annual_procedures.parquet", engine="pyarrow", index=False)
-
-print(f"✅ Wrote establishments.parquet ({len(establishments_df):,} rows)")
-print(f"✅ Wrote annual_procedures.parquet ({len(annual_df):,} rows)")
-
-# Verify the files were created
-if os.path.exists("data/processed/establishments.parquet"):
-    print("✅ establishments.parquet created successfully")
-else:
-    print("❌ establishments.parquet creation failed")
-
-if os.path.exists("data/processed/annual_procedures.parquet"):
-    print("✅ annual_procedures.parquet created successfully")
-else:
-    print("❌ annual_procedures.parquet creation failed")
+if __name__ == "__main__":
+    sys.exit(main())
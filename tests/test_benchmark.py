@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.benchmark import (
+    BENCHMARK_SOURCES, DEP, HOP, NATIONAL, NATL, REG, STATUS, aggregate, benchmark_table, compare,
+)
+from navira.store import get_table
+
+A, B = '010780195', '010780203'
+
+
+def _cube():
+    tables = {name: pd.DataFrame() for name in BENCHMARK_SOURCES}
+    tables['app_hop_year'] = pd.DataFrame({
+        'finessGeoDP': [A, A, B], 'annee': [2024] * 3, 'vda': ['COE', 'ROB', 'COE'], 'n': [30, 10, 20],
+    })
+    tables['app_natl_year'] = pd.DataFrame({'annee': [2024, 2024], 'vda': ['COE', 'ROB'], 'n': [900, 100]})
+    tables['compl_hop_year'] = pd.DataFrame({
+        'finessGeoDP': [A, B], 'annee': [2024, 2024], 'TOT': [40, 20], 'COMPL_nb': [2, 0],
+    })
+    tables['compl_reg_year'] = pd.DataFrame({'lib_reg': ['OCCITANIE'], 'annee': [2024], 'TOT': [500], 'COMPL_nb': [15]})
+    tables['compl_grade_hop_year'] = pd.DataFrame({
+        'finessGeoDP': [A], 'annee': [2024], 'clav_cat_90': [3], 'TOT': [40], 'COMPL_nb': [2],
+    })
+    tables['vol_status_year'] = pd.DataFrame({'statut': ['public'], 'annee': [2024], 'n': [1234]})
+    tables['hospitals_redux'] = pd.DataFrame({'finessGeo': [A, B], 'code_dep': ['01', '01']})
+    return benchmark_table(*(tables[name] for name in BENCHMARK_SOURCES)).to_pandas()
+
+
+def test_shares_use_the_entity_year_total():
+    cube = _cube()
+    rows = compare(cube, 'approach', {HOP: A, NATL: NATIONAL})
+    shares = {(r.level, r.category): r.value for r in rows.itertuples()}
+    assert shares == {(HOP, 'COE'): 75.0, (HOP, 'ROB'): 25.0, (NATL, 'COE'): 90.0, (NATL, 'ROB'): 10.0}
+
+
+def test_one_lookup_spans_every_level():
+    cube = _cube()
+    rows = compare(cube, 'complications', {HOP: A, REG: 'OCCITANIE', STATUS: None, NATL: NATIONAL})
+    assert rows.set_index('level')['value'].to_dict() == {HOP: 5.0, REG: 3.0}
+    assert compare(cube, 'volume', {STATUS: 'public'})['value'].tolist() == [1234.0]
+
+
+def test_departments_are_aggregated_from_hospitals():
+    cube = _cube()
+    approach = compare(cube, 'approach', {DEP: '01'}).set_index('category')
+    assert approach['num'].to_dict() == {'COE': 50.0, 'ROB': 10.0}
+    assert approach['den'].tolist() == [60.0, 60.0]
+    # Hospital B had no grade-3 row; its procedures still count in the denominator
+    grade = compare(cube, 'complication_grade', {DEP: '01'}, category='3')
+    assert grade[['num', 'den']].values.tolist() == [[2.0, 60.0]]
+
+
+def test_custom_cohorts():
+    cube = _cube()
+    cohort = aggregate(cube, {A: 'cohort'}, 'COHORT')
+    assert set(cohort['metric']) == {'approach', 'complications', 'complication_grade'}
+    assert compare(cohort, 'complications', {'COHORT': 'cohort'})['value'].tolist() == [5.0]
+
+
+def test_store_cube_matches_shipped_tables():
+    cube = get_table("benchmark")
+    reg = get_table("compl_reg_year").iloc[0]
+    rows = compare(cube, 'complications', {REG: reg['lib_reg']})
+    row = rows[rows['annee'] == reg['annee']].iloc[0]
+    assert (row['num'], row['den']) == (reg['COMPL_nb'], reg['TOT'])
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from build_parquet import build, sha256_file
+from navira import store
+from navira.artifacts import VERSIONS_DIR, compiled_dir, current_version, open_ipc
+
+
+def _write_new_data(root):
+    (root / "ACTIVITY").mkdir(parents=True)
+    (root / "COMPLICATIONS").mkdir(parents=True)
+    (root / "ACTIVITY" / "TAB_VOL_HOP_MONTH.csv").write_text(
+        '"finessGeoDP","annee","mois","n"\n'
+        '"920000000",2024,2,5\n'
+        '"010000024",2024,3,7\n'
+        '"010000024",2024,1,4\n'
+    )
+    (root / "COMPLICATIONS" / "TAB_COMPL_HOP_ROLL12.csv").write_text(
+        '"finessGeoDP","annee","mois","TOT","COMPL_nb"\n'
+        '"010000024",2024,1,40,2\n'
+    )
+
+
+def _build(tmp_path, **kwargs):
+    return build(tmp_path / "raw", tmp_path / "new_data", tmp_path / "out",
+                 only="new_data", jobs=2, **kwargs)
+
+
+def test_compiles_typed_sorted_tables(tmp_path):
+    _write_new_data(tmp_path / "new_data")
+    _build(tmp_path)
+    manifest = json.loads((tmp_path / "out" / "new_data" / store.MANIFEST_NAME).read_text())
+
+    entry = manifest["tables"]["vol_hop_month"]
+    assert sorted(manifest["tables"]) == ["compl_hop_roll12", "vol_hop_month"]
+    assert entry["rows"] == 3
+    assert entry["source"] == os.path.join("ACTIVITY", "TAB_VOL_HOP_MONTH.csv")
+
+    path = tmp_path / "out" / "new_data" / entry["file"]
+    assert sha256_file(path) == entry["sha256"]
+    assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
+
+    assert entry["ipc"] == "vol_hop_month.arrow"
+    ipc = open_ipc(tmp_path / "out" / "new_data" / entry["ipc"])
+    assert sha256_file(tmp_path / "out" / "new_data" / entry["ipc"]) == entry["ipc_sha256"]
+
+    t = pq.read_table(path)
+    assert ipc.equals(t)
+    assert t.schema.field("finessGeoDP").type == pa.string()
+    assert t.schema.field("annee").type == pa.int16()
+    assert t.schema.field("mois").type == pa.int8()
+    assert t["finessGeoDP"].to_pylist() == ["010000024", "010000024", "920000000"]
+    assert t["mois"].to_pylist() == [1, 3, 2]
+
+
+def test_rebuilds_only_changed_inputs(tmp_path):
+    _write_new_data(tmp_path / "new_data")
+    _build(tmp_path)
+    manifest_path = tmp_path / "out" / "new_data" / store.MANIFEST_NAME
+    before = json.loads(manifest_path.read_text())
+
+    assert "rebuilt" not in _build(tmp_path).values()
+
+    roll12 = tmp_path / "new_data" / "COMPLICATIONS" / "TAB_COMPL_HOP_ROLL12.csv"
+    with open(roll12, "a") as f:
+        f.write('"010000024",2024,2,41,3\n')
+
+    planned = _build(tmp_path, dry_run=True)
+    assert planned["compl_hop_roll12"] == "rebuilt"
+    assert planned["vol_hop_month"] == "up to date"
+    assert json.loads(manifest_path.read_text()) == before
+
+    status = _build(tmp_path)
+    assert sorted(n for n, s in status.items() if s == "rebuilt") == ["compl_hop_roll12", "compl_hop_roll12.arrow"]
+    after = json.loads(manifest_path.read_text())
+    assert after["tables"]["compl_hop_roll12"]["rows"] == 2
+    assert after["tables"]["compl_hop_roll12"]["source_sha256"] == sha256_file(roll12)
+    assert after["tables"]["vol_hop_month"] == before["tables"]["vol_hop_month"]
+    assert after["version"] != before["version"]
+
+
+def test_store_prefers_compiled_artifacts(tmp_path, monkeypatch):
+    _write_new_data(tmp_path / "new_data")
+    _build(tmp_path)
+    monkeypatch.setenv("NAVIRA_NEW_DATA_DIR", str(tmp_path / "new_data"))
+    monkeypatch.setenv("NAVIRA_OUT_DIR", str(tmp_path / "out"))
+
+    # Remove the CSV: the table must now come from the Parquet artifact
+    os.remove(tmp_path / "new_data" / "ACTIVITY" / "TAB_VOL_HOP_MONTH.csv")
+    assert store._source("vol_hop_month").suffix == ".arrow"
+    df = store.get_table("vol_hop_month")
+    assert len(df) == 3
+    assert str(df["annee"].dtype) == "Int64"
+
+
+def test_publishes_versions_and_swaps_readers(tmp_path, monkeypatch):
+    _write_new_data(tmp_path / "new_data")
+    _build(tmp_path)
+    monkeypatch.setenv("NAVIRA_NEW_DATA_DIR", str(tmp_path / "new_data"))
+    monkeypatch.setenv("NAVIRA_OUT_DIR", str(tmp_path / "out"))
+    root = tmp_path / "out" / "new_data"
+
+    first = current_version(root)
+    assert first == json.loads((root / store.MANIFEST_NAME).read_text())["version"]
+    assert compiled_dir(root) == root / VERSIONS_DIR / first
+    assert store.data_version() == first
+    assert store.get_table("compl_hop_roll12")["COMPL_nb"].tolist() == [2]
+    vol = store.get_arrow("vol_hop_month")
+
+    roll12 = tmp_path / "new_data" / "COMPLICATIONS" / "TAB_COMPL_HOP_ROLL12.csv"
+    with open(roll12, "a") as f:
+        f.write('"010000024",2024,2,41,3\n')
+    _build(tmp_path)
+    second = current_version(root)
+    assert second != first
+    # The previous snapshot is untouched while readers may still map it
+    assert (root / VERSIONS_DIR / first / "compl_hop_roll12.arrow").exists()
+
+    # Readers stay pinned until the switch
+    assert store.get_table("compl_hop_roll12")["COMPL_nb"].tolist() == [2]
+    retired = []
+    store.on_version_change(retired.append)
+    assert store.refresh_data()
+    assert retired == [first]
+    assert store.data_version() == second
+    assert store.get_table("compl_hop_roll12")["COMPL_nb"].tolist() == [2, 3]
+    assert not any(key[1].startswith(str(root / VERSIONS_DIR / first)) for key in store._loaded)
+    assert not store.refresh_data()
+    assert store.get_arrow("vol_hop_month") is not vol
+    store._version_hooks.remove(retired.append)
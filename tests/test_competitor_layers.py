@@ -33,3 +33,45 @@ def test_even_split_aggregation(tmp_path):
     assert abs(df["value"].sum() - 30.0) < 1e-6
 
 
+
+
+def test_mapping_resource_is_keyed_by_version(tmp_path):
+    from navira.postal_mapping import HASH_FUNCS, PostalInseeMapping
+
+    rec_path = tmp_path / "rec.csv"
+    pd.DataFrame(
+        {"finessGeoDP": ["000000001"], "codeGeo": ["75001"], "nb": [10]}
+    ).to_csv(rec_path, sep=";", index=False)
+
+    mapping = PostalInseeMapping.from_dict({"75001": ["75056", "75101"]})
+    assert mapping.version == PostalInseeMapping.from_dict({"75001": ["75101", "75056"]}).version
+    assert HASH_FUNCS[PostalInseeMapping](mapping) == mapping.version
+    assert mapping.get("75001") == ["75056", "75101"] and "99999" not in mapping
+
+    df, _ = competitor_choropleth_df(str(rec_path), "000000001", mapping, allocation="even_split")
+    assert df.set_index("insee5")["value"].to_dict() == {"75056": 5.0, "75101": 5.0}
+
+
+def test_csr_mapping_allocates_with_gathers(tmp_path):
+    from navira.postal_mapping import PostalInseeMapping
+
+    mapping = PostalInseeMapping.from_communes(
+        pd.DataFrame({"codePostal": ["1400", "75001", "75001"], "codeInsee": ["1001", "75056", "75056"]})
+    )
+    # Duplicates dropped, codes padded, Paris arrondissement added
+    assert mapping["01400"] == ["01001"]
+    assert mapping["75001"] == ["75056", "75101"]
+    assert mapping.positions(["75001", "99999"]).tolist()[1] == -1
+
+    insee, values, matched = mapping.allocate(["75001", "99999", "01400"], [10, 5, 3])
+    assert matched.tolist() == [True, False, True]
+    assert insee.tolist() == ["75056", "75101", "01001"]
+    assert values.tolist() == [5.0, 5.0, 3.0]
+    _, full, _ = mapping.allocate(["75001"], [10], "no_split")
+    assert full.tolist() == [10.0, 10.0]
+
+    path = tmp_path / "postal_insee.npz"
+    mapping.save(path, source_sha256="abc")
+    loaded, meta = PostalInseeMapping.load(path)
+    assert loaded.version == mapping.version and meta == {"source_sha256": "abc"}
+    assert loaded.to_dict() == mapping.to_dict()
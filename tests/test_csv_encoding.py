@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira import csv_encoding
+from navira.csv_encoding import SIDECAR_NAME, detect_encoding, read_csv_sniffed, sniff_encoding
+
+
+def test_sniffs_common_encodings(tmp_path):
+    utf8 = tmp_path / "utf8.csv"
+    utf8.write_bytes("ville;n\nBéthune;1\n".encode("utf-8"))
+    cp1252 = tmp_path / "cp1252.csv"
+    cp1252.write_bytes("ville;n\nBéthune;1\n’;2\n".encode("cp1252"))
+    bom = tmp_path / "bom.csv"
+    bom.write_bytes("﻿ville;n\nA;1\n".encode("utf-8"))
+
+    assert sniff_encoding(str(utf8)) == "utf-8"
+    assert sniff_encoding(str(cp1252)) == "cp1252"
+    assert sniff_encoding(str(bom)) == "utf-8-sig"
+
+
+def test_non_ascii_after_first_block(tmp_path):
+    p = tmp_path / "late.csv"
+    p.write_bytes(b"a;b\n" + b"x;1\n" * 40000 + "é;2\n".encode("cp1252"))
+    assert sniff_encoding(str(p)) == "cp1252"
+
+
+def test_sidecar_cache_is_keyed_by_mtime(tmp_path, monkeypatch):
+    p = tmp_path / "t.csv"
+    p.write_bytes("ville;n\nBéthune;1\n".encode("cp1252"))
+    assert detect_encoding(str(p)) == "cp1252"
+    entries = json.loads((tmp_path / SIDECAR_NAME).read_text())
+    assert entries["t.csv"]["encoding"] == "cp1252"
+
+    # A fresh process reuses the sidecar without sniffing
+    monkeypatch.setattr(csv_encoding, "_memo", {})
+    monkeypatch.setattr(csv_encoding, "sniff_encoding", lambda path: pytest.fail("re-sniffed"))
+    assert detect_encoding(str(p)) == "cp1252"
+    monkeypatch.undo()
+
+    p.write_bytes("ville;n\nBéthune;1\n".encode("utf-8"))
+    os.utime(p, (1, 1))
+    assert detect_encoding(str(p)) == "utf-8"
+    assert read_csv_sniffed(str(p), sep=";")["ville"].tolist() == ["Béthune"]
+
+
+def test_wrong_encoding_is_a_clear_error(tmp_path):
+    p = tmp_path / "mixed.csv"
+    p.write_bytes(
+        "ville;n\nBéthune;1\n".encode("utf-8") + b"x;1\n" * 40000 + "Sète;2\n".encode("cp1252")
+    )
+    with pytest.raises(ValueError, match="could not decode as utf-8"):
+        read_csv_sniffed(str(p), sep=";")
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.display_polygons import COMMUNES, COMMUNES_PARIS_ARRONDISSEMENTS, DisplayPolygons, geometry_sets
+
+# Communes GeoJSON drawing whole cities, plus the official Paris arrondissements
+SETS = geometry_sets(["01001", "75056", "13055", "69123"], ["75101", "75102"])
+
+
+def test_arrondissements_map_to_the_polygon_drawn():
+    table = DisplayPolygons.from_geometry(SETS, ["01001", "75101", "75115", "13201", "69381", "01002"])
+    codes = ["75101", "75115", "13201", "69381", "01001", "01002", "99999"]
+    assert table.display_codes(codes, COMMUNES).tolist() == ["75056", "75056", "13055", "69123", "01001", "", ""]
+    # With arrondissement polygons Paris is not drawn as one city; 75115 has no polygon
+    assert table.display_codes(codes, COMMUNES_PARIS_ARRONDISSEMENTS).tolist() == \
+        ["75101", "", "13055", "69123", "01001", "", ""]
+    assert table.preferred_set() == COMMUNES_PARIS_ARRONDISSEMENTS
+    assert DisplayPolygons.from_geometry({COMMUNES: SETS[COMMUNES]}).preferred_set() == COMMUNES
+
+
+def test_aggregate_sums_per_display_polygon():
+    table = DisplayPolygons.from_geometry(SETS)
+    df = pd.DataFrame({"insee5": ["75101", "75102", "13201", "13202", "01001", "02999"],
+                       "value": [1.0, 2.0, 0.5, 0.25, 4.0, 9.0]})
+    out = table.aggregate(df, COMMUNES)
+    assert out.to_dict("list") == {"insee5": ["01001", "13055", "75056"], "value": [4.0, 0.75, 3.0]}
+    out = table.aggregate(df, COMMUNES_PARIS_ARRONDISSEMENTS)
+    assert out.to_dict("list") == {"insee5": ["01001", "13055", "75101", "75102"], "value": [4.0, 0.75, 1.0, 2.0]}
+    assert table.aggregate(df.iloc[:0], COMMUNES).empty
+
+
+def test_save_and_load_round_trip(tmp_path):
+    table = DisplayPolygons.from_geometry(SETS)
+    table.save(tmp_path / "display_polygons.npz", communes_sha256="abc")
+    loaded, meta = DisplayPolygons.load(tmp_path / "display_polygons.npz")
+    assert meta == {"communes_sha256": "abc"}
+    assert loaded.sets == table.sets
+    assert (loaded.display_codes(["75101"], COMMUNES) == ["75056"]).all()
+    assert set(loaded.polygon_codes(COMMUNES_PARIS_ARRONDISSEMENTS)) == {"01001", "13055", "69123", "75101", "75102"}
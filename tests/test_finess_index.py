@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira import finess_index
+from navira.finess_index import FinessIndex, hospital_rows, sort_by_finess
+from navira.store import get_hospital_rows, get_table
+
+
+def _frame():
+    return pd.DataFrame({
+        'hospital_id': ['930000002', '010000024', '930000002', '750000001', '010000024'],
+        'year': [2021, 2021, 2022, 2021, 2022],
+    })
+
+
+def test_slices_match_boolean_masks():
+    df = sort_by_finess(_frame())
+    idx = FinessIndex.from_column(df['hospital_id'])
+    for hid in ['010000024', '750000001', '930000002', '000000000', '999999999']:
+        expected = df[df['hospital_id'] == hid]
+        pd.testing.assert_frame_equal(idx.slice(df, hid), expected)
+
+
+def test_sort_is_stable():
+    df = sort_by_finess(_frame())
+    assert df['hospital_id'].is_monotonic_increasing
+    assert df[df['hospital_id'] == '930000002']['year'].tolist() == [2021, 2022]
+
+
+def test_unsorted_tables_fall_back_to_mask():
+    df = _frame()
+    assert FinessIndex.from_column(df['hospital_id']) is None
+    assert hospital_rows(df, '010000024', 'test/unsorted')['year'].tolist() == [2021, 2022]
+
+
+def test_stale_index_is_rebuilt():
+    df = sort_by_finess(_frame())
+    assert len(hospital_rows(df, '930000002', 'test/stale')) == 2
+    other = sort_by_finess(pd.DataFrame({'hospital_id': ['020000001', '020000001', '030000001'], 'year': [1, 2, 3]}))
+    assert hospital_rows(other, '020000001', 'test/stale')['year'].tolist() == [1, 2]
+
+
+def test_store_hospital_rows():
+    vol = get_table("vol_hop_year")
+    hid = vol['finessGeoDP'].iloc[len(vol) // 2]
+    expected = vol[vol['finessGeoDP'] == hid].reset_index(drop=True)
+    got = get_hospital_rows("vol_hop_year", hid).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected)
+    assert get_hospital_rows("vol_hop_year", "not-a-finess").empty
+
+
+def test_index_is_keyed_on_the_data_version():
+    # 40 hospitals of 2 rows; the refresh moves a row from hospital 3 to 4
+    ids = [f'{h:09d}' for h in range(40) for _ in range(2)]
+    before = pd.DataFrame({'hospital_id': ids, 'row': range(80)})
+    after = before.assign(hospital_id=ids[:7] + [ids[8]] + ids[8:])
+    assert hospital_rows(before, '000000004', 'test/versioned', version='v1')['row'].tolist() == [8, 9]
+    # Cached loaders hand out copies: the same version reuses the index
+    assert hospital_rows(before.copy(), '000000004', 'test/versioned', version='v1')['row'].tolist() == [8, 9]
+    assert finess_index._indexes['test/versioned'][0] == 'v1'
+    # A new version of the same length rebuilds it
+    assert hospital_rows(after, '000000004', 'test/versioned', version='v2')['row'].tolist() == [7, 8, 9]
+
+
+def test_unversioned_index_follows_the_frame_object():
+    df = sort_by_finess(_frame())
+    assert len(hospital_rows(df, '930000002', 'test/by_frame')) == 2
+    idx = finess_index._indexes['test/by_frame'][2]
+    assert len(hospital_rows(df, '010000024', 'test/by_frame')) == 2
+    assert finess_index._indexes['test/by_frame'][2] is idx
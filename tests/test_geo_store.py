@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.geo import get_communes_geo_store
+from navira.geo_store import GeoStore, choose_level, write_store
+
+SQUARE = [[[2.0, 48.0], [2.1, 48.0], [2.1, 48.1], [2.0, 48.1], [2.0, 48.0]]]
+GEOJSON = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "properties": {"code": "75056", "nom": "Paris"},
+         "geometry": {"type": "Polygon", "coordinates": SQUARE}},
+        {"type": "Feature", "properties": {"code": "2A004", "nom": "Ajaccio"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [SQUARE, [[[8.7, 41.9], [8.8, 41.9], [8.7, 41.95], [8.7, 41.9]]]]}},
+        {"type": "Feature", "properties": {"code": 1001, "nom": "L'Abergement-Clémenciat"},
+         "geometry": {"type": "Point", "coordinates": [5.0, 46.0]}},
+        {"type": "Feature", "properties": {"nom": "No code"}, "geometry": None},
+    ],
+}
+
+
+def test_round_trips_features_by_code(tmp_path):
+    path = tmp_path / "communes_geo.bin"
+    assert write_store(GEOJSON, path, "code", source_sha256="abc") == 3
+    store = GeoStore(path)
+    assert list(store.codes) == [b"01001", b"2A004", b"75056"]
+    assert store.key == "code" and store.header["source_sha256"] == "abc"
+
+    assert store.feature("75056") == GEOJSON["features"][0]
+    assert store.feature("2a004") == GEOJSON["features"][1]
+    assert store.feature("1001")["geometry"] == {"type": "Point", "coordinates": [5.0, 46.0]}
+    assert store.feature("99999") is None and "99999" not in store
+
+
+def test_filtered_collection_reads_each_code_once(tmp_path):
+    path = tmp_path / "communes_geo.bin"
+    write_store(GEOJSON, path, "code")
+    store = GeoStore(path)
+    collection = store.feature_collection(["75056", "99999", "75056", "01001"])
+    assert collection["type"] == "FeatureCollection"
+    assert [f["properties"]["nom"] for f in collection["features"]] == ["L'Abergement-Clémenciat", "Paris"]
+    assert store.feature_collection([])["features"] == []
+
+
+def _wiggly_neighbours():
+    """Two communes sharing a jagged border along longitude 2.5."""
+    lats = [48.0 + i * 0.001 for i in range(101)]
+    border = [[2.5 + (0.0003 if i % 10 == 5 else 0.00002 * (i % 2)), lat] for i, lat in enumerate(lats)]
+    west = border + [[2.0, 48.1], [2.0, 48.0], border[0]]
+    east = border[::-1] + [[3.0, 48.0], [3.0, 48.1], border[-1]]
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"code": code}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+        for code, ring in (("01001", west), ("01002", east))
+    ]}
+
+
+def test_simplified_levels_keep_shared_borders(tmp_path):
+    path = tmp_path / "communes_geo.bin"
+    write_store(_wiggly_neighbours(), path, "code", tolerances=(0.0001, 0.001))
+    store = GeoStore(path)
+    assert store.tolerances == [0.0, 0.0001, 0.001]
+    sizes = []
+    for level in range(3):
+        west, east = ({tuple(p) for p in f["geometry"]["coordinates"][0]} for f in store.features(["01001", "01002"], level))
+        # Border vertices kept on one side are kept on the other
+        assert {p for p in west if p[0] >= 2.5} == {p for p in east if p[0] <= 2.5003}
+        sizes.append(len(west))
+    assert sizes[0] == 103 and sizes[2] < sizes[1] < sizes[0]
+
+
+def test_level_follows_zoom_and_extent(tmp_path):
+    path = tmp_path / "communes_geo.bin"
+    write_store(_wiggly_neighbours(), path, "code")
+    store = GeoStore(path)
+    west, south, east, north = store.extent(["01001", "01002", "99999"])
+    assert (west, south, east, north) == (2.0, 48.0, 3.0, 48.1)
+    # Zoomed in tight: the source geometry; coarser as the map zooms out
+    assert store.level_for(["01001"], zoom=13) == 0
+    assert 0 < store.level_for(["01001"], zoom=8)
+    # Small communes are drawn for the zoom that fits them, even on a wider map
+    assert store.level_for(["01001"], zoom=6) == store.level_for(["01001"])
+    assert store.level_for(["99999"]) == 0
+    france = (-5.0, 42.0, 8.0, 51.0)
+    assert choose_level(store.tolerances, france, zoom=6) == len(store.tolerances) - 1
+
+
+def test_app_ignores_a_store_built_from_another_geojson(tmp_path, monkeypatch):
+    source = tmp_path / "communes.geojson"
+    source.write_text(json.dumps(GEOJSON))
+    write_store(GEOJSON, tmp_path / "communes_geo.bin", "code",
+                source_sha256=hashlib.sha256(source.read_bytes()).hexdigest())
+    monkeypatch.setenv("NAVIRA_OUT_DIR", str(tmp_path))
+    monkeypatch.setenv("COMMUNES_GEOJSON_PATH", str(source))
+    assert "75056" in get_communes_geo_store()
+
+    # The configured GeoJSON changed since the build: fall back to it
+    source.write_text(json.dumps({**GEOJSON, "features": GEOJSON["features"][:1]}))
+    os.utime(source, (1, 1))
+    assert get_communes_geo_store() is None
+    # No GeoJSON shipped: the store is the only geometry
+    source.unlink()
+    assert "75056" in get_communes_geo_store()
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.geocoder import Geocoder, normalize_name
+
+# As in COMMUNES_FRANCE_INSEE.csv: unpadded codes, and latitudes in the "longitude" column
+COMMUNES = pd.DataFrame({
+    "codeInsee": ["1053", "42218", "42218", "75102", "75056", "13001", "13001", "69381"],
+    "codePostal": ["1000", "42000", "42100", "75002", "75000", "13080", "13100", "69001"],
+    "nomCommune": ["BOURG-EN-BRESSE", "SAINT-ETIENNE", "SAINT-ETIENNE", "PARIS-2E-ARRONDISSEMENT",
+                   "PARIS", "AIX-EN-PROVENCE", "AIX-EN-PROVENCE", "LYON--1ER-ARRONDISSEMENT"],
+    "longitude": ["46,205", "45,430", "45,430", "48,868", "48,855", "43,536", "43,536", "45,770"],
+    "latitude": ["5,246", "4,379", "4,379", "2,344", "2,347", "5,399", "5,399", "4,829"],
+})
+
+
+def test_normalize_name():
+    assert normalize_name("Saint-Étienne") == "SAINT ETIENNE"
+    assert normalize_name("st  étienne") == "SAINT ETIENNE"
+    assert normalize_name("Châlons-en-Champagne") == "CHALONS EN CHAMPAGNE"
+
+
+def test_postal_and_name_lookups():
+    geocoder = Geocoder.from_communes(COMMUNES)
+    assert [p.insee for p in geocoder.by_postal("01000")] == ["01053"]
+    assert [p.postal for p in geocoder.search("st-etienne")] == ["42000", "42100"]
+    # Prefix, then fuzzy
+    assert geocoder.search("bourg en")[0].insee == "01053"
+    assert geocoder.search("Bourg-en-Bresee")[0].insee == "01053"
+    assert geocoder.search("xyzzy") == []
+
+
+def test_geocode_addresses():
+    geocoder = Geocoder.from_communes(COMMUNES)
+    place = geocoder.geocode("12 rue de la Paix, 75002 Paris")
+    assert place.insee == "75102"
+    assert (round(place.latitude, 3), round(place.longitude, 3)) == (48.868, 2.344)
+    assert geocoder.geocode("13100").name == "AIX-EN-PROVENCE"
+    assert geocoder.geocode("Aix-en-Provence, France").insee == "13001"
+    assert geocoder.geocode("") is None
+    assert geocoder.geocode("nowhere at all") is None
+
+
+def test_reverse_returns_nearest_commune():
+    geocoder = Geocoder.from_communes(COMMUNES)
+    assert geocoder.reverse(45.76, 4.83).insee == "69381"
+    assert geocoder.reverse(48.87, 2.343).insee == "75102"
+    assert Geocoder.from_communes(pd.DataFrame()).reverse(45.0, 5.0) is None
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.hashing import cache_key, content_hash, frame_hash
+
+
+def _frame(values):
+    return pd.DataFrame({'time': ['Y1', 'Y2', 'Y3'], 'events': values, 'at_risk': [100] * 3})
+
+
+def test_hash_follows_content_not_identity():
+    assert content_hash(_frame([5, 4, 3])) == content_hash(_frame([5, 4, 3]))
+    assert content_hash(_frame([5, 4, 3])) != content_hash(_frame([2, 5, 6]))
+    # Column names and dtypes are part of the key, the index is not
+    df = _frame([5, 4, 3])
+    assert content_hash(df) != content_hash(df.rename(columns={'events': 'comp'}))
+    assert content_hash(df) != content_hash(df.astype({'events': 'float64'}))
+    assert content_hash(df) == content_hash(df.set_axis([7, 8, 9]))
+    # Unhashable cells fall back to their text
+    assert content_hash(pd.DataFrame({'a': [[1], [2]]})) != content_hash(pd.DataFrame({'a': [[1], [3]]}))
+
+
+def test_frame_hash_follows_in_place_edits():
+    df = _frame([5, 4, 3])
+    digest = frame_hash(df)
+    df.loc[0, 'events'] = 100
+    assert frame_hash(df) != digest
+    edited = frame_hash(df)
+    df['events'] = df['events'].astype(float)
+    assert frame_hash(df) != edited
+
+
+def test_cache_key_mixes_frames_and_scalars():
+    df = _frame([5, 4, 3])
+    assert cache_key(df, 'time', group=None) == cache_key(_frame([5, 4, 3]), 'time', group=None)
+    assert cache_key(df, 'time') != cache_key(df, 'events')
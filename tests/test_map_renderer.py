@@ -0,0 +1,43 @@
+import os
+import sys
+
+import branca.colormap as cm
+import folium
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.map_renderer import _add_shared_choropleth
+
+
+def _square(x, y):
+    return [[[x, y], [x + 0.1, y], [x + 0.1, y + 0.1], [x, y + 0.1], [x, y]]]
+
+
+GEOJSON = {"type": "FeatureCollection", "features": [
+    {"type": "Feature", "properties": {"code": code}, "geometry": {"type": "Polygon", "coordinates": _square(x, 48.0)}}
+    for code, x in (("01001", 2.0), ("01002", 2.1), ("75056", 2.2))
+]}
+
+
+def test_shared_choropleth_emits_geometry_once():
+    focal = pd.DataFrame({"insee5": ["01001", "75056"], "value": [4.0, 3.0]})
+    competitor = pd.DataFrame({"insee5": ["01002"], "value": [3.0]})
+    colormap = cm.linear.Blues_06.scale(0, 4)
+    communes = pd.DataFrame({"codeInsee": ["1001", "75056"], "nomCommune": ["Ambérieu", "Paris"]})
+    m = folium.Map()
+    _add_shared_choropleth(m, GEOJSON, [("Selected", focal, colormap, True), ("Rival & co", competitor, colormap, False)],
+                           "code", communes_df=communes)
+
+    shared = [c for c in m._children.values() if isinstance(c, folium.GeoJson)]
+    assert len(shared) == 1
+    props = {f["properties"]["code"]: f["properties"] for f in shared[0].data["features"]}
+    assert props["01001"]["v"] == [4.0, 0.0] and props["01001"]["c"] == [colormap(4.0), None]
+    assert props["01002"]["v"] == [0.0, 3.0] and props["01001"]["name"] == "Ambérieu"
+    assert props["75056"]["v"] == [3.0, 0.0]
+
+    html = m.get_root().render()
+    assert html.count("Polygon") == len(GEOJSON["features"])
+    # Layer names are escaped for the tooltips built in the browser
+    styler = [c for c in m._children.values() if type(c).__name__ == "_SharedChoroplethStyler"]
+    assert styler[0].names == ["Selected", "Rival &amp; co"]
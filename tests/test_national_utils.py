@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lib.national_utils import (
+    BARIATRIC_PROCEDURE_NAMES, NationalAggregates, affiliation_category_column, compute_affiliation_breakdown_2024,
+    compute_approach_trends, compute_baseline_bins_2020_2023, compute_national_kpis,
+    compute_robotic_geographic_analysis, compute_robotic_volume_analysis, compute_volume_bins_2024,
+    get_2024_procedure_totals, label_category_column, volume_bin_column,
+)
+
+
+def _hospitals():
+    return pd.DataFrame({
+        'hospital_id': ['A', 'B', 'C', 'D', 'E'],
+        'year': [2025, 2025, 2025, 2025, 2023],
+        'total_procedures_year': [30, 50, 199, 200, 120],
+        'sector': ['public', 'public', 'private', 'unknown', 'public'],
+        'academic_affiliation': [1, 0, 0, 0, 1],
+        'profit_status': ['not_for_profit', 'not_for_profit', 'for_profit', 'not_for_profit', 'not_for_profit'],
+        'cso_label': [1, 0, 0, None, 1],
+        'soffco_label': [1, 1, 0, 0, 0],
+    })
+
+
+def test_volume_bins_are_ordered_categories():
+    bins = volume_bin_column(pd.Series([49, 50, 99.5, 100, 199, 200, None]))
+    assert bins[:6].tolist() == ["<50", "50–100", "50–100", "100–200", "100–200", ">200"]
+    assert pd.isna(bins.iloc[6])
+    assert bins.cat.ordered
+
+
+def test_affiliation_and_label_categories():
+    df = _hospitals()
+    assert affiliation_category_column(df).tolist() == [
+        'Public – Univ.', 'Public – Non-Acad.', 'Private – For-profit', 'Private – Not-for-profit', 'Public – Univ.',
+    ]
+    # Missing columns take their defaults: everything is private, not-for-profit
+    assert set(affiliation_category_column(df[['hospital_id']])) == {'Private – Not-for-profit'}
+    assert label_category_column(df['cso_label'], df['soffco_label']).tolist() == [
+        'Both', 'SOFFCO Label', 'None', 'None', 'CSO Label',
+    ]
+
+
+def test_national_breakdowns_group_on_the_categories():
+    df = _hospitals()
+    breakdown = compute_affiliation_breakdown_2024(df)
+    assert breakdown['affiliation_counts'] == {
+        'Public – Univ.': 1, 'Public – Non-Acad.': 1, 'Private – For-profit': 1, 'Private – Not-for-profit': 1,
+    }
+    # D's CSO flag is unknown: it is left out of the label breakdown
+    assert breakdown['label_breakdown']['Private – Not-for-profit'] == {'SOFFCO Label': 0, 'CSO Label': 0, 'Both': 0, 'None': 0}
+    assert breakdown['label_breakdown']['Public – Univ.']['Both'] == 1
+    df['year'] = df['year'].replace({2025: 2024})
+    assert compute_volume_bins_2024(df) == {"<50": 1, "50–100": 1, "100–200": 1, ">200": 1}
+    assert compute_baseline_bins_2020_2023(df) == {"<50": 0.0, "50–100": 0.0, "100–200": 0.25, ">200": 0.0}
+
+
+def test_aggregates_views_match_the_frame():
+    df = _hospitals().assign(ROB=[3, 10, 20, 50, 12], SLE=[20, 30, 100, 100, 60], lib_reg=['N', 'N', 'S', 'S', 'N'])
+    df['year'] = df['year'].replace({2025: 2024})
+    national = NationalAggregates.from_frame(df)
+    assert national.cube['hospitals'].sum() == len(national.eligible) == 5
+    robotic = compute_robotic_volume_analysis(national)
+    assert robotic['volume_categories'] == ["<50", "50–100", "100–200", ">200"]
+    assert robotic['percentages_weighted'] == [10.0, 20.0, 10.1, 25.0]
+    assert compute_robotic_geographic_analysis(national)['regions'] == ['S', 'N']
+    assert get_2024_procedure_totals(national) == {**dict.fromkeys(BARIATRIC_PROCEDURE_NAMES, 0), 'SLE': 250, 'total_all': 479}
+    assert compute_approach_trends(national)['robotic'][2024] == 83
+    # A plain frame gives the same answers
+    assert compute_robotic_volume_analysis(df) == robotic
+
+
+def test_national_kpis_for_any_year():
+    df = _hospitals().assign(revision_pct=[10.0, None, 0.0, 5.0, 50.0])
+    national = NationalAggregates.from_frame(df)
+    kpis = compute_national_kpis(national, 2025)
+    # Revisions are estimated from each establishment's revision share; unknown or zero shares add none
+    assert kpis == {'total_hospitals_2024': 4, 'avg_surgeries_per_year': 479, 'avg_revisions_per_year': 13.0}
+    assert compute_national_kpis(national, 2023)['avg_revisions_per_year'] == 60.0
+    assert compute_national_kpis(national, 2019)['total_hospitals_2024'] == 0
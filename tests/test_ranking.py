@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.benchmark import HOP
+from navira.ranking import NATIONAL, REGION, STATUS, VOLUME_BIN, PeerRanks, volume_bin
+from navira.store import get_peer_ranks, get_table
+
+HOSPITALS = pd.DataFrame({
+    'finessGeo': ['A', 'B', 'C', 'D'],
+    'lib_reg': ['NORD', 'NORD', 'SUD', 'SUD'],
+    'statut': ['public', 'private', 'public', 'public'],
+})
+
+
+def _cube(rows):
+    return pd.DataFrame(rows, columns=['metric', 'level', 'entity', 'annee', 'category', 'num', 'den'])
+
+
+def _ranks():
+    cube = _cube([
+        ('volume', HOP, 'A', 2024, '', 40, None),
+        ('volume', HOP, 'B', 2024, '', 120, None),
+        ('volume', HOP, 'C', 2024, '', 120, None),
+        ('volume', HOP, 'D', 2024, '', 300, None),
+        ('complications', HOP, 'A', 2024, '', 1, 40),
+        ('complications', HOP, 'B', 2024, '', 6, 120),
+        ('complications', HOP, 'C', 2024, '', 3, 120),
+        ('approach', HOP, 'A', 2024, 'COE', 40, 40),
+        ('approach', HOP, 'B', 2024, 'ROB', 60, 120),
+        ('approach', HOP, 'B', 2024, 'COE', 60, 120),
+    ])
+    return PeerRanks.from_tables(cube, HOSPITALS)
+
+
+def test_positions_percentiles_and_quartiles():
+    ranks = _ranks()
+    d = ranks.rank('D', 'volume', 2024)
+    assert (d.position, d.peers, d.percentile, d.quartile) == (1, 4, 87.5, 1)
+    # Ties share a position and split the percentile
+    b, c = ranks.rank('B', 'volume', 2024), ranks.rank('C', 'volume', 2024)
+    assert b.position == c.position == 2 and b.percentile == c.percentile == 50.0
+    assert ranks.rank('A', 'volume', 2024).quartile == 4
+
+
+def test_lower_is_better_and_missing_categories():
+    ranks = _ranks()
+    # 2.5% complications is the best of three
+    assert ranks.rank('A', 'complication_rate', 2024).position == 1
+    assert ranks.rank('B', 'complication_rate', 2024).position == 3
+    # A reports approaches but no robotic procedure: a 0% share, ranked
+    assert ranks.rank('A', 'robotic_share', 2024).value == 0.0
+    assert ranks.rank('B', 'robotic_share', 2024).position == 1
+    assert ranks.rank('D', 'robotic_share', 2024) is None
+
+
+def test_peer_groups():
+    ranks = _ranks()
+    by_group = ranks.ranks('C', 'volume', 2024)
+    assert set(by_group) == {NATIONAL, REGION, STATUS, VOLUME_BIN}
+    assert (by_group[REGION].position, by_group[REGION].peers) == (2, 2)
+    assert (by_group[STATUS].position, by_group[STATUS].peers) == (2, 3)
+    assert by_group[VOLUME_BIN].peers == 2
+    assert list(volume_bin([49, 50, 199, 200])) == ["<50", "50–100", "100–200", ">200"]
+
+
+def test_store_ranks_match_a_full_scan():
+    vol = get_table("vol_hop_year")
+    year = vol[vol['annee'] == 2024]
+    hospital = year['finessGeoDP'].iloc[0]
+    value = year.loc[year['finessGeoDP'] == hospital, 'n'].iloc[0]
+    rank = get_peer_ranks().rank(hospital, 'volume', 2024)
+    assert rank.peers == len(year)
+    assert rank.position == int((year['n'] > value).sum()) + 1
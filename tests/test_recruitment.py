@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.postal_mapping import PostalInseeMapping
+from navira.recruitment import RecruitmentMatrix
+
+MAPPING = PostalInseeMapping.from_dict({'75001': ['75056', '75101'], '01400': ['01001']})
+
+
+def _matrix():
+    # A recruits in Paris twice and in an unknown postal code, B in Ain
+    return RecruitmentMatrix.from_frame(pd.DataFrame({
+        'finessGeoDP': ['000000002', '000000001', '000000001', '000000001'],
+        'codeGeo': ['1400', '75001', '99999', '75001'],
+        'nb': [3.0, 10.0, 4.0, 2.0],
+    }), MAPPING)
+
+
+def test_rows_sum_allocations_per_commune():
+    matrix = _matrix()
+    assert list(matrix.hospitals) == ['000000001', '000000002'] and matrix.nnz == 3
+    even = matrix.row('000000001')
+    assert even['insee5'].tolist() == ['75056', '75101'] and even['value'].tolist() == [6.0, 6.0]
+    assert matrix.row('1', 'no_split')['value'].tolist() == [12.0, 12.0]
+    assert matrix.row('000000003').empty
+
+
+def test_multi_row_slice_and_stats():
+    matrix = _matrix()
+    both = matrix.rows_of(['000000002', '000000001', '000000003'])
+    assert both['finess'].tolist() == ['000000002', '000000001', '000000001']
+    assert both['insee5'].tolist() == ['01001', '75056', '75101']
+    stats = matrix.stats('000000001')
+    assert (stats.rows, stats.total, stats.allocated) == (3, 16.0, 12.0)
+    assert stats.unmatched.tolist() == ['99999']
+    assert matrix.stats('000000003') is None
@@ -21,6 +21,7 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from navira.data_loaders import (
+    _decimal_comma_to_numeric,
     load_recruitment_data, 
     load_competitors_data, 
     load_communes_data, 
@@ -167,6 +168,15 @@ class TestDataLoaders:
         assert '13001' in mapping
         assert len(mapping['13001']) == 1
         assert '13001' in mapping['13001']
+    
+    def test_decimal_comma_columns_convert_whatever_the_text_dtype(self):
+        """Test the decimal-comma conversion the recruitment, competitor and commune loaders share."""
+        for dtype in (object, "string", "str"):
+            values = pd.Series(["12,5", "3", None, "n/a"], dtype=dtype)
+            converted = _decimal_comma_to_numeric(values)
+            assert converted.iloc[:2].tolist() == [12.5, 3.0]
+            assert converted.iloc[2:].isna().all()
+        assert _decimal_comma_to_numeric(pd.Series([1, 2])).tolist() == [1, 2]
 
 
 class TestCompetitorRanking:
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.rolling import MonthlyCounts, month_ordinal
+from navira.store import get_monthly_counts, get_table
+
+
+def _counts():
+    # A reports Jan-Jun with a gap in March, B starts in April
+    return MonthlyCounts.from_frame(pd.DataFrame({
+        'finessGeoDP': ['A'] * 5 + ['B'] * 3,
+        'annee': [2024] * 8,
+        'mois': [1, 2, 4, 5, 6, 4, 5, 6],
+        'TOT': [10, 10, 10, 10, 10, 5, 0, 5],
+        'COMPL_nb': [1, 0, 2, 0, 1, 1, 0, 0],
+    }))
+
+
+def test_windows_of_any_length_and_end():
+    counts = _counts()
+    june, april = month_ordinal(2024, 6), month_ordinal(2024, 4)
+    tot, compl = counts.window(3, june)
+    assert tot.tolist() == [30.0, 10.0]
+    assert compl.tolist() == [3.0, 1.0]
+    # Missing months count as zero
+    assert counts.rate('A', 3, april) == 10.0
+    assert counts.rate('A', 6) == 8.0
+
+
+def test_rates_need_a_covered_window():
+    counts = _counts()
+    # B's series starts in April: no 6-month rate, and none before its first month
+    assert np.isnan(counts.rates(6)).tolist() == [False, True]
+    assert np.isnan(counts.rate('B', 1, month_ordinal(2024, 5)))
+    assert np.isnan(counts.rate('A', 12))
+    assert np.isnan(counts.rate('unknown', 3))
+
+
+def test_series_matches_point_queries():
+    counts = _counts()
+    series = counts.series(2)
+    for col, month in enumerate(counts.months):
+        np.testing.assert_array_equal(series[:, col], counts.rates(2, month))
+
+
+def test_reproduces_shipped_roll12_rates():
+    df = get_table("compl_hop_roll12")
+    counts = get_monthly_counts("compl_hop_roll12")
+    rows = np.array([counts.position(h) for h in df['finessGeoDP']])
+    cols = (month_ordinal(df['annee'], df['mois']) - counts.first_month).to_numpy(dtype='int64')
+    ours = counts.series(12)[rows, cols]
+    shipped = df['COMPL_pct_roll12'].to_numpy(dtype='float64')
+    np.testing.assert_allclose(ours, shipped, atol=0.006)
@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.schema import COLUMNS, read_dtypes, read_tab
+from navira.store import apply_column_types, read_table_csv
+
+
+def _write_tcn(tmp_path):
+    p = tmp_path / "TAB_TCN_HOP_YEAR.csv"
+    p.write_text(
+        '"finessGeoDP","annee","baria_t","n","pct"\n'
+        '"010780195",2021,"SLE",12,60.5\n'
+        '"010780195",2021,"BPG",8,39.5\n'
+        '"2A0000014",2022,"SLE",3,100\n'
+    )
+    return p
+
+
+def test_read_tab_parses_compact_types(tmp_path):
+    df = read_tab(str(_write_tcn(tmp_path)), 'tcn')
+
+    assert list(df.columns) == ['hospital_id', 'year', 'procedure_type', 'count', 'percentage']
+    assert df['hospital_id'].tolist() == ['010780195', '010780195', '2A0000014']
+    assert str(df['year'].dtype) == 'int16'
+    assert str(df['count'].dtype) == 'int32'
+    assert df['procedure_type'].dtype == 'category'
+    assert df['percentage'].dtype == 'float64'
+
+
+def test_dates_and_nullable_counts(tmp_path):
+    p = tmp_path / "t.csv"
+    p.write_text('finessGeoDP,date,mois,Vol_2024\n010780195,2021-01-01,1,NA\n010780195,2021-02-01,2,7\n')
+    df = read_tab(str(p))
+
+    assert str(df['date'].dtype).startswith('datetime64')
+    assert str(df['mois'].dtype) == 'int8'
+    assert str(df['Vol_2024'].dtype) == 'Int32'
+    assert df['Vol_2024'].isna().tolist() == [True, False]
+
+
+def test_read_dtypes_only_covers_present_columns():
+    assert read_dtypes(['annee', 'unknown', 'date']) == {'annee': 'int16'}
+
+
+def test_arrow_reader_uses_the_same_registry(tmp_path):
+    table = apply_column_types(read_table_csv(_write_tcn(tmp_path)))
+    for name in table.column_names:
+        if name in COLUMNS:
+            assert table.schema.field(name).type == COLUMNS[name].arrow
+    assert table['finessGeoDP'].to_pylist()[0] == '010780195'
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.simplify import simplify_rings
+
+
+def _square(x0, y0, size, steps):
+    """Closed square ring with ``steps`` points per side (noise on none)."""
+    side = np.linspace(0, size, steps, endpoint=False).astype(np.int64)
+    ring = np.concatenate([
+        np.c_[x0 + side, np.full(steps, y0)],
+        np.c_[np.full(steps, x0 + size), y0 + side],
+        np.c_[x0 + size - side, np.full(steps, y0 + size)],
+        np.c_[np.full(steps, x0), y0 + size - side],
+    ])
+    return np.concatenate([ring, ring[:1]])
+
+
+def test_collinear_points_go_and_corners_stay():
+    (source, coarse), = zip(*simplify_rings([_square(0, 0, 1000, 10)], [0, 1]))
+    assert len(source) == 41
+    assert sorted(map(tuple, coarse[:-1].tolist())) == [(0, 0), (0, 1000), (1000, 0), (1000, 1000)]
+    assert (coarse[0] == coarse[-1]).all()
+
+
+def test_island_keeps_an_area():
+    # A ring without neighbours or corners to cut at never collapses to a line
+    angles = np.linspace(0, 2 * np.pi, 60, endpoint=False)
+    circle = np.c_[np.cos(angles) * 100, np.sin(angles) * 100].round().astype(np.int64)
+    circle = np.concatenate([circle, circle[:1]])
+    (coarse,) = simplify_rings([circle], [10_000])[0]
+    assert len(np.unique(coarse, axis=0)) >= 3
+
+
+def test_enclave_border_matches_its_host():
+    host = _square(0, 0, 1000, 10)
+    rng = np.random.default_rng(3)
+    hole = _square(300, 300, 400, 20)
+    hole[1:-1] += rng.integers(-5, 6, (len(hole) - 2, 2))
+    hole[-1] = hole[0]
+    enclave = hole[::-1]
+    levels = simplify_rings([host, hole, enclave], [0, 3, 50])
+    for _, simplified_hole, simplified_enclave in levels:
+        assert set(map(tuple, simplified_hole.tolist())) == set(map(tuple, simplified_enclave.tolist()))
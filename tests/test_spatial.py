@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.data_loaders import get_spatial_index
+from navira.spatial import SpatialIndex, haversine_km
+
+
+def test_haversine_km():
+    # Paris - Lyon, ~392 km
+    assert abs(float(haversine_km(48.8566, 2.3522, 45.7640, 4.8357)) - 392.2) < 1.0
+    assert float(haversine_km(45.0, 5.0, 45.0, 5.0)) == 0.0
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(41, 51, 2000), rng.uniform(-5, 9, 2000)
+    lat[7] = np.nan  # missing coordinates are never returned
+    index = SpatialIndex(lat, lon, leaf_size=8)
+    assert len(index) == 1999
+    for q_lat, q_lon in rng.uniform([41, -5], [51, 9], (20, 2)):
+        distances = np.nan_to_num(haversine_km(q_lat, q_lon, lat, lon), nan=np.inf)
+        positions, km = index.nearest(q_lat, q_lon, k=5)
+        assert positions.tolist() == np.argsort(distances, kind="stable")[:5].tolist()
+        assert np.allclose(km, np.sort(distances)[:5])
+
+
+def test_within_matches_brute_force():
+    rng = np.random.default_rng(2)
+    lat, lon = rng.uniform(41, 51, 3000), rng.uniform(-5, 9, 3000)
+    index = SpatialIndex(lat, lon, leaf_size=16)
+    for q_lat, q_lon in rng.uniform([41, -5], [51, 9], (10, 2)):
+        distances = haversine_km(q_lat, q_lon, lat, lon)
+        positions, km = index.within(q_lat, q_lon, 60.0)
+        expected = np.flatnonzero(distances <= 60.0)
+        assert positions.tolist() == expected[np.argsort(distances[expected], kind="stable")].tolist()
+        assert np.allclose(km, distances[positions])
+    assert len(index.within(45.0, 2.0, 0.0)[0]) == 0
+
+
+def test_shared_index_follows_table_content():
+    before = pd.DataFrame({'id': ['a', 'b'], 'latitude': [48.85, 45.76], 'longitude': [2.35, 4.84]})
+    after = pd.DataFrame({'id': ['b', 'a'], 'latitude': [45.76, 48.85], 'longitude': [4.84, 2.35]})
+    assert get_spatial_index('test/points', before) is get_spatial_index('test/points', before.copy())
+    # Same name, version and length, rows reordered: positions must follow the new table
+    for points in (before, after):
+        positions, _ = get_spatial_index('test/points', points).nearest(48.86, 2.34)
+        assert points['id'].iloc[positions].tolist() == ['a']
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.store import TABLES, get_arrow, get_table, read_table_csv, table_path
+
+
+def test_every_table_resolves():
+    for name in TABLES:
+        assert table_path(name).exists(), name
+
+
+def test_identifiers_keep_leading_zeros():
+    df = get_table("vol_hop_year")
+    assert df["finessGeoDP"].str.len().eq(9).all()
+    assert df["finessGeoDP"].iloc[0].startswith("0")
+    assert str(df["annee"].dtype) == "Int64"
+
+
+def test_parsed_once_per_process():
+    assert get_arrow("tcn_hop_year") is get_arrow("tcn_hop_year")
+
+
+def test_added_columns_do_not_leak():
+    df = get_table("vol_natl_year")
+    df["extra"] = 1
+    assert "extra" not in get_table("vol_natl_year").columns
+
+
+def test_unknown_table():
+    with pytest.raises(KeyError):
+        get_table("does_not_exist")
+
+
+def test_na_strings_become_nulls(tmp_path):
+    p = tmp_path / "t.csv"
+    p.write_text('"finessGeoDP","Vol_2024","diff_pct"\n" 010000024 ",1,NA\n')
+    t = read_table_csv(p)
+    assert t["finessGeoDP"].to_pylist() == ["010000024"]
+    assert t["diff_pct"].null_count == 1
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from navira.store import get_hospital_rows
+from navira.summary import summary_table
+
+A, B = '010780195', '2A0000014'
+
+
+def _summary():
+    vol = pd.DataFrame({
+        'finessGeoDP': [A] * 6 + [B],
+        'annee': [2020, 2021, 2022, 2023, 2024, 2025, 2025],
+        'n': [5, 10, 20, 30, 40, 7, 3],
+    })
+    trend = pd.DataFrame({'finessGeoDP': [A], 'diff_pct': [-12.5]})
+    tcn = pd.DataFrame({'finessGeoDP': [A, A, A], 'baria_t': ['SLE', 'BPG', 'NDD'], 'n': [6, 3, 1]})
+    app = pd.DataFrame({
+        'finessGeoDP': [A, A, B, B],
+        'annee': [2024, 2023, 2022, 2022],
+        'vda': ['ROB', 'COE', 'COE', 'LAP'],
+        'n': [4, 9, 2, 1],
+    })
+    rev = pd.DataFrame({'finessGeoDP': [B], 'PCT_rev': [8.0]})
+    compl = pd.DataFrame({
+        'finessGeoDP': [A, A, A, B],
+        'annee': [2023, 2024, 2025, 2022],
+        'COMPL_pct': [1.0, 2.0, 3.0, 4.0],
+    })
+    return summary_table(vol, trend, tcn, app, rev, compl).to_pandas().set_index('finessGeoDP')
+
+
+def test_volumes_and_history():
+    s = _summary()
+    assert s.loc[A, 'procedures_2021_2024'] == 100
+    assert s.loc[A, 'procedures_2025'] == 7
+    assert s.loc[B, 'procedures_2021_2024'] == 0
+    assert [h['year'] for h in s.loc[A, 'volume_history']] == [2021, 2022, 2023, 2024, 2025]
+    assert s.loc[A, 'trend_2025_pct'] == -12.5
+    assert pd.isna(s.loc[B, 'trend_2025_pct'])
+
+
+def test_latest_complete_year_rules():
+    s = _summary()
+    # Complications: second most recent year, or the only one
+    assert (s.loc[A, 'complication_year'], s.loc[A, 'complication_rate']) == (2024, 2.0)
+    assert (s.loc[B, 'complication_year'], s.loc[B, 'complication_rate']) == (2022, 4.0)
+    # Approaches: 2024 when present, else the latest year
+    assert s.loc[A, 'approach_year'] == 2024
+    assert [m['approach'] for m in s.loc[A, 'approach_mix']] == ['ROB']
+    assert s.loc[B, 'approach_year'] == 2022
+    assert {m['approach']: m['count'] for m in s.loc[B, 'approach_mix']} == {'COE': 2.0, 'LAP': 1.0}
+
+
+def test_procedure_mix_categories():
+    s = _summary()
+    mix = {m['procedure']: m['count'] for m in s.loc[A, 'procedure_mix']}
+    assert mix == {'Sleeve': 6.0, 'Gastric Bypass': 3.0, 'Other': 1.0}
+    assert list(s.loc[B, 'procedure_mix']) == []
+
+
+def test_store_serves_one_hospital():
+    vol = get_hospital_rows("vol_hop_year", A)
+    row = get_hospital_rows("hospital_summary", A)
+    assert len(row) == 1
+    expected = vol.loc[vol['annee'].between(2021, 2024), 'n'].sum()
+    assert row['procedures_2021_2024'].iloc[0] == expected
@@ -2,16 +2,17 @@
 Cache utility functions for debugging and management.
 """
 
-import hashlib
 import pandas as pd
 import streamlit as st
 from typing import Dict, Any
 
+from navira.hashing import cache_key, frame_hash
+
 
 def dataframe_md5(df: pd.DataFrame) -> str:
-    """Generate MD5 hash of DataFrame content for cache key generation."""
+    """Content hash of a DataFrame for cache key generation (vectorized row hashing)."""
     try:
-        return hashlib.md5(df.to_csv(index=False).encode()).hexdigest()
+        return frame_hash(df)
     except Exception:
         return "error_hash"
 
@@ -48,11 +49,14 @@ def debug_dataframe_signature(df: pd.DataFrame, label: str = "") -> Dict[str, An
 
 
 def clear_all_caches():
-    """Clear all Streamlit caches."""
+    """Switch to the latest published data and drop caches of the retired version.
+
+    Entries of the served version stay warm; a global clear would make every
+    session recompute at once.
+    """
     try:
-        st.cache_data.clear()
-        if hasattr(st, 'cache_resource'):
-            st.cache_resource.clear()
+        from navira.store import refresh_data
+        refresh_data()
         return True
     except Exception as e:
         st.error(f"Error clearing caches: {e}")
@@ -91,22 +95,4 @@ def show_debug_panel(signatures: Dict[str, Dict[str, Any]], expanded: bool = Fal
 
 def create_cache_key(*args, **kwargs) -> str:
     """Create a deterministic cache key from arguments."""
-    key_parts = []
-    
-    # Add positional args
-    for arg in args:
-        if isinstance(arg, pd.DataFrame):
-            key_parts.append(dataframe_md5(arg))
-        else:
-            key_parts.append(str(arg))
-    
-    # Add keyword args
-    for k, v in sorted(kwargs.items()):
-        if isinstance(v, pd.DataFrame):
-            key_parts.append(f"{k}={dataframe_md5(v)}")
-        else:
-            key_parts.append(f"{k}={v}")
-    
-    # Create hash of combined key
-    combined = "|".join(key_parts)
-    return hashlib.md5(combined.encode()).hexdigest()[:16]
+    return cache_key(*args, **kwargs)